@@ -295,9 +295,8 @@ class AuthTokenResource(_AuthFederationWebSSOBase):
         token = PROVIDERS.token_provider_api.validate_token(
             token_id, window_seconds=window_secs,
             access_rules_support=access_rules_support)
-        token_resp = render_token.render_token_response_from_model(
+        resp_body = PROVIDERS.token_provider_api.render_token_response(
             token, include_catalog=include_catalog)
-        resp_body = jsonutils.dumps(token_resp)
         response = flask.make_response(resp_body, http.client.OK)
         response.headers['X-Subject-Token'] = token_id
         response.headers['Content-Type'] = 'application/json'
@@ -334,6 +333,60 @@ class AuthTokenResource(_AuthFederationWebSSOBase):
         return None, http.client.NO_CONTENT
 
 
+class AuthTokenValidateResource(ks_flask.ResourceBase):
+    def post(self):
+        """Validate a batch of tokens.
+
+        POST /v3/auth/tokens/validate
+
+        Each token is validated independently; the response lists one result
+        per requested token, in request order, holding either the token or
+        the error that rejected it.
+        """
+        ENFORCER.enforce_call(action='identity:validate_tokens')
+        validation.lazy_validate(auth_schema.token_validate_batch,
+                                 self.request_body_json)
+        token_ids = self.request_body_json['tokens']
+        max_size = CONF.token.max_batch_validation_size
+        if len(token_ids) > max_size:
+            msg = _('Cannot validate more than %(max)d tokens in a single '
+                    'request.') % {'max': max_size}
+            raise exception.ValidationError(msg)
+
+        access_rules_support = flask.request.headers.get(
+            authorization.ACCESS_RULES_HEADER)
+        allow_expired = strutils.bool_from_string(
+            flask.request.args.get('allow_expired'))
+        window_secs = CONF.token.allow_expired_window if allow_expired else 0
+        include_catalog = 'nocatalog' not in flask.request.args
+        results = PROVIDERS.token_provider_api.validate_tokens(
+            token_ids, window_seconds=window_secs,
+            access_rules_support=access_rules_support)
+
+        rendered = {}
+        for token_id, result in results.items():
+            if isinstance(result, exception.Error):
+                rendered[token_id] = jsonutils.dumps({
+                    'id': token_id,
+                    'error': {'code': result.code,
+                              'title': result.title,
+                              'message': str(result)}})
+            else:
+                # NOTE: Go through the same, possibly cached, rendering as
+                # GET /v3/auth/tokens, and add the token ID to the rendered
+                # JSON object rather than decoding and encoding it again.
+                token_resp = (
+                    PROVIDERS.token_provider_api.render_token_response(
+                        result, include_catalog=include_catalog))
+                rendered[token_id] = '{"id": %s, %s' % (
+                    jsonutils.dumps(token_id), token_resp.lstrip()[1:])
+        resp_body = '{"tokens": [%s]}' % ', '.join(
+            rendered[token_id] for token_id in token_ids)
+        response = flask.make_response(resp_body, http.client.OK)
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+
 class AuthFederationWebSSOResource(_AuthFederationWebSSOBase):
     @classmethod
     def _perform_auth(cls, protocol_id):
@@ -490,6 +543,12 @@ class AuthAPI(ks_flask.APIBase):
             rel='revocations',
             resource_relation_func=json_home_relations.os_pki_resource_rel_func
         ),
+        ks_flask.construct_resource_map(
+            resource=AuthTokenValidateResource,
+            url='/auth/tokens/validate',
+            resource_kwargs={},
+            rel='auth_tokens_validate'
+        ),
         ks_flask.construct_resource_map(
             resource=AuthTokenResource,
             url='/auth/tokens',
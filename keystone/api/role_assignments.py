@@ -13,9 +13,12 @@
 # This file handles all flask-restful resources for /v3/role_assignments
 
 import flask
+import http.client
 
+from keystone.assignment import schema
 from keystone.common import provider_api
 from keystone.common import rbac_enforcer
+from keystone.common import validation
 from keystone import exception
 from keystone.i18n import _
 from keystone.server import flask as ks_flask
@@ -44,6 +47,43 @@ class RoleAssignmentsResource(ks_flask.ResourceBase):
             return self._list_role_assignments_for_tree()
         return self._list_role_assignments()
 
+    def put(self):
+        """Grant many roles at once.
+
+        PUT /v3/role_assignments
+        """
+        ENFORCER.enforce_call(action='identity:create_grants')
+        PROVIDERS.assignment_api.create_grants(
+            self._grants_from_request_body(),
+            initiator=self.audit_initiator)
+        return None, http.client.NO_CONTENT
+
+    def delete(self):
+        """Revoke many roles at once.
+
+        DELETE /v3/role_assignments
+        """
+        ENFORCER.enforce_call(action='identity:revoke_grants')
+        PROVIDERS.assignment_api.delete_grants(
+            self._grants_from_request_body(),
+            initiator=self.audit_initiator)
+        return None, http.client.NO_CONTENT
+
+    def _grants_from_request_body(self):
+        validation.lazy_validate(schema.role_assignments_bulk,
+                                 self.request_body_json)
+        grants = []
+        for assignment in self.request_body_json['role_assignments']:
+            scope = assignment['scope']
+            grants.append({
+                'role_id': assignment['role']['id'],
+                'user_id': assignment.get('user', {}).get('id'),
+                'group_id': assignment.get('group', {}).get('id'),
+                'project_id': scope.get('project', {}).get('id'),
+                'domain_id': scope.get('domain', {}).get('id'),
+                'inherited_to_projects': 'OS-INHERIT:inherited_to' in scope})
+        return grants
+
     def _list_role_assignments(self):
         filters = [
             'group.id', 'role.id', 'scope.domain.id', 'scope.project.id',
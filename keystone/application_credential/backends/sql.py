@@ -101,7 +101,8 @@ class ApplicationCredential(base.ApplicationCredentialDriverBase):
 
     def _check_secret(self, secret, app_cred_ref):
         secret_hash = app_cred_ref['secret_hash']
-        return password_hashing.check_password(secret, secret_hash)
+        return password_hashing.check_password(secret, secret_hash,
+                                               offload=True)
 
     def _check_expired(self, app_cred_ref):
         if app_cred_ref.get('expires_at'):
@@ -60,6 +60,18 @@ class AssignmentDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def create_grants(self, grants):
+        """Create a list of assignments/grants.
+
+        Each grant is a dict of the arguments of ``create_grant()``. Grants
+        that already exist are ignored. Drivers that can write many grants in
+        a single transaction should override this; by default each grant is
+        created in turn.
+
+        """
+        for grant in grants:
+            self.create_grant(**grant)
+
     @abc.abstractmethod
     def list_grant_role_ids(self, user_id=None, group_id=None,
                             domain_id=None, project_id=None,
@@ -92,6 +104,23 @@ class AssignmentDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def delete_grants(self, grants):
+        """Delete a list of assignments/grants.
+
+        Each grant is a dict of the arguments of ``delete_grant()``. Drivers
+        that can delete many grants in a single transaction should override
+        this; by default every grant is checked, then each is deleted in
+        turn.
+
+        :raises keystone.exception.RoleAssignmentNotFound: If any of the role
+            assignments doesn't exist, in which case none is deleted.
+
+        """
+        for grant in grants:
+            self.check_grant_role_id(**grant)
+        for grant in grants:
+            self.delete_grant(**grant)
+
     @abc.abstractmethod
     def list_role_assignments(self, role_id=None,
                               user_id=None, group_ids=None,
@@ -105,6 +134,42 @@ class AssignmentDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_role_ids_on_project(self, user_id, group_ids, project_id,
+                                 domain_id, parent_ids):
+        """Return the IDs of the roles assigned to a user on a project.
+
+        These are the roles assigned to the user, or to any of the groups,
+        on the project itself, and those inherited to the project from its
+        domain or from any of its parent projects. Implied roles are not
+        expanded. Drivers that can find these roles in a single request
+        should override this; by default the assignments of the user and of
+        the groups are listed in turn.
+
+        :param user_id: the ID of the user
+        :param group_ids: the IDs of the groups the user is a member of
+        :param project_id: the ID of the project
+        :param domain_id: the ID of the domain that owns the project
+        :param parent_ids: the IDs of the parents of the project
+        :returns: a list of role IDs
+
+        """
+        actors = [{'user_id': user_id}]
+        if group_ids:
+            actors.append({'group_ids': group_ids})
+        role_ids = set()
+        for actor in actors:
+            refs = self.list_role_assignments(
+                project_ids=[project_id], inherited_to_projects=False,
+                **actor)
+            refs += self.list_role_assignments(
+                domain_id=domain_id, inherited_to_projects=True, **actor)
+            if parent_ids:
+                refs += self.list_role_assignments(
+                    project_ids=parent_ids, inherited_to_projects=True,
+                    **actor)
+            role_ids.update(ref['role_id'] for ref in refs)
+        return list(role_ids)
+
     @abc.abstractmethod
     def delete_project_assignments(self, project_id):
         """Delete all assignments for a project.
@@ -115,6 +180,11 @@ class AssignmentDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def delete_assignments_for_projects(self, project_ids):
+        """Delete all assignments for a list of projects."""
+        for project_id in project_ids:
+            self.delete_project_assignments(project_id)
+
     @abc.abstractmethod
     def delete_role_assignments(self, role_id):
         """Delete all assignments for a role."""
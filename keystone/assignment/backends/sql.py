@@ -12,6 +12,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from oslo_db import api as oslo_db_api
+import sqlalchemy
+
 from keystone.assignment.backends import base
 from keystone.common import sql
 from keystone import exception
@@ -113,6 +116,76 @@ class Assignment(base.AssignmentDriverBase):
                                                        actor_id=actor_id,
                                                        target_id=target_id)
 
+    def _get_grant_keys(self, grants):
+        # The primary key of the assignment row of each grant.
+        keys = []
+        for grant in grants:
+            user_id = grant.get('user_id')
+            group_id = grant.get('group_id')
+            project_id = grant.get('project_id')
+            domain_id = grant.get('domain_id')
+            keys.append((
+                AssignmentType.calculate_type(
+                    user_id, group_id, project_id, domain_id),
+                user_id or group_id, project_id or domain_id,
+                grant['role_id'],
+                bool(grant.get('inherited_to_projects', False))))
+        return keys
+
+    def _list_existing_grant_keys(self, session, keys):
+        query = session.query(
+            RoleAssignment.type, RoleAssignment.actor_id,
+            RoleAssignment.target_id, RoleAssignment.role_id,
+            RoleAssignment.inherited)
+        query = query.filter(
+            RoleAssignment.actor_id.in_(set(key[1] for key in keys)),
+            RoleAssignment.target_id.in_(set(key[2] for key in keys)),
+            RoleAssignment.role_id.in_(set(key[3] for key in keys)))
+        keys = set(keys)
+        return set(tuple(row) for row in query if tuple(row) in keys)
+
+    @oslo_db_api.wrap_db_retry(
+        retry_on_deadlock=True,
+        exception_checker=lambda e: isinstance(e, sql.DBDuplicateEntry))
+    def create_grants(self, grants):
+        if not grants:
+            return
+        keys = self._get_grant_keys(grants)
+        with sql.session_for_write() as session:
+            existing_keys = self._list_existing_grant_keys(session, keys)
+            rows = []
+            for key in keys:
+                if key not in existing_keys:
+                    # The v3 grant APIs are silent if the assignment already
+                    # exists.
+                    existing_keys.add(key)
+                    rows.append(dict(zip(RoleAssignment.attributes, key)))
+            if rows:
+                session.execute(RoleAssignment.__table__.insert(), rows)
+
+    def delete_grants(self, grants):
+        if not grants:
+            return
+        keys = set(self._get_grant_keys(grants))
+        with sql.session_for_write() as session:
+            existing_keys = self._list_existing_grant_keys(session, keys)
+            missing_keys = keys - existing_keys
+            if missing_keys:
+                key = missing_keys.pop()
+                raise exception.RoleAssignmentNotFound(
+                    role_id=key[3], actor_id=key[1], target_id=key[2])
+            keys = list(keys)
+            # Delete the rows by primary key, a bounded number at a time.
+            for start in range(0, len(keys), 100):
+                q = session.query(RoleAssignment)
+                q = q.filter(sqlalchemy.or_(*[
+                    sqlalchemy.and_(*[
+                        getattr(RoleAssignment, attribute) == value
+                        for attribute, value in zip(
+                            RoleAssignment.attributes, key)])
+                    for key in keys[start:start + 100]]))
+                q.delete(False)
+
     def add_role_to_user_and_project(self, user_id, project_id, role_id):
         try:
             with sql.session_for_write() as session:
@@ -247,6 +320,40 @@ class Assignment(base.AssignmentDriverBase):
 
             return [denormalize_role(ref) for ref in query.all()]
 
+    def list_role_ids_on_project(self, user_id, group_ids, project_id,
+                                 domain_id, parent_ids):
+        actor_filters = [sqlalchemy.and_(
+            RoleAssignment.actor_id == user_id,
+            RoleAssignment.type.in_(self._get_user_assignment_types()))]
+        if group_ids:
+            actor_filters.append(sqlalchemy.and_(
+                RoleAssignment.actor_id.in_(group_ids),
+                RoleAssignment.type.in_(self._get_group_assignment_types())))
+
+        # Assignments on the project itself, and those inherited from its
+        # domain or from its parents. Inherited assignments do not apply to
+        # the project they are assigned on.
+        target_filters = [
+            sqlalchemy.and_(
+                RoleAssignment.target_id == project_id,
+                RoleAssignment.type.in_(self._get_project_assignment_types()),
+                RoleAssignment.inherited == sqlalchemy.false()),
+            sqlalchemy.and_(
+                RoleAssignment.target_id == domain_id,
+                RoleAssignment.type.in_(self._get_domain_assignment_types()),
+                RoleAssignment.inherited == sqlalchemy.true())]
+        if parent_ids:
+            target_filters.append(sqlalchemy.and_(
+                RoleAssignment.target_id.in_(parent_ids),
+                RoleAssignment.type.in_(self._get_project_assignment_types()),
+                RoleAssignment.inherited == sqlalchemy.true()))
+
+        with sql.session_for_read() as session:
+            query = session.query(RoleAssignment.role_id).distinct()
+            query = query.filter(sqlalchemy.or_(*actor_filters))
+            query = query.filter(sqlalchemy.or_(*target_filters))
+            return [ref.role_id for ref in query.all()]
+
     def delete_project_assignments(self, project_id):
         with sql.session_for_write() as session:
             q = session.query(RoleAssignment)
@@ -256,6 +363,17 @@ class Assignment(base.AssignmentDriverBase):
             )
             q.delete(False)
 
+    def delete_assignments_for_projects(self, project_ids):
+        if not project_ids:
+            return
+        with sql.session_for_write() as session:
+            q = session.query(RoleAssignment)
+            q = q.filter(RoleAssignment.target_id.in_(project_ids)).filter(
+                RoleAssignment.type.in_((AssignmentType.USER_PROJECT,
+                                         AssignmentType.GROUP_PROJECT))
+            )
+            q.delete(False)
+
     def delete_role_assignments(self, role_id):
         with sql.session_for_write() as session:
             q = session.query(RoleAssignment)
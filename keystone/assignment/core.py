@@ -14,10 +14,12 @@
 
 """Main entry point into the Assignment service."""
 
-import copy
+import collections
 import itertools
+import uuid
 
 from oslo_log import log
+from pycadf import cadftaxonomy as taxonomy
 
 from keystone.common import cache
 from keystone.common import driver_hints
@@ -39,14 +41,139 @@ PROVIDERS = provider_api.ProviderAPIs
 MEMOIZE = cache.get_memoization_decorator(group='role')
 
 # This builds a discrete cache region dedicated to role assignments computed
-# for a given user + project/domain pair. Any write operation to add or remove
-# any role assignment should invalidate this entire cache region.
+# for a given user + project/domain pair. The entries are keyed by the
+# generation of the user and the project or domain they were computed for, so
+# that a role assignment change only needs to move on the generations of the
+# users and targets it affects. Changes that may affect any user, such as
+# deleting a role or moving a project, invalidate this entire cache region.
 COMPUTED_ASSIGNMENTS_REGION = cache.create_region(name='computed assignments')
 MEMOIZE_COMPUTED_ASSIGNMENTS = cache.get_memoization_decorator(
     group='role',
     region=COMPUTED_ASSIGNMENTS_REGION)
 
 
+def _build_implied_role_closure(rules):
+    """Build the transitive closure of the implied role rules.
+
+    :param rules: an iterable of ``(prior_role_id, implied_role_id)`` tuples
+    :returns: a dict mapping each prior role ID to a tuple of every
+              ``(prior_role_id, implied_role_id)`` rule that applies,
+              directly or indirectly, to a holder of that role
+
+    """
+    implied_roles = {}
+    for prior_role_id, implied_role_id in rules:
+        implied_roles.setdefault(prior_role_id, []).append(implied_role_id)
+
+    closure = {}
+    for role_id in implied_roles:
+        role_rules = []
+        seen_rules = set()
+        visited = {role_id}
+        to_visit = collections.deque([role_id])
+        while to_visit:
+            prior_role_id = to_visit.popleft()
+            for implied_role_id in implied_roles.get(prior_role_id, []):
+                rule = (prior_role_id, implied_role_id)
+                if rule not in seen_rules:
+                    seen_rules.add(rule)
+                    role_rules.append(rule)
+                if implied_role_id not in visited:
+                    visited.add(implied_role_id)
+                    to_visit.append(implied_role_id)
+        closure[role_id] = tuple(role_rules)
+    return closure
+
+
+# A compact form of a role assignment, used while computing effective role
+# assignments so that a dict is only built for each assignment returned. The
+# actor and target are (key, ID) pairs, such as ('user_id', user_id) or
+# ('project_id', project_id), and indirect is a tuple of such pairs recording
+# where an expanded assignment came from.
+_Assignment = collections.namedtuple(
+    '_Assignment', ['actor', 'target', 'role_id', 'inherited', 'indirect'])
+
+
+def _assignment_from_ref(ref):
+    if 'user_id' in ref:
+        actor = ('user_id', ref['user_id'])
+    else:
+        actor = ('group_id', ref['group_id'])
+    if 'project_id' in ref:
+        target = ('project_id', ref['project_id'])
+    else:
+        target = ('domain_id', ref['domain_id'])
+    return _Assignment(actor, target, ref['role_id'],
+                       ref.get('inherited_to_projects') == 'projects', ())
+
+
+def _assignment_to_ref(assignment):
+    ref = {assignment.actor[0]: assignment.actor[1],
+           assignment.target[0]: assignment.target[1],
+           'role_id': assignment.role_id}
+    if assignment.inherited:
+        ref['inherited_to_projects'] = 'projects'
+    if assignment.indirect:
+        ref['indirect'] = dict(assignment.indirect)
+    return ref
+
+
+class _ProjectHierarchy(object):
+    """The parts of the project hierarchy needed to expand assignments.
+
+    Projects are fetched from the resource API at most once. A subtree or
+    domain that has already been loaded, or that lies within one that has,
+    is answered from memory.
+
+    """
+
+    def __init__(self, project_id=None, subtree=None):
+        self._children = collections.defaultdict(set)
+        self._loaded = set()
+        self._domains = {}
+        self._subtrees = {}
+        if project_id is not None and subtree is not None:
+            self._add_subtree(project_id, subtree)
+
+    def _add_subtree(self, project_id, projects):
+        for project in projects:
+            self._children[project['parent_id']].add(project['id'])
+        self._loaded.add(project_id)
+        self._loaded.update(self._walk(project_id))
+
+    def _walk(self, project_id):
+        project_ids = []
+        to_visit = [project_id]
+        while to_visit:
+            children = self._children.get(to_visit.pop(), ())
+            project_ids.extend(children)
+            to_visit.extend(children)
+        return project_ids
+
+    def list_projects_in_domain(self, domain_id):
+        """Return the IDs of all projects in a domain."""
+        if domain_id not in self._domains:
+            projects = PROVIDERS.resource_api.list_projects_in_domain(
+                domain_id)
+            for project in projects:
+                self._children[project['parent_id']].add(project['id'])
+            project_ids = [project['id'] for project in projects]
+            self._loaded.update(project_ids)
+            self._domains[domain_id] = project_ids
+        return self._domains[domain_id]
+
+    def list_projects_in_subtree(self, project_id):
+        """Return the IDs of all projects below a project."""
+        if project_id not in self._subtrees:
+            if project_id not in self._loaded:
+                self._add_subtree(
+                    project_id,
+                    PROVIDERS.resource_api.list_projects_in_subtree(
+                        project_id) or [])
+            self._subtrees[project_id] = self._walk(project_id)
+        return self._subtrees[project_id]
+
+
 @notifications.listener
 class Manager(manager.Manager):
     """Default pivot point for the Assignment backend.
@@ -81,6 +208,60 @@ class Manager(manager.Manager):
         domain_id = payload['resource_info']
         self.driver.delete_domain_assignments(domain_id)
 
+    def _get_generation_keys(self, entity_type, entity_ids):
+        return ['generation:%s:%s' % (entity_type, entity_id)
+                for entity_id in entity_ids]
+
+    def _get_generations(self, user_id, target_id=None, group_ids=None):
+        # The generations are read before the assignments are computed, so
+        # that an assignment change made meanwhile leaves the result under
+        # generations that are no longer current.
+        if not (CONF.cache.enabled and CONF.role.caching):
+            return None
+        return self._read_generations(user_id, target_id, group_ids)
+
+    def _read_generations(self, user_id, target_id=None, group_ids=None):
+        keys = self._get_generation_keys('user', [user_id])
+        if target_id:
+            keys += self._get_generation_keys('target', [target_id])
+        if group_ids:
+            keys += self._get_generation_keys('group', sorted(set(group_ids)))
+        return tuple(COMPUTED_ASSIGNMENTS_REGION.get_or_create_multi(
+            keys, lambda *keys: [uuid.uuid4().hex for key in keys]))
+
+    def invalidate_computed_assignments(self, user_ids=None, group_ids=None,
+                                        target_ids=None):
+        """Invalidate the assignments computed for some users and targets.
+
+        Rather than the whole computed assignments cache, only the entries
+        computed for the given users and groups, the members of the given
+        groups and the given projects or domains are invalidated, by moving
+        on their generation. Entries for other users and targets are kept.
+
+        :param user_ids: the IDs of the users whose assignments changed
+        :param group_ids: the IDs of the groups whose assignments changed
+        :param target_ids: the IDs of the projects and domains whose
+            assignments changed
+
+        """
+        if not CONF.cache.enabled:
+            return
+        user_ids = set(user_ids or [])
+        group_ids = set(group_ids or [])
+        for group_id in group_ids:
+            try:
+                user_ids.update(
+                    user['id'] for user in
+                    PROVIDERS.identity_api.list_users_in_group(group_id))
+            except exception.GroupNotFound:
+                LOG.debug('Group %s not found, no members to invalidate the '
+                          'computed assignments of.', group_id)
+        keys = (self._get_generation_keys('user', user_ids) +
+                self._get_generation_keys('group', group_ids) +
+                self._get_generation_keys('target', set(target_ids or [])))
+        COMPUTED_ASSIGNMENTS_REGION.set_multi(
+            dict((key, uuid.uuid4().hex) for key in keys))
+
     def _get_group_ids_for_user_id(self, user_id):
         # TODO(morganfainberg): Implement a way to get only group_ids
         # instead of the more expensive to_dict() call for each record.
@@ -89,10 +270,12 @@ class Manager(manager.Manager):
 
     def list_user_ids_for_project(self, project_id):
         PROVIDERS.resource_api.get_project(project_id)
-        assignment_list = self.list_role_assignments(
-            project_id=project_id, effective=True)
-        # Use set() to process the list to remove any duplicates
-        return list(set([x['user_id'] for x in assignment_list]))
+        assignments = self._list_effective_role_assignments(
+            role_id=None, user_id=None, group_id=None, domain_id=None,
+            project_id=project_id, subtree=None, inherited=None,
+            source_from_group_ids=None, strip_domain_roles=True)
+        # Use set() to remove any duplicates without holding every assignment
+        return list(set(x['user_id'] for x in assignments))
 
     def _send_app_cred_notification_for_role_removal(self, role_id):
         """Delete all application credential for a specific role.
@@ -111,7 +294,6 @@ class Manager(manager.Manager):
                     notifications.REMOVE_APP_CREDS_FOR_USER, payload
                 )
 
-    @MEMOIZE_COMPUTED_ASSIGNMENTS
     def get_roles_for_user_and_project(self, user_id, project_id):
         """Get the roles associated with a user within given project.
 
@@ -124,13 +306,15 @@ class Manager(manager.Manager):
             exist.
 
         """
-        PROVIDERS.resource_api.get_project(project_id)
-        assignment_list = self.list_role_assignments(
-            user_id=user_id, project_id=project_id, effective=True)
-        # Use set() to process the list to remove any duplicates
-        return list(set([x['role_id'] for x in assignment_list]))
+        return self._get_roles_for_user_and_project(
+            user_id, project_id, self._get_generations(user_id, project_id))
 
     @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _get_roles_for_user_and_project(self, user_id, project_id,
+                                        generations):
+        project = PROVIDERS.resource_api.get_project(project_id)
+        return self._list_effective_role_ids_on_project(user_id, project)
+
     def get_roles_for_trustor_and_project(self, trustor_id, project_id):
         """Get the roles associated with a trustor within given project.
 
@@ -143,14 +327,51 @@ class Manager(manager.Manager):
             exist.
 
         """
-        PROVIDERS.resource_api.get_project(project_id)
-        assignment_list = self.list_role_assignments(
-            user_id=trustor_id, project_id=project_id, effective=True,
-            strip_domain_roles=False)
-        # Use set() to process the list to remove any duplicates
-        return list(set([x['role_id'] for x in assignment_list]))
+        return self._get_roles_for_trustor_and_project(
+            trustor_id, project_id,
+            self._get_generations(trustor_id, project_id))
 
     @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _get_roles_for_trustor_and_project(self, trustor_id, project_id,
+                                           generations):
+        project = PROVIDERS.resource_api.get_project(project_id)
+        return self._list_effective_role_ids_on_project(
+            trustor_id, project, strip_domain_roles=False)
+
+    def _list_effective_role_ids_on_project(self, user_id, project,
+                                            strip_domain_roles=True):
+        """Return the IDs of the roles a user effectively has on a project.
+
+        This gives the same roles as listing the effective role assignments
+        of the user on the project, but rather than listing and expanding
+        each assignment, the driver is asked for the roles assigned to the
+        user and their groups on the project, its domain and its parents in
+        one go, and the implied roles are then added from the cached closure.
+
+        """
+        group_ids = self._get_group_ids_for_user_id(user_id)
+        parent_ids = PROVIDERS.resource_api.list_project_parent_ids(
+            project['id'])
+        role_ids = set(self.driver.list_role_ids_on_project(
+            user_id, group_ids, project['id'], project['domain_id'],
+            parent_ids))
+
+        try:
+            closure = PROVIDERS.role_api.get_implied_role_closure()
+        except exception.NotImplemented:
+            LOG.error('Role driver does not support implied roles.')
+            closure = {}
+        for role_id in list(role_ids):
+            role_ids.update(implied_role_id for prior_role_id, implied_role_id
+                            in closure.get(role_id, ()))
+
+        if strip_domain_roles:
+            role_ids = set(
+                role['id'] for role in
+                PROVIDERS.role_api.list_roles_from_ids(list(role_ids))
+                if role['domain_id'] is None)
+        return list(role_ids)
+
     def get_roles_for_user_and_domain(self, user_id, domain_id):
         """Get the roles associated with a user within given domain.
 
@@ -158,6 +379,11 @@ class Manager(manager.Manager):
         :raises keystone.exception.DomainNotFound: If the domain doesn't exist.
 
         """
+        return self._get_roles_for_user_and_domain(
+            user_id, domain_id, self._get_generations(user_id, domain_id))
+
+    @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _get_roles_for_user_and_domain(self, user_id, domain_id, generations):
         PROVIDERS.resource_api.get_domain(domain_id)
         assignment_list = self.list_role_assignments(
             user_id=user_id, domain_id=domain_id, effective=True)
@@ -204,12 +430,17 @@ class Manager(manager.Manager):
     def add_role_to_user_and_project(self, user_id, project_id, role_id):
         self._add_role_to_user_and_project_adapter(
             role_id, user_id=user_id, project_id=project_id)
-        COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        self.invalidate_computed_assignments(
+            user_ids=[user_id], target_ids=[project_id])
 
     # TODO(henry-nash): We might want to consider list limiting this at some
     # point in the future.
-    @MEMOIZE_COMPUTED_ASSIGNMENTS
     def list_projects_for_user(self, user_id):
+        return self._list_projects_for_user(
+            user_id, self._get_generations(user_id))
+
+    @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _list_projects_for_user(self, user_id, generations):
         # FIXME(lbragstad): Without the use of caching, listing effective role
         # assignments is slow, especially with large data set (lots of users
         # with multiple role assignments). This should serve as a marker in
@@ -226,8 +457,12 @@ class Manager(manager.Manager):
 
     # TODO(henry-nash): We might want to consider list limiting this at some
     # point in the future.
-    @MEMOIZE_COMPUTED_ASSIGNMENTS
     def list_domains_for_user(self, user_id):
+        return self._list_domains_for_user(
+            user_id, self._get_generations(user_id))
+
+    @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _list_domains_for_user(self, user_id, generations):
         assignment_list = self.list_role_assignments(
             user_id=user_id, effective=True)
         # Use set() to process the list to remove any duplicates
@@ -268,40 +503,14 @@ class Manager(manager.Manager):
             notifications.REMOVE_APP_CREDS_FOR_USER,
             payload
         )
-        self._invalidate_token_cache(
-            role_id, group_id, user_id, project_id, domain_id
-        )
 
     def remove_role_from_user_and_project(self, user_id, project_id, role_id):
         self._remove_role_from_user_and_project_adapter(
             role_id, user_id=user_id, project_id=project_id)
-        COMPUTED_ASSIGNMENTS_REGION.invalidate()
-
-    def _invalidate_token_cache(self, role_id, group_id, user_id, project_id,
-                                domain_id):
-        if group_id:
-            actor_type = 'group'
-            actor_id = group_id
-        elif user_id:
-            actor_type = 'user'
-            actor_id = user_id
-
-        if domain_id:
-            target_type = 'domain'
-            target_id = domain_id
-        elif project_id:
-            target_type = 'project'
-            target_id = project_id
-
-        reason = (
-            'Invalidating the token cache because role %(role_id)s was '
-            'removed from %(actor_type)s %(actor_id)s on %(target_type)s '
-            '%(target_id)s.' %
-            {'role_id': role_id, 'actor_type': actor_type,
-             'actor_id': actor_id, 'target_type': target_type,
-             'target_id': target_id}
-        )
-        notifications.invalidate_token_cache_notification(reason)
+        # NOTE: The token cache is kept. Cached tokens check the roles of
+        # their user again once the assignment generation has moved on.
+        self.invalidate_computed_assignments(
+            user_ids=[user_id], target_ids=[project_id])
 
     @notifications.role_assignment('created')
     def create_grant(self, role_id, user_id=None, group_id=None,
@@ -325,7 +534,10 @@ class Manager(manager.Manager):
             role_id, user_id=user_id, group_id=group_id, domain_id=domain_id,
             project_id=project_id, inherited_to_projects=inherited_to_projects
         )
-        COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        self.invalidate_computed_assignments(
+            user_ids=[user_id] if user_id else None,
+            group_ids=[group_id] if group_id else None,
+            target_ids=[project_id or domain_id])
 
     def get_grant(self, role_id, user_id=None, group_id=None,
                   domain_id=None, project_id=None,
@@ -370,9 +582,6 @@ class Manager(manager.Manager):
                 project_id=project_id,
                 inherited_to_projects=inherited_to_projects
             )
-            self._invalidate_token_cache(
-                role_id, group_id, user_id, project_id, domain_id
-            )
         else:
             try:
                 # check if role exists on the group before revoke
@@ -381,12 +590,8 @@ class Manager(manager.Manager):
                     domain_id=domain_id, project_id=project_id,
                     inherited_to_projects=inherited_to_projects
                 )
-                if CONF.token.revoke_by_id:
-                    self._invalidate_token_cache(
-                        role_id, group_id, user_id, project_id, domain_id
-                    )
             except exception.GroupNotFound:
-                LOG.debug('Group %s not found, no tokens to invalidate.',
+                LOG.debug('Group %s not found, no assignments to check.',
                           group_id)
 
         if domain_id:
@@ -397,22 +602,165 @@ class Manager(manager.Manager):
             role_id, user_id=user_id, group_id=group_id, domain_id=domain_id,
             project_id=project_id, inherited_to_projects=inherited_to_projects
         )
-        COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        # NOTE: The token cache is kept. Cached tokens check the roles of
+        # their user again once the assignment generation has moved on.
+        self.invalidate_computed_assignments(
+            user_ids=[user_id] if user_id else None,
+            group_ids=[group_id] if group_id else None,
+            target_ids=[project_id or domain_id])
+
+    def _normalize_grants(self, grants):
+        """Return a list of grants with every argument of a grant set.
+
+        :raises keystone.exception.ValidationError: If a grant does not name
+            exactly one of a user or a group, and one of a project or a
+            domain.
+
+        """
+        normalized_grants = []
+        for grant in grants:
+            grant = {
+                'role_id': grant['role_id'],
+                'user_id': grant.get('user_id'),
+                'group_id': grant.get('group_id'),
+                'domain_id': grant.get('domain_id'),
+                'project_id': grant.get('project_id'),
+                'inherited_to_projects': bool(
+                    grant.get('inherited_to_projects', False))}
+            if (bool(grant['user_id']) == bool(grant['group_id']) or
+                    bool(grant['project_id']) == bool(grant['domain_id'])):
+                raise exception.ValidationError(message=_(
+                    'Each role assignment must specify one of a user or a '
+                    'group, and one of a project or a domain.'))
+            normalized_grants.append(grant)
+        return normalized_grants
+
+    def _assert_grant_references_exist(self, grants, check_actors=True):
+        """Check that the entities referenced by a list of grants exist.
+
+        The roles, projects and domains, and optionally the users and groups,
+        are each read with a single call whatever the number of grants.
+
+        """
+        roles = {role['id']: role for role in
+                 PROVIDERS.role_api.list_roles_from_ids(
+                     list(set(grant['role_id'] for grant in grants)))}
+        targets = {project['id']: project for project in
+                   PROVIDERS.resource_api.list_projects_from_ids(
+                       list(set(grant['project_id'] or grant['domain_id']
+                                for grant in grants)))}
+        user_ids = set(grant['user_id'] for grant in grants
+                       if grant['user_id'])
+        group_ids = set(grant['group_id'] for grant in grants
+                        if grant['group_id'])
+        if check_actors:
+            user_ids = set(user['id'] for user in
+                           PROVIDERS.identity_api.list_users_from_ids(
+                               list(user_ids)))
+            group_ids = set(group['id'] for group in
+                            PROVIDERS.identity_api.list_groups_from_ids(
+                                list(group_ids)))
+
+        for grant in grants:
+            role = roles.get(grant['role_id'])
+            if role is None:
+                raise exception.RoleNotFound(role_id=grant['role_id'])
+            if grant['user_id'] and grant['user_id'] not in user_ids:
+                raise exception.UserNotFound(user_id=grant['user_id'])
+            if grant['group_id'] and grant['group_id'] not in group_ids:
+                raise exception.GroupNotFound(group_id=grant['group_id'])
+            if grant['domain_id']:
+                domain = targets.get(grant['domain_id'])
+                if domain is None or not domain['is_domain']:
+                    raise exception.DomainNotFound(
+                        domain_id=grant['domain_id'])
+                continue
+
+            project = targets.get(grant['project_id'])
+            if project is None:
+                raise exception.ProjectNotFound(
+                    project_id=grant['project_id'])
+            # For domain specific roles, the domain of the project
+            # and role must match
+            if role['domain_id'] and project['domain_id'] != role['domain_id']:
+                raise exception.DomainSpecificRoleMismatch(
+                    role_id=role['id'], project_id=project['id'])
+
+    def create_grants(self, grants, initiator=None):
+        """Create a list of grants at once.
 
-    # The methods _expand_indirect_assignment, _list_direct_role_assignments
+        Each grant is a dict of the arguments of ``create_grant()``. Every
+        role, user, group, project and domain the grants refer to is checked
+        before the grants are written in a single transaction, so that either
+        all or none of them are created. The computed assignments of the
+        users, groups and targets of the grants are then invalidated at once,
+        and a notification is sent for each grant.
+
+        """
+        grants = self._normalize_grants(grants)
+        notifier = notifications.role_assignment('created')
+        try:
+            self._assert_grant_references_exist(grants)
+            self.driver.create_grants(grants)
+        except Exception:
+            for grant in grants:
+                notifier.send(grant, initiator, taxonomy.OUTCOME_FAILURE)
+            raise
+        self._invalidate_computed_assignments_for_grants(grants)
+        for grant in grants:
+            notifier.send(grant, initiator, taxonomy.OUTCOME_SUCCESS)
+
+    def delete_grants(self, grants, initiator=None):
+        """Delete a list of grants at once.
+
+        Each grant is a dict of the arguments of ``delete_grant()``. The
+        grants are deleted in a single transaction, so that either all or
+        none of them are deleted. The computed assignments of the users,
+        groups and targets of the grants are then invalidated at once, and a
+        notification is sent for each grant.
+
+        :raises keystone.exception.RoleAssignmentNotFound: If any of the
+            grants doesn't exist.
+
+        """
+        grants = self._normalize_grants(grants)
+        notifier = notifications.role_assignment('deleted')
+        try:
+            self._assert_grant_references_exist(grants, check_actors=False)
+            self.driver.delete_grants(grants)
+        except Exception:
+            for grant in grants:
+                notifier.send(grant, initiator, taxonomy.OUTCOME_FAILURE)
+            raise
+        self._invalidate_computed_assignments_for_grants(grants)
+        for grant in grants:
+            notifier.send(grant, initiator, taxonomy.OUTCOME_SUCCESS)
+
+    def _invalidate_computed_assignments_for_grants(self, grants):
+        self.invalidate_computed_assignments(
+            user_ids=[grant['user_id'] for grant in grants
+                      if grant['user_id']],
+            group_ids=[grant['group_id'] for grant in grants
+                       if grant['group_id']],
+            target_ids=[grant['project_id'] or grant['domain_id']
+                        for grant in grants])
+
+    # The methods _expand_indirect_assignments, _list_direct_role_assignments
     # and _list_effective_role_assignments below are only used on
     # list_role_assignments, but they are not in its scope as nested functions
     # since it would significantly increase McCabe complexity, that should be
     # kept as it is in order to detect unnecessarily complex code, which is not
     # this case.
 
-    def _expand_indirect_assignment(self, ref, user_id=None, project_id=None,
-                                    subtree_ids=None, expand_groups=True):
-        """Return a list of expanded role assignments.
+    def _expand_indirect_assignments(self, refs, user_id=None,
+                                     project_id=None, subtree_ids=None,
+                                     expand_groups=True, hierarchy=None):
+        """Expand group and inherited role assignments.
 
-        This methods is called for each discovered assignment that either needs
-        a group assignment expanded into individual user assignments, or needs
-        an inherited assignment to be applied to its children.
+        Yields an assignment for each user of any group assignment (if
+        expand_groups is True), and for each project that any inherited
+        assignment applies to. Group membership and the project hierarchy are
+        each loaded once for all of the refs, rather than once per ref.
 
         In all cases, if either user_id and/or project_id is specified, then we
         filter the result on those values.
@@ -425,206 +773,106 @@ class Manager(manager.Manager):
         already ensured only those assignments that could affect them
         were passed to this method.
 
-        If expand_groups is True then we expand groups out to a list of
-        assignments, one for each member of that group.
-
-        """
-        def create_group_assignment(base_ref, user_id):
-            """Create a group assignment from the provided ref."""
-            ref = copy.deepcopy(base_ref)
-
-            ref['user_id'] = user_id
-
-            indirect = ref.setdefault('indirect', {})
-            indirect['group_id'] = ref.pop('group_id')
-
-            return ref
+        An expanded assignment records where it came from in its indirect
+        pairs: the group for an assignment expanded from group membership, and
+        the project or domain for one expanded from inheritance. For example,
+        a group assignment inherited from a parent project is expanded to::
 
-        def expand_group_assignment(ref, user_id):
-            """Expand group role assignment.
-
-            For any group role assignment on a target, it is replaced by a list
-            of role assignments containing one for each user of that group on
-            that target.
-
-            An example of accepted ref is::
-
-            {
+        {
+            'user_id': user_id,
+            'project_id': subproject_id,
+            'role_id': role_id,
+            'indirect' : {
                 'group_id': group_id,
-                'project_id': project_id,
-                'role_id': role_id
+                'project_id': parent_id
             }
+        }
 
-            Once expanded, it should be returned as a list of entities like the
-            one below, one for each user_id in the provided group_id.
-
-            ::
-
-            {
-                'user_id': user_id,
-                'project_id': project_id,
-                'role_id': role_id,
-                'indirect' : {
-                    'group_id': group_id
-                }
-            }
-
-            Returned list will be formatted by the Controller, which will
-            deduce a role assignment came from group membership if it has both
-            'user_id' in the main body of the dict and 'group_id' in indirect
-            subdict.
-
-            """
-            if user_id:
-                return [create_group_assignment(ref, user_id=user_id)]
-
-            # Note(prashkre): Try to get the users in a group,
-            # if a group wasn't found in the backend, users are set
-            # as empty list.
-            try:
-                users = PROVIDERS.identity_api.list_users_in_group(
-                    ref['group_id'])
-            except exception.GroupNotFound:
-                LOG.warning('Group %(group)s was not found but still has role '
-                            'assignments.', {'group': ref['group_id']})
-                users = []
-
-            return [create_group_assignment(ref, user_id=m['id'])
-                    for m in users]
-
-        def expand_inherited_assignment(ref, user_id, project_id, subtree_ids,
-                                        expand_groups):
-            """Expand inherited role assignments.
-
-            If expand_groups is True and this is a group role assignment on a
-            target, replace it by a list of role assignments containing one for
-            each user of that group, on every project under that target. If
-            expand_groups is False, then return a group assignment on an
-            inherited target.
-
-            If this is a user role assignment on a specific target (i.e.
-            project_id is specified, but subtree_ids is None) then simply
-            format this as a single assignment (since we are effectively
-            filtering on project_id). If however, project_id is None or
-            subtree_ids is not None, then replace this one assignment with a
-            list of role assignments for that user on every project under
-            that target.
-
-            An example of accepted ref is::
-
-            {
-                'group_id': group_id,
-                'project_id': parent_id,
-                'role_id': role_id,
-                'inherited_to_projects': 'projects'
-            }
-
-            Once expanded, it should be returned as a list of entities like the
-            one below, one for each user_id in the provided group_id and
-            for each subproject_id in the project_id subtree.
-
-            ::
-
-            {
-                'user_id': user_id,
-                'project_id': subproject_id,
-                'role_id': role_id,
-                'indirect' : {
-                    'group_id': group_id,
-                    'project_id': parent_id
-                }
-            }
-
-            Returned list will be formatted by the Controller, which will
-            deduce a role assignment came from group membership if it has both
-            'user_id' in the main body of the dict and 'group_id' in the
-            'indirect' subdict, as well as it is possible to deduce if it has
-            come from inheritance if it contains both a 'project_id' in the
-            main body of the dict and 'parent_id' in the 'indirect' subdict.
-
-            """
-            def create_inherited_assignment(base_ref, project_id):
-                """Create a project assignment from the provided ref.
-
-                base_ref can either be a project or domain inherited
-                assignment ref.
-
-                """
-                ref = copy.deepcopy(base_ref)
-
-                indirect = ref.setdefault('indirect', {})
-                if ref.get('project_id'):
-                    indirect['project_id'] = ref.pop('project_id')
-                else:
-                    indirect['domain_id'] = ref.pop('domain_id')
-
-                ref['project_id'] = project_id
-                ref.pop('inherited_to_projects')
+        once the assignments are turned back into refs.
 
-                return ref
+        :param refs: the role assignment refs from the assignment driver
+        :param hierarchy: a _ProjectHierarchy to expand inheritance with
+        :returns: a generator of _Assignment tuples
 
-            # Define expanded project list to which to apply this assignment
+        """
+        hierarchy = hierarchy or _ProjectHierarchy()
+        group_members = {}
+        projects_of_interest = None
+        if project_id:
+            projects_of_interest = [project_id] + (subtree_ids or [])
+            targets_of_interest = frozenset(projects_of_interest)
+
+        def list_user_ids_in_group(group_id):
+            if group_id not in group_members:
+                # Note(prashkre): Try to get the users in a group,
+                # if a group wasn't found in the backend, users are set
+                # as empty list.
+                try:
+                    users = PROVIDERS.identity_api.list_users_in_group(
+                        group_id)
+                except exception.GroupNotFound:
+                    LOG.warning('Group %(group)s was not found but still has '
+                                'role assignments.', {'group': group_id})
+                    users = []
+                group_members[group_id] = [user['id'] for user in users]
+            return group_members[group_id]
+
+        def list_inherited_project_ids(target):
+            target_type, target_id = target
             if project_id:
-                # Since ref is an inherited assignment and we are filtering by
-                # project(s), we are only going to apply the assignment to the
-                # relevant project(s)
-                project_ids = [project_id]
-                if subtree_ids:
-                    project_ids += subtree_ids
-                    # If this is a domain inherited assignment, then we know
-                    # that all the project_ids will get this assignment. If
-                    # it's a project inherited assignment, and the assignment
-                    # point is an ancestor of project_id, then we know that
-                    # again all the project_ids will get the assignment.  If,
-                    # however, the assignment point is within the subtree,
-                    # then only a partial tree will get the assignment.
-                    resource_api = PROVIDERS.resource_api
-                    if ref.get('project_id'):
-                        if ref['project_id'] in project_ids:
-                            project_ids = (
-                                [x['id'] for x in
-                                 resource_api.list_projects_in_subtree(
-                                     ref['project_id'])])
-            elif ref.get('domain_id'):
-                # A domain inherited assignment, so apply it to all projects
-                # in this domain
-                project_ids = (
-                    [x['id'] for x in
-                        PROVIDERS.resource_api.list_projects_in_domain(
-                            ref['domain_id'])])
+                # Since the assignment is inherited and we are filtering by
+                # project(s), we are only going to apply it to the relevant
+                # project(s). If the assignment point is within the subtree
+                # then only a partial tree will get the assignment, otherwise
+                # all of them will.
+                if (subtree_ids and target_type == 'project_id' and
+                        target_id in targets_of_interest):
+                    return hierarchy.list_projects_in_subtree(target_id)
+                return projects_of_interest if subtree_ids else [project_id]
+            if target_type == 'domain_id':
+                return hierarchy.list_projects_in_domain(target_id)
+            return hierarchy.list_projects_in_subtree(target_id)
+
+        for ref in refs:
+            assignment = _assignment_from_ref(ref)
+            actor_type, actor_id = assignment.actor
+            if actor_type == 'group_id' and expand_groups:
+                user_ids = ([user_id] if user_id else
+                            list_user_ids_in_group(actor_id))
+                actors = [('user_id', x) for x in user_ids]
+                indirect = (assignment.actor,)
             else:
-                # It must be a project assignment, so apply it to its subtree
-                project_ids = (
-                    [x['id'] for x in
-                        PROVIDERS.resource_api.list_projects_in_subtree(
-                            ref['project_id'])])
-
-            new_refs = []
-            if 'group_id' in ref:
-                if expand_groups:
-                    # Expand role assignment to all group members on any
-                    # inherited target of any of the projects
-                    for ref in expand_group_assignment(ref, user_id):
-                        new_refs += [create_inherited_assignment(ref, proj_id)
-                                     for proj_id in project_ids]
-                else:
-                    # Just place the group assignment on any inherited target
-                    # of any of the projects
-                    new_refs += [create_inherited_assignment(ref, proj_id)
-                                 for proj_id in project_ids]
+                actors = [assignment.actor]
+                indirect = ()
+
+            if assignment.inherited:
+                targets = [('project_id', x) for x in
+                           list_inherited_project_ids(assignment.target)]
+                indirect += (assignment.target,)
             else:
-                # Expand role assignment for all projects
-                new_refs += [create_inherited_assignment(ref, proj_id)
-                             for proj_id in project_ids]
+                targets = [assignment.target]
 
-            return new_refs
+            for actor in actors:
+                for target in targets:
+                    yield _Assignment(actor, target, assignment.role_id,
+                                      False, indirect)
 
-        if ref.get('inherited_to_projects') == 'projects':
-            return expand_inherited_assignment(
-                ref, user_id, project_id, subtree_ids, expand_groups)
-        elif 'group_id' in ref and expand_groups:
-            return expand_group_assignment(ref, user_id)
-        return [ref]
+    def _expand_implied_roles(self, assignments):
+        """Yield each assignment followed by those for its implied roles."""
+        try:
+            closure = PROVIDERS.role_api.get_implied_role_closure()
+        except exception.NotImplemented:
+            LOG.error('Role driver does not support implied roles.')
+            closure = {}
+
+        for assignment in assignments:
+            yield assignment
+            for prior_role_id, implied_role_id in closure.get(
+                    assignment.role_id, ()):
+                yield assignment._replace(
+                    role_id=implied_role_id,
+                    indirect=assignment.indirect + (
+                        ('role_id', prior_role_id),))
 
     def add_implied_roles(self, role_refs):
         """Expand out implied roles.
@@ -637,74 +885,32 @@ class Manager(manager.Manager):
         caller can determine where the assignment came from.
 
         """
-        def _make_implied_ref_copy(prior_ref, implied_role_id):
+        def _make_implied_ref_copy(prior_ref, rule):
             # Create a ref for an implied role from the ref of a prior role,
             # setting the new role_id to be the implied role and the indirect
             # role_id to be the prior role
-            implied_ref = copy.deepcopy(prior_ref)
+            prior_role_id, implied_role_id = rule
+            implied_ref = prior_ref.copy()
             implied_ref['role_id'] = implied_role_id
-            indirect = implied_ref.setdefault('indirect', {})
-            indirect['role_id'] = prior_ref['role_id']
+            indirect = dict(prior_ref.get('indirect', {}))
+            indirect['role_id'] = prior_role_id
+            implied_ref['indirect'] = indirect
             return implied_ref
 
         try:
-            implied_roles_cache = {}
-            role_refs_to_check = list(role_refs)
-            ref_results = list(role_refs)
-            checked_role_refs = list()
-            while(role_refs_to_check):
-                next_ref = role_refs_to_check.pop()
-                checked_role_refs.append(next_ref)
-                next_role_id = next_ref['role_id']
-                if next_role_id in implied_roles_cache:
-                    implied_roles = implied_roles_cache[next_role_id]
-                else:
-                    implied_roles = (
-                        PROVIDERS.role_api.list_implied_roles(next_role_id))
-                    implied_roles_cache[next_role_id] = implied_roles
-                for implied_role in implied_roles:
-                    implied_ref = (
-                        _make_implied_ref_copy(
-                            next_ref, implied_role['implied_role_id']))
-                    if implied_ref in checked_role_refs:
-                        # Avoid traversing a cycle
-                        continue
-                    else:
-                        ref_results.append(implied_ref)
-                        role_refs_to_check.append(implied_ref)
+            closure = PROVIDERS.role_api.get_implied_role_closure()
         except exception.NotImplemented:
             LOG.error('Role driver does not support implied roles.')
+            return list(role_refs)
 
-        return ref_results
-
-    def _filter_by_role_id(self, role_id, ref_results):
-        # if we arrive here, we need to filer by role_id.
-        filter_results = []
-        for ref in ref_results:
-            if ref['role_id'] == role_id:
-                filter_results.append(ref)
-        return filter_results
-
-    def _strip_domain_roles(self, role_refs):
-        """Post process assignment list for domain roles.
-
-        Domain roles are only designed to do the job of inferring other roles
-        and since that has been done before this method is called, we need to
-        remove any assignments that include a domain role.
-
-        """
-        def _role_is_global(role_id):
-            ref = PROVIDERS.role_api.get_role(role_id)
-            return (ref['domain_id'] is None)
-
-        filter_results = []
+        ref_results = list(role_refs)
         for ref in role_refs:
-            if _role_is_global(ref['role_id']):
-                filter_results.append(ref)
-        return filter_results
+            for rule in closure.get(ref['role_id'], ()):
+                ref_results.append(_make_implied_ref_copy(ref, rule))
+        return ref_results
 
     def _list_effective_role_assignments(self, role_id, user_id, group_id,
-                                         domain_id, project_id, subtree_ids,
+                                         domain_id, project_id, subtree,
                                          inherited, source_from_group_ids,
                                          strip_domain_roles):
         """List role assignments in effective mode.
@@ -713,16 +919,19 @@ class Manager(manager.Manager):
         ones that come from grouping or inheritance are retrieved and will then
         be expanded.
 
-        The resulting list of assignments will be filtered by the provided
-        parameters. If subtree_ids is not None, then we also want to include
-        all subtree_ids in the filter as well. Since we are in effective mode,
+        The resulting assignments will be filtered by the provided parameters.
+        If subtree is not None, then it is the list of projects in the subtree
+        of project_id, and we also want to include those projects in the
+        filter as well. Since we are in effective mode,
         group can never act as a filter (since group assignments are expanded
         into user roles) and domain can only be filter if we want non-inherited
         assignments, since domains can't inherit assignments.
 
         The goal of this method is to only ask the driver for those
         assignments as could effect the result based on the parameter filters
-        specified, hence avoiding retrieving a huge list.
+        specified, hence avoiding retrieving a huge list. The expanded
+        assignments are generated one at a time rather than built up as a
+        list, so the caller decides how many of them to hold in memory.
 
         """
         def list_role_assignments_for_actor(
@@ -800,9 +1009,9 @@ class Manager(manager.Manager):
                     # they are from the same tree the only places these can
                     # come from are from parents of the main project or
                     # inherited assignments on the project or subtree itself.
-                    source_ids = [project['id'] for project in
-                                  PROVIDERS.resource_api.list_project_parents(
-                                      project_id)]
+                    source_ids = (
+                        PROVIDERS.resource_api.list_project_parent_ids(
+                            project_id))
                     if subtree_ids:
                         source_ids += project_ids_of_interest
                     if source_ids:
@@ -823,6 +1032,10 @@ class Manager(manager.Manager):
         if group_id or (domain_id and inherited):
             return []
 
+        subtree_ids = None
+        if subtree is not None:
+            subtree_ids = [x['id'] for x in subtree]
+
         if user_id and source_from_group_ids:
             # You can't do both - and since source_from_group_ids is only used
             # internally, this must be a coding error by the caller.
@@ -855,20 +1068,39 @@ class Manager(manager.Manager):
                     subtree_ids=subtree_ids, group_ids=group_ids,
                     domain_id=domain_id, inherited=inherited)
 
-        # Expand grouping and inheritance on retrieved role assignments
-        refs = []
-        expand_groups = (source_from_group_ids is None)
-        for ref in (direct_refs + group_refs):
-            refs += self._expand_indirect_assignment(
-                ref, user_id, project_id, subtree_ids, expand_groups)
+        # Expand grouping, inheritance and implied roles on the retrieved
+        # role assignments, building a ref only for those that are returned.
+        assignments = self._expand_implied_roles(
+            self._expand_indirect_assignments(
+                itertools.chain(direct_refs, group_refs), user_id,
+                project_id, subtree_ids,
+                expand_groups=(source_from_group_ids is None),
+                hierarchy=_ProjectHierarchy(project_id, subtree)))
 
-        refs = self.add_implied_roles(refs)
-        if strip_domain_roles:
-            refs = self._strip_domain_roles(refs)
-        if role_id:
-            refs = self._filter_by_role_id(role_id, refs)
+        return self._build_effective_role_assignment_refs(
+            assignments, role_id, strip_domain_roles)
+
+    def _build_effective_role_assignment_refs(self, assignments, role_id,
+                                              strip_domain_roles):
+        """Yield a ref for each effective assignment that is to be returned.
 
-        return refs
+        Domain specific roles are stripped, since such roles only do the job
+        of inferring other roles, and if role_id is specified then only
+        assignments of that role are returned.
+
+        """
+        role_is_global = {}
+        for assignment in assignments:
+            if role_id and assignment.role_id != role_id:
+                continue
+            if strip_domain_roles:
+                if assignment.role_id not in role_is_global:
+                    role_is_global[assignment.role_id] = (
+                        PROVIDERS.role_api.get_role(
+                            assignment.role_id)['domain_id'] is None)
+                if not role_is_global[assignment.role_id]:
+                    continue
+            yield _assignment_to_ref(assignment)
 
     def _list_direct_role_assignments(self, role_id, user_id, group_id, system,
                                       domain_id, project_id, subtree_ids,
@@ -981,21 +1213,19 @@ class Manager(manager.Manager):
         which is useful for internal calls like trusts which need to examine
         the full set of roles.
         """
-        subtree_ids = None
+        subtree = subtree_ids = None
         if project_id and include_subtree:
-            subtree_ids = (
-                [x['id'] for x in
-                    PROVIDERS.resource_api.list_projects_in_subtree(
-                        project_id)])
+            subtree = PROVIDERS.resource_api.list_projects_in_subtree(
+                project_id)
+            subtree_ids = [x['id'] for x in subtree]
 
         if system != 'all':
             system = None
 
         if effective:
-            role_assignments = self._list_effective_role_assignments(
-                role_id, user_id, group_id, domain_id, project_id,
-                subtree_ids, inherited, source_from_group_ids,
-                strip_domain_roles)
+            role_assignments = list(self._list_effective_role_assignments(
+                role_id, user_id, group_id, domain_id, project_id, subtree,
+                inherited, source_from_group_ids, strip_domain_roles))
         else:
             role_assignments = self._list_direct_role_assignments(
                 role_id, user_id, group_id, system, domain_id, project_id,
@@ -1006,67 +1236,105 @@ class Manager(manager.Manager):
         return role_assignments
 
     def _get_names_from_role_assignments(self, role_assignments):
-        role_assign_list = []
+        # Gather the distinct ids of each type of entity first, so that all
+        # the entities of one type can be read in a single call rather than
+        # once per assignment.
+        ids = collections.defaultdict(set)
+        for role_asgmt in role_assignments:
+            for key in ('user_id', 'group_id', 'project_id', 'domain_id',
+                        'role_id'):
+                if key in role_asgmt:
+                    ids[key].add(role_asgmt[key])
+
+        def index_by_id(refs):
+            return {ref['id']: ref for ref in refs}
+
+        users = groups = projects = roles = {}
+        if ids['user_id']:
+            users = index_by_id(PROVIDERS.identity_api.list_users_from_ids(
+                list(ids['user_id'])))
+        if ids['group_id']:
+            groups = index_by_id(PROVIDERS.identity_api.list_groups_from_ids(
+                list(ids['group_id'])))
+        if ids['project_id']:
+            projects = index_by_id(
+                PROVIDERS.resource_api.list_projects_from_ids(
+                    list(ids['project_id'])))
+        if ids['role_id']:
+            roles = index_by_id(PROVIDERS.role_api.list_roles_from_ids(
+                list(ids['role_id'])))
+
+        domain_ids = set(ids['domain_id'])
+        for ref in itertools.chain(users.values(), groups.values(),
+                                   projects.values(), roles.values()):
+            if ref.get('domain_id'):
+                domain_ids.add(ref['domain_id'])
+        domains = {}
+        if domain_ids:
+            domains = index_by_id(
+                PROVIDERS.resource_api.list_domains_from_ids(
+                    list(domain_ids)))
+
+        # Projects, domains and roles that were not found in bulk are read
+        # individually, so that the usual not found error is raised.
+        def get_domain(domain_id):
+            return (domains.get(domain_id) or
+                    PROVIDERS.resource_api.get_domain(domain_id))
 
+        role_assign_list = []
         for role_asgmt in role_assignments:
-            new_assign = copy.deepcopy(role_asgmt)
-            for key, value in role_asgmt.items():
-                if key == 'domain_id':
-                    _domain = PROVIDERS.resource_api.get_domain(value)
-                    new_assign['domain_name'] = _domain['name']
-                elif key == 'user_id':
-                    try:
-                        # Note(knikolla): Try to get the user, otherwise
-                        # if the user wasn't found in the backend
-                        # use empty values.
-                        _user = PROVIDERS.identity_api.get_user(value)
-                    except exception.UserNotFound:
-                        msg = ('User %(user)s not found in the'
-                               ' backend but still has role assignments.')
-                        LOG.warning(msg, {'user': value})
-                        new_assign['user_name'] = ''
-                        new_assign['user_domain_id'] = ''
-                        new_assign['user_domain_name'] = ''
-                    else:
-                        new_assign['user_name'] = _user['name']
-                        new_assign['user_domain_id'] = _user['domain_id']
-                        new_assign['user_domain_name'] = (
-                            PROVIDERS.resource_api.get_domain(
-                                _user['domain_id'])['name'])
-                elif key == 'group_id':
-                    try:
-                        # Note(knikolla): Try to get the group, otherwise
-                        # if the group wasn't found in the backend
-                        # use empty values.
-                        _group = PROVIDERS.identity_api.get_group(value)
-                    except exception.GroupNotFound:
-                        msg = ('Group %(group)s not found in the'
-                               ' backend but still has role assignments.')
-                        LOG.warning(msg, {'group': value})
-                        new_assign['group_name'] = ''
-                        new_assign['group_domain_id'] = ''
-                        new_assign['group_domain_name'] = ''
-                    else:
-                        new_assign['group_name'] = _group['name']
-                        new_assign['group_domain_id'] = _group['domain_id']
-                        new_assign['group_domain_name'] = (
-                            PROVIDERS.resource_api.get_domain(
-                                _group['domain_id'])['name'])
-                elif key == 'project_id':
-                    _project = PROVIDERS.resource_api.get_project(value)
-                    new_assign['project_name'] = _project['name']
-                    new_assign['project_domain_id'] = _project['domain_id']
-                    new_assign['project_domain_name'] = (
-                        PROVIDERS.resource_api.get_domain(
-                            _project['domain_id'])['name'])
-                elif key == 'role_id':
-                    _role = PROVIDERS.role_api.get_role(value)
-                    new_assign['role_name'] = _role['name']
-                    if _role['domain_id'] is not None:
-                        new_assign['role_domain_id'] = _role['domain_id']
-                        new_assign['role_domain_name'] = (
-                            PROVIDERS.resource_api.get_domain(
-                                _role['domain_id'])['name'])
+            new_assign = dict(role_asgmt)
+            if 'domain_id' in role_asgmt:
+                _domain = get_domain(role_asgmt['domain_id'])
+                new_assign['domain_name'] = _domain['name']
+            if 'user_id' in role_asgmt:
+                _user = users.get(role_asgmt['user_id'])
+                if _user is None:
+                    # Note(knikolla): If the user wasn't found in the backend
+                    # use empty values.
+                    msg = ('User %(user)s not found in the'
+                           ' backend but still has role assignments.')
+                    LOG.warning(msg, {'user': role_asgmt['user_id']})
+                    new_assign['user_name'] = ''
+                    new_assign['user_domain_id'] = ''
+                    new_assign['user_domain_name'] = ''
+                else:
+                    new_assign['user_name'] = _user['name']
+                    new_assign['user_domain_id'] = _user['domain_id']
+                    new_assign['user_domain_name'] = (
+                        get_domain(_user['domain_id'])['name'])
+            if 'group_id' in role_asgmt:
+                _group = groups.get(role_asgmt['group_id'])
+                if _group is None:
+                    # Note(knikolla): If the group wasn't found in the backend
+                    # use empty values.
+                    msg = ('Group %(group)s not found in the'
+                           ' backend but still has role assignments.')
+                    LOG.warning(msg, {'group': role_asgmt['group_id']})
+                    new_assign['group_name'] = ''
+                    new_assign['group_domain_id'] = ''
+                    new_assign['group_domain_name'] = ''
+                else:
+                    new_assign['group_name'] = _group['name']
+                    new_assign['group_domain_id'] = _group['domain_id']
+                    new_assign['group_domain_name'] = (
+                        get_domain(_group['domain_id'])['name'])
+            if 'project_id' in role_asgmt:
+                _project = (projects.get(role_asgmt['project_id']) or
+                            PROVIDERS.resource_api.get_project(
+                                role_asgmt['project_id']))
+                new_assign['project_name'] = _project['name']
+                new_assign['project_domain_id'] = _project['domain_id']
+                new_assign['project_domain_name'] = (
+                    get_domain(_project['domain_id'])['name'])
+            if 'role_id' in role_asgmt:
+                _role = (roles.get(role_asgmt['role_id']) or
+                         PROVIDERS.role_api.get_role(role_asgmt['role_id']))
+                new_assign['role_name'] = _role['name']
+                if _role['domain_id'] is not None:
+                    new_assign['role_domain_id'] = _role['domain_id']
+                    new_assign['role_domain_name'] = (
+                        get_domain(_role['domain_id'])['name'])
             role_assign_list.append(new_assign)
         return role_assign_list
 
@@ -1148,6 +1416,7 @@ class Manager(manager.Manager):
         self.driver.create_system_grant(
             role_id, user_id, target_id, assignment_type, inherited
         )
+        self.invalidate_computed_assignments(user_ids=[user_id])
 
     def delete_system_grant_for_user(self, user_id, role_id):
         """Remove a system grant from a user.
@@ -1163,6 +1432,7 @@ class Manager(manager.Manager):
         target_id = self._SYSTEM_SCOPE_TOKEN
         inherited = False
         self.driver.delete_system_grant(role_id, user_id, target_id, inherited)
+        self.invalidate_computed_assignments(user_ids=[user_id])
 
     def check_system_grant_for_group(self, group_id, role_id):
         """Check if a group has a specific role on the system.
@@ -1220,6 +1490,7 @@ class Manager(manager.Manager):
         self.driver.create_system_grant(
             role_id, group_id, target_id, assignment_type, inherited
         )
+        self.invalidate_computed_assignments(group_ids=[group_id])
 
     def delete_system_grant_for_group(self, group_id, role_id):
         """Remove a system grant from a group.
@@ -1237,6 +1508,7 @@ class Manager(manager.Manager):
         self.driver.delete_system_grant(
             role_id, group_id, target_id, inherited
         )
+        self.invalidate_computed_assignments(group_ids=[group_id])
 
     def list_all_system_grants(self):
         """Return a list of all system grants."""
@@ -1247,6 +1519,31 @@ class Manager(manager.Manager):
             actor_id, target_id, assignment_type
         )
 
+    def get_assignment_generation(self, user_id, target_id=None,
+                                  group_ids=None):
+        """Return an opaque value that changes when some assignments change.
+
+        Callers that keep data derived from the role assignments of a user on
+        a project or domain, such as the effective roles of a token, can
+        store this value alongside it and recompute the data once it no
+        longer matches. It changes when the assignments of the user, of the
+        given groups or on the project or domain change, and when a change
+        that may affect any user, such as deleting a role, is made. ``None``
+        is returned when caching is disabled.
+
+        :param user_id: the ID of the user
+        :param target_id: the ID of the project or domain, if any
+        :param group_ids: the IDs of groups the user's roles also come from
+            other than the groups the user is a member of, such as the
+            groups of a federated user
+
+        """
+        if cache.get_region_id(COMPUTED_ASSIGNMENTS_REGION) is None:
+            return None
+        # The keys of the generations include the ID of the region, so they
+        # also move on when the whole region is invalidated.
+        return self._read_generations(user_id, target_id, group_ids)
+
 
 class RoleManager(manager.Manager):
     """Default pivot point for the Role backend."""
@@ -1275,6 +1572,21 @@ class RoleManager(manager.Manager):
     def get_role(self, role_id):
         return self.driver.get_role(role_id)
 
+    @MEMOIZE
+    def get_implied_role_closure(self):
+        """Return the transitive closure of the implied role rules.
+
+        The closure maps each prior role ID to every ``(prior_role_id,
+        implied_role_id)`` rule that applies, directly or indirectly, to a
+        holder of that role, so expanding a role is a single lookup. It is
+        cached and invalidated when implied roles are created or deleted.
+
+        """
+        rules = self.driver.list_role_inference_rules()
+        return _build_implied_role_closure(
+            (rule['prior_role_id'], rule['implied_role_id'])
+            for rule in rules)
+
     def get_unique_role_by_name(self, role_name, hints=None):
         if not hints:
             hints = driver_hints.Hints()
@@ -1326,6 +1638,7 @@ class RoleManager(manager.Manager):
         ret = self.driver.update_role(role_id, role)
         notifications.Audit.updated(self._ROLE, role_id, initiator)
         self.get_role.invalidate(self, role_id)
+        COMPUTED_ASSIGNMENTS_REGION.invalidate()
         return ret
 
     def delete_role(self, role_id, initiator=None):
@@ -1348,6 +1661,7 @@ class RoleManager(manager.Manager):
             'a token' % {'role_id': role_id}
         )
         notifications.invalidate_token_cache_notification(reason)
+        self.get_implied_role_closure.invalidate(self)
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
 
     # TODO(ayoung): Add notification
@@ -1362,9 +1676,11 @@ class RoleManager(manager.Manager):
                                                role_id=implied_role_id)
         response = self.driver.create_implied_role(
             prior_role_id, implied_role_id)
+        self.get_implied_role_closure.invalidate(self)
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
         return response
 
     def delete_implied_role(self, prior_role_id, implied_role_id):
         self.driver.delete_implied_role(prior_role_id, implied_role_id)
+        self.get_implied_role_closure.invalidate(self)
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
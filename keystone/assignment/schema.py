@@ -34,3 +34,54 @@ role_update = {
     'minProperties': 1,
     'additionalProperties': True
 }
+
+_entity_ref = {
+    'type': 'object',
+    'properties': {
+        'id': parameter_types.id_string
+    },
+    'required': ['id']
+}
+
+# Role assignments are given in the format in which they are listed, so that
+# the output of GET /v3/role_assignments can be sent back to revoke them.
+role_assignments_bulk = {
+    'type': 'object',
+    'properties': {
+        'role_assignments': {
+            'type': 'array',
+            'minItems': 1,
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'role': _entity_ref,
+                    'user': _entity_ref,
+                    'group': _entity_ref,
+                    'scope': {
+                        'type': 'object',
+                        'properties': {
+                            'project': _entity_ref,
+                            'domain': _entity_ref,
+                            'OS-INHERIT:inherited_to': {
+                                'type': 'string',
+                                'enum': ['projects']
+                            }
+                        },
+                        'oneOf': [
+                            {'required': ['project']},
+                            {'required': ['domain']}
+                        ],
+                        'additionalProperties': False
+                    }
+                },
+                'required': ['role', 'scope'],
+                'oneOf': [
+                    {'required': ['user']},
+                    {'required': ['group']}
+                ]
+            }
+        }
+    },
+    'required': ['role_assignments'],
+    'additionalProperties': False
+}
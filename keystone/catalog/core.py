@@ -237,6 +237,14 @@ class Manager(manager.Manager):
     def get_v3_catalog(self, user_id, project_id):
         return self.driver.get_v3_catalog(user_id, project_id)
 
+    def get_catalog_generation(self):
+        """Return an opaque value that changes whenever the catalog changes.
+
+        See :meth:`keystone.assignment.core.Manager.get_assignment_generation`.
+
+        """
+        return cache.get_region_id(COMPUTED_CATALOG_REGION)
+
     def add_endpoint_to_project(self, endpoint_id, project_id):
         self.driver.add_endpoint_to_project(endpoint_id, project_id)
         COMPUTED_CATALOG_REGION.invalidate()
@@ -19,6 +19,7 @@ import argparse
 import datetime
 import os
 import sys
+import time
 import uuid
 
 import migrate
@@ -42,6 +43,7 @@ from keystone import exception
 from keystone.federation import idp
 from keystone.federation import utils as mapping_engine
 from keystone.i18n import _
+from keystone.identity.backends import sql as sql_identity
 from keystone.server import backends
 
 CONF = keystone.conf.CONF
@@ -834,6 +836,140 @@ class TrustFlush(BaseApp):
         )
 
 
+class RevocationPrune(BaseApp):
+    """Prune expired revocation events from the backend."""
+
+    name = 'revocation_prune'
+
+    @classmethod
+    def add_argument_parser(cls, subparsers):
+        parser = super(RevocationPrune, cls).add_argument_parser(subparsers)
+
+        parser.add_argument('--batch-size', default=1000, type=int,
+                            help=('The maximum number of revocation events '
+                                  'to delete in a single transaction.'))
+        parser.add_argument('--time-budget', default=None, type=int,
+                            help=('The number of seconds after which no more '
+                                  'batches of revocation events are pruned. '
+                                  'If not supplied, every expired revocation '
+                                  'event is pruned.'))
+        return parser
+
+    @classmethod
+    def main(cls):
+        if CONF.command.batch_size < 1:
+            raise ValueError(_('--batch-size must be a positive integer'))
+
+        drivers = backends.load_backends()
+        revoke_manager = drivers['revoke_api']
+
+        start = time.monotonic()
+        pruned = revoke_manager.prune_expired_events(
+            batch_size=CONF.command.batch_size,
+            time_budget=CONF.command.time_budget)
+        elapsed = time.monotonic() - start
+
+        rate = pruned / elapsed if elapsed > 0 else float(pruned)
+        print(_('Pruned %(count)d revocation events in %(elapsed).2f seconds '
+                '(%(rate).1f events per second).') % {
+                    'count': pruned, 'elapsed': elapsed, 'rate': rate})
+
+
+class PasswordHashReport(BaseApp):
+    """Report the algorithms and costs the passwords are hashed with."""
+
+    name = 'password_hash_report'
+
+    @classmethod
+    def main(cls):
+        # NOTE: Passwords are only stored by the SQL identity driver, whatever
+        # driver the default domain uses.
+        counts = sql_identity.Identity().count_password_hashes()
+        if not counts:
+            print(_('No passwords are stored.'))
+            return
+
+        total = sum(entry['count'] for entry in counts)
+        outdated = sum(entry['count'] for entry in counts
+                       if entry['outdated'])
+        print('%-16s %-40s %10s %s' % (
+            _('algorithm'), _('cost'), _('passwords'), _('outdated')))
+        for entry in counts:
+            cost = ', '.join('%s=%s' % param
+                             for param in sorted(entry['params'].items()))
+            print('%-16s %-40s %10d %s' % (
+                entry['algorithm'], cost, entry['count'],
+                _('yes') if entry['outdated'] else _('no')))
+        print(_('%(outdated)d of %(total)d passwords are hashed with other '
+                'options than the current [identity] options, and are '
+                'hashed again when their users next authenticate if '
+                '[identity] rehash_passwords_on_authentication is set.') % {
+                    'outdated': outdated, 'total': total})
+        unknown = sum(entry['count'] for entry in counts
+                      if entry['algorithm'] == 'unknown')
+        if unknown:
+            print(_('%d passwords are hashed with an algorithm keystone does '
+                    'not support, and can not be used to authenticate.') %
+                  unknown)
+
+
+class ProjectPurge(BaseApp):
+    """Delete a project and its subtree, or a domain and all its projects."""
+
+    name = 'project_purge'
+
+    @classmethod
+    def add_argument_parser(cls, subparsers):
+        parser = super(ProjectPurge, cls).add_argument_parser(subparsers)
+
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--project-id', default=None,
+                           help=('The ID of the project to delete together '
+                                 'with its whole subtree. Every project of '
+                                 'the subtree must be disabled.'))
+        group.add_argument('--domain-id', default=None,
+                           help=('The ID of the domain to delete together '
+                                 'with all of its projects. The domain must '
+                                 'be disabled.'))
+        parser.add_argument('--batch-size', default=None, type=int,
+                            help=('The maximum number of projects to delete '
+                                  'in a single transaction. Defaults to '
+                                  '[resource] delete_batch_size.'))
+        return parser
+
+    @classmethod
+    def main(cls):
+        if not (CONF.command.project_id or CONF.command.domain_id):
+            raise ValueError(_('Either --project-id or --domain-id must be '
+                               'provided'))
+        if CONF.command.batch_size is not None:
+            if CONF.command.batch_size < 1:
+                raise ValueError(_('--batch-size must be a positive integer'))
+            CONF.set_override('delete_batch_size', CONF.command.batch_size,
+                              group='resource')
+
+        drivers = backends.load_backends()
+        resource_manager = drivers['resource_api']
+
+        def progress(deleted, total):
+            print(_('Deleted %(deleted)d of %(total)d projects.') % {
+                'deleted': deleted, 'total': total})
+
+        start = time.monotonic()
+        if CONF.command.domain_id:
+            resource_manager.delete_domain(CONF.command.domain_id,
+                                           progress=progress)
+            target = CONF.command.domain_id
+        else:
+            resource_manager.delete_project(CONF.command.project_id,
+                                            cascade=True, progress=progress)
+            target = CONF.command.project_id
+        elapsed = time.monotonic() - start
+
+        print(_('Deleted %(target)s in %(elapsed).2f seconds.') % {
+            'target': target, 'elapsed': elapsed})
+
+
 class MappingPurge(BaseApp):
     """Purge the mapping table."""
 
@@ -1316,8 +1452,11 @@ CMDS = [
     MappingPopulate,
     MappingPurge,
     MappingEngineTester,
+    PasswordHashReport,
+    ProjectPurge,
     ReceiptRotate,
     ReceiptSetup,
+    RevocationPrune,
     SamlIdentityProviderMetadata,
     TokenRotate,
     TokenSetup,
@@ -0,0 +1,68 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""A dogpile.cache proxy that counts the hits and misses of a region."""
+from dogpile.cache import api
+from dogpile.cache import proxy
+
+
+class RegionStatistics(object):
+    """The number of lookups of a cache region that found a value or not."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, values):
+        for value in values:
+            if value is api.NO_VALUE:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+
+class _StatisticsProxy(proxy.ProxyBackend):
+
+    def __init__(self, statistics):
+        super(_StatisticsProxy, self).__init__()
+        self._statistics = statistics
+
+    def get(self, key):
+        value = self.proxied.get(key)
+        self._statistics.count([value])
+        return value
+
+    def get_multi(self, keys):
+        values = self.proxied.get_multi(keys)
+        self._statistics.count(values)
+        return values
+
+    # NOTE: Newer releases of dogpile.cache read from backends that serialize
+    # their values through these methods instead of get() and get_multi().
+    def get_serialized(self, key):
+        value = self.proxied.get_serialized(key)
+        self._statistics.count([value])
+        return value
+
+    def get_serialized_multi(self, keys):
+        values = self.proxied.get_serialized_multi(keys)
+        self._statistics.count(values)
+        return values
@@ -21,6 +21,7 @@ from dogpile.cache import util
 from oslo_cache import core as cache
 
 from keystone.common.cache import _context_cache
+from keystone.common.cache import _statistics
 import keystone.conf
 
 
@@ -112,6 +113,9 @@ CACHE_INVALIDATION_REGION = create_region(name='invalidation region')
 
 register_model_handler = _context_cache._register_model_handler
 
+# The hit and miss counts of each configured region, by region name.
+_REGION_STATISTICS = {}
+
 
 def configure_cache(region=None):
     if region is None:
@@ -125,6 +129,9 @@ def configure_cache(region=None):
     # to oslo_cache lib somehow.
     if not configured:
         region.wrap(_context_cache._ResponseCacheProxy)
+        statistics = _REGION_STATISTICS.setdefault(
+            region.name, _statistics.RegionStatistics())
+        region.wrap(_statistics._StatisticsProxy(statistics))
 
         region_manager = RegionInvalidationManager(
             CACHE_INVALIDATION_REGION, region.name)
@@ -176,6 +183,47 @@ def configure_invalidation_region():
         CACHE_INVALIDATION_REGION.key_mangler = _sha1_mangle_key
 
 
+def get_region_id(region):
+    """Return the identifier of the current generation of a region.
+
+    The identifier changes every time the region is invalidated, so it can be
+    stored alongside data derived from the region's contents to tell when that
+    data has gone stale. ``None`` is returned when caching is disabled or the
+    region has not been configured.
+
+    """
+    if not CONF.cache.enabled:
+        return None
+    invalidator = region.region_invalidator
+    if not isinstance(invalidator, DistributedInvalidationStrategy):
+        return None
+    return invalidator._region_manager.region_id
+
+
+def get_region_statistics():
+    """Return the number of cache hits and misses of each region.
+
+    The counts cover the lookups made by this process since it configured the
+    region, or since :func:`reset_region_statistics` was last called. A
+    lookup is a hit if it found a value, either in the request local cache or
+    in the cache backend.
+
+    :returns: a dict mapping the name of each region to a dict with the
+              ``hits``, ``misses`` and ``hit_rate`` of the region
+
+    """
+    return dict(
+        (name, {'hits': statistics.hits, 'misses': statistics.misses,
+                'hit_rate': statistics.hit_rate})
+        for name, statistics in _REGION_STATISTICS.items())
+
+
+def reset_region_statistics():
+    """Reset the hit and miss counts of every region."""
+    for statistics in _REGION_STATISTICS.values():
+        statistics.reset()
+
+
 def get_memoization_decorator(group, expiration_group=None, region=None):
     if region is None:
         region = CACHE_REGION
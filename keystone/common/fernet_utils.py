@@ -11,14 +11,17 @@
 # under the License.
 
 import base64
+import collections
 import os
 import stat
+import struct
 
 from cryptography import fernet
 from oslo_log import log
 
 from keystone.common import utils
 import keystone.conf
+from keystone import exception
 
 
 LOG = log.getLogger(__name__)
@@ -33,6 +36,80 @@ CONF = keystone.conf.CONF
 # upgrades.
 NULL_KEY = base64.urlsafe_b64encode(b'\x00' * 32)
 
+# The layout of a decoded Fernet token, as defined in
+# https://github.com/fernet/spec
+FERNET_VERSION = 0x80
+TIMESTAMP_START = 1
+TIMESTAMP_END = 9
+IV_END = 25
+HMAC_LENGTH = 32
+BLOCK_LENGTH = 16
+# The version byte and the timestamp are the first 9 bytes of a token, which
+# are exactly the first 12 base64 characters.
+HEADER_B64_LENGTH = 12
+
+ParsedToken = collections.namedtuple('ParsedToken', ['version', 'timestamp'])
+
+
+def _decode_header(token):
+    try:
+        header = base64.urlsafe_b64decode(token[:HEADER_B64_LENGTH])
+    except (TypeError, ValueError):
+        return None
+    if len(header) != TIMESTAMP_END:
+        return None
+    return header
+
+
+def get_token_timestamp(token):
+    """Return the creation timestamp of a Fernet token.
+
+    Only the header of the token is decoded, so this is cheap, but nothing
+    about the token is verified.
+
+    :param token: a Fernet token, with or without padding
+    :type token: str or bytes
+    :returns: the timestamp as an integer, or None if the token is malformed
+
+    """
+    header = _decode_header(token)
+    if header is None:
+        return None
+    return struct.unpack_from('>Q', header, TIMESTAMP_START)[0]
+
+
+def parse_token(token):
+    """Check the structure of a Fernet token and read its header.
+
+    Only the header of the token is decoded; the length of the ciphertext is
+    worked out from the length of the encoded token, so the token is still
+    decoded just once, when it is decrypted. Nothing about the token is
+    verified beyond its structure; the HMAC still has to be checked by
+    decrypting the token.
+
+    :param token: a Fernet token, with or without padding
+    :type token: str or bytes
+    :returns: a :class:`ParsedToken` of the version and the creation
+              timestamp
+    :raises ValueError: if the token isn't a well formed Fernet token
+
+    """
+    header = _decode_header(token)
+    if header is None:
+        raise ValueError('Fernet token is not valid base64')
+
+    encoded_length = len(token.rstrip('=' if isinstance(token, str)
+                                      else b'='))
+    ciphertext_length = encoded_length * 3 // 4 - IV_END - HMAC_LENGTH
+    if (encoded_length % 4 == 1 or
+            ciphertext_length < BLOCK_LENGTH or
+            ciphertext_length % BLOCK_LENGTH or
+            header[0] != FERNET_VERSION):
+        raise ValueError('Fernet token is malformed')
+
+    timestamp = struct.unpack_from('>Q', header, TIMESTAMP_START)[0]
+    return ParsedToken(header[0], timestamp)
+
 
 class FernetUtils(object):
 
@@ -295,3 +372,154 @@ class FernetUtils(object):
             key_list.append(NULL_KEY)
 
         return key_list
+
+
+class KeyHintedMultiFernet(object):
+    """A ``fernet.MultiFernet`` that tries the most likely key first.
+
+    ``fernet.MultiFernet`` tries every key in turn until one of them validates
+    the token's HMAC, so with a large ``max_active_keys`` a token signed with
+    an old key pays for a failed HMAC check per newer key.
+
+    Tokens are always signed with whichever key was primary when they were
+    issued, which makes the creation time in the (unauthenticated) header of a
+    token a good hint for the key that signed it. This remembers the range of
+    creation times each key has successfully decrypted and tries the keys
+    whose range covers the token first, before falling back to the remaining
+    keys in the usual order. The hint only affects the order keys are tried
+    in, never whether a token is accepted.
+
+    """
+
+    def __init__(self, fernets):
+        self._fernets = list(fernets)
+        self._multi_fernet = fernet.MultiFernet(self._fernets)
+        self._timestamp_ranges = [None] * len(self._fernets)
+
+    def encrypt(self, msg):
+        return self._multi_fernet.encrypt(msg)
+
+    def _candidate_order(self, timestamp):
+        hinted = []
+        remaining = []
+        for index, timestamp_range in enumerate(self._timestamp_ranges):
+            if (timestamp is not None and timestamp_range is not None and
+                    timestamp_range[0] <= timestamp <= timestamp_range[1]):
+                hinted.append(index)
+            else:
+                remaining.append(index)
+        return hinted + remaining
+
+    def _remember(self, index, timestamp):
+        timestamp_range = self._timestamp_ranges[index]
+        if timestamp_range is None:
+            self._timestamp_ranges[index] = (timestamp, timestamp)
+        elif not timestamp_range[0] <= timestamp <= timestamp_range[1]:
+            self._timestamp_ranges[index] = (
+                min(timestamp_range[0], timestamp),
+                max(timestamp_range[1], timestamp))
+
+    def decrypt(self, msg, ttl=None):
+        timestamp = get_token_timestamp(msg)
+        for index in self._candidate_order(timestamp):
+            try:
+                plaintext = self._fernets[index].decrypt(msg, ttl)
+            except fernet.InvalidToken:
+                continue
+            if timestamp is not None:
+                self._remember(index, timestamp)
+            return plaintext
+        raise fernet.InvalidToken
+
+
+class FernetKeyRing(utils.KeyRing):
+    """An in-memory copy of a key repository.
+
+    Loading a key repository lists the directory, reads every key file and
+    builds a ``fernet.Fernet`` instance per key. Doing that for every token
+    that is issued or validated is expensive, so the key ring holds on to the
+    loaded keys and only reloads them when the key repository changes.
+
+    Changes are detected with a cheap signature of the repository: the inode
+    and modification time of the directory plus the names of the files in it.
+    Key rotation always renames files within the repository, and atomically
+    moving a synchronized repository into place replaces the directory, so
+    both are picked up without restarting keystone.
+
+    """
+
+    def __init__(self, key_repository, max_active_keys, config_group=None,
+                 use_null_key=False, check_interval=0):
+        super(FernetKeyRing, self).__init__(
+            ([], None, None), check_interval=check_interval)
+        self.key_utils = FernetUtils(
+            key_repository, max_active_keys, config_group)
+        self.use_null_key = use_null_key
+
+    def _get_signature(self):
+        key_repository = self.key_utils.key_repository
+        try:
+            stat_info = os.stat(key_repository)
+            filenames = tuple(sorted(os.listdir(key_repository)))
+        except OSError:
+            return None
+        return (stat_info.st_ino, stat_info.st_mtime_ns, filenames)
+
+    def _load(self):
+        keys = self.key_utils.load_keys(use_null_key=self.use_null_key)
+        crypto = None
+        hinted_crypto = None
+        if keys:
+            fernets = [fernet.Fernet(key) for key in keys]
+            crypto = fernet.MultiFernet(fernets)
+            hinted_crypto = KeyHintedMultiFernet(fernets)
+        return keys, crypto, hinted_crypto
+
+    def load(self, key_hints=False):
+        """Return the ``fernet.MultiFernet`` and the keys it was built from.
+
+        The keys are returned primary key first.
+
+        :param key_hints: If true, a :class:`KeyHintedMultiFernet` is returned
+                          instead of a ``fernet.MultiFernet``.
+        :raises keystone.exception.KeysNotFound: if the key repository is
+            empty or can't be read.
+
+        """
+        keys, crypto, hinted_crypto = self._get_state()
+        if crypto is None:
+            raise exception.KeysNotFound()
+        if key_hints:
+            return hinted_crypto, list(keys)
+        return crypto, list(keys)
+
+    @property
+    def crypto(self):
+        """Return a ``fernet.MultiFernet`` for the loaded keys."""
+        crypto, _ = self.load()
+        return crypto
+
+    @property
+    def hinted_crypto(self):
+        """Return a :class:`KeyHintedMultiFernet` for the loaded keys."""
+        crypto, _ = self.load(key_hints=True)
+        return crypto
+
+
+def get_key_ring(key_repository, max_active_keys, config_group=None,
+                 use_null_key=False, check_interval=0):
+    """Return the process-wide key ring for a key repository.
+
+    :param key_repository: directory containing the Fernet keys
+    :param max_active_keys: the number of keys held in rotation
+    :param config_group: the configuration group the repository belongs to
+    :param use_null_key: If true, a known key containing null bytes will be
+                         appended to the list of keys.
+    :param check_interval: minimum number of seconds between checks of the
+                           key repository for changes
+    :returns: a :class:`FernetKeyRing`
+
+    """
+    return utils.get_key_ring(
+        FernetKeyRing, key_repository, max_active_keys, config_group,
+        use_null_key=use_null_key, check_interval=check_interval)
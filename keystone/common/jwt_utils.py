@@ -10,9 +10,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import hashlib
+import os
+
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization
+from oslo_log import log
+
+from keystone.common import utils
+
+
+LOG = log.getLogger(__name__)
+
+PRIVATE_KEY_NAME = 'private.pem'
 
 
 def create_jws_keypair(private_key_path, public_key_path):
@@ -41,3 +53,135 @@ def create_jws_keypair(private_key_path, public_key_path):
                 format=serialization.PublicFormat.SubjectPublicKeyInfo
             )
         )
+
+
+def get_key_id(public_key):
+    """Return the key ID of a public key.
+
+    The key ID is the unpadded URL-safe base64 encoding of the SHA-256 digest
+    of the DER encoded public key, so every keystone node derives the same ID
+    for the same key without any coordination.
+
+    :param public_key: a ``cryptography`` public key object
+    :returns: the key ID as a string
+
+    """
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    digest = hashlib.sha256(der).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('utf-8')
+
+
+class JWSKeyRing(utils.KeyRing):
+    """An in-memory copy of the JWS key repositories.
+
+    Signing or validating a JWS token with a PEM encoded key means reading and
+    parsing the key first, and validation has to try every public key in the
+    repository. The key ring holds on to the parsed key objects, indexed by
+    key ID, and only reloads them when one of the key repositories changes.
+
+    Changes are detected the same way as for Fernet key repositories, with a
+    signature made of the inode and modification time of each repository
+    directory and the names of the files in it, plus the inode and
+    modification time of the private key itself.
+
+    """
+
+    def __init__(self, private_key_repository, public_key_repository,
+                 check_interval=0):
+        super(JWSKeyRing, self).__init__(
+            (None, None, {}), check_interval=check_interval)
+        self.private_key_repository = private_key_repository
+        self.public_key_repository = public_key_repository
+
+    @property
+    def private_key_path(self):
+        return os.path.join(self.private_key_repository, PRIVATE_KEY_NAME)
+
+    def _get_signature(self):
+        signature = []
+        try:
+            for repository in (self.private_key_repository,
+                               self.public_key_repository):
+                stat_info = os.stat(repository)
+                signature.append((stat_info.st_ino, stat_info.st_mtime_ns,
+                                  tuple(sorted(os.listdir(repository)))))
+            stat_info = os.stat(self.private_key_path)
+        except OSError:
+            return None
+        signature.append((stat_info.st_ino, stat_info.st_mtime_ns))
+        return tuple(signature)
+
+    def _load_private_key(self):
+        try:
+            with open(self.private_key_path, 'rb') as f:
+                return serialization.load_pem_private_key(
+                    f.read(), password=None, backend=default_backend()
+                )
+        except (OSError, ValueError) as e:
+            LOG.warning('Unable to load JWS private key %(path)s: %(error)s',
+                        {'path': self.private_key_path, 'error': e})
+            return None
+
+    def _load_public_keys(self):
+        public_keys = {}
+        try:
+            filenames = sorted(os.listdir(self.public_key_repository))
+        except OSError as e:
+            LOG.warning('Unable to read JWS public key repository %(path)s: '
+                        '%(error)s',
+                        {'path': self.public_key_repository, 'error': e})
+            return public_keys
+        for filename in filenames:
+            path = os.path.join(self.public_key_repository, filename)
+            try:
+                with open(path, 'rb') as f:
+                    public_key = serialization.load_pem_public_key(
+                        f.read(), backend=default_backend()
+                    )
+            except (OSError, ValueError) as e:
+                LOG.warning('Ignoring JWS public key %(path)s: %(error)s',
+                            {'path': path, 'error': e})
+                continue
+            public_keys[get_key_id(public_key)] = public_key
+        return public_keys
+
+    def _load(self):
+        private_key = self._load_private_key()
+        private_key_id = None
+        if private_key is not None:
+            private_key_id = get_key_id(private_key.public_key())
+        return private_key, private_key_id, self._load_public_keys()
+
+    def get_private_key(self):
+        """Return the private key used for signing and its key ID.
+
+        :returns: a tuple of the private key object and its key ID, or
+                  ``(None, None)`` if the private key can't be loaded
+
+        """
+        private_key, private_key_id, _ = self._get_state()
+        return private_key, private_key_id
+
+    def get_public_keys(self):
+        """Return the public keys used for validation, indexed by key ID."""
+        _, _, public_keys = self._get_state()
+        return dict(public_keys)
+
+
+def get_key_ring(private_key_repository, public_key_repository,
+                 check_interval=0):
+    """Return the process-wide key ring for a pair of JWS key repositories.
+
+    :param private_key_repository: directory containing the private key
+    :param public_key_repository: directory containing the public keys
+    :param check_interval: minimum number of seconds between checks of the
+                           key repositories for changes
+    :returns: a :class:`JWSKeyRing`
+
+    """
+    return utils.get_key_ring(
+        JWSKeyRing, private_key_repository, public_key_repository,
+        check_interval=check_interval)
@@ -13,7 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
+from concurrent.futures import process
 import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
 
 from oslo_log import log
 import passlib.hash
@@ -73,18 +80,191 @@ def verify_length_and_trunc_password(password):
         raise exception.ValidationError(attribute='string', target='password')
 
 
-def check_password(password, hashed):
+class _VerificationStats(object):
+    """Statistics of the password hash verifications of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._rejected = 0
+        self._latency = {}
+
+    def enqueued(self):
+        with self._lock:
+            self._queue_depth += 1
+            self._max_queue_depth = max(self._max_queue_depth,
+                                        self._queue_depth)
+
+    def dequeued(self):
+        with self._lock:
+            self._queue_depth -= 1
+
+    def rejected(self):
+        with self._lock:
+            self._rejected += 1
+
+    def verified(self, algorithm, elapsed):
+        with self._lock:
+            latency = self._latency.setdefault(
+                algorithm, {'count': 0, 'total': 0.0, 'max': 0.0})
+            latency['count'] += 1
+            latency['total'] += elapsed
+            latency['max'] = max(latency['max'], elapsed)
+
+    def get(self):
+        with self._lock:
+            return {'queue_depth': self._queue_depth,
+                    'max_queue_depth': self._max_queue_depth,
+                    'rejected': self._rejected,
+                    'latency': {algorithm: dict(latency) for
+                                algorithm, latency in self._latency.items()}}
+
+
+_STATS = _VerificationStats()
+
+
+def get_verification_stats():
+    """Return statistics of the password hash verifications of this process.
+
+    :returns: a dict with the number of verifications waiting for or being
+              computed by a worker process (``queue_depth``), the largest
+              such number seen (``max_queue_depth``), the number rejected
+              because too many were waiting (``rejected``), and, for each
+              hashing algorithm, the number of hashes verified and the total
+              and maximum number of seconds that took (``latency``).
+
+    """
+    return _STATS.get()
+
+
+def _verify(password_utf8, hashed):
+    # NOTE: This runs in the worker processes, so it only gets picklable
+    # arguments and returns the time taken along with the result.
+    hasher = _get_hasher_from_ident(hashed)
+    start = time.monotonic()
+    result = hasher.verify(password_utf8, hashed)
+    return result, time.monotonic() - start
+
+
+def _get_worker_executable():
+    """Return the Python interpreter to start the worker processes with."""
+    if CONF.identity.password_hash_worker_executable:
+        return CONF.identity.password_hash_worker_executable
+    # NOTE: Under a web server such as uWSGI or Apache mod_wsgi,
+    # sys.executable is the web server's binary rather than a Python
+    # interpreter, so fall back to the interpreter of the installation
+    # keystone runs from.
+    if os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+    return os.path.join(sys.exec_prefix, 'bin',
+                        'python%d.%d' % sys.version_info[:2])
+
+
+class _VerificationExecutor(object):
+    """Verify, or make, password hashes in a pool of worker processes.
+
+    At most ``queue_size`` verifications may wait for one of the ``workers``
+    processes to be free; any further verification is rejected at once
+    rather than waiting too.
+
+    """
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        # NOTE: The worker processes are started from a fork server rather
+        # than forked from this process, which has other threads that may
+        # hold locks, such as those of the logging handlers or the database
+        # connection pools, at the time of the fork. Python 3.6 can't pass
+        # the start method to the pool, so it forks the workers.
+        if sys.version_info >= (3, 7):
+            context = multiprocessing.get_context('forkserver')
+            context.set_executable(_get_worker_executable())
+            self._pool = futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=context)
+        else:
+            self._pool = futures.ProcessPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            _STATS.rejected()
+            raise exception.PasswordVerificationUnavailable(
+                retry_after=CONF.identity.password_hash_retry_after)
+        _STATS.enqueued()
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            _STATS.dequeued()
+            self._slots.release()
+
+    def verify(self, password_utf8, hashed):
+        return self.submit(_verify, password_utf8, hashed)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    workers = CONF.identity.password_hash_workers
+    queue_size = CONF.identity.password_hash_queue_size
+    with _executor_lock:
+        if (_executor is None or _executor.workers != workers or
+                _executor.queue_size != queue_size):
+            if _executor is not None:
+                _executor.shutdown()
+            _executor = _VerificationExecutor(workers, queue_size)
+        return _executor
+
+
+def _discard_executor(executor):
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown()
+
+
+def check_password(password, hashed, offload=False):
     """Check that a plaintext password matches hashed.
 
     hashpw returns the salt value concatenated with the actual hash value.
     It extracts the actual salt if this value is then passed as the salt.
 
+    :param offload: whether to verify the hash in a worker process, when
+                    ``[identity] password_hash_workers`` is set. Checks made
+                    to authenticate a request should be offloaded.
+    :raises keystone.exception.PasswordVerificationUnavailable: If the hash
+        was to be verified in a worker process, but too many verifications
+        are already waiting for one.
+
     """
     if password is None or hashed is None:
         return False
     password_utf8 = verify_length_and_trunc_password(password).encode('utf-8')
     hasher = _get_hasher_from_ident(hashed)
-    return hasher.verify(password_utf8, hashed)
+    if offload and CONF.identity.password_hash_workers:
+        executor = _get_executor()
+        try:
+            result, elapsed = executor.verify(password_utf8, hashed)
+        except process.BrokenProcessPool:
+            # A worker process died, start new ones on the next check.
+            LOG.warning('A password hash verification worker process '
+                        'terminated abruptly, verifying the hash inline.')
+            _discard_executor(executor)
+            result, elapsed = _verify(password_utf8, hashed)
+    else:
+        result, elapsed = _verify(password_utf8, hashed)
+    _STATS.verified(hasher.name, elapsed)
+    return result
 
 
 def hash_user_password(user):
@@ -96,10 +276,9 @@ def hash_user_password(user):
     return dict(user, password=hash_password(password))
 
 
-def hash_password(password):
-    """Hash a password. Harder."""
+def _get_configured_hasher():
+    """Return the configured hasher and the parameters to hash with."""
     params = {}
-    password_utf8 = verify_length_and_trunc_password(password).encode('utf-8')
     conf_hasher = CONF.identity.password_hash_algorithm
     hasher = _HASHER_NAME_MAP.get(conf_hasher)
 
@@ -121,4 +300,72 @@ def hash_password(password):
         if CONF.identity.salt_bytesize:
             params['salt_size'] = CONF.identity.salt_bytesize
 
-    return hasher.using(**params).hash(password_utf8)
+    return hasher, params
+
+
+def _hash(password_utf8, hasher_name, params):
+    # NOTE: This may run in the worker processes, so it only gets picklable
+    # arguments.
+    return _HASHER_NAME_MAP[hasher_name].using(**params).hash(password_utf8)
+
+
+def hash_password(password, offload=False):
+    """Hash a password. Harder.
+
+    :param offload: whether to make the hash in a worker process, when
+                    ``[identity] password_hash_workers`` is set, as for
+                    :func:`check_password`.
+    :raises keystone.exception.PasswordVerificationUnavailable: If the hash
+        was to be made in a worker process, but too many verifications are
+        already waiting for one.
+
+    """
+    password_utf8 = verify_length_and_trunc_password(password).encode('utf-8')
+    hasher, params = _get_configured_hasher()
+    if offload and CONF.identity.password_hash_workers:
+        executor = _get_executor()
+        try:
+            return executor.submit(_hash, password_utf8, hasher.name, params)
+        except process.BrokenProcessPool:
+            LOG.warning('A password hashing worker process terminated '
+                        'abruptly, hashing the password inline.')
+            _discard_executor(executor)
+    return _hash(password_utf8, hasher.name, params)
+
+
+def needs_rehash(hashed):
+    """Check whether a password hash was made with other settings.
+
+    A hash needs to be remade when its algorithm, its cost or the size of its
+    salt differ from those ``hash_password()`` would use with the current
+    ``[identity]`` options.
+
+    """
+    hasher, params = _get_configured_hasher()
+    if _get_hasher_from_ident(hashed) is not hasher:
+        return True
+    # NOTE: passlib only reports the rounds as out of date when the desired
+    # rounds are set, so compare against the default rounds when the option
+    # is unset, as the hash would be made with those.
+    params.setdefault('rounds', hasher.default_rounds)
+    salt_size = params.pop('salt_size', None)
+    if hasher.using(**params).needs_update(hashed):
+        return True
+    return (salt_size is not None and
+            len(hasher.from_string(hashed).salt) != salt_size)
+
+
+def describe_hash(hashed):
+    """Return the algorithm and the cost parameters of a password hash.
+
+    :returns: a tuple of the name of the hashing algorithm and a dict of its
+              cost parameters, such as ``rounds``, found in the hash.
+
+    """
+    hasher = _get_hasher_from_ident(hashed)
+    ref = hasher.from_string(hashed)
+    params = {'rounds': ref.rounds}
+    if hasher is passlib.hash.scrypt:
+        params['block_size'] = ref.block_size
+        params['parallelism'] = ref.parallelism
+    return hasher.name, params
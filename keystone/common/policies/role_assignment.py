@@ -64,6 +64,20 @@ role_assignment_policies = [
         deprecated_rule=deprecated_list_role_assignments_for_tree,
         deprecated_reason=DEPRECATED_REASON,
         deprecated_since=versionutils.deprecated.TRAIN),
+    policy.DocumentedRuleDefault(
+        name=base.IDENTITY % 'create_grants',
+        check_str=base.SYSTEM_ADMIN,
+        scope_types=['system'],
+        description='Create many role assignments at once.',
+        operations=[{'path': '/v3/role_assignments',
+                     'method': 'PUT'}]),
+    policy.DocumentedRuleDefault(
+        name=base.IDENTITY % 'revoke_grants',
+        check_str=base.SYSTEM_ADMIN,
+        scope_types=['system'],
+        description='Remove many role assignments at once.',
+        operations=[{'path': '/v3/role_assignments',
+                     'method': 'DELETE'}]),
 
 ]
 
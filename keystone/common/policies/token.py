@@ -42,6 +42,9 @@ SYSTEM_USER_OR_SERVICE_OR_TOKEN_SUBJECT = (
     '(role:reader and system_scope:all) '  # nosec
     'or rule:service_role or rule:token_subject'  # nosec
 )
+SYSTEM_USER_OR_SERVICE = (
+    '(role:reader and system_scope:all) or rule:service_role'  # nosec
+)
 
 
 token_policies = [
@@ -65,6 +68,13 @@ token_policies = [
         deprecated_rule=deprecated_validate_token,
         deprecated_reason=DEPRECATED_REASON,
         deprecated_since=versionutils.deprecated.TRAIN),
+    policy.DocumentedRuleDefault(
+        name=base.IDENTITY % 'validate_tokens',
+        check_str=SYSTEM_USER_OR_SERVICE,
+        scope_types=['system', 'domain', 'project'],
+        description='Validate a batch of tokens.',
+        operations=[{'path': '/v3/auth/tokens/validate',
+                     'method': 'POST'}]),
     policy.DocumentedRuleDefault(
         name=base.IDENTITY % 'revoke_token',
         check_str=SYSTEM_ADMIN_OR_TOKEN_SUBJECT,
@@ -0,0 +1,24 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import importlib
+
+# NOTE: Every server maintains the project_ancestor table by now, so rebuild
+# it as the data migration did, to index the projects that servers running
+# the previous release created since then.
+_data_migration = importlib.import_module(
+    'keystone.common.sql.data_migration_repo.versions.'
+    '079_migrate_add_project_ancestor_table')
+
+
+def upgrade(migrate_engine):
+    _data_migration.upgrade(migrate_engine)
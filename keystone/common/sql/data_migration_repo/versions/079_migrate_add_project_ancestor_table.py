@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import sqlalchemy as sql
+
+# NOTE: The project hierarchy is indexed by the project_ancestor table, which
+# holds a row linking each project to itself and to each of its parents. The
+# rows are (re)built here from the parent_id column. Servers still running the
+# previous release during a rolling upgrade create projects without indexing
+# them, so the contract phase of this migration builds the rows again once
+# every server maintains the table.
+NULL_DOMAIN_ID = '<<keystone.domain.root>>'
+
+
+def upgrade(migrate_engine):
+    meta = sql.MetaData()
+    meta.bind = migrate_engine
+
+    project_table = sql.Table('project', meta, autoload=True)
+    project_ancestor_table = sql.Table('project_ancestor', meta,
+                                       autoload=True)
+
+    # NOTE: Read the hierarchy in the transaction that replaces the rows,
+    # locking the projects, so that they cannot be moved or deleted between
+    # reading the parent_id column and writing the index.
+    with migrate_engine.begin() as connection:
+        query = sql.select([project_table.c.id,
+                            project_table.c.parent_id]).with_for_update()
+        parents = {}
+        for project in connection.execute(query):
+            if project.id != NULL_DOMAIN_ID:
+                parents[project.id] = project.parent_id
+
+        rows = []
+        for project_id in parents:
+            ancestor_id, depth = project_id, 0
+            examined = set()
+            # Stop at a cycle, leaving the project out of the index so that
+            # the hierarchy of the project is still read from the parent_id
+            # column.
+            while ancestor_id is not None and ancestor_id not in examined:
+                examined.add(ancestor_id)
+                rows.append({'project_id': project_id,
+                             'ancestor_id': ancestor_id,
+                             'depth': depth})
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+            if ancestor_id is not None:
+                del rows[-len(examined):]
+
+        connection.execute(project_ancestor_table.delete())
+        for start in range(0, len(rows), 1000):
+            connection.execute(project_ancestor_table.insert(),
+                               rows[start:start + 1000])
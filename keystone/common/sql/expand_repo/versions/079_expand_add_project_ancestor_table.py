@@ -0,0 +1,43 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import sqlalchemy as sql
+
+
+def upgrade(migrate_engine):
+    meta = sql.MetaData()
+    meta.bind = migrate_engine
+
+    project_table = sql.Table('project', meta, autoload=True)
+
+    project_ancestor_table = sql.Table(
+        'project_ancestor',
+        meta,
+        sql.Column('project_id', sql.String(64),
+                   sql.ForeignKey(project_table.c.id, ondelete='CASCADE'),
+                   nullable=False, primary_key=True),
+        sql.Column('ancestor_id', sql.String(64),
+                   sql.ForeignKey(project_table.c.id, ondelete='CASCADE'),
+                   nullable=False, primary_key=True),
+        sql.Column('depth', sql.Integer, nullable=False),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+    project_ancestor_table.create()
+
+    sql.Index('ix_project_ancestor_ancestor_id_depth',
+              project_ancestor_table.c.ancestor_id,
+              project_ancestor_table.c.depth).create()
+
+    # The children of a project are looked up by parent_id, both to walk the
+    # hierarchy and to find projects missing from project_ancestor.
+    sql.Index('ix_project_parent_id', project_table.c.parent_id).create()
@@ -22,6 +22,8 @@ import hashlib
 import itertools
 import os
 import pwd
+import threading
+import time
 import uuid
 
 from oslo_log import log
@@ -489,3 +491,89 @@ def create_directory(directory, keystone_user_id=None, keystone_group_id=None):
                 'Unable to change the ownership of key repository without '
                 'a keystone user ID and keystone group ID both being '
                 'provided: %s', directory)
+
+
+class KeyRing(object):
+    """Base class of an in-memory copy of key repositories.
+
+    Subclasses provide a cheap signature of the repositories with
+    ``_get_signature()``, such as the inode and modification time of each
+    repository directory and the names of the files in it, and load the keys
+    with ``_load()``. The keys are only loaded again once the signature
+    changes, which is checked at most once every ``check_interval`` seconds.
+
+    """
+
+    def __init__(self, initial_state, check_interval=0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = None
+        # NOTE: Everything loaded from the repositories is swapped in
+        # together so that readers always see a consistent set.
+        self._state = initial_state
+
+    def _get_signature(self):
+        """Return a signature of the repositories, or None if unreadable."""
+        raise NotImplementedError()
+
+    def _load(self):
+        """Load the keys from the repositories and return the new state."""
+        raise NotImplementedError()
+
+    def _get_state(self):
+        self._refresh()
+        return self._state
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (self._last_check is not None and self._signature is not None and
+                now - self._last_check < self.check_interval):
+            return
+
+        signature = self._get_signature()
+        if signature is not None and signature == self._signature:
+            self._last_check = now
+            return
+
+        with self._lock:
+            # NOTE: Another thread may have reloaded the keys while we were
+            # waiting on the lock, in which case there is nothing left to do.
+            if signature is not None and signature == self._signature:
+                return
+            self._state = self._load()
+            # NOTE: If a repository couldn't be read, don't remember a
+            # signature so that the next call tries to load it again.
+            self._signature = signature
+            self._last_check = now
+
+
+_KEY_RINGS = {}
+_KEY_RINGS_LOCK = threading.Lock()
+
+
+def get_key_ring(key_ring_class, *args, check_interval=0, **kwargs):
+    """Return the process-wide key ring for some key repositories.
+
+    Key rings are shared by everything that uses the same repositories, so
+    the keys are only loaded and kept in memory once per process.
+
+    :param key_ring_class: the :class:`KeyRing` subclass to build
+    :param args: the positional arguments to build the key ring with, which
+                 also identify it along with ``kwargs``
+    :param check_interval: minimum number of seconds between checks of the
+                           key repositories for changes
+    :param kwargs: the keyword arguments to build the key ring with
+    :returns: an instance of ``key_ring_class``
+
+    """
+    ring_id = (key_ring_class,) + args + tuple(sorted(kwargs.items()))
+    key_ring = _KEY_RINGS.get(ring_id)
+    if key_ring is None:
+        with _KEY_RINGS_LOCK:
+            key_ring = _KEY_RINGS.get(ring_id)
+            if key_ring is None:
+                key_ring = key_ring_class(*args, **kwargs)
+                _KEY_RINGS[ring_id] = key_ring
+    key_ring.check_interval = check_interval
+    return key_ring
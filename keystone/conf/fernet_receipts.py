@@ -55,11 +55,28 @@ highest numerical index), and one secondary key (every other index). Increasing
 this value means that additional secondary keys will be kept in the rotation.
 """))
 
+key_repository_check_interval = cfg.IntOpt(
+    'key_repository_check_interval',
+    default=0,
+    min=0,
+    help=utils.fmt("""
+Keystone keeps the keys in `[fernet_receipts] key_repository` in memory and
+only reloads them when the repository changes. This controls the minimum number
+of seconds between checks of the key repository for changes, such as those made
+by `keystone-manage fernet_rotate`. The default value of 0 checks the
+repository on every receipt operation, which is cheap compared to reading the
+keys. Increasing this value reduces filesystem access further, at the cost of
+delaying how soon a rotated or synchronized key repository is picked up. Key
+files must be replaced by renaming them into place rather than being rewritten
+in place for changes to be detected.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
     key_repository,
     max_active_keys,
+    key_repository_check_interval,
 ]
 
 
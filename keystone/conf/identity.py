@@ -123,7 +123,9 @@ This option represents a trade off between security and performance. Higher
 values lead to slower performance, but higher security. Changing this option
 will only affect newly created passwords as existing password hashes already
 have a fixed number of rounds applied, so it is safe to tune this option in a
-running cluster.
+running cluster. Existing password hashes are remade with the new number of
+rounds when their users next authenticate, see `[identity]
+rehash_passwords_on_authentication`.
 
 The default for bcrypt is 12, must be between 4 and 31, inclusive.
 
@@ -166,6 +168,70 @@ This option is only used when the `password_hash_algorithm` option is set
 to `scrypt`. Defaults to 1.
 """))
 
+password_hash_workers = cfg.IntOpt(
+    'password_hash_workers',
+    default=0,
+    min=0,
+    help=utils.fmt("""
+The number of worker processes that keystone should verify the password hashes
+of password and application credential authentication requests in. This keeps
+the threads serving requests free for the requests that need no hashing, such
+as token validation, when many users authenticate at once. Each keystone
+process has its own workers. A value of zero (`0`) verifies the hashes on the
+thread serving the request.
+"""))
+
+password_hash_queue_size = cfg.IntOpt(
+    'password_hash_queue_size',
+    default=16,
+    min=0,
+    help=utils.fmt("""
+The number of password hash verifications that may wait for a worker process,
+in addition to those being computed, before keystone rejects further
+authentication requests with `503 Service Unavailable` and a `Retry-After`
+header. This option is only used when `[identity] password_hash_workers` is
+set.
+"""))
+
+password_hash_retry_after = cfg.IntOpt(
+    'password_hash_retry_after',
+    default=1,
+    min=1,
+    help=utils.fmt("""
+The number of seconds that keystone asks clients to wait, in the
+`Retry-After` header, before retrying an authentication request rejected
+because too many password hash verifications were waiting. This option is only
+used when `[identity] password_hash_workers` is set.
+"""))
+
+password_hash_worker_executable = cfg.StrOpt(
+    'password_hash_worker_executable',
+    help=utils.fmt("""
+The path of the Python interpreter that keystone starts the password hash
+worker processes with. When unset, keystone uses the interpreter it runs in,
+or, when keystone runs inside a web server such as uWSGI or Apache `mod_wsgi`,
+where that is the web server's own binary, the interpreter of the Python
+installation keystone runs from. Set this if that interpreter is not the one
+keystone is installed for. This option is only used when `[identity]
+password_hash_workers` is set.
+"""))
+
+rehash_passwords_on_authentication = cfg.BoolOpt(
+    'rehash_passwords_on_authentication',
+    default=True,
+    help=utils.fmt("""
+If set to true, when a user authenticates with a password whose hash was made
+with another algorithm, number of rounds or salt size than the `[identity]
+password_hash_algorithm`, `[identity] password_hash_rounds`, `[identity]
+scrypt_block_size`, `[identity] scrypt_parallelism` and `[identity]
+salt_bytesize` options now give, keystone hashes the password again with the
+current options and stores the new hash. This migrates existing passwords to
+new hashing options as users log in, at the cost of hashing the password once
+more on their first login. The password creation and expiry dates are kept.
+`keystone-manage password_hash_report` reports how many passwords are hashed
+with each algorithm and cost.
+"""))
+
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
     default_domain_id,
@@ -182,6 +248,11 @@ ALL_OPTS = [
     scrypt_block_size,
     scrypt_paralellism,
     salt_bytesize,
+    password_hash_workers,
+    password_hash_queue_size,
+    password_hash_retry_after,
+    password_hash_worker_executable,
+    rehash_passwords_on_authentication,
 ]
 
 
@@ -42,11 +42,28 @@ required to issue JWS tokens. This option is only applicable in deployments
 issuing JWS tokens and setting `keystone.conf [token] provider = jws`.
 """))
 
+key_repository_check_interval = cfg.IntOpt(
+    'key_repository_check_interval',
+    default=0,
+    min=0,
+    help=utils.fmt("""
+Keystone keeps the parsed keys from `[jwt_tokens] jws_private_key_repository`
+and `[jwt_tokens] jws_public_key_repository` in memory and only reloads them
+when one of the repositories changes. This controls the minimum number of
+seconds between checks of the key repositories for changes. The default value
+of 0 checks the repositories on every token operation, which is cheap compared
+to reading and parsing the keys. Increasing this value reduces filesystem
+access further, at the cost of delaying how soon new or removed keys are
+picked up. Key files must be replaced by renaming them into place rather than
+being rewritten in place for changes to be detected.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
     jws_public_key_repository,
-    jws_private_key_repository
+    jws_private_key_repository,
+    key_repository_check_interval
 ]
 
 
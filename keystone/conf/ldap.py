@@ -70,6 +70,39 @@ from the LDAP server when listing objects. A value of zero (`0`) disables
 paging.
 """))
 
+lookup_batch_size = cfg.IntOpt(
+    'lookup_batch_size',
+    default=100,
+    min=1,
+    help=utils.fmt("""
+The maximum number of objects that keystone should look up by ID in a single
+LDAP search, such as when resolving the members of a group. Larger values mean
+fewer searches, each with a longer filter.
+"""))
+
+entity_cache_size = cfg.IntOpt(
+    'entity_cache_size',
+    default=0,
+    min=0,
+    help=utils.fmt("""
+The maximum number of entries that keystone should keep in its in-memory cache
+of LDAP users and groups, and of the members of groups. Once the cache is full,
+the least recently used entry is evicted to make room for a new one. The cache
+is separate for users and for groups, and for each domain. A value of zero
+(`0`) disables the cache.
+"""))
+
+entity_cache_time = cfg.IntOpt(
+    'entity_cache_time',
+    default=60,
+    min=1,
+    help=utils.fmt("""
+The number of seconds for which an entry of the LDAP entity cache is used
+before it is looked up in the LDAP server again. Changes made directly in the
+directory may take this long to be seen by keystone. This has no effect unless
+`[ldap] entity_cache_size` is set.
+"""))
+
 alias_dereferencing = cfg.StrOpt(
     'alias_dereferencing',
     default='default',
@@ -484,6 +517,9 @@ ALL_OPTS = [
     suffix,
     query_scope,
     page_size,
+    lookup_batch_size,
+    entity_cache_size,
+    entity_cache_time,
     alias_dereferencing,
     debug_level,
     chase_referrals,
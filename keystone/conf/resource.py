@@ -92,6 +92,19 @@ with a URL-unsafe domain name will fail, thereby forcing all domain names to be
 updated to be URL-safe.
 """))
 
+delete_batch_size = cfg.IntOpt(
+    'delete_batch_size',
+    default=100,
+    min=1,
+    help=utils.fmt("""
+The maximum number of projects removed in a single database transaction when a
+domain or a project subtree is deleted. Projects are deleted one level of the
+hierarchy at a time, starting from the leaves, and their role assignments,
+credentials, trusts and limits are removed with one statement per batch.
+Smaller batches hold database locks for less time; larger batches finish
+sooner.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
@@ -103,6 +116,7 @@ ALL_OPTS = [
     admin_project_name,
     project_name_url_safe,
     domain_name_url_safe,
+    delete_batch_size,
 ]
 
 
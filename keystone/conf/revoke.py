@@ -51,6 +51,39 @@ Time to cache the revocation list and the revocation events (in seconds). This
 has no effect unless global and `[revoke] caching` are both enabled.
 """))
 
+index_refresh_interval = cfg.IntOpt(
+    'index_refresh_interval',
+    default=1,
+    min=0,
+    help=utils.fmt("""
+Each keystone process keeps an in-memory index of revocation events that
+tokens are checked against, and refreshes it by fetching only the events that
+were revoked since its last refresh. This controls the minimum number of
+seconds between those refreshes. Token validations in between are checked
+against the index without querying the revocation backend. The default value
+of 1 delays when revocations made by other keystone processes take effect by
+up to a second; increasing it further reduces load on the revocation backend
+at the cost of longer delays. A value of 0 refreshes the index on every token
+validation, so revocations made by other processes take effect immediately.
+Revocations made by a process are always applied to its own index immediately.
+"""))
+
+prune_interval = cfg.IntOpt(
+    'prune_interval',
+    default=300,
+    min=0,
+    help=utils.fmt("""
+Expired revocation events are removed from the backend as part of recording a
+new revocation event. This controls the minimum number of seconds between two
+such removals in a keystone process. By default, expired events are removed at
+most once every five minutes, which keeps recording revocation events cheap
+when many tokens are revoked at once. Expired events never match a valid
+token, so leaving them in the backend a little longer does not change which
+tokens are revoked. A value of 0 removes expired events every time an event is
+recorded. Expired events can also be removed periodically with
+`keystone-manage revocation_prune`.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
@@ -58,6 +91,8 @@ ALL_OPTS = [
     expiration_buffer,
     caching,
     cache_time,
+    index_refresh_interval,
+    prune_interval,
 ]
 
 
@@ -118,6 +118,17 @@ the built-in expiry time. This allows long running operations to succeed.
 Defaults to two days.
 """))
 
+max_batch_validation_size = cfg.IntOpt(
+    'max_batch_validation_size',
+    default=100,
+    min=1,
+    help=utils.fmt("""
+The maximum number of tokens that may be submitted in a single request to
+`POST /v3/auth/tokens/validate`. Larger batches amortize the per-request
+overhead for services that validate many tokens at once, but also increase the
+amount of work a single request can ask keystone to do.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
@@ -129,6 +140,7 @@ ALL_OPTS = [
     allow_rescope_scoped_token,
     cache_on_issue,
     allow_expired_window,
+    max_batch_validation_size,
 ]
 
 
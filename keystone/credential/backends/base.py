@@ -16,6 +16,7 @@ import abc
 
 from oslo_log import log
 
+from keystone.common import driver_hints
 from keystone import exception
 
 
@@ -96,6 +97,21 @@ class CredentialDriverBase(object, metaclass=abc.ABCMeta):
         """Delete all credentials for a project."""
         self._delete_credentials(lambda cr: cr['project_id'] == project_id)
 
+    def delete_credentials_for_projects(self, project_ids):
+        """Delete all credentials for a list of projects.
+
+        :returns: a list of the deleted credentials. Used for cache
+            invalidating.
+
+        """
+        credentials = []
+        for project_id in project_ids:
+            hints = driver_hints.Hints()
+            hints.add_filter('project_id', project_id)
+            credentials.extend(self.list_credentials(hints))
+            self.delete_credentials_for_project(project_id)
+        return credentials
+
     @abc.abstractmethod
     def delete_credentials_for_user(self, user_id):
         """Delete all credentials for a user."""
@@ -112,6 +112,16 @@ class Credential(base.CredentialDriverBase):
             query = query.filter_by(project_id=project_id)
             query.delete()
 
+    def delete_credentials_for_projects(self, project_ids):
+        if not project_ids:
+            return []
+        with sql.session_for_write() as session:
+            query = session.query(CredentialModel)
+            query = query.filter(CredentialModel.project_id.in_(project_ids))
+            credentials = [ref.to_dict() for ref in query.all()]
+            query.delete(synchronize_session=False)
+        return credentials
+
     @oslo_db_api.wrap_db_retry(retry_on_deadlock=True)
     def delete_credentials_for_user(self, user_id):
         with sql.session_for_write() as session:
@@ -221,6 +221,18 @@ class Manager(manager.Manager):
                                                        cred['user_id'],
                                                        None)
 
+    def delete_credentials_for_projects(self, project_ids):
+        """Delete all credentials for a list of projects."""
+        creds = self.driver.delete_credentials_for_projects(project_ids)
+        for cred in creds:
+            self._get_credential.invalidate(self, cred['id'])
+            self._list_credentials_for_user.invalidate(self,
+                                                       cred['user_id'],
+                                                       cred['type'])
+            self._list_credentials_for_user.invalidate(self,
+                                                       cred['user_id'],
+                                                       None)
+
     def delete_credentials_for_user(self, user_id):
         """Delete all credentials for a user."""
         creds = self.driver.list_credentials_for_user(user_id)
@@ -41,15 +41,10 @@ MAX_ACTIVE_KEYS = 3
 
 
 def get_multi_fernet_keys():
-    key_utils = fernet_utils.FernetUtils(
+    key_ring = fernet_utils.get_key_ring(
         CONF.credential.key_repository, MAX_ACTIVE_KEYS,
-        'credential')
-    keys = key_utils.load_keys(use_null_key=True)
-
-    fernet_keys = [fernet.Fernet(key) for key in keys]
-    crypto = fernet.MultiFernet(fernet_keys)
-
-    return crypto, keys
+        'credential', use_null_key=True)
+    return key_ring.load()
 
 
 def primary_key_hash(keys):
@@ -95,11 +90,7 @@ class Provider(core.Provider):
         :param credential: an encrypted credential string
         :returns: a decrypted credential
         """
-        key_utils = fernet_utils.FernetUtils(
-            CONF.credential.key_repository, MAX_ACTIVE_KEYS)
-        keys = key_utils.load_keys(use_null_key=True)
-        fernet_keys = [fernet.Fernet(key) for key in keys]
-        crypto = fernet.MultiFernet(fernet_keys)
+        crypto, _ = get_multi_fernet_keys()
 
         try:
             if isinstance(credential, str):
@@ -632,6 +632,25 @@ class Gone(Error):
     title = http.client.responses[http.client.GONE]
 
 
+class ServiceUnavailable(Error):
+    message_format = _("The service is temporarily unavailable, please retry"
+                       " later.")
+    code = int(http.client.SERVICE_UNAVAILABLE)
+    title = http.client.responses[http.client.SERVICE_UNAVAILABLE]
+
+    def __init__(self, message=None, retry_after=None, **kwargs):
+        # The number of seconds after which the request may be retried, sent
+        # to the client in the Retry-After header.
+        self.retry_after = retry_after
+        super(ServiceUnavailable, self).__init__(
+            message, retry_after=retry_after, **kwargs)
+
+
+class PasswordVerificationUnavailable(ServiceUnavailable):
+    message_format = _("Too many passwords are being verified, please retry"
+                       " in %(retry_after)s seconds.")
+
+
 class ConfigFileNotFound(UnexpectedError):
     debug_message_format = _("The Keystone configuration file %(config_file)s "
                              "could not be found.")
@@ -150,18 +150,29 @@ class Manager(manager.Manager):
 
     def create_sp(self, sp_id, service_provider):
         sp_ref = self.driver.create_sp(sp_id, service_provider)
-        self.get_enabled_service_providers.invalidate(self)
+        self._service_providers_changed(sp_id)
         return sp_ref
 
     def delete_sp(self, sp_id):
         self.driver.delete_sp(sp_id)
-        self.get_enabled_service_providers.invalidate(self)
+        self._service_providers_changed(sp_id)
 
     def update_sp(self, sp_id, service_provider):
         sp_ref = self.driver.update_sp(sp_id, service_provider)
-        self.get_enabled_service_providers.invalidate(self)
+        self._service_providers_changed(sp_id)
         return sp_ref
 
+    def _service_providers_changed(self, sp_id):
+        self.get_enabled_service_providers.invalidate(self)
+        # NOTE: Token responses list the enabled service providers and
+        # rendered token responses are cached along with the tokens.
+        reason = (
+            'The token cache is being invalidated because service provider '
+            '%(sp_id)s has been created, updated or deleted.' %
+            {'sp_id': sp_id}
+        )
+        notifications.invalidate_token_cache_notification(reason)
+
     def evaluate(self, idp_id, protocol_id, assertion_data):
         mapping = self.get_mapping_from_idp_and_protocol(idp_id, protocol_id)
         rules = mapping['rules']
@@ -213,6 +213,23 @@ class IdentityDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def iter_users(self, hints):
+        """Return an iterator over the users in the system.
+
+        Drivers that can read users a batch at a time should override this,
+        so that callers consuming the users as a stream never hold all of
+        them at once; by default the users are listed with ``list_users()``.
+
+        :param hints: filter hints which the driver should
+                      implement if at all possible.
+        :type hints: keystone.common.driver_hints.Hints
+
+        :returns: an iterator of users. See user schema in
+                  :class:`~.IdentityDriverBase`.
+
+        """
+        return iter(self.list_users(hints))
+
     @abc.abstractmethod
     def unset_default_project_id(self, project_id):
         """Unset a user's default project given a specific project ID.
@@ -254,6 +271,28 @@ class IdentityDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_users_from_ids(self, user_ids):
+        """List users for the provided list of ids.
+
+        Drivers that can read many users in a single request should override
+        this; by default each user is read in turn.
+
+        :param list user_ids: list of user IDs
+
+        :returns: a list of users. IDs that do not belong to a user are
+                  ignored. See user schema in :class:`~.IdentityDriverBase`.
+        :rtype: list of dict
+
+        """
+        users = []
+        for user_id in user_ids:
+            try:
+                users.append(self.get_user(user_id))
+            except exception.UserNotFound:  # nosec
+                # A user deleted directly in the backend is simply omitted.
+                pass
+        return users
+
     @abc.abstractmethod
     def update_user(self, user_id, user):
         """Update an existing user.
@@ -407,6 +446,27 @@ class IdentityDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_groups_from_ids(self, group_ids):
+        """List groups for the provided list of ids.
+
+        Drivers that can read many groups in a single request should override
+        this; by default each group is read in turn.
+
+        :param list group_ids: list of group IDs
+
+        :returns: a list of group_refs. IDs that do not belong to a group are
+                  ignored. See group schema in :class:`~.IdentityDriverBase`.
+
+        """
+        groups = []
+        for group_id in group_ids:
+            try:
+                groups.append(self.get_group(group_id))
+            except exception.GroupNotFound:  # nosec
+                # A group deleted directly in the backend is simply omitted.
+                pass
+        return groups
+
     @abc.abstractmethod
     def get_group_by_name(self, group_name, domain_id):
         """Get a group by name.
@@ -14,10 +14,14 @@
 
 import abc
 import codecs
+import collections
 import functools
+import itertools
 import os.path
 import re
 import sys
+import threading
+import time
 import weakref
 
 import ldap.controls
@@ -311,6 +315,26 @@ def is_dn_equal(dn1, dn2):
     return True
 
 
+def normalize_dn(dn):
+    """Return a normalized form of a DN, for use as a dictionary key.
+
+    DNs that is_dn_equal considers equal have the same normalized form: the
+    attribute types are lowercased, the values are prepared with
+    prep_case_insensitive, and the AVAs of each RDN are sorted.
+
+    :param dn: Either a string DN or a DN parsed by ldap.dn.str2dn.
+    :returns: A tuple of RDNs, each a tuple of (type, value) pairs.
+
+    """
+    if not isinstance(dn, list):
+        dn = ldap.dn.str2dn(dn)
+
+    return tuple(
+        tuple(sorted((attr_type.lower(), prep_case_insensitive(value))
+                     for attr_type, value, dummy in rdn))
+        for rdn in dn)
+
+
 def dn_startswith(descendant_dn, dn):
     """Return True if and only if the descendant_dn is under the dn.
 
@@ -967,8 +991,41 @@ class KeystoneLDAPHandler(LDAPHandler):
                                     serverctrls, clientctrls,
                                     timeout, sizelimit)
 
+    def search_pages(self, base, scope,
+                     filterstr='(objectClass=*)', attrlist=None):
+        """Search the directory, yielding the results a page at a time.
+
+        When paging is enabled the request for each page is sent to the
+        server before the page received previously is handed to the caller,
+        so the server prepares the next page while the caller is still
+        working on the current one. Only one page is held in memory at a
+        time. When paging is disabled all the results are yielded as a
+        single page.
+
+        """
+        if attrlist is not None:
+            attrlist = [attr for attr in attrlist if attr is not None]
+        LOG.debug('LDAP paged search: base=%s scope=%s filterstr=%s '
+                  'attrs=%s', base, scope, filterstr, attrlist)
+        if self.page_size:
+            pages = self._paged_search_pages(base, scope, filterstr, attrlist)
+        else:
+            try:
+                pages = [self.conn.search_s(base, scope, filterstr,
+                                            attrlist)]
+            except ldap.SIZELIMIT_EXCEEDED:
+                raise exception.LDAPSizeLimitExceeded()
+        for ldap_result in pages:
+            yield convert_ldap_result(ldap_result)
+
     def _paged_search_s(self, base, scope, filterstr, attrlist=None):
         res = []
+        for rdata in self._paged_search_pages(base, scope, filterstr,
+                                              attrlist):
+            res.extend(rdata)
+        return res
+
+    def _paged_search_pages(self, base, scope, filterstr, attrlist=None):
         use_old_paging_api = False
         # The API for the simple paged results control changed between
         # python-ldap 2.3 and 2.4.  We need to detect the capabilities
@@ -993,11 +1050,10 @@ class KeystoneLDAPHandler(LDAPHandler):
                                      attrlist,
                                      serverctrls=[lc])
         # Endless loop request pages on ldap server until it has no data
-        while True:
+        while msgid is not None:
             # Request to the ldap server a page with 'page_size' entries
             rtype, rdata, rmsgid, serverctrls = self.conn.result3(msgid)
-            # Receive the data
-            res.extend(rdata)
+            msgid = None
             pctrls = [c for c in serverctrls
                       if c.controlType == page_ctrl_oid]
             if pctrls:
@@ -1009,23 +1065,21 @@ class KeystoneLDAPHandler(LDAPHandler):
                     cookie = lc.cookie = pctrls[0].cookie
 
                 if cookie:
-                    # There is more data still on the server
-                    # so we request another page
+                    # There is more data still on the server so we request
+                    # another page, before handing over the data received,
+                    # for the server to work on it in the meantime.
                     msgid = self.conn.search_ext(base,
                                                  scope,
                                                  filterstr,
                                                  attrlist,
                                                  serverctrls=[lc])
-                else:
-                    # Exit condition no more data on server
-                    break
             else:
                 LOG.warning('LDAP Server does not support paging. '
                             'Disable paging in keystone.conf to '
                             'avoid this message.')
                 self._disable_paging()
-                break
-        return res
+            # Receive the data
+            yield rdata
 
     def result3(self, msgid=ldap.RES_ANY, all=1, timeout=None,
                 resp_ctrl_classes=None):
@@ -1098,6 +1152,63 @@ def filter_entity(entity_ref):
     return entity_ref
 
 
+class EntityCache(object):
+    """An in-memory cache of LDAP entries.
+
+    An entry is used for ``cache_time`` seconds after it was stored. Once
+    ``size`` entries are stored, the least recently used one is evicted to
+    make room for a new one. A size of zero disables the cache. The number
+    of lookups that found an entry and that did not are counted in ``hits``
+    and ``misses``.
+
+    """
+
+    def __init__(self, size, cache_time):
+        self.size = size
+        self.cache_time = cache_time
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry stored for a key.
+
+        :raises KeyError: If there is no entry for the key, or it expired.
+
+        """
+        if not self.size:
+            raise KeyError(key)
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+                if expires_at <= time.monotonic():
+                    del self._entries[key]
+                    raise KeyError(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if not self.size:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.cache_time, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class BaseLdap(object):
     DEFAULT_OU = None
     DEFAULT_STRUCTURAL_CLASSES = None
@@ -1121,6 +1232,7 @@ class BaseLdap(object):
         self.LDAP_SCOPE = ldap_scope(conf.ldap.query_scope)
         self.alias_dereferencing = parse_deref(conf.ldap.alias_dereferencing)
         self.page_size = conf.ldap.page_size
+        self.lookup_batch_size = conf.ldap.lookup_batch_size
         self.use_tls = conf.ldap.use_tls
         self.tls_cacertfile = conf.ldap.tls_cacertfile
         self.tls_cacertdir = conf.ldap.tls_cacertdir
@@ -1138,6 +1250,12 @@ class BaseLdap(object):
         self.pool_conn_timeout = conf.ldap.pool_connection_timeout
         self.pool_conn_lifetime = conf.ldap.pool_connection_lifetime
 
+        # NOTE: Lookups of entries by ID and by DN, and of the members of a
+        # group, are served from this cache when it is enabled. Every write
+        # clears it.
+        self.entity_cache = EntityCache(conf.ldap.entity_cache_size,
+                                        conf.ldap.entity_cache_time)
+
         # End user authentication pool specific config attributes
         self.use_auth_pool = self.use_pool and conf.ldap.use_auth_pool
         self.auth_pool_size = conf.ldap.auth_pool_size
@@ -1268,6 +1386,12 @@ class BaseLdap(object):
     def _id_to_dn(self, object_id):
         if self.LDAP_SCOPE == ldap.SCOPE_ONELEVEL:
             return self._id_to_dn_string(object_id)
+        try:
+            dn, attrs = self.entity_cache.get(('id', object_id))
+            return dn
+        except KeyError:  # nosec
+            # Not cached, search for it.
+            pass
         with self.get_connection() as conn:
             search_result = conn.search_s(
                 self.tree_dn, self.LDAP_SCOPE,
@@ -1290,9 +1414,16 @@ class BaseLdap(object):
             return ldap.dn.str2dn(dn)[0][0][1]
         else:
             # The 'ID' attribute is NOT in the DN, so we need to perform an
-            # LDAP search to look it up from the user entry itself.
-            with self.get_connection() as conn:
-                search_result = conn.search_s(dn, ldap.SCOPE_BASE)
+            # LDAP search to look it up from the user entry itself, unless
+            # the entry is cached.
+            key = ('dn', normalize_dn(dn))
+            try:
+                search_result = [self.entity_cache.get(key)]
+            except KeyError:
+                with self.get_connection() as conn:
+                    search_result = conn.search_s(dn, ldap.SCOPE_BASE)
+                if search_result:
+                    self.entity_cache.set(key, search_result[0])
 
             if search_result:
                 try:
@@ -1413,6 +1544,7 @@ class BaseLdap(object):
 
         with self.get_connection() as conn:
             conn.add_s(self._id_to_dn(values['id']), attrs)
+        self.entity_cache.clear()
         return values
 
     # NOTE(prashkre): Filter ldap search results on an attribute to ensure
@@ -1463,6 +1595,22 @@ class BaseLdap(object):
         return result
 
     def _ldap_get(self, object_id, ldap_filter=None):
+        if ldap_filter is not None:
+            return self._ldap_search_by_id(object_id, ldap_filter)
+
+        key = ('id', object_id)
+        try:
+            return self.entity_cache.get(key)
+        except KeyError:  # nosec
+            # Not cached, search for it.
+            pass
+        res = self._ldap_search_by_id(object_id)
+        if res is not None:
+            self.entity_cache.set(key, res)
+            self.entity_cache.set(('dn', normalize_dn(res[0])), res)
+        return res
+
+    def _ldap_search_by_id(self, object_id, ldap_filter=None):
         query = (u'(&(%(id_attr)s=%(id)s)'
                  u'%(filter)s'
                  u'(objectClass=%(object_class)s))'
@@ -1509,16 +1657,20 @@ class BaseLdap(object):
             except ldap.NO_SUCH_OBJECT:
                 return []
 
-    @driver_hints.truncated
-    def _ldap_get_all(self, hints, ldap_filter=None):
+    def _ldap_get_all_query(self, ldap_filter=None):
         query = u'(&%s(objectClass=%s)(%s=*))' % (
             ldap_filter or self.ldap_filter or '',
             self.object_class,
             self.id_attr)
-        sizelimit = 0
         attrs = list(set(([self.id_attr] +
                           list(self.attribute_mapping.values()) +
                           list(self.extra_attr_mapping.keys()))))
+        return query, attrs
+
+    @driver_hints.truncated
+    def _ldap_get_all(self, hints, ldap_filter=None):
+        query, attrs = self._ldap_get_all_query(ldap_filter)
+        sizelimit = 0
         if hints.limit:
             sizelimit = hints.limit['limit']
             res = self._ldap_get_limited(self.tree_dn,
@@ -1544,6 +1696,26 @@ class BaseLdap(object):
         # compared to explicit filtering by 'name' through ldap result.
         return self._filter_ldap_result_by_attr(res, 'name')
 
+    def _ldap_get_all_pages(self, ldap_filter=None):
+        query, attrs = self._ldap_get_all_query(ldap_filter)
+        with self.get_connection() as conn:
+            try:
+                for res in conn.search_pages(self.tree_dn,
+                                             self.LDAP_SCOPE,
+                                             query,
+                                             attrs):
+                    yield self._filter_ldap_result_by_attr(res, 'name')
+            except ldap.NO_SUCH_OBJECT:
+                return
+
+    def _ldap_get_all_iter(self, hints, ldap_filter=None):
+        if hints.limit:
+            # The search is limited to a single page, so there is nothing to
+            # gain from streaming it.
+            return iter(self._ldap_get_all(hints, ldap_filter))
+        return itertools.chain.from_iterable(
+            self._ldap_get_all_pages(ldap_filter))
+
     def _ldap_get_list(self, search_base, scope, query_params=None,
                        attrlist=None):
         query = u'(objectClass=%s)' % self.object_class
@@ -1581,6 +1753,39 @@ class BaseLdap(object):
         return [self._ldap_res_to_model(x)
                 for x in self._ldap_get_all(hints, ldap_filter)]
 
+    def get_all_iter(self, ldap_filter=None, hints=None):
+        """Return an iterator over all the objects.
+
+        Unlike ``get_all()``, which reads every object before converting them
+        all, the objects are read and converted a page at a time as the
+        iterator is consumed, so only a page of them is held in memory.
+
+        """
+        hints = hints or driver_hints.Hints()
+        for x in self._ldap_get_all_iter(hints, ldap_filter):
+            yield self._ldap_res_to_model(x)
+
+    def get_all_by_ids(self, object_ids):
+        """Return the objects with any of the given IDs.
+
+        Rather than searching for each ID in turn, the IDs are looked up a
+        batch of at most ``lookup_batch_size`` at a time, each batch with a
+        single search. IDs that are not found are ignored, and the objects
+        are returned in no particular order.
+
+        """
+        object_ids = sorted(set(str(x) for x in object_ids))
+        objects = []
+        for start in range(0, len(object_ids), self.lookup_batch_size):
+            id_filter = u'(|%s)' % ''.join(
+                u'(%s=%s)' % (self.id_attr,
+                              ldap.filter.escape_filter_chars(object_id))
+                for object_id in
+                object_ids[start:start + self.lookup_batch_size])
+            objects += self.get_all(
+                u'%s%s' % (self.ldap_filter or '', id_filter))
+        return objects
+
     def update(self, object_id, values, old_obj=None):
         if old_obj is None:
             old_obj = self.get(object_id)
@@ -1631,6 +1836,7 @@ class BaseLdap(object):
                     conn.modify_s(self._id_to_dn(object_id), modlist)
                 except ldap.NO_SUCH_OBJECT:
                     raise self._not_found(object_id)
+            self.entity_cache.clear()
 
         return self.get(object_id)
 
@@ -1656,6 +1862,7 @@ class BaseLdap(object):
                                                'group': member_list_dn})
             except ldap.NO_SUCH_OBJECT:
                 raise self._not_found(member_list_dn)
+        self.entity_cache.clear()
 
     def filter_query(self, hints, query=None):
         """Apply filtering to a query.
@@ -1893,6 +2100,22 @@ class EnabledEmuMixIn(BaseLdap):
         else:
             return super(EnabledEmuMixIn, self).get_all(ldap_filter, hints)
 
+    def get_all_iter(self, ldap_filter=None, hints=None):
+        hints = hints or driver_hints.Hints()
+        if 'enabled' not in self.attribute_ignore and self.enabled_emulation:
+            # had to copy BaseLdap.get_all_iter here to ldap_filter by DN
+            with self.get_connection() as conn:
+                for x in self._ldap_get_all_iter(hints, ldap_filter):
+                    if x[0] == self.enabled_emulation_dn:
+                        continue
+                    obj_ref = self._ldap_res_to_model(x)
+                    obj_ref['enabled'] = self._is_id_enabled(
+                        obj_ref['id'], conn)
+                    yield obj_ref
+        else:
+            yield from super(EnabledEmuMixIn, self).get_all_iter(
+                ldap_filter, hints)
+
     def update(self, object_id, values, old_obj=None):
         if 'enabled' not in self.attribute_ignore and self.enabled_emulation:
             data = values.copy()
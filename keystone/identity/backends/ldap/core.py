@@ -85,6 +85,9 @@ class Identity(base.IdentityDriverBase):
     def list_users(self, hints):
         return self.user.get_all_filtered(hints)
 
+    def iter_users(self, hints):
+        return self.user.get_all_filtered_iter(hints)
+
     def unset_default_project_id(self, project_id):
         # This function is not implemented for the LDAP backend. The LDAP
         # backend is readonly.
@@ -123,12 +126,19 @@ class Identity(base.IdentityDriverBase):
             yield user_id
 
     def list_users_in_group(self, group_id, hints):
-        users = []
         group_members = self.group.list_group_users(group_id)
-        for user_id in self._transform_group_member_ids(group_members):
+        user_ids = list(self._transform_group_member_ids(group_members))
+        # NOTE: Look the members up in batches rather than one at a time.
+        # Like the search for a single user, matching on the ID is not case
+        # sensitive.
+        users_by_id = dict(
+            (user['id'].lower(), user)
+            for user in self.user.get_all_filtered_by_ids(user_ids))
+        users = []
+        for user_id in user_ids:
             try:
-                users.append(self.user.get_filtered(user_id))
-            except exception.UserNotFound:
+                users.append(users_by_id[str(user_id).lower()])
+            except KeyError:
                 msg = ('Group member `%(user_id)s` for group `%(group_id)s`'
                        ' not found in the directory. The user should be'
                        ' removed from the group. The user will be ignored.')
@@ -323,11 +333,26 @@ class UserApi(common_ldap.EnabledEmuMixIn, common_ldap.BaseLdap):
             obj['options'] = {}  # options always empty
         return objs
 
+    def get_all_iter(self, ldap_filter=None, hints=None):
+        for obj in super(UserApi, self).get_all_iter(ldap_filter=ldap_filter,
+                                                     hints=hints):
+            obj['options'] = {}  # options always empty
+            yield obj
+
     def get_all_filtered(self, hints):
         query = self.filter_query(hints, self.ldap_filter)
         return [self.filter_attributes(user)
                 for user in self.get_all(query, hints)]
 
+    def get_all_filtered_iter(self, hints):
+        query = self.filter_query(hints, self.ldap_filter)
+        return (self.filter_attributes(user)
+                for user in self.get_all_iter(query, hints))
+
+    def get_all_filtered_by_ids(self, user_ids):
+        return [self.filter_attributes(user)
+                for user in self.get_all_by_ids(user_ids)]
+
     def filter_attributes(self, user):
         return base.filter_user(common_ldap.filter_entity(user))
 
@@ -429,6 +454,13 @@ class GroupApi(common_ldap.BaseLdap):
 
     def list_group_users(self, group_id):
         """Return a list of user dns which are members of a group."""
+        key = ('members', group_id)
+        try:
+            return list(self.entity_cache.get(key))
+        except KeyError:  # nosec
+            # Not cached, search for them.
+            pass
+
         group_ref = self.get(group_id)
         group_dn = group_ref['dn']
 
@@ -455,7 +487,8 @@ class GroupApi(common_ldap.BaseLdap):
             user_dns = member.get(self.member_attribute, [])
             for user_dn in user_dns:
                 users.append(user_dn)
-        return users
+        self.entity_cache.set(key, users)
+        return list(users)
 
     def get_filtered(self, group_id):
         group = self.get(group_id)
@@ -15,6 +15,8 @@
 import datetime
 
 from oslo_db import api as oslo_db_api
+from oslo_db import exception as db_exception
+from oslo_log import log
 import sqlalchemy
 
 from keystone.common import driver_hints
@@ -30,6 +32,7 @@ from keystone.identity.backends import sql_model as model
 
 
 CONF = keystone.conf.CONF
+LOG = log.getLogger(__name__)
 
 
 class Identity(base.IdentityDriverBase):
@@ -52,7 +55,8 @@ class Identity(base.IdentityDriverBase):
         https://blueprints.launchpad.net/keystone/+spec/sql-identiy-pam
 
         """
-        return password_hashing.check_password(password, user_ref.password)
+        return password_hashing.check_password(password, user_ref.password,
+                                               offload=True)
 
     # Identity interface
     def authenticate(self, user_id, password):
@@ -74,8 +78,80 @@ class Identity(base.IdentityDriverBase):
         # successful auth, reset failed count if present
         if user_ref.local_user.failed_auth_count:
             self._reset_failed_auth(user_id)
+        if (CONF.identity.rehash_passwords_on_authentication and
+                password_hashing.needs_rehash(user_ref.password)):
+            self._rehash_password(user_id, password, user_ref.password)
         return user_dict
 
+    def _rehash_password(self, user_id, password, hashed):
+        """Replace the hash of a password with one made with current options.
+
+        The password ref is updated in place, rather than a new one being
+        added as when the password changes, so the password history and
+        expiry are untouched.
+
+        """
+        # NOTE: The new hash is made in the password hashing worker processes
+        # when there are some, as the hashes checked to authenticate are.
+        # Should too many hashes be waiting for them, or should the new hash
+        # fail to be stored, the user is authenticated regardless and the
+        # hash is remade on a later authentication.
+        try:
+            new_hashed = password_hashing.hash_password(password,
+                                                        offload=True)
+        except exception.PasswordVerificationUnavailable:
+            LOG.debug('Deferred remaking the password hash of user %s, too '
+                      'many password hashes are waiting for a worker.',
+                      user_id)
+            return
+        try:
+            with sql.session_for_write() as session:
+                user_ref = session.query(model.User).get(user_id)
+                password_ref = user_ref.password_ref
+                # NOTE: Leave the hash alone if the password changed since it
+                # was checked.
+                if (password_ref is None or
+                        password_ref.password_hash != hashed):
+                    return
+                password_ref.password_hash = new_hashed
+        except db_exception.DBError:
+            LOG.warning('Failed to store the new password hash of user %s.',
+                        user_id, exc_info=True)
+
+    def count_password_hashes(self):
+        """Count the current password hashes by algorithm and cost.
+
+        :returns: a list of dicts, sorted by algorithm and cost, of the name
+                  of the hashing algorithm (``algorithm``), a dict of its
+                  cost parameters (``params``), whether the hashes would be
+                  remade with the current options (``outdated``) and the
+                  number of current passwords so hashed (``count``). Hashes
+                  that are not recognised are counted under the ``unknown``
+                  algorithm.
+
+        """
+        counts = {}
+        with sql.session_for_read() as session:
+            for local_user in session.query(model.LocalUser):
+                if not local_user.passwords:
+                    continue
+                hashed = local_user.passwords[-1].password_hash
+                if hashed is None:
+                    continue
+                try:
+                    algorithm, params = password_hashing.describe_hash(hashed)
+                    key = (algorithm, tuple(sorted(params.items())),
+                           password_hashing.needs_rehash(hashed))
+                except ValueError:
+                    # Hashes made with an algorithm keystone doesn't support
+                    # can't be checked, so they are never remade either.
+                    key = ('unknown', (), False)
+                counts[key] = counts.get(key, 0) + 1
+        return [{'algorithm': algorithm, 'params': dict(params),
+                 'outdated': outdated, 'count': count}
+                for (algorithm, params, outdated), count
+                in sorted(counts.items())]
+
     def _is_account_locked(self, user_id, user_ref):
         """Check if the user account is locked.
 
@@ -195,6 +271,14 @@ class Identity(base.IdentityDriverBase):
             return base.filter_user(
                 self._get_user(session, user_id).to_dict())
 
+    def list_users_from_ids(self, user_ids):
+        if not user_ids:
+            return []
+        with sql.session_for_read() as session:
+            query = session.query(model.User)
+            query = query.filter(model.User.id.in_(user_ids))
+            return [base.filter_user(x.to_dict()) for x in query]
+
     def get_user_by_name(self, user_name, domain_id):
         with sql.session_for_read() as session:
             query = session.query(model.User).join(model.LocalUser)
@@ -408,6 +492,14 @@ class Identity(base.IdentityDriverBase):
         with sql.session_for_read() as session:
             return self._get_group(session, group_id).to_dict()
 
+    def list_groups_from_ids(self, group_ids):
+        if not group_ids:
+            return []
+        with sql.session_for_read() as session:
+            query = session.query(model.Group)
+            query = query.filter(model.Group.id.in_(group_ids))
+            return [ref.to_dict() for ref in query]
+
     def get_group_by_name(self, group_name, domain_id):
         with sql.session_for_read() as session:
             query = session.query(model.Group)
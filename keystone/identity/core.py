@@ -14,6 +14,7 @@
 
 """Main entry point into the Identity service."""
 
+import collections.abc
 import copy
 import functools
 import itertools
@@ -26,7 +27,6 @@ from oslo_config import cfg
 from oslo_log import log
 from pycadf import reason
 
-from keystone import assignment  # TODO(lbragstad): Decouple this dependency
 from keystone.common import cache
 from keystone.common import driver_hints
 from keystone.common import manager
@@ -584,6 +584,8 @@ class Manager(manager.Manager):
 
         if not self._needs_post_processing(driver):
             # a classic case would be when running with a single SQL driver
+            if isinstance(ref, collections.abc.Iterator):
+                return list(ref)
             return ref
 
         LOG.debug('ID Mapping - Domain ID: %(domain)s, '
@@ -599,7 +601,7 @@ class Manager(manager.Manager):
         if isinstance(ref, dict):
             return self._set_domain_id_and_mapping_for_single_ref(
                 ref, domain_id, driver, entity_type, conf)
-        elif isinstance(ref, list):
+        elif isinstance(ref, (list, collections.abc.Iterator)):
             return self._set_domain_id_and_mapping_for_list(
                 ref, domain_id, driver, entity_type, conf)
         else:
@@ -643,55 +645,50 @@ class Manager(manager.Manager):
                 self._insert_new_public_id(local_entity, ref, driver)
         return ref
 
-    def _set_domain_id_and_mapping_for_list(self, ref_list, domain_id, driver,
+    def _set_domain_id_and_mapping_for_list(self, refs, domain_id, driver,
                                             entity_type, conf):
-        """Set domain id and mapping for a list of refs.
+        """Set domain id and mapping for a list or an iterator of refs.
 
-        The method modifies refs in-place.
+        The refs are consumed one at a time and modified in-place, so that an
+        iterator is never read into memory before it is processed. The list
+        of the processed refs is returned.
         """
-        if not ref_list:
-            return []
-
         # If the domain_id is None that means we are running in a single
         # backend mode, so to remain backwards compatible we will use the
         # default domain ID.
         if not domain_id:
             domain_id = CONF.identity.default_domain_id
 
-        if not driver.is_domain_aware():
-            for ref in ref_list:
+        set_domain_id = not driver.is_domain_aware()
+        mapping_needed = self._is_mapping_needed(driver)
+        public_ids = None
+        ref_list = []
+        for ref in refs:
+            if set_domain_id:
                 ref['domain_id'] = domain_id
 
-        if not self._is_mapping_needed(driver):
-            return ref_list
-
-        # build a map of refs for fast look-up
-        refs_map = {}
-        for r in ref_list:
-            refs_map[(r['id'], entity_type, r['domain_id'])] = r
-
-        # fetch all mappings for the domain, lookup the user at the map built
-        # at previous step and replace his id.
-        domain_mappings = PROVIDERS.id_mapping_api.get_domain_mapping_list(
-            domain_id, entity_type=entity_type)
-        for _mapping in domain_mappings:
-            idx = (_mapping.local_id, _mapping.entity_type, _mapping.domain_id)
-            try:
-                ref = refs_map.pop(idx)
-                # due to python specifics, `ref` still points to an item in
-                # `ref_list`. That's why when we change it here, it gets
-                # changed in `ref_list`.
-                ref['id'] = _mapping.public_id
-            except KeyError:
-                pass  # some old entry, skip it
-
-        # at this point, all known refs were granted a public_id. For the refs
-        # left, there are no mappings. They need to be created.
-        for ref in refs_map.values():
-            local_entity = {'domain_id': ref['domain_id'],
-                            'local_id': ref['id'],
-                            'entity_type': entity_type}
-            self._insert_new_public_id(local_entity, ref, driver)
+            if mapping_needed:
+                if public_ids is None:
+                    # fetch all mappings for the domain once, for fast look-up
+                    # of the public ID of each ref.
+                    public_ids = {
+                        (_mapping.local_id, _mapping.domain_id):
+                            _mapping.public_id
+                        for _mapping in
+                        PROVIDERS.id_mapping_api.get_domain_mapping_list(
+                            domain_id, entity_type=entity_type)}
+                idx = (ref['id'], ref['domain_id'])
+                try:
+                    ref['id'] = public_ids[idx]
+                except KeyError:
+                    # There is no mapping for this ref, it needs to be
+                    # created.
+                    local_entity = {'domain_id': ref['domain_id'],
+                                    'local_id': ref['id'],
+                                    'entity_type': entity_type}
+                    self._insert_new_public_id(local_entity, ref, driver)
+                    public_ids[idx] = ref['id']
+            ref_list.append(ref)
         return ref_list
 
     def _is_mapping_needed(self, driver):
@@ -822,6 +819,34 @@ class Manager(manager.Manager):
         # which case we leave this to the caller to check.
         return (conf.default_domain_id, driver, public_id)
 
+    def _list_entities_from_ids(self, public_ids, entity_type):
+        """Read a set of users or groups, with one call per backend.
+
+        The public IDs are first sorted by the domain and driver that own
+        them, so that each driver is asked for all of its entities at once.
+        IDs that cannot be found are ignored.
+
+        """
+        local_ids = {}
+        for public_id in set(public_ids):
+            try:
+                domain_id, driver, entity_id = (
+                    self._get_domain_driver_and_entity_id(public_id))
+            except exception.PublicIDNotFound:  # nosec
+                # The entity no longer exists, so there is nothing to read.
+                continue
+            local_ids.setdefault((domain_id, driver), []).append(entity_id)
+
+        ref_list = []
+        for (domain_id, driver), entity_ids in local_ids.items():
+            if entity_type == mapping.EntityType.USER:
+                refs = driver.list_users_from_ids(entity_ids)
+            else:
+                refs = driver.list_groups_from_ids(entity_ids)
+            ref_list += self._set_domain_id_and_mapping(
+                refs, domain_id, driver, entity_type)
+        return ref_list
+
     def _assert_user_and_group_in_same_backend(
             self, user_entity_id, user_driver, group_entity_id, group_driver):
         """Ensure that user and group IDs are backed by the same backend.
@@ -1016,6 +1041,22 @@ class Manager(manager.Manager):
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.USER)
 
+    @domains_configured
+    @exception_translated('user')
+    def list_users_from_ids(self, user_ids):
+        """List users for the provided list of ids.
+
+        :param user_ids: list of ids
+
+        :returns: a list of user_refs, without any that could not be found.
+
+        This method is used internally by the assignment manager to bulk read
+        a set of users given their ids.
+
+        """
+        return self._list_entities_from_ids(
+            user_ids, mapping.EntityType.USER)
+
     def assert_user_enabled(self, user_id, user=None):
         """Assert the user and the user's domain are enabled.
 
@@ -1088,7 +1129,7 @@ class Manager(manager.Manager):
                 fed_res = PROVIDERS.shadow_users_api.get_federated_users(
                     fed_hints)
                 break
-        return driver.list_users(hints) + fed_res
+        return itertools.chain(driver.iter_users(hints), fed_res)
 
     @domains_configured
     @exception_translated('user')
@@ -1225,9 +1266,10 @@ class Manager(manager.Manager):
         PROVIDERS.id_mapping_api.delete_id_mapping(user_id)
         notifications.Audit.deleted(self._USER, user_id, initiator)
 
-        # Invalidate user role assignments cache region, as it may be caching
-        # role assignments where the actor is the specified user
-        assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        # Invalidate the role assignments computed for the user, as they may
+        # include role assignments where the actor is the specified user
+        PROVIDERS.assignment_api.invalidate_computed_assignments(
+            user_ids=[user_id])
 
     @domains_configured
     @exception_translated('group')
@@ -1263,6 +1305,22 @@ class Manager(manager.Manager):
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.GROUP)
 
+    @domains_configured
+    @exception_translated('group')
+    def list_groups_from_ids(self, group_ids):
+        """List groups for the provided list of ids.
+
+        :param group_ids: list of ids
+
+        :returns: a list of group_refs, without any that could not be found.
+
+        This method is used internally by the assignment manager to bulk read
+        a set of groups given their ids.
+
+        """
+        return self._list_entities_from_ids(
+            group_ids, mapping.EntityType.GROUP)
+
     @domains_configured
     @exception_translated('group')
     def get_group_by_name(self, group_name, domain_id):
@@ -1295,7 +1353,7 @@ class Manager(manager.Manager):
         roles = PROVIDERS.assignment_api.list_role_assignments(
             group_id=group_id
         )
-        user_ids = (u['id'] for u in self.list_users_in_group(group_id))
+        user_ids = [u['id'] for u in self.list_users_in_group(group_id)]
         driver.delete_group(entity_id)
         self.get_group.invalidate(self, group_id)
         PROVIDERS.id_mapping_api.delete_id_mapping(group_id)
@@ -1310,9 +1368,11 @@ class Manager(manager.Manager):
             for user_id in user_ids:
                 self._persist_revocation_event_for_user(user_id)
 
-        # Invalidate user role assignments cache region, as it may be caching
-        # role assignments expanded from the specified group to its users
-        assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        # Invalidate the role assignments computed for the members of the
+        # group, as they may include role assignments expanded from the
+        # specified group to its users
+        PROVIDERS.assignment_api.invalidate_computed_assignments(
+            user_ids=user_ids)
 
     @domains_configured
     @exception_translated('group')
@@ -1333,9 +1393,10 @@ class Manager(manager.Manager):
 
         group_driver.add_user_to_group(user_entity_id, group_entity_id)
 
-        # Invalidate user role assignments cache region, as it may now need to
-        # include role assignments from the specified group to its users
-        assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        # Invalidate the role assignments computed for the user, as they may
+        # now need to include role assignments from the specified group
+        PROVIDERS.assignment_api.invalidate_computed_assignments(
+            user_ids=[user_id])
         notifications.Audit.added_to(self._GROUP, group_id, self._USER,
                                      user_id, initiator)
 
@@ -1359,9 +1420,10 @@ class Manager(manager.Manager):
         group_driver.remove_user_from_group(user_entity_id, group_entity_id)
         self._persist_revocation_event_for_user(user_id)
 
-        # Invalidate user role assignments cache region, as it may be caching
-        # role assignments expanded from this group to this user
-        assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        # Invalidate the role assignments computed for the user, as they may
+        # include role assignments expanded from this group to this user
+        PROVIDERS.assignment_api.invalidate_computed_assignments(
+            user_ids=[user_id])
         notifications.Audit.removed_from(self._GROUP, group_id, self._USER,
                                          user_id, initiator)
 
@@ -173,3 +173,17 @@ class UnifiedLimitDriverBase(object, metaclass=abc.ABCMeta):
 
         """
         raise exception.NotImplemented()  # pragma: no cover
+
+    def delete_limits_for_projects(self, project_ids):
+        """Delete the existing limits which belong to the specified projects.
+
+        :param project_ids: the limits' project ids.
+
+        :returns: a list of the deleted limits ids. Used for cache
+            invalidating.
+
+        """
+        limit_ids = []
+        for project_id in project_ids:
+            limit_ids.extend(self.delete_limits_for_project(project_id))
+        return limit_ids
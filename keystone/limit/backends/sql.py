@@ -315,3 +315,13 @@ class UnifiedLimit(base.UnifiedLimitDriverBase):
                 limit_ids.append(limit.id)
             query.delete()
         return limit_ids
+
+    def delete_limits_for_projects(self, project_ids):
+        if not project_ids:
+            return []
+        with sql.session_for_write() as session:
+            query = session.query(LimitModel)
+            query = query.filter(LimitModel.project_id.in_(project_ids))
+            limit_ids = [limit.id for limit in query.all()]
+            query.delete(synchronize_session=False)
+        return limit_ids
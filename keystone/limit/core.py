@@ -140,3 +140,8 @@ class Manager(manager.Manager):
         limit_ids = self.driver.delete_limits_for_project(project_id)
         for limit_id in limit_ids:
             self.get_limit.invalidate(self, limit_id)
+
+    def delete_limits_for_projects(self, project_ids):
+        limit_ids = self.driver.delete_limits_for_projects(project_ids)
+        for limit_id in limit_ids:
+            self.get_limit.invalidate(self, limit_id)
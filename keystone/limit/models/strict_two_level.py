@@ -77,12 +77,12 @@ class StrictTwoLevelModel(base.ModelBase):
         else:
             # This is a domain limit, need make sure its limit is not smaller
             # than its children.
-            sub_projects = PROVIDERS.resource_api.list_projects_in_subtree(
-                domain_id)
-            for sub_project in sub_projects:
+            sub_project_ids = (
+                PROVIDERS.resource_api.list_project_ids_in_subtree(domain_id))
+            for sub_project_id in sub_project_ids:
                 sub_limit_value = self._get_specified_limit_value(
                     resource_name, service_id, region_id,
-                    project_id=sub_project['id'])
+                    project_id=sub_project_id)
                 if sub_limit_value and resource_limit < sub_limit_value:
                     raise exception.InvalidLimit(
                         reason="Limit is smaller than child.")
@@ -204,6 +204,152 @@ def matches(event, token_values):
     return True
 
 
+# The attributes revocation events are indexed by, in order of preference, and
+# the token values each of them is compared against. An event is stored under
+# the first of these attributes it has a value for.
+_INDEX_ATTRIBUTES = [
+    ('audit_id', ['audit_id']),
+    ('audit_chain_id', ['audit_chain_id']),
+    ('user_id', ['user_id', 'trustor_id', 'trustee_id']),
+    ('project_id', ['project_id']),
+    ('trust_id', ['trust_id']),
+    ('consumer_id', ['consumer_id']),
+    ('domain_scope_id', ['assignment_domain_id']),
+    ('domain_id', ['identity_domain_id', 'assignment_domain_id']),
+    ('role_id', ['roles']),
+]
+
+
+def _event_identity(event):
+    return tuple(getattr(event, name) for name in REVOKE_KEYS)
+
+
+def _matches_all(event, token_values):
+    """See if the token matches every attribute of the revocation event.
+
+    Unlike :func:`matches`, this also compares the attributes the backends
+    filter on when listing the events for a token.
+
+    """
+    if event.issued_before < token_values['issued_at']:
+        return False
+
+    if event.user_id is not None and event.user_id not in (
+            token_values.get('user_id'),
+            token_values.get('trustor_id'),
+            token_values.get('trustee_id'),):
+        return False
+
+    if event.project_id is not None and event.project_id not in (
+            token_values.get('project_id'),):
+        return False
+
+    if event.audit_id is not None and event.audit_id not in (
+            token_values.get('audit_id'),):
+        return False
+
+    return matches(event, token_values)
+
+
+class RevokeIndex(object):
+    """An in-memory index of revocation events.
+
+    Events are bucketed by the most selective attribute they have a value for,
+    so checking a token only compares it against the events in the buckets
+    matching the token's values, plus the (rare) events that don't have any
+    indexed attribute at all, rather than against every event.
+
+    """
+
+    def __init__(self, events=None):
+        self._buckets = {}
+        self._unindexed = []
+        self._identities = set()
+        self.add_events(events or [])
+
+    def __len__(self):
+        return len(self._identities)
+
+    def add_event(self, event):
+        """Add a revocation event, ignoring events already in the index."""
+        identity = _event_identity(event)
+        if identity in self._identities:
+            return
+        self._identities.add(identity)
+
+        for attribute, _ in _INDEX_ATTRIBUTES:
+            value = getattr(event, attribute)
+            if value is not None:
+                self._buckets.setdefault((attribute, value), []).append(event)
+                break
+        else:
+            self._unindexed.append(event)
+
+    def add_events(self, events):
+        for event in events:
+            self.add_event(event)
+
+    def _candidate_buckets(self, token_values):
+        for attribute, token_keys in _INDEX_ATTRIBUTES:
+            for token_key in token_keys:
+                values = token_values.get(token_key)
+                if values is None:
+                    continue
+                if not isinstance(values, list):
+                    values = [values]
+                for value in values:
+                    yield (attribute, value)
+
+    def _candidate_events(self, token_values):
+        for bucket in self._candidate_buckets(token_values):
+            for event in self._buckets.get(bucket, []):
+                yield event
+        for event in self._unindexed:
+            yield event
+
+    def is_revoked(self, token_values):
+        """Check if a token matches any revocation event in the index.
+
+        :param token_values: map based on a flattened view of the token, as
+                             described in :func:`is_revoked`
+        :returns: True if the token matches a revocation event, meaning the
+                  token is revoked.
+        """
+        return any(_matches_all(event, token_values)
+                   for event in self._candidate_events(token_values))
+
+    def are_revoked(self, tokens_values):
+        """Check several tokens against the index in a single pass.
+
+        Each bucket of events is visited once for the whole batch, and its
+        events are only compared against the tokens that have the value of
+        the bucket, rather than the buckets being looked up again for every
+        token.
+
+        :param tokens_values: a list of maps as accepted by
+                              :meth:`is_revoked`
+        :returns: a list of booleans, True for each token that matches a
+                  revocation event
+        """
+        revoked = [False] * len(tokens_values)
+        tokens_by_bucket = {}
+        for position, token_values in enumerate(tokens_values):
+            for bucket in self._candidate_buckets(token_values):
+                tokens_by_bucket.setdefault(bucket, set()).add(position)
+
+        def match(events, positions):
+            for event in events:
+                for position in positions:
+                    if (not revoked[position] and
+                            _matches_all(event, tokens_values[position])):
+                        revoked[position] = True
+
+        for bucket, positions in tokens_by_bucket.items():
+            match(self._buckets.get(bucket, []), positions)
+        match(self._unindexed, range(len(tokens_values)))
+        return revoked
+
+
 def build_token_values(token):
 
     token_expires_at = timeutils.parse_isotime(token.expires_at)
@@ -79,6 +79,11 @@ class TokenModel(object):
         self.application_credential_id = None
         self.__application_credential = None
 
+        self.__original_trustor_id = None
+        self.__roles = None
+        self.__roles_generation = None
+        self.__roles_validated_generation = None
+
     def __repr__(self):
         """Return string representation of TokenModel."""
         desc = ('<%(type)s (audit_id=%(audit_id)s, '
@@ -251,6 +256,19 @@ class TokenModel(object):
                 )
         return self.__trust_project_domain
 
+    def _get_roles_from_ids(self, role_ids):
+        """Fetch the given roles with a single lookup, preserving order."""
+        if not role_ids:
+            return []
+        refs = PROVIDERS.role_api.list_roles_from_ids(list(set(role_ids)))
+        refs = {ref['id']: ref for ref in refs}
+        roles = []
+        for role_id in role_ids:
+            if role_id not in refs:
+                raise exception.RoleNotFound(role_id=role_id)
+            roles.append(refs[role_id])
+        return roles
+
     def _get_system_roles(self):
         roles = []
         groups = PROVIDERS.identity_api.list_groups_for_user(self.user_id)
@@ -281,25 +299,31 @@ class TokenModel(object):
         # be fixed to be more clear by operating on actual roles instead of
         # just assignments.
         assignments = PROVIDERS.assignment_api.add_implied_roles(assignments)
-        for assignment in assignments:
-            role = PROVIDERS.role_api.get_role(assignment['role_id'])
+        for role in self._get_roles_from_ids(
+                [assignment['role_id'] for assignment in assignments]):
             roles.append({'id': role['id'], 'name': role['name']})
 
         return roles
 
-    def _get_trust_roles(self):
-        roles = []
+    def _get_original_trustor_id(self):
         # If redelegated_trust_id is set, then we must traverse the trust_chain
         # in order to determine who the original trustor is. We need to do this
         # because the user ID of the original trustor helps us determine scope
         # in the redelegated context.
-        if self.trust.get('redelegated_trust_id'):
-            trust_chain = PROVIDERS.trust_api.get_trust_pedigree(
-                self.trust_id
-            )
-            original_trustor_id = trust_chain[-1]['trustor_user_id']
-        else:
-            original_trustor_id = self.trustor['id']
+        if self.__original_trustor_id is None:
+            if self.trust.get('redelegated_trust_id'):
+                trust_chain = PROVIDERS.trust_api.get_trust_pedigree(
+                    self.trust_id
+                )
+                self.__original_trustor_id = (
+                    trust_chain[-1]['trustor_user_id'])
+            else:
+                self.__original_trustor_id = self.trust['trustor_user_id']
+        return self.__original_trustor_id
+
+    def _get_trust_roles(self):
+        roles = []
+        original_trustor_id = self._get_original_trustor_id()
 
         trust_roles = [
             {'role_id': role['id']} for role in self.trust['roles']
@@ -318,14 +342,14 @@ class TokenModel(object):
         )
 
         for trust_role_id in effective_trust_role_ids:
-            if trust_role_id in current_effective_trustor_roles:
-                role = PROVIDERS.role_api.get_role(trust_role_id)
-                if role['domain_id'] is None:
-                    roles.append(role)
-            else:
+            if trust_role_id not in current_effective_trustor_roles:
                 raise exception.Forbidden(
                     _('Trustee has no delegated roles.'))
 
+        for role in self._get_roles_from_ids(list(effective_trust_role_ids)):
+            if role['domain_id'] is None:
+                roles.append(role)
+
         return roles
 
     def _get_oauth_roles(self):
@@ -337,10 +361,10 @@ class TokenModel(object):
             PROVIDERS.assignment_api.add_implied_roles(access_token_roles)
         )
         user_roles = [r['id'] for r in self._get_project_roles()]
-        for role in effective_access_token_roles:
-            if role['role_id'] in user_roles:
-                role = PROVIDERS.role_api.get_role(role['role_id'])
-                roles.append({'id': role['id'], 'name': role['name']})
+        role_ids = [role['role_id'] for role in effective_access_token_roles
+                    if role['role_id'] in user_roles]
+        for role in self._get_roles_from_ids(role_ids):
+            roles.append({'id': role['id'], 'name': role['name']})
         return roles
 
     def _get_federated_roles(self):
@@ -405,8 +429,7 @@ class TokenModel(object):
                 self.user_id, self.domain_id
             )
         )
-        for role_id in domain_roles:
-            role = PROVIDERS.role_api.get_role(role_id)
+        for role in self._get_roles_from_ids(domain_roles):
             roles.append({'id': role['id'], 'name': role['name']})
 
         return roles
@@ -418,8 +441,7 @@ class TokenModel(object):
                 self.user_id, self.project_id
             )
         )
-        for role_id in project_roles:
-            r = PROVIDERS.role_api.get_role(role_id)
+        for r in self._get_roles_from_ids(project_roles):
             roles.append({'id': r['id'], 'name': r['name']})
 
         return roles
@@ -440,8 +462,43 @@ class TokenModel(object):
 
         return roles
 
+    def get_assignment_generation(self):
+        """Return an opaque value that changes when the token's roles may.
+
+        The roles of a token only depend on the role assignments of its user,
+        or of the original trustor for trust scoped tokens, of its federated
+        groups and on its project or domain, so assignment changes for other
+        users and targets leave this value unchanged.
+
+        """
+        if self.trust_scoped:
+            user_id = self._get_original_trustor_id()
+        else:
+            user_id = self.user_id
+        group_ids = None
+        if self.is_federated and self.federated_groups:
+            group_ids = [group['id'] for group in self.federated_groups]
+        return PROVIDERS.assignment_api.get_assignment_generation(
+            user_id, target_id=self.project_id or self.domain_id,
+            group_ids=group_ids)
+
     @property
     def roles(self):
+        # NOTE: Computing the effective roles is the most expensive part of
+        # validating a token and they are needed several times per request.
+        # Keep them on the token, tagged with the assignment generation of its
+        # user and scope, so that they are reused (including when the token
+        # comes back from the token cache) until one of the role assignments
+        # they depend on changes.
+        if self.unscoped:
+            return []
+        generation = self.get_assignment_generation()
+        if self.__roles is None or self.__roles_generation != generation:
+            self.__roles = self._get_roles()
+            self.__roles_generation = generation
+        return [dict(role) for role in self.__roles]
+
+    def _get_roles(self):
         if self.system_scoped:
             roles = self._get_system_roles()
         elif self.trust_scoped:
@@ -460,6 +517,112 @@ class TokenModel(object):
             roles = []
         return roles
 
+    @staticmethod
+    def resolve_all(tokens):
+        """Look up every entity a batch of tokens refers to, in bulk.
+
+        Tokens often refer to the same entities: the trustee of a trust is
+        always the user of the token, the project of a trust is usually the
+        project of the token, the user and project frequently share a domain
+        and tokens validated together often belong to the same users and
+        projects. The users, projects and domains the tokens refer to are read
+        with one call per backend each, reusing whatever has already been
+        looked up on any of the tokens, and kept on the tokens so that they
+        travel with them into the token cache.
+
+        Entities that can't be found are left unresolved, so that looking them
+        up through the token raises the usual errors.
+
+        :param tokens: a list of token models
+
+        """
+        users = {}
+        projects = {}
+        domains = {}
+        for token in tokens:
+            for ref in (token.__user, token.__trustor, token.__trustee):
+                if ref:
+                    users[ref['id']] = ref
+            for ref in (token.__project, token.__trust_project):
+                if ref:
+                    projects[ref['id']] = ref
+            for ref in (token.__user_domain, token.__domain,
+                        token.__project_domain, token.__trust_project_domain):
+                if ref:
+                    domains[ref['id']] = ref
+
+        def _fetch(refs, ref_ids, list_from_ids):
+            ref_ids = set(ref_ids) - set(refs)
+            ref_ids.discard(None)
+            if ref_ids:
+                for ref in list_from_ids(list(ref_ids)):
+                    if ref['id'] in ref_ids:
+                        refs[ref['id']] = ref
+
+        user_ids = []
+        for token in tokens:
+            user_ids.append(token.user_id)
+            if token.trust:
+                user_ids.append(token.trust['trustor_user_id'])
+                user_ids.append(token.trust['trustee_user_id'])
+        _fetch(users, user_ids, PROVIDERS.identity_api.list_users_from_ids)
+
+        project_ids = []
+        for token in tokens:
+            token.__user = token.__user or users.get(token.user_id)
+            project_ids.append(token.project_id)
+            if token.trust:
+                token.__trustor = token.__trustor or users.get(
+                    token.trust['trustor_user_id'])
+                token.__trustee = token.__trustee or users.get(
+                    token.trust['trustee_user_id'])
+                project_ids.append(token.trust.get('project_id'))
+        _fetch(projects, project_ids,
+               PROVIDERS.resource_api.list_projects_from_ids)
+
+        domain_ids = []
+        for token in tokens:
+            token.__project = token.__project or projects.get(
+                token.project_id)
+            if token.trust:
+                token.__trust_project = token.__trust_project or projects.get(
+                    token.trust.get('project_id'))
+            domain_ids.append(token.domain_id)
+            for ref in (token.__user, token.__project, token.__trust_project):
+                if ref:
+                    domain_ids.append(ref.get('domain_id'))
+        _fetch(domains, domain_ids,
+               PROVIDERS.resource_api.list_domains_from_ids)
+
+        for token in tokens:
+            token.__domain = token.__domain or domains.get(token.domain_id)
+            if token.__user:
+                token.__user_domain = token.__user_domain or domains.get(
+                    token.__user['domain_id'])
+            if token.__project:
+                token.__project_domain = (
+                    token.__project_domain or
+                    domains.get(token.__project.get('domain_id')))
+            if token.__trust_project:
+                token.__trust_project_domain = (
+                    token.__trust_project_domain or
+                    domains.get(token.__trust_project['domain_id']))
+
+    def _resolve(self):
+        """Look up every entity the token refers to, each one only once."""
+        TokenModel.resolve_all([self])
+        # NOTE: Anything the bulk lookups couldn't find is looked up again on
+        # its own by the properties, which raise the usual NotFound errors.
+        for name in ('user', 'user_domain', 'domain', 'project',
+                     'project_domain'):
+            getattr(self, name)
+        if self.trust:
+            for name in ('trustor', 'trustee'):
+                getattr(self, name)
+            if self.trust.get('project_id'):
+                for name in ('trust_project', 'trust_project_domain'):
+                    getattr(self, name)
+
     def _validate_token_resources(self):
         if self.project and not self.project.get('enabled'):
             msg = ('Unable to validate token because project %(id)s is '
@@ -539,6 +702,31 @@ class TokenModel(object):
             LOG.debug(msg)
             raise exception.Unauthorized(tr_msg)
 
+    def _validate_roles(self):
+        generation = self.get_assignment_generation()
+        self._validate_system_scope()
+        self._validate_domain_scope()
+        self._validate_project_scope()
+        self._validate_trust_scope()
+        self.__roles_validated_generation = generation
+
+    def validate_roles(self):
+        """Check that the token's user still has roles on its scope.
+
+        The roles are checked when the token is minted, but a token can be
+        reused from the token cache after role assignments have changed. The
+        checks are made again if the assignment generation has moved on since
+        they were last made.
+
+        :returns: True if the roles were checked again, False otherwise.
+
+        """
+        generation = self.get_assignment_generation()
+        if generation == self.__roles_validated_generation:
+            return False
+        self._validate_roles()
+        return True
+
     def _validate_trust_scope(self):
         trust_roles = []
         if self.trust_id:
@@ -558,13 +746,13 @@ class TokenModel(object):
             # trustor still has them, if any have been removed, then we
             # will treat the trust as invalid
             for trust_role_id in effective_trust_role_ids:
-                if trust_role_id in current_effective_trustor_roles:
-                    role = PROVIDERS.role_api.get_role(trust_role_id)
-                    if role['domain_id'] is None:
-                        trust_roles.append(role)
-                else:
+                if trust_role_id not in current_effective_trustor_roles:
                     raise exception.Forbidden(
                         _('Trustee has no delegated roles.'))
+            for role in self._get_roles_from_ids(
+                    list(effective_trust_role_ids)):
+                if role['domain_id'] is None:
+                    trust_roles.append(role)
 
     def mint(self, token_id, issued_at):
         """Set the ``id`` and ``issued_at`` attributes of a token.
@@ -576,12 +764,10 @@ class TokenModel(object):
         an ``id`` attribute and their creation time is recorded.
 
         """
+        self._resolve()
         self._validate_token_resources()
         self._validate_token_user()
-        self._validate_system_scope()
-        self._validate_domain_scope()
-        self._validate_project_scope()
-        self._validate_trust_scope()
+        self._validate_roles()
 
         self.id = token_id
         self.issued_at = issued_at
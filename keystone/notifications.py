@@ -660,41 +660,48 @@ class CadfRoleAssignmentNotificationWrapper(object):
             """
             call_args = inspect.getcallargs(
                 f, wrapped_self, role_id, *args, **kwargs)
-            inherited = call_args['inherited_to_projects']
             initiator = call_args.get('initiator', None)
-            target = resource.Resource(typeURI=taxonomy.ACCOUNT_USER)
-
-            audit_kwargs = {}
-            if call_args['project_id']:
-                audit_kwargs['project'] = call_args['project_id']
-            elif call_args['domain_id']:
-                audit_kwargs['domain'] = call_args['domain_id']
-
-            if call_args['user_id']:
-                audit_kwargs['user'] = call_args['user_id']
-            elif call_args['group_id']:
-                audit_kwargs['group'] = call_args['group_id']
-
-            audit_kwargs['inherited_to_projects'] = inherited
-            audit_kwargs['role'] = role_id
 
             try:
                 result = f(wrapped_self, role_id, *args, **kwargs)
             except Exception:
-                _send_audit_notification(self.action, initiator,
-                                         taxonomy.OUTCOME_FAILURE,
-                                         target, self.event_type,
-                                         **audit_kwargs)
+                self.send(call_args, initiator, taxonomy.OUTCOME_FAILURE)
                 raise
             else:
-                _send_audit_notification(self.action, initiator,
-                                         taxonomy.OUTCOME_SUCCESS,
-                                         target, self.event_type,
-                                         **audit_kwargs)
+                self.send(call_args, initiator, taxonomy.OUTCOME_SUCCESS)
                 return result
 
         return wrapper
 
+    def send(self, grant, initiator, outcome):
+        """Send the notification for one role assignment.
+
+        :param grant: a dict of the arguments of ``create_grant()`` or
+                      ``delete_grant()`` that identify the role assignment
+        :param initiator: CADF resource representing the initiator
+        :param outcome: The CADF outcome (taxonomy.OUTCOME_SUCCESS or
+                        taxonomy.OUTCOME_FAILURE)
+        """
+        target = resource.Resource(typeURI=taxonomy.ACCOUNT_USER)
+
+        audit_kwargs = {}
+        if grant.get('project_id'):
+            audit_kwargs['project'] = grant['project_id']
+        elif grant.get('domain_id'):
+            audit_kwargs['domain'] = grant['domain_id']
+
+        if grant.get('user_id'):
+            audit_kwargs['user'] = grant['user_id']
+        elif grant.get('group_id'):
+            audit_kwargs['group'] = grant['group_id']
+
+        audit_kwargs['inherited_to_projects'] = grant.get(
+            'inherited_to_projects', False)
+        audit_kwargs['role'] = grant['role_id']
+
+        _send_audit_notification(self.action, initiator, outcome, target,
+                                 self.event_type, **audit_kwargs)
+
 
 def send_saml_audit_notification(action, user_id, group_ids,
                                  identity_provider, protocol, token_id,
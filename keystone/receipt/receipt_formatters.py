@@ -14,7 +14,6 @@
 
 import base64
 import datetime
-import struct
 import uuid
 
 from cryptography import fernet
@@ -35,8 +34,14 @@ LOG = log.getLogger(__name__)
 
 # Fernet byte indexes as computed by pypi/keyless_fernet and defined in
 # https://github.com/fernet/spec
-TIMESTAMP_START = 1
-TIMESTAMP_END = 9
+TIMESTAMP_START = utils.TIMESTAMP_START
+TIMESTAMP_END = utils.TIMESTAMP_END
+
+# Receipts created longer ago than this are rejected before being decrypted.
+# It is the largest allowed [receipt] expiration rather than the current one,
+# which may have been lowered since a receipt was issued; the expiry embedded
+# in the receipt is what actually decides whether it is still valid.
+MAX_RECEIPT_LIFETIME = 24 * 60 * 60
 
 
 class ReceiptFormatter(object):
@@ -55,18 +60,13 @@ class ReceiptFormatter(object):
         ``encrypt(plaintext)`` and ``decrypt(ciphertext)``.
 
         """
-        fernet_utils = utils.FernetUtils(
+        key_ring = utils.get_key_ring(
             CONF.fernet_receipts.key_repository,
             CONF.fernet_receipts.max_active_keys,
-            'fernet_receipts'
+            'fernet_receipts',
+            check_interval=CONF.fernet_receipts.key_repository_check_interval
         )
-        keys = fernet_utils.load_keys()
-
-        if not keys:
-            raise exception.KeysNotFound()
-
-        fernet_instances = [fernet.Fernet(key) for key in keys]
-        return fernet.MultiFernet(fernet_instances)
+        return key_ring.crypto
 
     def pack(self, payload):
         """Pack a payload for transport as a receipt.
@@ -93,6 +93,22 @@ class ReceiptFormatter(object):
             raise exception.ValidationError(
                 _('This is not a recognized Fernet receipt %s') % receipt)
 
+    @classmethod
+    def parse(cls, receipt):
+        """Read the header of a Fernet receipt, without decrypting it.
+
+        :type receipt: str
+        :rtype: keystone.common.fernet_utils.ParsedToken
+        :raises keystone.exception.ValidationError: if the receipt is
+            malformed
+
+        """
+        try:
+            return utils.parse_token(receipt)
+        except ValueError:
+            raise exception.ValidationError(
+                _('This is not a recognized Fernet receipt %s') % receipt)
+
     @classmethod
     def restore_padding(cls, receipt):
         """Restore padding based on receipt size.
@@ -116,20 +132,13 @@ class ReceiptFormatter(object):
         :type fernet_receipt: str
 
         """
-        fernet_receipt = ReceiptFormatter.restore_padding(fernet_receipt)
-        # fernet_receipt is str
-
-        # Fernet receipts are base64 encoded, so we need to unpack them first
-        # urlsafe_b64decode() requires bytes
-        receipt_bytes = base64.urlsafe_b64decode(
-            fernet_receipt.encode('utf-8'))
-
-        # slice into the byte array to get just the timestamp
-        timestamp_bytes = receipt_bytes[TIMESTAMP_START:TIMESTAMP_END]
-
-        # convert those bytes to an integer
-        # (it's a 64-bit "unsigned long long int" in C)
-        timestamp_int = struct.unpack(">Q", timestamp_bytes)[0]
+        # Fernet receipts are base64 encoded, but only the header holding the
+        # timestamp needs to be decoded
+        timestamp_int = utils.get_token_timestamp(fernet_receipt)
+        if timestamp_int is None:
+            raise exception.ValidationError(
+                _('This is not a recognized Fernet receipt %s') %
+                fernet_receipt)
 
         # and with an integer, it's trivial to produce a datetime object
         issued_at = datetime.datetime.utcfromtimestamp(timestamp_int)
@@ -162,6 +171,14 @@ class ReceiptFormatter(object):
         :type receipt: str
 
         """
+        # NOTE: The receipt header is read up front so that malformed
+        # receipts, and receipts too old to possibly still be valid, are
+        # rejected before any keys are tried.
+        parsed_receipt = ReceiptFormatter.parse(receipt)
+        if (parsed_receipt.timestamp + MAX_RECEIPT_LIFETIME <
+                timeutils.utcnow_ts()):
+            raise exception.ValidationError(_('Fernet receipt has expired'))
+
         serialized_payload = self.unpack(receipt)
         payload = msgpack.unpackb(serialized_payload)
 
@@ -169,7 +186,8 @@ class ReceiptFormatter(object):
 
         # rather than appearing in the payload, the creation time is encoded
         # into the receipt format itself
-        issued_at = ReceiptFormatter.creation_time(receipt)
+        issued_at = datetime.datetime.utcfromtimestamp(
+            parsed_receipt.timestamp)
         issued_at = ks_utils.isotime(at=issued_at, subsecond=True)
         expires_at = timeutils.parse_isotime(expires_at)
         expires_at = ks_utils.isotime(at=expires_at, subsecond=True)
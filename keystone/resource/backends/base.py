@@ -95,6 +95,25 @@ class ResourceDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_project_hierarchy_in_domain(self, domain_id):
+        """List the hierarchy of the projects in a domain.
+
+        :param domain_id: the ID of the domain
+        :returns: a list of dicts holding the ``id``, ``parent_id`` and
+                  ``enabled`` attributes of the domain, first, and of each
+                  project in the domain
+        :raises keystone.exception.DomainNotFound: if the domain does not
+                                                   exist
+
+        """
+        try:
+            domain = self.get_project(domain_id)
+        except exception.ProjectNotFound:
+            raise exception.DomainNotFound(domain_id=domain_id)
+        return [{'id': ref['id'], 'parent_id': ref['parent_id'],
+                 'enabled': ref.get('enabled', True)}
+                for ref in [domain] + self.list_projects_in_domain(domain_id)]
+
     @abc.abstractmethod
     def get_project(self, project_id):
         """Get a project by ID.
@@ -25,6 +25,21 @@ from keystone.resource.backends import sql_model
 LOG = log.getLogger(__name__)
 
 
+def _supports_recursive_queries(session):
+    """Return whether the database supports WITH RECURSIVE queries."""
+    dialect = session.get_bind().dialect
+    version = dialect.server_version_info or ()
+    if dialect.name == 'sqlite':
+        return version >= (3, 8, 3)
+    if dialect.name == 'postgresql':
+        return version >= (8, 4)
+    if dialect.name == 'mysql':
+        if getattr(dialect, '_is_mariadb', False) or 'MariaDB' in version:
+            return version >= (10, 2, 2)
+        return version >= (8, 0)
+    return False
+
+
 class Resource(base.ResourceDriverBase):
 
     def _encode_domain_id(self, ref):
@@ -116,6 +131,25 @@ class Resource(base.ResourceDriverBase):
                 sql_model.Project.domain_id == domain_id)
             return [project_ref.to_dict() for project_ref in project_refs]
 
+    def list_project_hierarchy_in_domain(self, domain_id):
+        with sql.session_for_read() as session:
+            project = sql_model.Project
+            query = session.query(
+                project.id, project.parent_id, project.enabled).filter(
+                    expression.or_(project.id == domain_id,
+                                   project.domain_id == domain_id))
+            domain, projects = None, []
+            for row in query:
+                ref = {'id': row.id, 'parent_id': row.parent_id,
+                       'enabled': row.enabled}
+                if row.id == domain_id:
+                    domain = ref
+                else:
+                    projects.append(ref)
+            if domain is None:
+                raise exception.DomainNotFound(domain_id=domain_id)
+            return [domain] + projects
+
     def list_projects_acting_as_domain(self, hints):
         hints.add_filter('is_domain', True)
         return self.list_projects(hints)
@@ -126,46 +160,178 @@ class Resource(base.ResourceDriverBase):
         project_refs = query.all()
         return [project_ref.to_dict() for project_ref in project_refs]
 
+    def _joined_project_loads(self):
+        # Load the tags and options of projects read by a recursive query in
+        # the same statement, since loading them with separate subqueries
+        # would run the recursive query again for each of them.
+        return (orm.joinedload(sql_model.Project._tags),
+                orm.joinedload(sql_model.Project._resource_option_mapper))
+
+    def _is_indexed(self, session, project_id):
+        # A project is in the project_ancestor index once it has a row for
+        # itself. Projects created before the index existed, or by a server
+        # that does not maintain it yet during a rolling upgrade, are indexed
+        # by the data migration.
+        ancestor = sql_model.ProjectAncestor
+        query = session.query(ancestor.project_id).filter(
+            ancestor.project_id == project_id,
+            ancestor.ancestor_id == project_id)
+        return session.query(query.exists()).scalar()
+
+    def _unindexed_projects(self, session):
+        ancestor = orm.aliased(sql_model.ProjectAncestor)
+        indexed = session.query(ancestor.project_id).filter(
+            ancestor.project_id == sql_model.Project.id,
+            ancestor.ancestor_id == sql_model.Project.id)
+        return session.query(sql_model.Project.id).filter(
+            sql_model.Project.id != base.NULL_DOMAIN_ID, ~indexed.exists())
+
     def list_projects_in_subtree(self, project_id):
         with sql.session_for_read() as session:
-            children = self._get_children(session, [project_id])
-            subtree = []
-            examined = set([project_id])
-            while children:
-                children_ids = set()
-                for ref in children:
-                    if ref['id'] in examined:
-                        msg = ('Circular reference or a repeated '
-                               'entry found in projects hierarchy - '
-                               '%(project_id)s.')
-                        LOG.error(msg, {'project_id': ref['id']})
-                        return
-                    children_ids.add(ref['id'])
-
-                examined.update(children_ids)
-                subtree += children
-                children = self._get_children(session, children_ids)
-            return subtree
+            if self._is_indexed(session, project_id):
+                subtree = self._query_indexed_subtree(session, project_id)
+                if subtree is not None:
+                    return subtree
+            if _supports_recursive_queries(session):
+                return self._query_projects_in_subtree(session, project_id)
+            return self._walk_projects_in_subtree(session, project_id)
+
+    def _query_indexed_subtree(self, session, project_id):
+        ancestor = sql_model.ProjectAncestor
+        # Every descendant of an indexed project is indexed, unless it was
+        # created by a server that does not maintain the index. Fall back to
+        # reading the hierarchy from parent_id if there is such a project.
+        unindexed = self._unindexed_projects(session).join(
+            ancestor, expression.and_(
+                ancestor.project_id == sql_model.Project.parent_id,
+                ancestor.ancestor_id == project_id))
+        if session.query(unindexed.exists()).scalar():
+            return
 
-    def list_project_parents(self, project_id):
-        with sql.session_for_read() as session:
-            project = self._get_project(session, project_id).to_dict()
-            parents = []
-            examined = set()
-            while project.get('parent_id') is not None:
-                if project['id'] in examined:
+        query = session.query(sql_model.Project).join(
+            ancestor, sql_model.Project.id == ancestor.project_id).filter(
+                ancestor.ancestor_id == project_id, ancestor.depth > 0)
+        query = query.options(*self._joined_project_loads())
+        return [project_ref.to_dict()
+                for project_ref in query.order_by(ancestor.depth)]
+
+    def _query_projects_in_subtree(self, session, project_id):
+        # Read the whole subtree with a single recursive query. Using UNION
+        # rather than UNION ALL discards rows that were already found, so the
+        # query ends even if the hierarchy contains a cycle.
+        child = orm.aliased(sql_model.Project)
+        subtree = session.query(sql_model.Project.id).filter(
+            sql_model.Project.parent_id == project_id).cte(
+                name='subtree', recursive=True)
+        subtree = subtree.union(
+            session.query(child.id).filter(child.parent_id == subtree.c.id))
+        query = session.query(sql_model.Project).join(
+            subtree, sql_model.Project.id == subtree.c.id)
+        query = query.options(*self._joined_project_loads())
+
+        children_by_parent = {}
+        for project_ref in query:
+            if project_ref.id == project_id:
+                msg = ('Circular reference or a repeated '
+                       'entry found in projects hierarchy - '
+                       '%(project_id)s.')
+                LOG.error(msg, {'project_id': project_id})
+                return
+            children_by_parent.setdefault(
+                project_ref.parent_id, []).append(project_ref.to_dict())
+
+        # Return the projects level by level, as when walking the tree.
+        subtree = []
+        children = children_by_parent.get(project_id, [])
+        while children:
+            subtree += children
+            children = [grandchild for ref in children for grandchild in
+                        children_by_parent.get(ref['id'], [])]
+        return subtree
+
+    def _walk_projects_in_subtree(self, session, project_id):
+        children = self._get_children(session, [project_id])
+        subtree = []
+        examined = set([project_id])
+        while children:
+            children_ids = set()
+            for ref in children:
+                if ref['id'] in examined:
                     msg = ('Circular reference or a repeated '
                            'entry found in projects hierarchy - '
                            '%(project_id)s.')
-                    LOG.error(msg, {'project_id': project['id']})
+                    LOG.error(msg, {'project_id': ref['id']})
                     return
+                children_ids.add(ref['id'])
 
-                examined.add(project['id'])
-                parent_project = self._get_project(
-                    session, project['parent_id']).to_dict()
-                parents.append(parent_project)
-                project = parent_project
-            return parents
+            examined.update(children_ids)
+            subtree += children
+            children = self._get_children(session, children_ids)
+        return subtree
+
+    def list_project_parents(self, project_id):
+        with sql.session_for_read() as session:
+            if self._is_indexed(session, project_id):
+                return self._query_indexed_parents(session, project_id)
+            return self._walk_project_parents(session, project_id)
+
+    def _query_indexed_parents(self, session, project_id):
+        # The parents of an indexed project are always indexed as well.
+        ancestor = sql_model.ProjectAncestor
+        query = session.query(sql_model.Project).join(
+            ancestor, sql_model.Project.id == ancestor.ancestor_id).filter(
+                ancestor.project_id == project_id, ancestor.depth > 0)
+        query = query.options(*self._joined_project_loads())
+        return [project_ref.to_dict()
+                for project_ref in query.order_by(ancestor.depth)
+                if not self._is_hidden_ref(project_ref)]
+
+    def _walk_project_parents(self, session, project_id):
+        if _supports_recursive_queries(session):
+            projects_by_id = self._query_project_lineage(session, project_id)
+
+            def get_project(project_id):
+                try:
+                    return projects_by_id[project_id]
+                except KeyError:
+                    raise exception.ProjectNotFound(project_id=project_id)
+        else:
+            def get_project(project_id):
+                return self._get_project(session, project_id).to_dict()
+
+        project = get_project(project_id)
+        parents = []
+        examined = set()
+        while project.get('parent_id') is not None:
+            if project['id'] in examined:
+                msg = ('Circular reference or a repeated '
+                       'entry found in projects hierarchy - '
+                       '%(project_id)s.')
+                LOG.error(msg, {'project_id': project['id']})
+                return
+
+            examined.add(project['id'])
+            parent_project = get_project(project['parent_id'])
+            parents.append(parent_project)
+            project = parent_project
+        return parents
+
+    def _query_project_lineage(self, session, project_id):
+        # Read a project and all of its parents with a single recursive
+        # query, returning them indexed by ID.
+        parent = orm.aliased(sql_model.Project)
+        lineage = session.query(
+            sql_model.Project.id, sql_model.Project.parent_id).filter(
+                sql_model.Project.id == project_id).cte(
+                    name='lineage', recursive=True)
+        lineage = lineage.union(
+            session.query(parent.id, parent.parent_id).filter(
+                parent.id == lineage.c.parent_id))
+        query = session.query(sql_model.Project).join(
+            lineage, sql_model.Project.id == lineage.c.id)
+        query = query.options(*self._joined_project_loads())
+        return {project_ref.id: project_ref.to_dict() for project_ref in query
+                if not self._is_hidden_ref(project_ref)}
 
     def is_leaf_project(self, project_id):
         with sql.session_for_read() as session:
@@ -238,13 +404,71 @@ class Resource(base.ResourceDriverBase):
             resource_options.resource_options_ref_to_mapper(
                 project_ref, sql_model.ProjectOption
             )
+            session.flush()
+            self._add_to_index(session, project_ref.id, project_ref.parent_id)
             return project_ref.to_dict()
 
+    def _add_to_index(self, session, project_id, parent_id):
+        # A project is only indexed under an indexed parent, so that the
+        # parents of every indexed project are indexed too. The hidden root
+        # of all domains is never indexed.
+        if project_id == base.NULL_DOMAIN_ID:
+            return
+        if parent_id is not None and not self._is_indexed(session, parent_id):
+            return
+        table = sql_model.ProjectAncestor.__table__
+        session.execute(table.insert().values(
+            project_id=project_id, ancestor_id=project_id, depth=0))
+        if parent_id is not None:
+            parents = expression.select([
+                expression.literal(project_id), table.c.ancestor_id,
+                table.c.depth + 1]).where(table.c.project_id == parent_id)
+            session.execute(table.insert().from_select(
+                ['project_id', 'ancestor_id', 'depth'], parents))
+
+    def _move_in_index(self, session, project_id, parent_id):
+        table = sql_model.ProjectAncestor.__table__
+        subtree = session.execute(
+            expression.select([table.c.project_id, table.c.depth]).where(
+                table.c.ancestor_id == project_id)).fetchall()
+        if not subtree:
+            return
+        subtree_ids = [row.project_id for row in subtree]
+        # Unlink the subtree from the parents of the project, keeping the
+        # rows within the subtree.
+        session.execute(table.delete().where(expression.and_(
+            table.c.project_id.in_(subtree_ids),
+            ~table.c.ancestor_id.in_(subtree_ids))))
+        if parent_id is None:
+            return
+        if (parent_id in subtree_ids or
+                not self._is_indexed(session, parent_id)):
+            # Leave the subtree out of the index, so that its hierarchy is
+            # read from parent_id.
+            session.execute(table.delete().where(
+                table.c.project_id.in_(subtree_ids)))
+            return
+        parents = session.execute(
+            expression.select([table.c.ancestor_id, table.c.depth]).where(
+                table.c.project_id == parent_id)).fetchall()
+        session.execute(table.insert(), [
+            {'project_id': descendant.project_id,
+             'ancestor_id': parent.ancestor_id,
+             'depth': parent.depth + descendant.depth + 1}
+            for descendant in subtree for parent in parents])
+
+    def _remove_from_index(self, session, project_ids):
+        table = sql_model.ProjectAncestor.__table__
+        session.execute(table.delete().where(expression.or_(
+            table.c.project_id.in_(project_ids),
+            table.c.ancestor_id.in_(project_ids))))
+
     @sql.handle_conflicts(conflict_type='project')
     def update_project(self, project_id, project):
         update_project = self._encode_domain_id(project)
         with sql.session_for_write() as session:
             project_ref = self._get_project(session, project_id)
+            old_parent_id = project_ref.parent_id
             old_project_dict = project_ref.to_dict()
             for k in update_project:
                 old_project_dict[k] = update_project[k]
@@ -265,12 +489,16 @@ class Resource(base.ResourceDriverBase):
             resource_options.resource_options_ref_to_mapper(
                 project_ref, sql_model.ProjectOption)
             project_ref.extra = new_project.extra
+            if project_ref.parent_id != old_parent_id:
+                session.flush()
+                self._move_in_index(session, project_id, project_ref.parent_id)
             return project_ref.to_dict(include_extra_dict=True)
 
     @sql.handle_conflicts(conflict_type='project')
     def delete_project(self, project_id):
         with sql.session_for_write() as session:
             project_ref = self._get_project(session, project_id)
+            self._remove_from_index(session, [project_id])
             session.delete(project_ref)
 
     @sql.handle_conflicts(conflict_type='project')
@@ -286,10 +514,20 @@ class Resource(base.ResourceDriverBase):
                         project_id == base.NULL_DOMAIN_ID):
                     LOG.warning('Project %s does not exist and was not '
                                 'deleted.', project_id)
+            self._remove_from_index(session, project_ids_from_bd)
             query.delete(synchronize_session=False)
 
     def check_project_depth(self, max_depth):
         with sql.session_for_read() as session:
+            if not session.query(
+                    self._unindexed_projects(session).exists()).scalar():
+                # Every project is indexed, so the projects that are too deep
+                # are those with a parent max_depth levels above them.
+                ancestor = sql_model.ProjectAncestor
+                query = session.query(ancestor.project_id).filter(
+                    ancestor.depth == max_depth).distinct()
+                return [row.project_id for row in query]
+
             obj_list = []
             # Using db table self outerjoin to find the project descendants.
             #
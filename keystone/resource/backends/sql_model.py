@@ -65,7 +65,8 @@ class Project(sql.ModelBase, sql.ModelDictMixinWithExtras):
     description = sql.Column(sql.Text())
     enabled = sql.Column(sql.Boolean)
     extra = sql.Column(sql.JsonBlob())
-    parent_id = sql.Column(sql.String(64), sql.ForeignKey('project.id'))
+    parent_id = sql.Column(sql.String(64), sql.ForeignKey('project.id'),
+                           index=True)
     is_domain = sql.Column(sql.Boolean, default=False, nullable=False,
                            server_default='0')
     _tags = orm.relationship(
@@ -133,3 +134,25 @@ class ProjectOption(sql.ModelBase):
     def __init__(self, option_id, option_value):
         self.option_id = option_id
         self.option_value = option_value
+
+
+class ProjectAncestor(sql.ModelBase):
+    """An entry in the closure table of the project hierarchy.
+
+    Each project has one row for itself, at depth 0, and one row for each of
+    its parents, with the depth being the number of levels between them. This
+    allows the parents or the subtree of a project to be read with a single
+    indexed query.
+
+    """
+
+    __tablename__ = 'project_ancestor'
+    project_id = sql.Column(sql.String(64),
+                            sql.ForeignKey('project.id', ondelete='CASCADE'),
+                            nullable=False, primary_key=True)
+    ancestor_id = sql.Column(sql.String(64),
+                             sql.ForeignKey('project.id', ondelete='CASCADE'),
+                             nullable=False, primary_key=True)
+    depth = sql.Column(sql.Integer, nullable=False)
+    __table_args__ = (sql.Index('ix_project_ancestor_ancestor_id_depth',
+                                'ancestor_id', 'depth'),)
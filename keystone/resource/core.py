@@ -12,6 +12,10 @@
 
 """Main entry point into the Resource service."""
 
+import array
+import sys
+import uuid
+
 from oslo_log import log
 
 from keystone import assignment
@@ -37,6 +41,108 @@ PROVIDERS = provider_api.ProviderAPIs
 TAG_SEARCH_FILTERS = ('tags', 'tags-any', 'not-tags', 'not-tags-any')
 
 
+class _ProjectTree(object):
+    """The hierarchy of the projects in a domain.
+
+    Projects are numbered with the domain first. The tree is held as an array
+    of the number of the parent of each project, with -1 for the domain, and
+    the children of each project are stored next to each other in a second
+    array so that a subtree can be walked without looking at every project.
+
+    :raises ValueError: if a project's parent is not in the domain, or the
+                        hierarchy contains a cycle
+
+    """
+
+    def __init__(self, domain, projects):
+        self.ids = [domain['id']] + [project['id'] for project in projects]
+        self.index = {project_id: i for i, project_id in enumerate(self.ids)}
+        self.parents = array.array('i', [-1])
+        self.enabled = bytearray([bool(domain.get('enabled', True))])
+        for project in projects:
+            parent = self.index.get(project['parent_id'])
+            if parent is None:
+                raise ValueError('The parent of project %s is not in domain '
+                                 '%s.' % (project['id'], domain['id']))
+            self.parents.append(parent)
+            self.enabled.append(bool(project.get('enabled', True)))
+
+        # The children of project i are children[first_child[i]:
+        # first_child[i + 1]].
+        self.first_child = array.array('i', [0] * (len(self.ids) + 1))
+        for parent in self.parents[1:]:
+            self.first_child[parent + 1] += 1
+        for i in range(len(self.ids)):
+            self.first_child[i + 1] += self.first_child[i]
+        self.children = array.array('i', [0] * (len(self.ids) - 1))
+        next_child = self.first_child[:-1]
+        for i, parent in enumerate(self.parents[1:], 1):
+            self.children[next_child[parent]] = i
+            next_child[parent] += 1
+
+        if len(self._walk(0)) != len(self.ids) - 1:
+            raise ValueError('Circular reference found in the projects '
+                             'hierarchy of domain %s.' % domain['id'])
+
+    def _walk(self, i):
+        # Return the numbers of the projects below project i, level by level.
+        subtree = []
+        level = [i]
+        while level:
+            level = [child for parent in level for child in
+                     self.children[self.first_child[parent]:
+                                   self.first_child[parent + 1]]]
+            subtree += level
+        return subtree
+
+    def __contains__(self, project_id):
+        return project_id in self.index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def list_parent_ids(self, project_id):
+        """Return the IDs of the parents of a project, nearest first."""
+        parent_ids = []
+        i = self.parents[self.index[project_id]]
+        while i != -1:
+            parent_ids.append(self.ids[i])
+            i = self.parents[i]
+        return parent_ids
+
+    def list_subtree_ids(self, project_id):
+        """Return the IDs of the projects below a project, level by level."""
+        return [self.ids[i] for i in self._walk(self.index[project_id])]
+
+    def is_enabled(self, project_id):
+        return bool(self.enabled[self.index[project_id]])
+
+    def get_parents_as_ids(self, project_id):
+        parents_as_ids = None
+        for parent_id in reversed(self.list_parent_ids(project_id)):
+            parents_as_ids = {parent_id: parents_as_ids}
+        return parents_as_ids
+
+    def get_subtree_as_ids(self, project_id):
+        def traverse_subtree_hierarchy(i):
+            children = self.children[self.first_child[i]:
+                                     self.first_child[i + 1]]
+            if not children:
+                return None
+            return {self.ids[child]: traverse_subtree_hierarchy(child)
+                    for child in children}
+
+        return traverse_subtree_hierarchy(self.index[project_id])
+
+    def get_size(self):
+        """Return the approximate number of bytes used by the tree."""
+        return (sum(sys.getsizeof(project_id) for project_id in self.ids) +
+                sys.getsizeof(self.ids) + sys.getsizeof(self.index) +
+                sys.getsizeof(self.parents) + sys.getsizeof(self.enabled) +
+                sys.getsizeof(self.first_child) +
+                sys.getsizeof(self.children))
+
+
 class Manager(manager.Manager):
     """Default pivot point for the Resource backend.
 
@@ -55,6 +161,54 @@ class Manager(manager.Manager):
     def __init__(self):
         resource_driver = CONF.resource.driver
         super(Manager, self).__init__(resource_driver)
+        # The project trees of the domains read by this process, each stored
+        # with the generation of the tree it was read at.
+        self._project_trees = {}
+
+    @MEMOIZE
+    def _get_project_tree_generation(self, domain_id):
+        # A tree stays current for as long as its generation remains in the
+        # cache, which is shared with the other keystone processes.
+        return uuid.uuid4().hex
+
+    def _invalidate_project_tree(self, domain_id):
+        self._get_project_tree_generation.invalidate(self, domain_id)
+        self._project_trees.pop(domain_id, None)
+
+    def _get_project_tree(self, project):
+        """Return the tree of the domain of a project.
+
+        The trees are only kept while resource caching is enabled, since the
+        cache is how changes made by other processes are noticed. ``None`` is
+        returned if caching is disabled, or if the project is not in the tree.
+
+        """
+        if not (CONF.cache.enabled and CONF.resource.caching):
+            return None
+        domain_id = project['domain_id'] or project['id']
+        # Read the generation before the projects, so that changes made while
+        # the projects are being read invalidate the tree.
+        generation = self._get_project_tree_generation(domain_id)
+        generation_and_tree = self._project_trees.get(domain_id)
+        if generation_and_tree and generation_and_tree[0] == generation:
+            tree = generation_and_tree[1]
+        else:
+            try:
+                hierarchy = self.driver.list_project_hierarchy_in_domain(
+                    domain_id)
+                tree = _ProjectTree(hierarchy[0], hierarchy[1:])
+            except (exception.NotFound, ValueError) as e:
+                LOG.warning('Unable to load the project tree of domain '
+                            '%(domain_id)s: %(error)s',
+                            {'domain_id': domain_id, 'error': e})
+                return None
+            LOG.debug('Loaded the project tree of domain %(domain_id)s, '
+                      'holding %(count)d projects in about %(size)d bytes.',
+                      {'domain_id': domain_id, 'count': len(tree),
+                       'size': tree.get_size()})
+            self._project_trees[domain_id] = (generation, tree)
+        if project['id'] in tree:
+            return tree
 
     def _get_hierarchy_depth(self, parents_list):
         return len(parents_list) + 1
@@ -227,6 +381,7 @@ class Manager(manager.Manager):
             self.get_project.set(ret, self, project_id)
             self.get_project_by_name.set(ret, self, ret['name'],
                                          ret['domain_id'])
+        self._invalidate_project_tree(ret['domain_id'] or project_id)
 
         assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
 
@@ -278,9 +433,15 @@ class Manager(manager.Manager):
             raise AssertionError(_('Project is disabled: %s') % project_id)
 
     def _assert_all_parents_are_enabled(self, project_id):
-        parents_list = self.list_project_parents(project_id)
-        for project in parents_list:
-            if not project.get('enabled', True):
+        tree = self._get_project_tree(self.get_project(project_id))
+        if tree is not None:
+            parents_enabled = [tree.is_enabled(parent_id) for parent_id in
+                               tree.list_parent_ids(project_id)]
+        else:
+            parents_enabled = [project.get('enabled', True) for project in
+                               self.list_project_parents(project_id)]
+        for enabled in parents_enabled:
+            if not enabled:
                 raise exception.ForbiddenNotSecurity(
                     _('Cannot enable project %s since it has disabled '
                       'parents') % project_id)
@@ -291,6 +452,10 @@ class Manager(manager.Manager):
 
     def _check_whole_subtree_is_disabled(self, project_id, subtree_list=None):
         if not subtree_list:
+            tree = self._get_project_tree(self.get_project(project_id))
+            if tree is not None:
+                return not any(tree.is_enabled(x) for x in
+                               tree.list_subtree_ids(project_id))
             subtree_list = self.list_projects_in_subtree(project_id)
         subtree_enabled = [ref.get('enabled', True) for ref in subtree_list]
         return (not any(subtree_enabled))
@@ -384,6 +549,12 @@ class Manager(manager.Manager):
             self.get_project.invalidate(self, project_id)
             self.get_project_by_name.invalidate(self, original_project['name'],
                                                 original_project['domain_id'])
+            # A project tree only holds the hierarchy and the enabled flags,
+            # so other updates, such as a rename, leave it current.
+            if any(ret.get(attr) != original_project.get(attr)
+                   for attr in ('parent_id', 'domain_id', 'enabled')):
+                self._invalidate_project_tree(
+                    original_project['domain_id'] or project_id)
             if ('domain_id' in project and
                project['domain_id'] != original_project['domain_id']):
                 # If the project's domain_id has been updated, invalidate user
@@ -447,41 +618,141 @@ class Manager(manager.Manager):
 
         return ret
 
-    def _post_delete_cleanup_project(self, project_id, project,
-                                     initiator=None):
+    def _post_delete_cleanup_projects(self, projects, initiator=None):
+        project_ids = [project['id'] for project in projects]
         try:
-            self.get_project.invalidate(self, project_id)
-            self.get_project_by_name.invalidate(self, project['name'],
-                                                project['domain_id'])
-            PROVIDERS.assignment_api.delete_project_assignments(project_id)
+            for project in projects:
+                self.get_project.invalidate(self, project['id'])
+                self.get_project_by_name.invalidate(self, project['name'],
+                                                    project['domain_id'])
+            for domain_id in set(project['domain_id'] or project['id']
+                                 for project in projects):
+                self._invalidate_project_tree(domain_id)
+            PROVIDERS.assignment_api.delete_assignments_for_projects(
+                project_ids)
             # Invalidate user role assignments cache region, as it may
             # be caching role assignments where the target is
-            # the specified project
+            # one of the specified projects
             assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
-            PROVIDERS.credential_api.delete_credentials_for_project(project_id)
-            PROVIDERS.trust_api.delete_trusts_for_project(project_id)
-            PROVIDERS.unified_limit_api.delete_limits_for_project(project_id)
+            PROVIDERS.credential_api.delete_credentials_for_projects(
+                project_ids)
+            PROVIDERS.trust_api.delete_trusts_for_projects(project_ids)
+            PROVIDERS.unified_limit_api.delete_limits_for_projects(
+                project_ids)
         finally:
-            # attempt to send audit event even if the cache invalidation raises
-            notifications.Audit.deleted(self._PROJECT, project_id, initiator)
+            # attempt to send audit events even if the cache invalidation
+            # raises
+            for project_id in project_ids:
+                notifications.Audit.deleted(self._PROJECT, project_id,
+                                            initiator)
+
+    def _group_projects_by_level(self, projects):
+        """Group a list of projects by their depth within the list.
 
-    def delete_project(self, project_id, initiator=None, cascade=False):
+        A project whose parent is not in the list is on the first level.
+        Projects on a circular reference, and the projects below them, are
+        left out.
+
+        :returns: a list holding the list of projects on each level
+
+        """
+        parent_ids = {project['id']: project['parent_id']
+                      for project in projects}
+        depths = {}
+        for project in projects:
+            # Walk up until reaching a project whose depth is known, or the
+            # top of the list, then set the depth of the projects on the way.
+            path = []
+            project_id = project['id']
+            while project_id in parent_ids and project_id not in depths:
+                if project_id in path:
+                    LOG.error('Circular reference or a repeated entry found '
+                              'projects hierarchy - %(project_id)s.',
+                              {'project_id': project_id})
+                    depths[project_id] = None
+                    break
+                path.append(project_id)
+                project_id = parent_ids[project_id]
+            depth = depths.get(project_id, -1)
+            for project_id in reversed(path):
+                depth = None if depth is None else depth + 1
+                depths[project_id] = depth
+
+        levels = []
+        for project in projects:
+            depth = depths[project['id']]
+            if depth is None:
+                continue
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(project)
+        return levels
+
+    def _delete_projects(self, projects, initiator=None, progress=None):
+        """Delete a list of projects from the bottom of the hierarchy up.
+
+        The projects are deleted one level at a time, starting from the
+        deepest, in batches of at most ``[resource] delete_batch_size``
+        projects, so that no project is deleted before its children. The
+        role assignments, credentials, trusts and limits of a batch are
+        removed together, and the notifications for the projects of a batch
+        are sent once it has been deleted.
+
+        :param progress: optional callable, called after each batch with the
+                         number of projects deleted so far and the number to
+                         delete in total
+        :raises keystone.exception.ResourceDeleteForbidden: if any of the
+            projects is immutable, in which case none of them is deleted
+        :returns: the number of projects deleted
+
+        """
+        levels = self._group_projects_by_level(projects)
+        for level in levels:
+            for project in level:
+                ro_opt.check_immutable_delete(
+                    resource_ref=project,
+                    resource_type='project',
+                    resource_id=project['id'])
+
+        total = sum(len(level) for level in levels)
+        batch_size = CONF.resource.delete_batch_size
+        deleted = 0
+        for level in reversed(levels):
+            for start in range(0, len(level), batch_size):
+                batch = level[start:start + batch_size]
+                self.driver.delete_projects_from_ids(
+                    [project['id'] for project in batch])
+                self._post_delete_cleanup_projects(batch, initiator)
+                deleted += len(batch)
+                LOG.debug('Deleted %(deleted)d of %(total)d projects.',
+                          {'deleted': deleted, 'total': total})
+                if progress is not None:
+                    progress(deleted, total)
+        return deleted
+
+    def delete_project(self, project_id, initiator=None, cascade=False,
+                       progress=None):
         """Delete one project or a subtree.
 
         :param cascade: If true, the specified project and all its
                         sub-projects are deleted. Otherwise, only the specified
                         project is deleted.
         :type cascade: boolean
+        :param progress: optional callable, called with the number of
+                         projects deleted so far and the number to delete in
+                         total as a subtree or a domain is being deleted
         :raises keystone.exception.ValidationError: if project is a domain
         :raises keystone.exception.Forbidden: if project is not a leaf
         """
         project = self.driver.get_project(project_id)
         if project.get('is_domain'):
-            self._delete_domain(project, initiator)
+            self._delete_domain(project, initiator, progress=progress)
         else:
-            self._delete_project(project, initiator, cascade)
+            self._delete_project(project, initiator, cascade,
+                                 progress=progress)
 
-    def _delete_project(self, project, initiator=None, cascade=False):
+    def _delete_project(self, project, initiator=None, cascade=False,
+                        progress=None):
         # Prevent deletion of immutable projects
         ro_opt.check_immutable_delete(
             resource_ref=project,
@@ -502,10 +773,7 @@ class Manager(manager.Manager):
                 % project_id)
 
         if cascade:
-            # Getting reversed project's subtrees list, i.e. from the leaves
-            # to the root, so we do not break parent_id FK.
             subtree_list = self.list_projects_in_subtree(project_id)
-            subtree_list.reverse()
             if not self._check_whole_subtree_is_disabled(
                     project_id, subtree_list=subtree_list):
                 raise exception.ForbiddenNotSecurity(
@@ -513,15 +781,14 @@ class Manager(manager.Manager):
                       'contains enabled projects.')
                     % {'project_id': project_id})
 
-            project_list = subtree_list + [project]
-            projects_ids = [x['id'] for x in project_list]
-
-            ret = self.driver.delete_projects_from_ids(projects_ids)
-            for prj in project_list:
-                self._post_delete_cleanup_project(prj['id'], prj, initiator)
+            # The projects are deleted from the leaves up to the root, so
+            # that we do not break parent_id FK.
+            ret = self._delete_projects([project] + subtree_list,
+                                        initiator=initiator,
+                                        progress=progress)
         else:
             ret = self.driver.delete_project(project_id)
-            self._post_delete_cleanup_project(project_id, project, initiator)
+            self._post_delete_cleanup_projects([project], initiator)
 
         reason = (
             'The token cache is being invalidate because project '
@@ -563,7 +830,14 @@ class Manager(manager.Manager):
     def list_project_parents(self, project_id, user_id=None,
                              include_limits=False):
         self._assert_valid_project_id(project_id)
-        parents = self.driver.list_project_parents(project_id)
+        tree = self._get_project_tree(self.get_project(project_id))
+        if tree is not None:
+            # The parents are read from the cache, so copy them before they
+            # can be modified.
+            parents = [self.get_project(parent_id).copy() for parent_id in
+                       tree.list_parent_ids(project_id)]
+        else:
+            parents = self.driver.list_project_parents(project_id)
         # If a user_id was provided, the returned list should be filtered
         # against the projects this user has access to.
         if user_id:
@@ -572,6 +846,14 @@ class Manager(manager.Manager):
             self._include_limits(parents)
         return parents
 
+    def list_project_parent_ids(self, project_id):
+        """List the IDs of the parents of a project, nearest first."""
+        tree = self._get_project_tree(self.get_project(project_id))
+        if tree is not None:
+            return tree.list_parent_ids(project_id)
+        return [project['id'] for project in
+                self.driver.list_project_parents(project_id)]
+
     def _build_parents_as_ids_dict(self, project, parents_by_id):
         # NOTE(rodrigods): we don't rely in the order of the projects returned
         # by the list_project_parents() method. Thus, we create a project cache
@@ -610,6 +892,9 @@ class Manager(manager.Manager):
             }
 
         """
+        tree = self._get_project_tree(project)
+        if tree is not None:
+            return tree.get_parents_as_ids(project['id'])
         parents_list = self.list_project_parents(project['id'])
         parents_as_ids = self._build_parents_as_ids_dict(
             project, {proj['id']: proj for proj in parents_list})
@@ -627,6 +912,14 @@ class Manager(manager.Manager):
             self._include_limits(subtree)
         return subtree
 
+    def list_project_ids_in_subtree(self, project_id):
+        """List the IDs of the projects below a project, level by level."""
+        tree = self._get_project_tree(self.get_project(project_id))
+        if tree is not None:
+            return tree.list_subtree_ids(project_id)
+        return [project['id'] for project in
+                self.driver.list_projects_in_subtree(project_id) or []]
+
     def _build_subtree_as_ids_dict(self, project_id, subtree_by_parent):
         # NOTE(rodrigods): we perform a depth first search to construct the
         # dictionaries representing each level of the subtree hierarchy. In
@@ -681,6 +974,9 @@ class Manager(manager.Manager):
                         projects_by_parent[parent_id] = [proj]
             return projects_by_parent
 
+        tree = self._get_project_tree(self.get_project(project_id))
+        if tree is not None:
+            return tree.get_subtree_as_ids(project_id)
         subtree_list = self.list_projects_in_subtree(project_id)
         subtree_as_ids = self._build_subtree_as_ids_dict(
             project_id, _projects_indexed_by_parent(subtree_list))
@@ -792,16 +1088,16 @@ class Manager(manager.Manager):
 
         return domain_from_project
 
-    def delete_domain(self, domain_id, initiator=None):
+    def delete_domain(self, domain_id, initiator=None, progress=None):
         # Use the driver directly to get the project that acts as a domain and
         # prevent using old cached value.
         try:
             domain = self.driver.get_project(domain_id)
         except exception.ProjectNotFound:
             raise exception.DomainNotFound(domain_id=domain_id)
-        self._delete_domain(domain, initiator)
+        self._delete_domain(domain, initiator, progress=progress)
 
-    def _delete_domain(self, domain, initiator=None):
+    def _delete_domain(self, domain, initiator=None, progress=None):
         # Disallow deletion of immutable domains
         ro_opt.check_immutable_delete(
             resource_ref=domain,
@@ -817,7 +1113,7 @@ class Manager(manager.Manager):
                   'first.'))
 
         domain_id = domain['id']
-        self._delete_domain_contents(domain_id)
+        self._delete_domain_contents(domain_id, progress=progress)
         notifications.Audit.internal(
             notifications.DOMAIN_DELETED, domain_id
         )
@@ -832,45 +1128,18 @@ class Manager(manager.Manager):
             # attempt to send audit event even if the cache invalidation raises
             notifications.Audit.deleted(self._DOMAIN, domain_id, initiator)
 
-    def _delete_domain_contents(self, domain_id):
+    def _delete_domain_contents(self, domain_id, progress=None):
         """Delete the contents of a domain.
 
         Before we delete a domain, we need to remove all the entities
-        that are owned by it, i.e. Projects. To do this we
-        call the delete function for these entities, which are
-        themselves responsible for deleting any credentials and role grants
-        associated with them as well as revoking any relevant tokens.
+        that are owned by it, i.e. Projects. These are deleted together with
+        any credentials, trusts, limits and role grants associated with them,
+        a batch at a time from the bottom of the hierarchy up. The token
+        cache is invalidated once the domain itself has been deleted.
 
         """
-        def _delete_projects(project, projects, examined):
-            if project['id'] in examined:
-                msg = ('Circular reference or a repeated entry found '
-                       'projects hierarchy - %(project_id)s.')
-                LOG.error(msg, {'project_id': project['id']})
-                return
-
-            examined.add(project['id'])
-            children = [proj for proj in projects
-                        if proj.get('parent_id') == project['id']]
-            for proj in children:
-                _delete_projects(proj, projects, examined)
-
-            try:
-                self._delete_project(project, initiator=None)
-            except exception.ProjectNotFound:
-                LOG.debug(('Project %(projectid)s not found when '
-                           'deleting domain contents for %(domainid)s, '
-                           'continuing with cleanup.'),
-                          {'projectid': project['id'],
-                           'domainid': domain_id})
-
         proj_refs = self.list_projects_in_domain(domain_id)
-
-        # Deleting projects recursively
-        roots = [x for x in proj_refs if x.get('parent_id') == domain_id]
-        examined = set()
-        for project in roots:
-            _delete_projects(project, proj_refs, examined)
+        self._delete_projects(proj_refs, progress=progress)
 
     @manager.response_truncated
     def list_projects(self, hints=None):
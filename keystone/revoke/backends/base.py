@@ -59,3 +59,31 @@ class RevokeDriverBase(object, metaclass=abc.ABCMeta):
 
         """
         raise exception.NotImplemented()  # pragma: no cover
+
+    def list_events_after(self, event_id=None):
+        """Return the revocation events recorded after a given event.
+
+        Unlike the revocation time of an event, which is set by the keystone
+        process that revoked it, the event ids are assigned by the backend in
+        the order events are recorded, so they are safe to use to fetch only
+        the events recorded since an earlier call.
+
+        :param event_id: the id of the last event already fetched, or None to
+                         return every event
+        :returns: a tuple of the id of the last event returned, or None if the
+                  backend doesn't order events, and a list of
+                  keystone.revoke.model.RevokeEvent
+
+        """
+        return None, self.list_events()
+
+    def prune_expired_events(self, batch_size=1000, time_budget=None):
+        """Remove revocation events that can no longer match a valid token.
+
+        :param batch_size: the maximum number of events to remove at a time
+        :param time_budget: the number of seconds after which no more batches
+                            are started, or None to remove every expired event
+        :returns: the number of events removed
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
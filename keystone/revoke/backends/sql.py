@@ -10,15 +10,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import time
+
 import sqlalchemy
 
 from keystone.common import sql
+import keystone.conf
 from keystone.models import revoke_model
 from keystone.revoke.backends import base
 
 from oslo_db import api as oslo_db_api
 
 
+CONF = keystone.conf.CONF
+
+
 class RevocationEvent(sql.ModelBase, sql.ModelDictMixin):
     __tablename__ = 'revocation_event'
     attributes = revoke_model.REVOKE_KEYS
@@ -49,6 +55,10 @@ class RevocationEvent(sql.ModelBase, sql.ModelDictMixin):
 
 
 class Revoke(base.RevokeDriverBase):
+    def __init__(self):
+        super(Revoke, self).__init__()
+        self._last_pruned = None
+
     def _flush_batch_size(self, dialect):
         batch_size = 0
         if dialect == 'ibm_db_sa':
@@ -90,6 +100,45 @@ class Revoke(base.RevokeDriverBase):
 
             session.flush()
 
+    def _prune_expired_events_batch(self, oldest, batch_size):
+        with sql.session_for_write() as session:
+            query = session.query(RevocationEvent.id)
+            query = query.filter(RevocationEvent.revoked_at < oldest)
+            ids = [ref.id for ref in query.limit(batch_size)]
+            if not ids:
+                return 0
+            query = session.query(RevocationEvent)
+            query = query.filter(RevocationEvent.id.in_(ids))
+            return query.delete(synchronize_session=False)
+
+    def prune_expired_events(self, batch_size=1000, time_budget=None):
+        oldest = base.revoked_before_cutoff_time()
+        deadline = None
+        if time_budget:
+            deadline = time.monotonic() + time_budget
+
+        pruned = 0
+        while True:
+            # NOTE: Each batch is deleted in its own transaction so that
+            # pruning a large backlog doesn't hold locks on the table for the
+            # whole run.
+            rowcount = self._prune_expired_events_batch(oldest, batch_size)
+            pruned += rowcount
+            if rowcount < batch_size:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return pruned
+
+    def _maybe_prune_expired_events(self):
+        """Prune expired events, at most once per `[revoke] prune_interval`."""
+        now = time.monotonic()
+        if (self._last_pruned is not None and
+                now - self._last_pruned < CONF.revoke.prune_interval):
+            return
+        self._last_pruned = now
+        self._prune_expired_events()
+
     def _list_token_events(self, token):
         with sql.session_for_read() as session:
             query = session.query(RevocationEvent).filter(
@@ -124,6 +173,15 @@ class Revoke(base.RevokeDriverBase):
             events = [revoke_model.RevokeEvent(**e.to_dict()) for e in query]
             return events
 
+    def list_events_after(self, event_id=None):
+        with sql.session_for_read() as session:
+            query = session.query(RevocationEvent).order_by(RevocationEvent.id)
+            if event_id is not None:
+                query = query.filter(RevocationEvent.id > event_id)
+            refs = query.all()
+            events = [revoke_model.RevokeEvent(**e.to_dict()) for e in refs]
+            return (refs[-1].id if refs else event_id), events
+
     def list_events(self, last_fetch=None, token=None):
         if token:
             return self._list_token_events(token)
@@ -138,4 +196,4 @@ class Revoke(base.RevokeDriverBase):
         record = RevocationEvent(**kwargs)
         with sql.session_for_write() as session:
             session.add(record)
-            self._prune_expired_events()
+            self._maybe_prune_expired_events()
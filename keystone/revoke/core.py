@@ -12,6 +12,9 @@
 
 """Main entry point into the Revoke service."""
 
+import threading
+import time
+
 from keystone.common import cache
 from keystone.common import manager
 import keystone.conf
@@ -31,6 +34,18 @@ MEMOIZE = cache.get_memoization_decorator(
     group='revoke',
     region=REVOKE_REGION)
 
+# NOTE: Incremental refreshes of the revocation index fetch events by the id
+# the backend assigned to them rather than by their revocation time, which is
+# set by the clock of the revoking node before the event is committed. Ids are
+# allocated on insert, so events from concurrent transactions may still become
+# visible slightly out of order; refreshes re-read the last few events they may
+# already have seen to pick those up.
+_INDEX_REFRESH_OVERLAP = 100
+
+# How often the revocation index is rebuilt from scratch, which also drops the
+# events that have been pruned from the backend.
+_INDEX_REBUILD_INTERVAL = 300
+
 
 class Manager(manager.Manager):
     """Default pivot point for the Revoke backend.
@@ -49,6 +64,22 @@ class Manager(manager.Manager):
         super(Manager, self).__init__(CONF.revoke.driver)
         self._register_listeners()
         self.model = revoke_model
+        self._index = None
+        # NOTE: _index_lock guards the index and the attributes below, it is
+        # never held across a query to the backend. _fetch_lock makes sure
+        # only one thread at a time fetches events from the backend.
+        self._index_lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._index_built_at = None
+        self._index_refreshed_at = None
+        # The id of the last event fetched from the backend. Events revoked
+        # through this process are added to the index without moving it, so
+        # the next refresh still fetches the events other processes revoked
+        # in the meantime.
+        self._last_event_id = None
+        # Events revoked through this process while a rebuild is fetching
+        # events, to add to the new index.
+        self._revoked_while_fetching = None
 
     @MEMOIZE
     def _list_events(self, last_fetch):
@@ -132,10 +163,98 @@ class Manager(manager.Manager):
         :raises keystone.exception.TokenNotFound: If the token is invalid.
 
         """
-        if revoke_model.is_revoked(self.driver.list_events(token=token),
-                                   token):
+        if self._get_index().is_revoked(token):
             raise exception.TokenNotFound(_('Failed to validate token'))
 
+    def are_tokens_revoked(self, tokens):
+        """Check several tokens against the revocation list at once.
+
+        :param tokens: a list of token value dictionaries, as accepted by
+                       :meth:`check_token`
+        :returns: a list of booleans, ``True`` for each token that has been
+                  revoked
+
+        """
+        return self._get_index().are_revoked(tokens)
+
+    def _get_index(self):
+        """Return the revocation index, refreshing it if necessary.
+
+        The index is built once from every revocation event in the backend
+        and then kept up to date by only fetching the events recorded since
+        the last refresh. While one thread fetches events, the others keep
+        using the current index rather than waiting for it, unless there is
+        none yet.
+
+        """
+        with self._index_lock:
+            index = self._index
+            if index is not None and not self._index_is_stale():
+                return index
+        if not self._fetch_lock.acquire(blocking=index is None):
+            return index
+        try:
+            with self._index_lock:
+                # Another thread may have refreshed the index while this one
+                # waited for the fetch lock.
+                if self._index is not None and not self._index_is_stale():
+                    return self._index
+                rebuild = self._index_needs_rebuild()
+                after_id = None
+                if rebuild:
+                    self._revoked_while_fetching = []
+                elif self._last_event_id is not None:
+                    after_id = max(
+                        self._last_event_id - _INDEX_REFRESH_OVERLAP, 0)
+
+            last_event_id, events = self.driver.list_events_after(
+                event_id=after_id)
+
+            now = time.monotonic()
+            with self._index_lock:
+                if rebuild:
+                    index = revoke_model.RevokeIndex(events)
+                    index.add_events(self._revoked_while_fetching)
+                    self._index = index
+                    self._index_built_at = now
+                    self._last_event_id = last_event_id
+                else:
+                    self._index.add_events(events)
+                    if (last_event_id is not None and
+                            self._last_event_id is not None):
+                        last_event_id = max(last_event_id,
+                                            self._last_event_id)
+                    self._last_event_id = last_event_id
+                self._index_refreshed_at = now
+                return self._index
+        finally:
+            # NOTE: Stop collecting local revocations once the rebuild is
+            # done, including when fetching the events failed.
+            with self._index_lock:
+                self._revoked_while_fetching = None
+            self._fetch_lock.release()
+
+    def _index_needs_rebuild(self):
+        return (self._index is None or
+                time.monotonic() - self._index_built_at >=
+                _INDEX_REBUILD_INTERVAL)
+
+    def _index_is_stale(self):
+        return (self._index_needs_rebuild() or
+                time.monotonic() - self._index_refreshed_at >=
+                CONF.revoke.index_refresh_interval)
+
+    def prune_expired_events(self, batch_size=1000, time_budget=None):
+        return self.driver.prune_expired_events(batch_size=batch_size,
+                                                time_budget=time_budget)
+
     def revoke(self, event):
         self.driver.revoke(event)
+        # NOTE: The revocation index of this process is updated with the new
+        # event directly, other processes pick it up on their next refresh.
+        with self._index_lock:
+            if self._index is not None:
+                self._index.add_event(event)
+            if self._revoked_while_fetching is not None:
+                self._revoked_while_fetching.append(event)
         REVOKE_REGION.invalidate()
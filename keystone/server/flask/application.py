@@ -114,6 +114,10 @@ def _handle_keystone_exception(error):
     if isinstance(error, exception.Unauthorized):
         url = ks_flask.base_url()
         response.headers['WWW-Authenticate'] = 'Keystone uri="%s"' % url
+    # Tell the client when to retry if the service is temporarily unavailable
+    elif (isinstance(error, exception.ServiceUnavailable) and
+            error.retry_after):
+        response.headers['Retry-After'] = str(error.retry_after)
     return response
 
 
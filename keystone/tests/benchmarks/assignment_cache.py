@@ -0,0 +1,192 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Benchmarks for the computed role assignments cache under role churn.
+
+This creates users with role assignments on projects, then replays a mix of
+role lookups, as made when issuing and validating tokens, and role grants and
+revocations. The same mix is replayed twice: once invalidating the whole
+computed assignments cache on every change, as keystone used to do, and once
+invalidating only the users and targets each change affects. The hit rate of
+every cache region is reported for each. Run it with::
+
+    python -m keystone.tests.benchmarks.assignment_cache
+
+The entities are created in an in-memory SQLite database and cached in
+memory.
+
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+import uuid
+
+from oslo_db import options as db_options
+
+from keystone.assignment import core as assignment_core
+from keystone.common import cache
+from keystone.common import fernet_utils
+from keystone.common import provider_api
+from keystone.common import sql
+import keystone.conf
+from keystone.server import backends
+from keystone.tests.unit.ksfixtures import database
+
+
+CONF = keystone.conf.CONF
+keystone.conf.configure()
+PROVIDERS = provider_api.ProviderAPIs
+
+
+def _invalidate_region(self, user_ids=None, group_ids=None, target_ids=None):
+    assignment_core.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+
+
+def _create_entities(users, projects, projects_per_user):
+    domain_id = uuid.uuid4().hex
+    PROVIDERS.resource_api.create_domain(
+        domain_id, {'id': domain_id, 'name': domain_id})
+    role_ids = []
+    for x in range(3):
+        role = {'id': uuid.uuid4().hex, 'name': uuid.uuid4().hex}
+        role_ids.append(PROVIDERS.role_api.create_role(role['id'], role)['id'])
+    project_ids = []
+    for x in range(projects):
+        project = {'id': uuid.uuid4().hex, 'name': uuid.uuid4().hex,
+                   'domain_id': domain_id, 'parent_id': domain_id}
+        project_ids.append(PROVIDERS.resource_api.create_project(
+            project['id'], project)['id'])
+    grants = {}
+    for x in range(users):
+        user_id = PROVIDERS.identity_api.create_user(
+            {'name': uuid.uuid4().hex, 'domain_id': domain_id})['id']
+        grants[user_id] = random.sample(project_ids, projects_per_user)
+        for project_id in grants[user_id]:
+            PROVIDERS.assignment_api.create_grant(
+                role_ids[0], user_id=user_id, project_id=project_id)
+    return grants, role_ids
+
+
+def _replay(grants, role_ids, operations, write_ratio):
+    user_ids = sorted(grants)
+    extra_grants = set()
+    for x in range(operations):
+        user_id = random.choice(user_ids)
+        project_id = random.choice(grants[user_id])
+        if random.random() < write_ratio:
+            # Grant or revoke an extra role, leaving the user with a role.
+            grant = (random.choice(role_ids[1:]), user_id, project_id)
+            if grant in extra_grants:
+                extra_grants.remove(grant)
+                PROVIDERS.assignment_api.delete_grant(
+                    grant[0], user_id=user_id, project_id=project_id)
+            else:
+                extra_grants.add(grant)
+                PROVIDERS.assignment_api.create_grant(
+                    grant[0], user_id=user_id, project_id=project_id)
+        else:
+            PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                user_id, project_id)
+            PROVIDERS.assignment_api.list_projects_for_user(user_id)
+    # Leave the assignments as they were for the next replay.
+    for role_id, user_id, project_id in extra_grants:
+        PROVIDERS.assignment_api.delete_grant(
+            role_id, user_id=user_id, project_id=project_id)
+
+
+def _replay_and_report(name, grants, role_ids, operations, write_ratio,
+                       stream):
+    assignment_core.COMPUTED_ASSIGNMENTS_REGION.invalidate()
+    cache.reset_region_statistics()
+    random.seed(1)
+    start = time.time()
+    _replay(grants, role_ids, operations, write_ratio)
+    elapsed = (time.time() - start) * 1000
+    statistics = cache.get_region_statistics()
+    for region in sorted(statistics):
+        if statistics[region]['hits'] or statistics[region]['misses']:
+            stream.write('%-14s %10.1f %-24s %8d %8d %8.1f%%\n' % (
+                name, elapsed, region, statistics[region]['hits'],
+                statistics[region]['misses'],
+                statistics[region]['hit_rate'] * 100))
+
+
+def run(users, projects, projects_per_user, operations, write_ratio,
+        stream=sys.stdout):
+    key_repositories = []
+    CONF([], project='keystone', default_config_files=[])
+    db_options.set_defaults(CONF, connection='sqlite://')
+    CONF.set_override('enabled', True, group='cache')
+    CONF.set_override('backend', 'dogpile.cache.memory', group='cache')
+    try:
+        for group in ('fernet_tokens', 'fernet_receipts'):
+            key_repository = tempfile.mkdtemp()
+            key_repositories.append(key_repository)
+            CONF.set_override('key_repository', key_repository, group=group)
+            utils = fernet_utils.FernetUtils(key_repository, 3, group)
+            utils.create_key_directory()
+            utils.initialize_key_repository()
+        database._load_sqlalchemy_models()
+        with sql.session_for_write() as session:
+            sql.ModelBase.metadata.create_all(bind=session.get_bind())
+        backends.load_backends()
+
+        random.seed(0)
+        grants, role_ids = _create_entities(
+            users, projects, projects_per_user)
+        stream.write('%d users with roles on %d of %d projects, %d '
+                     'operations, %.1f%% of them role changes\n' % (
+                         users, projects_per_user, projects, operations,
+                         write_ratio * 100))
+        stream.write('%-14s %10s %-24s %8s %8s %9s\n' % (
+            'invalidation', 'total ms', 'region', 'hits', 'misses',
+            'hit rate'))
+        with mock.patch.object(assignment_core.Manager,
+                               'invalidate_computed_assignments',
+                               _invalidate_region):
+            _replay_and_report('whole region', grants, role_ids, operations,
+                               write_ratio, stream)
+        _replay_and_report('per user', grants, role_ids, operations,
+                           write_ratio, stream)
+    finally:
+        with sql.session_for_write() as session:
+            sql.ModelBase.metadata.drop_all(bind=session.get_bind())
+        sql.cleanup()
+        for key_repository in key_repositories:
+            shutil.rmtree(key_repository, ignore_errors=True)
+        CONF.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500,
+                        help='number of users')
+    parser.add_argument('--projects', type=int, default=100,
+                        help='number of projects')
+    parser.add_argument('--projects-per-user', type=int, default=3,
+                        help='number of projects each user has a role on')
+    parser.add_argument('--operations', type=int, default=20000,
+                        help='number of lookups and role changes to replay')
+    parser.add_argument('--write-ratio', type=float, default=0.02,
+                        help='fraction of the operations that change a role')
+    args = parser.parse_args(argv)
+    run(args.users, args.projects, args.projects_per_user, args.operations,
+        args.write_ratio)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Microbenchmarks for packing and unpacking Fernet token payloads.
+
+For every payload type this reports the throughput of assembling and
+disassembling the payload on its own (``pack`` and ``unpack``), and of
+creating and validating a complete Fernet token, which adds serialization
+and encryption (``create`` and ``validate``).
+
+It then compares decrypting a token with ``fernet.MultiFernet`` and with
+``KeyHintedMultiFernet`` for key repositories of several sizes, reporting
+the time per call for a token signed with the oldest key and for one signed
+with the primary key. Run it with::
+
+    python -m keystone.tests.benchmarks.fernet_payloads
+
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import timeit
+import uuid
+
+from cryptography import fernet
+import msgpack
+
+from keystone.common import fernet_utils
+from keystone.common import utils
+import keystone.conf
+from keystone.token import provider
+from keystone.token import token_formatters
+
+
+CONF = keystone.conf.CONF
+keystone.conf.configure()
+
+
+def _payload_arguments():
+    """Return the arguments to use for each payload type."""
+    expires_at = utils.isotime(provider.default_expire_time(), subsecond=True)
+    common = {
+        'user_id': uuid.uuid4().hex,
+        'methods': ['password'],
+        'expires_at': expires_at,
+        'audit_ids': [provider.random_urlsafe_str()],
+    }
+    federated = {
+        'methods': ['mapped'],
+        'federated_group_ids': [{'id': uuid.uuid4().hex}],
+        'identity_provider_id': uuid.uuid4().hex,
+        'protocol_id': uuid.uuid4().hex,
+    }
+    scopes = [
+        (token_formatters.UnscopedPayload, {}),
+        (token_formatters.DomainScopedPayload,
+         {'domain_id': uuid.uuid4().hex}),
+        (token_formatters.ProjectScopedPayload,
+         {'project_id': uuid.uuid4().hex}),
+        (token_formatters.TrustScopedPayload,
+         {'project_id': uuid.uuid4().hex, 'trust_id': uuid.uuid4().hex}),
+        (token_formatters.FederatedUnscopedPayload, federated),
+        (token_formatters.FederatedProjectScopedPayload,
+         dict(federated, project_id=uuid.uuid4().hex)),
+        (token_formatters.FederatedDomainScopedPayload,
+         dict(federated, domain_id=uuid.uuid4().hex)),
+        (token_formatters.OauthScopedPayload,
+         {'methods': ['oauth1'], 'project_id': uuid.uuid4().hex,
+          'access_token_id': uuid.uuid4().hex}),
+        (token_formatters.SystemScopedPayload, {'system': 'all'}),
+        (token_formatters.ApplicationCredentialScopedPayload,
+         {'methods': ['application_credential'],
+          'project_id': uuid.uuid4().hex, 'app_cred_id': uuid.uuid4().hex}),
+    ]
+    for payload_class, scope in scopes:
+        yield payload_class, dict(common, **scope)
+
+
+def _assemble_arguments(kwargs):
+    return (
+        kwargs['user_id'], kwargs['methods'], kwargs.get('system'),
+        kwargs.get('project_id'), kwargs.get('domain_id'),
+        kwargs['expires_at'], kwargs['audit_ids'], kwargs.get('trust_id'),
+        kwargs.get('federated_group_ids'),
+        kwargs.get('identity_provider_id'), kwargs.get('protocol_id'),
+        kwargs.get('access_token_id'), kwargs.get('app_cred_id')
+    )
+
+
+def _throughput(func, number, repeat):
+    """Return the best observed number of calls per second."""
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return number / best
+
+
+def _time_per_call(func, number, repeat):
+    """Return the best observed number of microseconds per call."""
+    return 1000000 / _throughput(func, number, repeat)
+
+
+def run_key_hints(number, repeat, key_counts, stream=sys.stdout):
+    columns = ('keys', 'oldest', 'oldest/hint', 'primary', 'primary/hint')
+    stream.write('%4s %12s %12s %12s %12s\n' % columns)
+    for key_count in key_counts:
+        # NOTE: Keys are ordered primary key first, as in a key ring.
+        fernets = [fernet.Fernet(fernet.Fernet.generate_key())
+                   for _ in range(key_count)]
+        crypto = fernet.MultiFernet(fernets)
+        hinted_crypto = fernet_utils.KeyHintedMultiFernet(fernets)
+        oldest_key_token = fernets[-1].encrypt(b'payload')
+        primary_key_token = fernets[0].encrypt(b'payload')
+        # Let the hinted crypto learn which key signed each token.
+        hinted_crypto.decrypt(oldest_key_token)
+        hinted_crypto.decrypt(primary_key_token)
+
+        results = (
+            _time_per_call(lambda: crypto.decrypt(oldest_key_token),
+                           number, repeat),
+            _time_per_call(lambda: hinted_crypto.decrypt(oldest_key_token),
+                           number, repeat),
+            _time_per_call(lambda: crypto.decrypt(primary_key_token),
+                           number, repeat),
+            _time_per_call(lambda: hinted_crypto.decrypt(primary_key_token),
+                           number, repeat),
+        )
+        stream.write('%4d %10.1fus %10.1fus %10.1fus %10.1fus\n' % (
+            (key_count,) + results))
+
+
+def run(number, repeat, stream=sys.stdout):
+    key_repository = tempfile.mkdtemp()
+    try:
+        CONF([], project='keystone', default_config_files=[])
+        CONF.set_override('key_repository', key_repository,
+                          group='fernet_tokens')
+        key_utils = fernet_utils.FernetUtils(
+            key_repository, CONF.fernet_tokens.max_active_keys,
+            'fernet_tokens')
+        key_utils.create_key_directory()
+        key_utils.initialize_key_repository()
+
+        token_formatter = token_formatters.TokenFormatter()
+        columns = ('payload', 'pack/s', 'unpack/s', 'create/s',
+                   'validate/s')
+        stream.write('%-36s %10s %10s %10s %10s\n' % columns)
+        for payload_class, kwargs in _payload_arguments():
+            args = _assemble_arguments(kwargs)
+            payload = payload_class.assemble(*args)
+            # NOTE: Round trip the payload through msgpack so that it is
+            # disassembled from the same types as when validating a token.
+            payload = msgpack.unpackb(msgpack.packb(payload))
+            create_kwargs = dict(kwargs)
+            user_id = create_kwargs.pop('user_id')
+            expires_at = create_kwargs.pop('expires_at')
+            audit_ids = create_kwargs.pop('audit_ids')
+            create_kwargs.pop('federated_group_ids', None)
+            token = token_formatter.create_token(
+                user_id, expires_at, audit_ids, payload_class,
+                federated_group_ids=kwargs.get('federated_group_ids'),
+                **create_kwargs)
+
+            results = (
+                _throughput(lambda: payload_class.assemble(*args),
+                            number, repeat),
+                _throughput(lambda: payload_class.disassemble(payload),
+                            number, repeat),
+                _throughput(lambda: token_formatter.create_token(
+                    user_id, expires_at, audit_ids, payload_class,
+                    federated_group_ids=kwargs.get('federated_group_ids'),
+                    **create_kwargs), number, repeat),
+                _throughput(lambda: token_formatter.validate_token(token),
+                            number, repeat),
+            )
+            stream.write('%-36s %10.0f %10.0f %10.0f %10.0f\n' % (
+                (payload_class.__name__,) + results))
+    finally:
+        shutil.rmtree(key_repository, ignore_errors=True)
+        CONF.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000,
+                        help='calls per timing run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing runs per measurement; the best is '
+                             'reported')
+    parser.add_argument('--key-counts', type=int, nargs='+',
+                        default=[3, 10, 30],
+                        help='key repository sizes to compare decrypting '
+                             'with and without key hints for')
+    args = parser.parse_args(argv)
+    run(args.number, args.repeat)
+    sys.stdout.write('\n')
+    run_key_hints(args.number, args.repeat, args.key_counts)
+
+
+if __name__ == '__main__':
+    main()
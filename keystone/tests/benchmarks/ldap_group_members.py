@@ -0,0 +1,124 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Benchmarks for listing the members of an LDAP group.
+
+This fills the fake LDAP server used by the unit tests with a group and its
+member users, then counts the LDAP searches made, and times, listing the
+users in the group, with the members looked up one at a time and a batch at
+a time. Run it with::
+
+    python -m keystone.tests.benchmarks.ldap_group_members
+
+The fake server evaluates a filter against every entry of the directory, so
+the timings only give an idea of the cost of the searches; the number of
+searches is what a real directory server has to answer.
+
+"""
+
+import argparse
+import sys
+import time
+from unittest import mock
+import uuid
+
+import keystone.conf
+from keystone import exception
+from keystone.identity.backends.ldap import common as common_ldap
+from keystone.identity.backends.ldap import core as ldap_core
+from keystone.tests.unit import fakeldap
+
+
+CONF = keystone.conf.CONF
+keystone.conf.configure()
+
+
+def _get_all_filtered_by_ids_one_at_a_time(self, user_ids):
+    users = []
+    for user_id in user_ids:
+        try:
+            users.append(self.get_filtered(user_id))
+        except exception.UserNotFound:
+            pass
+    return users
+
+
+def _create_group(driver, members):
+    """Create a group of new users directly in the fake directory."""
+    conn = driver.user.get_connection()
+    try:
+        member_dns = []
+        for _ in range(members):
+            user_id = uuid.uuid4().hex
+            user_dn = driver.user._id_to_dn_string(user_id)
+            conn.add_s(user_dn, [('objectClass', [driver.user.object_class]),
+                                 ('cn', [user_id]), ('sn', [user_id])])
+            member_dns.append(user_dn)
+        group_id = uuid.uuid4().hex
+        conn.add_s(driver.group._id_to_dn_string(group_id),
+                   [('objectClass', [driver.group.object_class]),
+                    ('cn', [group_id]),
+                    ('ou', [group_id]), ('member', member_dns)])
+    finally:
+        conn.unbind_s()
+    return group_id
+
+
+def _list_users_in_group(driver, group_id, name, stream):
+    with mock.patch.object(fakeldap.FakeLdap, 'search_s', autospec=True,
+                           side_effect=fakeldap.FakeLdap.search_s
+                           ) as search_s:
+        start = time.time()
+        users = driver.list_users_in_group(group_id, None)
+        elapsed = (time.time() - start) * 1000
+    stream.write('%-12s %8d %10d %12.1f\n' % (
+        name, len(users), search_s.call_count, elapsed))
+
+
+def run(members, batch_size, stream=sys.stdout):
+    CONF([], project='keystone', default_config_files=[])
+    CONF.set_override('url', 'fake://memory', group='ldap')
+    CONF.set_override('user', 'cn=Admin', group='ldap')
+    CONF.set_override('password', 'password', group='ldap')
+    CONF.set_override('suffix', 'cn=example,cn=com', group='ldap')
+    CONF.set_override('lookup_batch_size', batch_size, group='ldap')
+    common_ldap.register_handler('fake://', fakeldap.FakeLdap)
+    try:
+        driver = ldap_core.Identity()
+        group_id = _create_group(driver, members)
+
+        stream.write('%-12s %8s %10s %12s\n' % (
+            'lookup', 'members', 'searches', 'total ms'))
+        with mock.patch.object(ldap_core.UserApi, 'get_all_filtered_by_ids',
+                               _get_all_filtered_by_ids_one_at_a_time):
+            _list_users_in_group(driver, group_id, 'one by one', stream)
+        _list_users_in_group(driver, group_id, 'batch of %d' % batch_size,
+                             stream)
+    finally:
+        for shelf in fakeldap.FakeShelves.values():
+            shelf.clear()
+        common_ldap._HANDLERS.clear()
+        CONF.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=1000,
+                        help='number of users in the group')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='the [ldap] lookup_batch_size option')
+    args = parser.parse_args(argv)
+    run(args.members, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Benchmarks for hashing and checking passwords.
+
+This hashes a password with each of the given algorithms and numbers of
+rounds, as the ``[identity] password_hash_algorithm`` and ``[identity]
+password_hash_rounds`` options would, then times checking the password
+against the hash, which is what a password authentication costs, to help
+choosing those options for the hardware keystone runs on. Run it with::
+
+    python -m keystone.tests.benchmarks.password_hashing \\
+        --algorithm bcrypt --rounds 10 --rounds 12
+
+The default number of rounds of each algorithm is used when no rounds are
+given.
+
+"""
+
+import argparse
+import sys
+import time
+
+from keystone.common import password_hashing
+import keystone.conf
+
+
+CONF = keystone.conf.CONF
+keystone.conf.configure()
+
+ALGORITHMS = ['bcrypt', 'scrypt', 'pbkdf2_sha512']
+
+
+def _time(func, *args):
+    start = time.time()
+    func(*args)
+    return (time.time() - start) * 1000
+
+
+def _benchmark(algorithm, rounds, checks, stream):
+    CONF.set_override('password_hash_algorithm', algorithm, group='identity')
+    CONF.set_override('password_hash_rounds', rounds, group='identity')
+    hasher = password_hashing._HASHER_NAME_MAP[algorithm]
+    rounds = rounds or hasher.default_rounds
+
+    password = 'password'
+    hashed = password_hashing.hash_password(password)
+    hash_ms = _time(password_hashing.hash_password, password)
+    check_ms = sorted(_time(password_hashing.check_password, password, hashed)
+                      for _ in range(checks))
+    stream.write('%-14s %8d %10.1f %10.1f %10.1f %10.1f\n' % (
+        algorithm, rounds, hash_ms, sum(check_ms) / checks,
+        check_ms[len(check_ms) // 2], check_ms[-1]))
+
+
+def run(algorithms, rounds, checks, stream=sys.stdout):
+    CONF([], project='keystone', default_config_files=[])
+    try:
+        stream.write('%-14s %8s %10s %10s %10s %10s\n' % (
+            'algorithm', 'rounds', 'hash ms', 'check avg', 'check p50',
+            'check max'))
+        for algorithm in algorithms:
+            for algorithm_rounds in rounds or [None]:
+                _benchmark(algorithm, algorithm_rounds, checks, stream)
+    finally:
+        CONF.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--algorithm', action='append', choices=ALGORITHMS,
+                        help='a hashing algorithm to benchmark, may be given '
+                             'more than once (default: all of them)')
+    parser.add_argument('--rounds', action='append', type=int,
+                        help='a number of rounds to benchmark each algorithm '
+                             'with, may be given more than once (default: '
+                             'the default rounds of each algorithm)')
+    parser.add_argument('--checks', type=int, default=10,
+                        help='number of times the password is checked')
+    args = parser.parse_args(argv)
+    run(args.algorithm or ALGORITHMS, args.rounds, args.checks)
+
+
+if __name__ == '__main__':
+    main()
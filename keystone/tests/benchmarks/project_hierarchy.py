@@ -0,0 +1,163 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Benchmarks for reading project hierarchies from the SQL resource backend.
+
+This generates a domain containing a tree of projects, then times listing
+the subtree of a project and the parents of a leaf project using the
+``project_ancestor`` index, with a recursive query and by walking the tree
+one level at a time. Run it with::
+
+    python -m keystone.tests.benchmarks.project_hierarchy
+
+By default the tree is built in an in-memory SQLite database. Pass
+``--connection`` to use another, empty, database instead.
+
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from unittest import mock
+import uuid
+
+from oslo_db import options as db_options
+
+from keystone.common import sql
+import keystone.conf
+from keystone.resource.backends import base
+from keystone.resource.backends import sql as resource_sql
+from keystone.resource.backends import sql_model
+
+
+CONF = keystone.conf.CONF
+keystone.conf.configure()
+
+
+def _project_row(domain_id, parent_id, is_domain=False, project_id=None):
+    project_id = project_id or uuid.uuid4().hex
+    return {'id': project_id, 'name': project_id, 'domain_id': domain_id,
+            'parent_id': parent_id, 'is_domain': is_domain, 'enabled': True,
+            'extra': {}, 'description': ''}
+
+
+def _insert(session, table, rows):
+    for start in range(0, len(rows), 1000):
+        session.execute(table.insert(), rows[start:start + 1000])
+
+
+def _create_tree(session, projects, depth, width):
+    """Create a domain with a tree of projects ``depth`` levels deep.
+
+    The first level holds ``width`` projects and the remaining projects are
+    spread evenly over the deeper levels, each under a random parent from
+    the level above. Returns the IDs of the projects on each level.
+
+    """
+    table = sql_model.Project.__table__
+    ancestor_table = sql_model.ProjectAncestor.__table__
+    domain_id = uuid.uuid4().hex
+    session.execute(table.insert(), [
+        _project_row(base.NULL_DOMAIN_ID, None, is_domain=True,
+                     project_id=base.NULL_DOMAIN_ID),
+        _project_row(base.NULL_DOMAIN_ID, None, is_domain=True,
+                     project_id=domain_id)])
+    # The IDs of the parents of each project, nearest first.
+    parents = {domain_id: []}
+    session.execute(ancestor_table.insert(), [
+        {'project_id': domain_id, 'ancestor_id': domain_id, 'depth': 0}])
+
+    per_level = max(1, (projects - width) // max(1, depth - 1))
+    levels = [[domain_id]]
+    for level in range(depth):
+        size = width if level == 0 else per_level
+        rows = [_project_row(domain_id, random.choice(levels[-1]))
+                for x in range(size)]
+        _insert(session, table, rows)
+        ancestor_rows = []
+        for row in rows:
+            parents[row['id']] = [row['parent_id']] + parents[row['parent_id']]
+            ancestor_rows += [
+                {'project_id': row['id'], 'ancestor_id': ancestor_id,
+                 'depth': distance}
+                for distance, ancestor_id in enumerate(
+                    [row['id']] + parents[row['id']])]
+        _insert(session, ancestor_table, ancestor_rows)
+        levels.append([row['id'] for row in rows])
+    return levels[1:]
+
+
+def _best_time(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def run(projects, depth, width, repeat, connection, stream=sys.stdout):
+    random.seed(0)
+    CONF([], project='keystone', default_config_files=[])
+    db_options.set_defaults(CONF, connection=connection)
+    try:
+        with sql.session_for_write() as session:
+            engine = session.get_bind()
+            sql.ModelBase.metadata.create_all(bind=engine)
+            levels = _create_tree(session, projects, depth, width)
+
+        driver = resource_sql.Resource()
+        top, leaf = levels[0][0], levels[-1][0]
+        operations = [
+            ('subtree of a top level project',
+             lambda: driver.list_projects_in_subtree(top)),
+            ('parents of a leaf project',
+             lambda: driver.list_project_parents(leaf)),
+        ]
+        stream.write('%d projects, %d levels deep\n' % (
+            sum(len(level) for level in levels), depth))
+        stream.write('%-32s %8s %12s %14s\n' % (
+            'operation', 'index ms', 'recursive ms', 'level by level'))
+        for name, operation in operations:
+            timings = []
+            for indexed, recursive in ((True, True), (False, True),
+                                       (False, False)):
+                with mock.patch.object(
+                        resource_sql.Resource, '_is_indexed',
+                        return_value=indexed), mock.patch.object(
+                        resource_sql, '_supports_recursive_queries',
+                        return_value=recursive):
+                    timings.append(_best_time(operation, repeat) * 1000)
+            stream.write('%-32s %8.1f %12.1f %14.1f\n' % (
+                (name,) + tuple(timings)))
+    finally:
+        with sql.session_for_write() as session:
+            sql.ModelBase.metadata.drop_all(bind=session.get_bind())
+        sql.cleanup()
+        CONF.reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=100000,
+                        help='number of projects in the tree')
+    parser.add_argument('--depth', type=int, default=10,
+                        help='number of levels in the tree')
+    parser.add_argument('--width', type=int, default=10,
+                        help='number of projects on the top level')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing runs per measurement; the best is '
+                             'reported')
+    parser.add_argument('--connection', default='sqlite://',
+                        help='SQLAlchemy URL of an empty database to use')
+    args = parser.parse_args(argv)
+    run(args.projects, args.depth, args.width, args.repeat, args.connection)
+
+
+if __name__ == '__main__':
+    main()
@@ -118,6 +118,62 @@ class _AssignmentTestUtilities(object):
             assignments.append(a)
         return assignments
 
+    def _setup_bulk_role_assignment(self, domain_id):
+        # Utility to create a user and a project in a domain, and return them
+        # along with the body of a bulk role assignment request for them.
+        user = PROVIDERS.identity_api.create_user(
+            unit.new_user_ref(domain_id=domain_id)
+        )
+        project = PROVIDERS.resource_api.create_project(
+            uuid.uuid4().hex, unit.new_project_ref(domain_id=domain_id)
+        )
+        body = {
+            'role_assignments': [{
+                'role': {'id': self.bootstrapper.reader_role_id},
+                'user': {'id': user['id']},
+                'scope': {'project': {'id': project['id']}}
+            }]
+        }
+        return user['id'], project['id'], body
+
+    def _assert_user_cannot_create_grants(self, domain_id):
+        user_id, project_id, body = self._setup_bulk_role_assignment(
+            domain_id
+        )
+
+        with self.test_client() as c:
+            c.put(
+                '/v3/role_assignments', json=body, headers=self.headers,
+                expected_status_code=http.client.FORBIDDEN
+            )
+
+        self.assertEqual(
+            [], PROVIDERS.assignment_api.list_role_assignments(
+                user_id=user_id, project_id=project_id
+            )
+        )
+
+    def _assert_user_cannot_revoke_grants(self, domain_id):
+        user_id, project_id, body = self._setup_bulk_role_assignment(
+            domain_id
+        )
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.reader_role_id, user_id=user_id,
+            project_id=project_id
+        )
+
+        with self.test_client() as c:
+            c.delete(
+                '/v3/role_assignments', json=body, headers=self.headers,
+                expected_status_code=http.client.FORBIDDEN
+            )
+
+        self.assertEqual(
+            1, len(PROVIDERS.assignment_api.list_role_assignments(
+                user_id=user_id, project_id=project_id
+            ))
+        )
+
 
 class _SystemUserTests(object):
     """Common functionality for system users regardless of default role."""
@@ -705,6 +761,12 @@ class _SystemUserTests(object):
 class _DomainUserTests(object):
     """Common functionality for domain users."""
 
+    def test_user_cannot_create_grants_in_bulk(self):
+        self._assert_user_cannot_create_grants(self.domain_id)
+
+    def test_user_cannot_revoke_grants_in_bulk(self):
+        self._assert_user_cannot_revoke_grants(self.domain_id)
+
     def _setup_test_role_assignments_for_domain(self):
         # Populate role assignment within `self.domain_id` so that we can
         # assert users can view assignments within the domain they have
@@ -1027,6 +1089,12 @@ class _DomainUserTests(object):
 
 class _ProjectUserTests(object):
 
+    def test_user_cannot_create_grants_in_bulk(self):
+        self._assert_user_cannot_create_grants(self.domain_id)
+
+    def test_user_cannot_revoke_grants_in_bulk(self):
+        self._assert_user_cannot_revoke_grants(self.domain_id)
+
     def test_user_cannot_list_all_assignments_in_their_project(self):
         with self.test_client() as c:
             c.get(
@@ -1142,10 +1210,24 @@ class _ProjectReaderMemberTests(object):
             )
 
 
+class _SystemReaderMemberTests(object):
+
+    def test_user_cannot_create_grants_in_bulk(self):
+        self._assert_user_cannot_create_grants(
+            CONF.identity.default_domain_id
+        )
+
+    def test_user_cannot_revoke_grants_in_bulk(self):
+        self._assert_user_cannot_revoke_grants(
+            CONF.identity.default_domain_id
+        )
+
+
 class SystemReaderTests(base_classes.TestCaseWithBootstrap,
                         common_auth.AuthTestMixin,
                         _AssignmentTestUtilities,
-                        _SystemUserTests):
+                        _SystemUserTests,
+                        _SystemReaderMemberTests):
 
     def setUp(self):
         super(SystemReaderTests, self).setUp()
@@ -1187,7 +1269,8 @@ class SystemReaderTests(base_classes.TestCaseWithBootstrap,
 class SystemMemberTests(base_classes.TestCaseWithBootstrap,
                         common_auth.AuthTestMixin,
                         _AssignmentTestUtilities,
-                        _SystemUserTests):
+                        _SystemUserTests,
+                        _SystemReaderMemberTests):
 
     def setUp(self):
         super(SystemMemberTests, self).setUp()
@@ -1252,6 +1335,40 @@ class SystemAdminTests(base_classes.TestCaseWithBootstrap,
             self.token_id = r.headers['X-Subject-Token']
             self.headers = {'X-Auth-Token': self.token_id}
 
+    def test_user_can_create_grants_in_bulk(self):
+        user_id, project_id, body = self._setup_bulk_role_assignment(
+            CONF.identity.default_domain_id
+        )
+
+        with self.test_client() as c:
+            c.put('/v3/role_assignments', json=body, headers=self.headers)
+
+        assignments = PROVIDERS.assignment_api.list_role_assignments(
+            user_id=user_id, project_id=project_id
+        )
+        self.assertEqual(
+            [self.bootstrapper.reader_role_id],
+            [assignment['role_id'] for assignment in assignments]
+        )
+
+    def test_user_can_revoke_grants_in_bulk(self):
+        user_id, project_id, body = self._setup_bulk_role_assignment(
+            CONF.identity.default_domain_id
+        )
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.reader_role_id, user_id=user_id,
+            project_id=project_id
+        )
+
+        with self.test_client() as c:
+            c.delete('/v3/role_assignments', json=body, headers=self.headers)
+
+        self.assertEqual(
+            [], PROVIDERS.assignment_api.list_role_assignments(
+                user_id=user_id, project_id=project_id
+            )
+        )
+
 
 class DomainReaderTests(base_classes.TestCaseWithBootstrap,
                         common_auth.AuthTestMixin,
@@ -102,6 +102,45 @@ class _SystemUserTokenTests(object):
             c.get('/v3/auth/tokens', headers=self.headers)
 
 
+class _BatchValidationTests(object):
+
+    def test_user_can_validate_a_batch_of_tokens(self):
+        project = PROVIDERS.resource_api.create_project(
+            uuid.uuid4().hex,
+            unit.new_project_ref(domain_id=CONF.identity.default_domain_id)
+        )
+
+        user = unit.new_user_ref(domain_id=CONF.identity.default_domain_id)
+        user['id'] = PROVIDERS.identity_api.create_user(user)['id']
+
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.reader_role_id, user_id=user['id'],
+            project_id=project['id']
+        )
+
+        project_auth = self.build_authentication_request(
+            user_id=user['id'], password=user['password'],
+            project_id=project['id']
+        )
+
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=project_auth)
+            project_token = r.headers['X-Subject-Token']
+
+        with self.test_client() as c:
+            r = c.post(
+                '/v3/auth/tokens/validate',
+                json={'tokens': [project_token, self.token_id]},
+                headers=self.headers, expected_status_code=http.client.OK
+            )
+            tokens = r.json['tokens']
+            self.assertEqual(
+                [project_token, self.token_id],
+                [token['id'] for token in tokens]
+            )
+            self.assertEqual(user['id'], tokens[0]['token']['user']['id'])
+
+
 class _SystemMemberAndReaderTokenTests(object):
 
     def test_user_cannot_revoke_a_system_scoped_token(self):
@@ -191,6 +230,7 @@ class _SystemMemberAndReaderTokenTests(object):
 class SystemReaderTests(base_classes.TestCaseWithBootstrap,
                         common_auth.AuthTestMixin,
                         _SystemUserTokenTests,
+                        _BatchValidationTests,
                         _SystemMemberAndReaderTokenTests):
 
     def setUp(self):
@@ -225,6 +265,7 @@ class SystemReaderTests(base_classes.TestCaseWithBootstrap,
 class SystemMemberTests(base_classes.TestCaseWithBootstrap,
                         common_auth.AuthTestMixin,
                         _SystemUserTokenTests,
+                        _BatchValidationTests,
                         _SystemMemberAndReaderTokenTests):
 
     def setUp(self):
@@ -233,18 +274,18 @@ class SystemMemberTests(base_classes.TestCaseWithBootstrap,
         self.useFixture(ksfixtures.Policy(self.config_fixture))
         self.config_fixture.config(group='oslo_policy', enforce_scope=True)
 
-        system_reader = unit.new_user_ref(
+        system_member = unit.new_user_ref(
             domain_id=CONF.identity.default_domain_id
         )
         self.user_id = PROVIDERS.identity_api.create_user(
-            system_reader
+            system_member
         )['id']
         PROVIDERS.assignment_api.create_system_grant_for_user(
-            self.user_id, self.bootstrapper.reader_role_id
+            self.user_id, self.bootstrapper.member_role_id
         )
 
         auth = self.build_authentication_request(
-            user_id=self.user_id, password=system_reader['password'],
+            user_id=self.user_id, password=system_member['password'],
             system=True
         )
 
@@ -258,7 +299,8 @@ class SystemMemberTests(base_classes.TestCaseWithBootstrap,
 
 class SystemAdminTests(base_classes.TestCaseWithBootstrap,
                        common_auth.AuthTestMixin,
-                       _SystemUserTokenTests):
+                       _SystemUserTokenTests,
+                       _BatchValidationTests):
 
     def setUp(self):
         super(SystemAdminTests, self).setUp()
@@ -362,6 +404,14 @@ class _DomainAndProjectUserTests(object):
             self.headers['X-Subject-Token'] = self.token_id
             c.get('/v3/auth/tokens', headers=self.headers)
 
+    def test_user_cannot_validate_a_batch_of_tokens(self):
+        with self.test_client() as c:
+            c.post(
+                '/v3/auth/tokens/validate',
+                json={'tokens': [self.token_id]}, headers=self.headers,
+                expected_status_code=http.client.FORBIDDEN
+            )
+
     def test_user_can_revoke_their_own_tokens(self):
         with self.test_client() as c:
             self.headers['X-Subject-Token'] = self.token_id
@@ -611,3 +661,194 @@ class ProjectUserTests(base_classes.TestCaseWithBootstrap,
             r = c.post('/v3/auth/tokens', json=auth)
             self.token_id = r.headers['X-Subject-Token']
             self.headers = {'X-Auth-Token': self.token_id}
+
+
+class DomainReaderTests(base_classes.TestCaseWithBootstrap,
+                        common_auth.AuthTestMixin,
+                        _DomainAndProjectUserTests):
+
+    def setUp(self):
+        super(DomainReaderTests, self).setUp()
+        self.loadapp()
+        self.useFixture(ksfixtures.Policy(self.config_fixture))
+        self.config_fixture.config(group='oslo_policy', enforce_scope=True)
+
+        domain = PROVIDERS.resource_api.create_domain(
+            uuid.uuid4().hex, unit.new_domain_ref()
+        )
+        self.domain_id = domain['id']
+        domain_reader = unit.new_user_ref(domain_id=self.domain_id)
+        self.user_id = PROVIDERS.identity_api.create_user(domain_reader)['id']
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.reader_role_id, user_id=self.user_id,
+            domain_id=self.domain_id
+        )
+
+        auth = self.build_authentication_request(
+            user_id=self.user_id, password=domain_reader['password'],
+            domain_id=self.domain_id
+        )
+
+        # Grab a token using the persona we're testing and prepare headers
+        # for requests we'll be making in the tests.
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=auth)
+            self.token_id = r.headers['X-Subject-Token']
+            self.headers = {'X-Auth-Token': self.token_id}
+
+
+class DomainAdminTests(base_classes.TestCaseWithBootstrap,
+                       common_auth.AuthTestMixin,
+                       _DomainAndProjectUserTests):
+
+    def setUp(self):
+        super(DomainAdminTests, self).setUp()
+        self.loadapp()
+        self.useFixture(ksfixtures.Policy(self.config_fixture))
+        self.config_fixture.config(group='oslo_policy', enforce_scope=True)
+
+        domain = PROVIDERS.resource_api.create_domain(
+            uuid.uuid4().hex, unit.new_domain_ref()
+        )
+        self.domain_id = domain['id']
+        domain_admin = unit.new_user_ref(domain_id=self.domain_id)
+        self.user_id = PROVIDERS.identity_api.create_user(domain_admin)['id']
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.admin_role_id, user_id=self.user_id,
+            domain_id=self.domain_id
+        )
+
+        auth = self.build_authentication_request(
+            user_id=self.user_id, password=domain_admin['password'],
+            domain_id=self.domain_id
+        )
+
+        # Grab a token using the persona we're testing and prepare headers
+        # for requests we'll be making in the tests.
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=auth)
+            self.token_id = r.headers['X-Subject-Token']
+            self.headers = {'X-Auth-Token': self.token_id}
+
+
+class ProjectMemberTests(base_classes.TestCaseWithBootstrap,
+                         common_auth.AuthTestMixin,
+                         _DomainAndProjectUserTests):
+
+    def setUp(self):
+        super(ProjectMemberTests, self).setUp()
+        self.loadapp()
+        self.useFixture(ksfixtures.Policy(self.config_fixture))
+        self.config_fixture.config(group='oslo_policy', enforce_scope=True)
+
+        domain = PROVIDERS.resource_api.create_domain(
+            uuid.uuid4().hex, unit.new_domain_ref()
+        )
+        self.domain_id = domain['id']
+
+        project_member = unit.new_user_ref(domain_id=self.domain_id)
+        self.user_id = PROVIDERS.identity_api.create_user(project_member)['id']
+        project = unit.new_project_ref(domain_id=self.domain_id)
+        self.project_id = PROVIDERS.resource_api.create_project(
+            project['id'], project
+        )['id']
+
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.member_role_id, user_id=self.user_id,
+            project_id=self.project_id
+        )
+
+        auth = self.build_authentication_request(
+            user_id=self.user_id, password=project_member['password'],
+            project_id=self.project_id
+        )
+
+        # Grab a token using the persona we're testing and prepare headers
+        # for requests we'll be making in the tests.
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=auth)
+            self.token_id = r.headers['X-Subject-Token']
+            self.headers = {'X-Auth-Token': self.token_id}
+
+
+class ProjectAdminTests(base_classes.TestCaseWithBootstrap,
+                        common_auth.AuthTestMixin,
+                        _DomainAndProjectUserTests):
+
+    def setUp(self):
+        super(ProjectAdminTests, self).setUp()
+        self.loadapp()
+        self.useFixture(ksfixtures.Policy(self.config_fixture))
+        self.config_fixture.config(group='oslo_policy', enforce_scope=True)
+
+        domain = PROVIDERS.resource_api.create_domain(
+            uuid.uuid4().hex, unit.new_domain_ref()
+        )
+        self.domain_id = domain['id']
+
+        project_admin = unit.new_user_ref(domain_id=self.domain_id)
+        self.user_id = PROVIDERS.identity_api.create_user(project_admin)['id']
+        project = unit.new_project_ref(domain_id=self.domain_id)
+        self.project_id = PROVIDERS.resource_api.create_project(
+            project['id'], project
+        )['id']
+
+        PROVIDERS.assignment_api.create_grant(
+            self.bootstrapper.admin_role_id, user_id=self.user_id,
+            project_id=self.project_id
+        )
+
+        auth = self.build_authentication_request(
+            user_id=self.user_id, password=project_admin['password'],
+            project_id=self.project_id
+        )
+
+        # Grab a token using the persona we're testing and prepare headers
+        # for requests we'll be making in the tests.
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=auth)
+            self.token_id = r.headers['X-Subject-Token']
+            self.headers = {'X-Auth-Token': self.token_id}
+
+
+class ServiceUserTests(base_classes.TestCaseWithBootstrap,
+                       common_auth.AuthTestMixin,
+                       _BatchValidationTests):
+
+    def setUp(self):
+        super(ServiceUserTests, self).setUp()
+        self.loadapp()
+        self.useFixture(ksfixtures.Policy(self.config_fixture))
+        self.config_fixture.config(group='oslo_policy', enforce_scope=True)
+
+        service_role = unit.new_role_ref(name='service')
+        PROVIDERS.role_api.create_role(service_role['id'], service_role)
+
+        domain = PROVIDERS.resource_api.create_domain(
+            uuid.uuid4().hex, unit.new_domain_ref()
+        )
+        self.domain_id = domain['id']
+
+        service_user = unit.new_user_ref(domain_id=self.domain_id)
+        self.user_id = PROVIDERS.identity_api.create_user(service_user)['id']
+        project = unit.new_project_ref(domain_id=self.domain_id)
+        self.project_id = PROVIDERS.resource_api.create_project(
+            project['id'], project
+        )['id']
+
+        PROVIDERS.assignment_api.create_grant(
+            service_role['id'], user_id=self.user_id,
+            project_id=self.project_id
+        )
+
+        auth = self.build_authentication_request(
+            user_id=self.user_id, password=service_user['password'],
+            project_id=self.project_id
+        )
+
+        # Grab a token using the persona we're testing and prepare headers
+        # for requests we'll be making in the tests.
+        with self.test_client() as c:
+            r = c.post('/v3/auth/tokens', json=auth)
+            self.token_id = r.headers['X-Subject-Token']
+            self.headers = {'X-Auth-Token': self.token_id}
@@ -15,6 +15,8 @@ import uuid
 
 from testtools import matchers
 
+from keystone.assignment.backends import base as assignment_base
+from keystone.assignment import core as assignment_core
 from keystone.common import provider_api
 import keystone.conf
 from keystone import exception
@@ -589,15 +591,12 @@ class AssignmentTests(AssignmentTestHelperMixin):
         self.assertEqual([], assignment_list)
 
     def test_list_role_assignments_user_not_found(self):
-        def _user_not_found(value):
-            raise exception.UserNotFound(user_id=value)
-
-        # Note(knikolla): Patch get_user to return UserNotFound
+        # Note(knikolla): Patch list_users_from_ids to find no users
         # this simulates the possibility of a user being deleted
         # directly in the backend and still having lingering role
         # assignments.
-        with mock.patch.object(PROVIDERS.identity_api, 'get_user',
-                               _user_not_found):
+        with mock.patch.object(PROVIDERS.identity_api, 'list_users_from_ids',
+                               return_value=[]):
             assignment_list = PROVIDERS.assignment_api.list_role_assignments(
                 include_names=True
             )
@@ -638,11 +637,11 @@ class AssignmentTests(AssignmentTestHelperMixin):
         num_assignments = len(PROVIDERS.assignment_api.list_role_assignments())
         self.assertEqual(1, num_assignments)
 
-        # Patch get_group to return GroupNotFound, allowing us to confirm
-        # that the exception is handled properly when include_names processing
-        # attempts to lookup a group that has been deleted in the backend
-        with mock.patch.object(PROVIDERS.identity_api, 'get_group',
-                               _group_not_found):
+        # Patch list_groups_from_ids to find no groups, allowing us to
+        # confirm that include_names processing handles a group that has been
+        # deleted in the backend
+        with mock.patch.object(PROVIDERS.identity_api, 'list_groups_from_ids',
+                               return_value=[]):
             assignment_list = PROVIDERS.assignment_api.list_role_assignments(
                 include_names=True
             )
@@ -683,6 +682,35 @@ class AssignmentTests(AssignmentTestHelperMixin):
         # TODO(edmondsw) should cleanup users/groups as well, but that raises
         # LDAP read-only issues
 
+    def test_list_role_assignments_reads_names_in_bulk(self):
+        PROVIDERS.assignment_api.create_grant(
+            user_id=self.user_foo['id'],
+            domain_id=CONF.identity.default_domain_id,
+            role_id=self.role_member['id'])
+        assignments = PROVIDERS.assignment_api.list_role_assignments()
+
+        with mock.patch.object(
+                PROVIDERS.identity_api, 'get_user') as mock_get_user, \
+                mock.patch.object(PROVIDERS.resource_api,
+                                  'get_domain') as mock_get_domain:
+            named_assignments = (
+                PROVIDERS.assignment_api.list_role_assignments(
+                    include_names=True))
+
+        self.assertFalse(mock_get_user.called)
+        self.assertFalse(mock_get_domain.called)
+        self.assertEqual(len(assignments), len(named_assignments))
+        for assignment in named_assignments:
+            if 'user_id' in assignment:
+                user = PROVIDERS.identity_api.get_user(assignment['user_id'])
+                self.assertEqual(user['name'], assignment['user_name'])
+                self.assertEqual(user['domain_id'],
+                                 assignment['user_domain_id'])
+            if 'domain_id' in assignment:
+                domain = PROVIDERS.resource_api.get_domain(
+                    assignment['domain_id'])
+                self.assertEqual(domain['name'], assignment['domain_name'])
+
     def test_add_duplicate_role_grant(self):
         roles_ref = PROVIDERS.assignment_api.get_roles_for_user_and_project(
             self.user_foo['id'], self.project_bar['id'])
@@ -2027,6 +2055,181 @@ class AssignmentTests(AssignmentTestHelperMixin):
             group_id=uuid.uuid4().hex,
             project_id=self.project_bar['id'])
 
+    def _create_bulk_grants(self):
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=CONF.identity.default_domain_id))
+        return [
+            {'role_id': self.role_other['id'],
+             'user_id': self.user_foo['id'],
+             'project_id': self.project_bar['id']},
+            {'role_id': self.role_member['id'],
+             'group_id': group['id'],
+             'domain_id': CONF.identity.default_domain_id},
+            {'role_id': self.role_admin['id'],
+             'group_id': group['id'],
+             'domain_id': CONF.identity.default_domain_id,
+             'inherited_to_projects': True}]
+
+    def _assert_grants_exist(self, grants, exist=True):
+        for grant in grants:
+            assignments = PROVIDERS.assignment_api.list_role_assignments(
+                role_id=grant['role_id'], user_id=grant.get('user_id'),
+                group_id=grant.get('group_id'),
+                project_id=grant.get('project_id'),
+                domain_id=grant.get('domain_id'),
+                inherited=grant.get('inherited_to_projects', False))
+            self.assertEqual(exist, bool(assignments))
+
+    def test_create_and_delete_grants(self):
+        grants = self._create_bulk_grants()
+        PROVIDERS.assignment_api.create_grants(grants)
+        self._assert_grants_exist(grants)
+
+        # Creating grants that already exist does not fail.
+        PROVIDERS.assignment_api.create_grants(grants + grants[:1])
+        self._assert_grants_exist(grants)
+
+        PROVIDERS.assignment_api.delete_grants(grants)
+        self._assert_grants_exist(grants, exist=False)
+
+    def test_create_grants_creates_none_if_one_is_invalid(self):
+        grants = self._create_bulk_grants()
+        for invalid_grant, expected_exception in [
+                ({'role_id': uuid.uuid4().hex}, exception.RoleNotFound),
+                ({'user_id': uuid.uuid4().hex}, exception.UserNotFound),
+                ({'project_id': uuid.uuid4().hex},
+                 exception.ProjectNotFound),
+                ({'user_id': self.user_foo['id'],
+                  'group_id': grants[1]['group_id']},
+                 exception.ValidationError)]:
+            invalid_grant = dict(grants[0], **invalid_grant)
+            self.assertRaises(expected_exception,
+                              PROVIDERS.assignment_api.create_grants,
+                              grants[1:] + [invalid_grant])
+            self._assert_grants_exist(grants, exist=False)
+
+    def test_delete_grants_deletes_none_if_one_does_not_exist(self):
+        grants = self._create_bulk_grants()
+        PROVIDERS.assignment_api.create_grants(grants[1:])
+        self.assertRaises(exception.RoleAssignmentNotFound,
+                          PROVIDERS.assignment_api.delete_grants,
+                          grants)
+        self._assert_grants_exist(grants[1:])
+
+    def _list_users_with_roles_computed(self, user_ids, project_id):
+        # Return the users whose roles on the project were computed again,
+        # rather than read from the computed assignments cache.
+        with mock.patch.object(
+                PROVIDERS.assignment_api.driver, 'list_role_ids_on_project',
+                wraps=PROVIDERS.assignment_api.driver.list_role_ids_on_project
+        ) as list_role_ids_on_project:
+            for user_id in sorted(user_ids):
+                PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                    user_id, project_id)
+        return set(call[0][0]
+                   for call in list_role_ids_on_project.call_args_list)
+
+    @unit.skip_if_cache_disabled('role')
+    def test_grant_invalidates_only_affected_computed_assignments(self):
+        domain_id = CONF.identity.default_domain_id
+        user_ids = [
+            unit.create_user(PROVIDERS.identity_api, domain_id)['id']
+            for x in range(3)]
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=domain_id))
+        PROVIDERS.identity_api.add_user_to_group(user_ids[1], group['id'])
+        project_id = self.project_bar['id']
+        self.assertEqual(
+            set(user_ids),
+            self._list_users_with_roles_computed(user_ids, project_id))
+        self.assertEqual(
+            set(), self._list_users_with_roles_computed(user_ids, project_id))
+
+        # A grant to a user invalidates the roles of that user only.
+        PROVIDERS.assignment_api.create_grant(
+            self.role_member['id'], user_id=user_ids[0],
+            project_id=self.project_baz['id'])
+        self.assertEqual(
+            set(user_ids[:1]),
+            self._list_users_with_roles_computed(user_ids, project_id))
+
+        # A grant to a group invalidates the roles of its members.
+        PROVIDERS.assignment_api.create_grant(
+            self.role_member['id'], group_id=group['id'],
+            domain_id=domain_id, inherited_to_projects=True)
+        self.assertEqual(
+            set(user_ids[1:2]),
+            self._list_users_with_roles_computed(user_ids, project_id))
+        self.assertIn(
+            self.role_member['id'],
+            PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                user_ids[1], project_id))
+
+        # So does adding a user to a group, for that user.
+        PROVIDERS.identity_api.add_user_to_group(user_ids[2], group['id'])
+        self.assertEqual(
+            set(user_ids[2:]),
+            self._list_users_with_roles_computed(user_ids, project_id))
+        self.assertIn(
+            self.role_member['id'],
+            PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                user_ids[2], project_id))
+
+        # Removing a grant invalidates the roles as well.
+        PROVIDERS.assignment_api.delete_grant(
+            self.role_member['id'], group_id=group['id'],
+            domain_id=domain_id, inherited_to_projects=True)
+        self.assertEqual(
+            set(user_ids[1:]),
+            self._list_users_with_roles_computed(user_ids, project_id))
+        self.assertEqual(
+            [], PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                user_ids[2], project_id))
+
+    @unit.skip_if_cache_disabled('role')
+    def test_grant_changes_assignment_generation(self):
+        def get_generation():
+            return PROVIDERS.assignment_api.get_assignment_generation(
+                self.user_foo['id'], target_id=self.project_baz['id'])
+
+        generation = get_generation()
+        self.assertEqual(generation, get_generation())
+        PROVIDERS.assignment_api.create_grant(
+            self.role_member['id'], user_id=self.user_foo['id'],
+            project_id=self.project_baz['id'])
+        self.assertNotEqual(generation, get_generation())
+
+    @unit.skip_if_cache_disabled('role')
+    def test_grant_to_others_keeps_assignment_generation(self):
+        def get_generation():
+            return PROVIDERS.assignment_api.get_assignment_generation(
+                self.user_foo['id'], target_id=self.project_baz['id'])
+
+        generation = get_generation()
+        PROVIDERS.assignment_api.create_grant(
+            self.role_member['id'], user_id=self.user_two['id'],
+            project_id=self.project_bar['id'])
+        self.assertEqual(generation, get_generation())
+
+    @unit.skip_if_cache_disabled('role')
+    def test_group_grant_changes_assignment_generation_of_group(self):
+        group = unit.new_group_ref(domain_id=CONF.identity.default_domain_id)
+        group = PROVIDERS.identity_api.create_group(group)
+
+        def get_generation():
+            return PROVIDERS.assignment_api.get_assignment_generation(
+                self.user_foo['id'], target_id=self.project_baz['id'],
+                group_ids=[group['id']])
+
+        # The group's roles count for the user, even though the user isn't
+        # a member of it, as for the groups of a federated user.
+        generation = get_generation()
+        PROVIDERS.assignment_api.create_grant(
+            self.role_member['id'], group_id=group['id'],
+            domain_id=CONF.identity.default_domain_id,
+            inherited_to_projects=True)
+        self.assertNotEqual(generation, get_generation())
+
     def test_delete_group_removes_role_assignments(self):
         # When a group is deleted any role assignments for the group are
         # removed.
@@ -3674,6 +3877,59 @@ class InheritanceTests(AssignmentTestHelperMixin):
         }
         self.execute_assignment_plan(test_plan)
 
+    def test_list_effective_assignments_loads_groups_and_subtrees_once(self):
+        """Test group members and subtrees are fetched once per listing."""
+        test_plan = {
+            # A domain with a project hierarchy 3 levels deep, 2 users in a
+            # group, plus 2 roles.
+            'entities': {'domains': {'projects': {'project': [{'project': 1}]},
+                                     'users': 2, 'groups': 1},
+                         'roles': 2},
+            'group_memberships': [{'group': 0, 'users': [0, 1]}],
+            'assignments': [{'group': 0, 'role': 0, 'project': 0,
+                             'inherited_to_projects': True},
+                            {'group': 0, 'role': 1, 'project': 0,
+                             'inherited_to_projects': True},
+                            {'group': 0, 'role': 0, 'project': 1},
+                            {'group': 0, 'role': 1, 'project': 1,
+                             'inherited_to_projects': True}]
+        }
+        test_data = self.execute_assignment_plan(test_plan)
+        group_id = test_data['groups'][0]['id']
+        project_ids = [project['id'] for project in test_data['projects']]
+
+        with mock.patch.object(
+                PROVIDERS.identity_api, 'list_users_in_group',
+                side_effect=PROVIDERS.identity_api.list_users_in_group
+        ) as mock_list_users_in_group, mock.patch.object(
+                PROVIDERS.resource_api, 'list_projects_in_subtree',
+                side_effect=PROVIDERS.resource_api.list_projects_in_subtree
+        ) as mock_list_projects_in_subtree:
+            assignments = PROVIDERS.assignment_api.list_role_assignments(
+                effective=True)
+
+        listed_group_ids = [
+            call[0][0] for call in mock_list_users_in_group.call_args_list]
+        self.assertEqual(1, listed_group_ids.count(group_id))
+        self.assertEqual(len(set(listed_group_ids)), len(listed_group_ids))
+        # The subtree of project 1 is part of the subtree of project 0, so
+        # only one of them needs to be fetched.
+        listed_project_ids = [
+            call[0][0] for call in
+            mock_list_projects_in_subtree.call_args_list]
+        self.assertEqual(1, len(set(project_ids) & set(listed_project_ids)))
+
+        from_group = [a for a in assignments
+                      if a.get('indirect', {}).get('group_id') == group_id]
+        # 2 users * (2 roles * 2 projects + 1 role * 1 project + 1 role)
+        self.assertThat(from_group, matchers.HasLength(12))
+        self.assertIn({'user_id': test_data['users'][1]['id'],
+                       'project_id': project_ids[2],
+                       'role_id': test_data['roles'][1]['id'],
+                       'indirect': {'group_id': group_id,
+                                    'project_id': project_ids[1]}},
+                      from_group)
+
 
 class ImpliedRoleTests(AssignmentTestHelperMixin):
 
@@ -3712,6 +3968,107 @@ class ImpliedRoleTests(AssignmentTestHelperMixin):
                           uuid.uuid4().hex,
                           uuid.uuid4().hex)
 
+    def _assert_implied_role_closure_is_current(self):
+        rules = [(rule['prior_role_id'], rule['implied_role_id'])
+                 for rule in PROVIDERS.role_api.list_role_inference_rules()]
+        expected = assignment_core._build_implied_role_closure(rules)
+        actual = PROVIDERS.role_api.get_implied_role_closure()
+        self.assertEqual(
+            {role_id: set(role_rules)
+             for role_id, role_rules in expected.items()},
+            {role_id: set(tuple(rule) for rule in role_rules)
+             for role_id, role_rules in actual.items() if role_rules})
+
+    def test_implied_role_closure_is_maintained(self):
+        role_ids = []
+        for _ in range(5):
+            role = unit.new_role_ref()
+            PROVIDERS.role_api.create_role(role['id'], role)
+            role_ids.append(role['id'])
+        # populate the cache before changing any rules
+        PROVIDERS.role_api.get_implied_role_closure()
+
+        # a chain with a cycle back to its start and a diamond
+        rules = [(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (1, 4)]
+        for prior, implied in rules:
+            PROVIDERS.role_api.create_implied_role(
+                role_ids[prior], role_ids[implied])
+            self._assert_implied_role_closure_is_current()
+
+        closure = PROVIDERS.role_api.get_implied_role_closure()
+        self.assertEqual(
+            {(role_ids[prior], role_ids[implied])
+             for prior, implied in rules},
+            set(tuple(rule) for rule in closure[role_ids[2]]))
+
+        for prior, implied in [(1, 2), (0, 3), (1, 4), (2, 0)]:
+            PROVIDERS.role_api.delete_implied_role(
+                role_ids[prior], role_ids[implied])
+            self._assert_implied_role_closure_is_current()
+
+        PROVIDERS.role_api.delete_role(role_ids[3])
+        self._assert_implied_role_closure_is_current()
+
+    def test_implied_role_closure_is_rebuilt_when_stale(self):
+        role_ids = []
+        for _ in range(4):
+            role = unit.new_role_ref()
+            PROVIDERS.role_api.create_role(role['id'], role)
+            role_ids.append(role['id'])
+        PROVIDERS.role_api.create_implied_role(role_ids[0], role_ids[1])
+        # populate the cache, then change the rules behind its back as
+        # another process would
+        PROVIDERS.role_api.get_implied_role_closure()
+        PROVIDERS.role_api.driver.create_implied_role(
+            role_ids[1], role_ids[2])
+        PROVIDERS.role_api.driver.delete_implied_role(
+            role_ids[0], role_ids[1])
+
+        PROVIDERS.role_api.create_implied_role(role_ids[2], role_ids[3])
+        self._assert_implied_role_closure_is_current()
+        closure = PROVIDERS.role_api.get_implied_role_closure()
+        self.assertNotIn(role_ids[0], closure)
+
+        PROVIDERS.role_api.driver.create_implied_role(
+            role_ids[0], role_ids[1])
+        PROVIDERS.role_api.delete_implied_role(role_ids[2], role_ids[3])
+        self._assert_implied_role_closure_is_current()
+        closure = PROVIDERS.role_api.get_implied_role_closure()
+        self.assertEqual(
+            {(role_ids[0], role_ids[1]), (role_ids[1], role_ids[2])},
+            set(tuple(rule) for rule in closure[role_ids[0]]))
+
+    def test_add_implied_roles_expands_from_closure(self):
+        role_ids = []
+        for _ in range(3):
+            role = unit.new_role_ref()
+            PROVIDERS.role_api.create_role(role['id'], role)
+            role_ids.append(role['id'])
+        PROVIDERS.role_api.create_implied_role(role_ids[0], role_ids[1])
+        PROVIDERS.role_api.create_implied_role(role_ids[1], role_ids[2])
+
+        prior_ref = {'user_id': uuid.uuid4().hex,
+                     'project_id': uuid.uuid4().hex,
+                     'role_id': role_ids[0],
+                     'indirect': {'group_id': uuid.uuid4().hex}}
+        with mock.patch.object(
+                PROVIDERS.role_api.driver,
+                'list_implied_roles') as list_implied_roles:
+            refs = PROVIDERS.assignment_api.add_implied_roles([prior_ref])
+        list_implied_roles.assert_not_called()
+
+        self.assertEqual(3, len(refs))
+        self.assertEqual(prior_ref, refs[0])
+        for ref, prior_role_id, role_id in zip(refs[1:], role_ids,
+                                               role_ids[1:]):
+            self.assertEqual(role_id, ref['role_id'])
+            self.assertEqual(
+                {'group_id': prior_ref['indirect']['group_id'],
+                 'role_id': prior_role_id},
+                ref['indirect'])
+        # the prior ref must not have been modified
+        self.assertNotIn('role_id', prior_ref['indirect'])
+
     def test_role_assignments_simple_tree_of_implied_roles(self):
         """Test that implied roles are expanded out."""
         test_plan = {
@@ -3924,6 +4281,119 @@ class ImpliedRoleTests(AssignmentTestHelperMixin):
         }
         self.execute_assignment_plan(test_plan)
 
+    def test_roles_for_user_and_project_match_effective_assignments(self):
+        test_plan = {
+            # A domain with a project, its child and grandchild, one domain
+            # specific role and six global roles.
+            'entities': {'domains': {'users': 2, 'groups': 2, 'roles': 1,
+                                     'projects': {'project': {'project': 1}}},
+                         'roles': 6},
+            'implied_roles': [{'role': 0, 'implied_roles': [1]},
+                              {'role': 2, 'implied_roles': [3]},
+                              {'role': 3, 'implied_roles': [4]}],
+            'group_memberships': [{'group': 0, 'users': [0]},
+                                  {'group': 1, 'users': [1]}],
+            'assignments': [{'user': 0, 'role': 2, 'project': 1},
+                            {'group': 0, 'role': 5, 'project': 1},
+                            {'user': 0, 'role': 5, 'project': 0},
+                            {'user': 0, 'role': 1, 'domain': 0},
+                            {'user': 0, 'role': 0, 'domain': 0,
+                             'inherited_to_projects': True},
+                            {'group': 0, 'role': 6, 'project': 0,
+                             'inherited_to_projects': True},
+                            {'user': 0, 'role': 6, 'project': 1,
+                             'inherited_to_projects': True},
+                            {'group': 1, 'role': 4, 'project': 1}],
+        }
+        test_data = self.execute_assignment_plan(test_plan)
+
+        assignment_api = PROVIDERS.assignment_api
+
+        def list_effective_role_ids(user_id, project_id, strip_domain_roles):
+            assignments = assignment_api.list_role_assignments(
+                user_id=user_id, project_id=project_id, effective=True,
+                strip_domain_roles=strip_domain_roles)
+            return sorted(set(x['role_id'] for x in assignments))
+
+        for user in test_data['users']:
+            for project in test_data['projects']:
+                role_ids = assignment_api.get_roles_for_user_and_project(
+                    user['id'], project['id'])
+                self.assertEqual(
+                    list_effective_role_ids(user['id'], project['id'], True),
+                    sorted(role_ids))
+                role_ids = assignment_api.get_roles_for_trustor_and_project(
+                    user['id'], project['id'])
+                self.assertEqual(
+                    list_effective_role_ids(user['id'], project['id'], False),
+                    sorted(role_ids))
+
+        # The grandchild only gets the roles inherited from the domain and
+        # from its parents.
+        roles = test_data['roles']
+        self.assertEqual(
+            sorted([roles[1]['id'], roles[6]['id']]),
+            sorted(assignment_api.get_roles_for_user_and_project(
+                test_data['users'][0]['id'], test_data['projects'][2]['id'])))
+
+    def test_roles_for_user_and_project_read_roles_in_bulk(self):
+        domain_id = CONF.identity.default_domain_id
+        user_id = unit.create_user(PROVIDERS.identity_api, domain_id)['id']
+        project = unit.new_project_ref(domain_id=domain_id)
+        project_id = PROVIDERS.resource_api.create_project(
+            project['id'], project)['id']
+        for _ in range(3):
+            role = unit.new_role_ref()
+            PROVIDERS.role_api.create_role(role['id'], role)
+            PROVIDERS.assignment_api.add_role_to_user_and_project(
+                user_id, project_id, role['id'])
+        with mock.patch.object(PROVIDERS.role_api, 'get_role') as get_role:
+            role_ids = PROVIDERS.assignment_api.get_roles_for_user_and_project(
+                user_id, project_id)
+        self.assertEqual(3, len(role_ids))
+        get_role.assert_not_called()
+
+    def test_list_role_ids_on_project_matches_default(self):
+        domain_id = CONF.identity.default_domain_id
+        parent = unit.new_project_ref(domain_id=domain_id)
+        PROVIDERS.resource_api.create_project(parent['id'], parent)
+        project = unit.new_project_ref(domain_id=domain_id,
+                                       parent_id=parent['id'])
+        PROVIDERS.resource_api.create_project(project['id'], project)
+        user_id = uuid.uuid4().hex
+        group_ids = [uuid.uuid4().hex, uuid.uuid4().hex]
+        role_ids = []
+        for _ in range(5):
+            role = unit.new_role_ref()
+            PROVIDERS.role_api.create_role(role['id'], role)
+            role_ids.append(role['id'])
+        grants = [
+            {'user_id': user_id, 'project_id': project['id']},
+            {'group_id': group_ids[1], 'project_id': project['id']},
+            {'user_id': user_id, 'domain_id': domain_id,
+             'inherited_to_projects': True},
+            {'group_id': group_ids[0], 'project_id': parent['id'],
+             'inherited_to_projects': True},
+            {'group_id': uuid.uuid4().hex, 'project_id': project['id']}]
+        for role_id, grant in zip(role_ids, grants):
+            PROVIDERS.assignment_api.driver.create_grant(role_id, **grant)
+        # Neither applies to the project.
+        PROVIDERS.assignment_api.driver.create_grant(
+            role_ids[4], user_id=user_id, project_id=parent['id'])
+        PROVIDERS.assignment_api.driver.create_grant(
+            role_ids[4], user_id=user_id, project_id=project['id'],
+            inherited_to_projects=True)
+
+        driver = PROVIDERS.assignment_api.driver
+        args = (user_id, group_ids, project['id'], domain_id, [parent['id']])
+        default_list_role_ids_on_project = (
+            assignment_base.AssignmentDriverBase.list_role_ids_on_project)
+        self.assertEqual(sorted(role_ids[:4]),
+                         sorted(driver.list_role_ids_on_project(*args)))
+        self.assertEqual(
+            sorted(role_ids[:4]),
+            sorted(default_list_role_ids_on_project(driver, *args)))
+
 
 class SystemAssignmentTests(AssignmentTestHelperMixin):
     def test_create_system_grant_for_user(self):
@@ -195,3 +195,23 @@ class TestCacheRegion(unit.BaseTestCase):
         # test invalidation
         cache.CACHE_INVALIDATION_REGION.delete(region_key)
         self.assertIsInstance(self.region0.get(key), dogpile.NoValue)
+
+    def test_region_statistics(self):
+        region = cache.create_region(self.region_name)
+        cache.configure_cache(region=region)
+        key = uuid.uuid4().hex
+
+        region.get(key)
+        region.set(key, uuid.uuid4().hex)
+        region.get(key)
+        region.get_multi([key, uuid.uuid4().hex])
+
+        statistics = cache.get_region_statistics()[self.region_name]
+        self.assertEqual(2, statistics['hits'])
+        self.assertEqual(2, statistics['misses'])
+        self.assertEqual(0.5, statistics['hit_rate'])
+
+        cache.reset_region_statistics()
+        statistics = cache.get_region_statistics()[self.region_name]
+        self.assertEqual(0, statistics['hits'])
+        self.assertEqual(0, statistics['misses'])
@@ -1346,6 +1346,49 @@ class CadfNotificationsWrapperTestCase(test_v3.RestfulTestCase):
         self._assert_event(self.role_id, project=self.project_id,
                            user=self.user_id)
 
+    def test_create_and_delete_grants(self):
+        # A notification is sent for each of the grants created or deleted
+        # by create_grants and delete_grants on the assignment manager.
+        group_ref = unit.new_group_ref(domain_id=self.domain_id)
+        group = PROVIDERS.identity_api.create_group(group_ref)
+        grants = [
+            {'role_id': self.role_id, 'user_id': self.user_id,
+             'project_id': self.project_id},
+            {'role_id': self.role_id, 'group_id': group['id'],
+             'domain_id': self.domain_id, 'inherited_to_projects': True}]
+
+        for operation, method in [
+                ('created', PROVIDERS.assignment_api.create_grants),
+                ('deleted', PROVIDERS.assignment_api.delete_grants)]:
+            del self._notifications[:]
+            method(grants)
+            self.assertEqual(2, len(self._notifications))
+            for note in self._notifications:
+                self.assertEqual('%s.role_assignment' % operation,
+                                 note['action'])
+                self.assertEqual(cadftaxonomy.OUTCOME_SUCCESS,
+                                 note['event'].outcome)
+            self._notifications.pop()
+            self._assert_event(self.role_id, project=self.project_id,
+                               user=self.user_id)
+
+    def test_create_grants_failure(self):
+        # A failure notification is sent for each grant when create_grants
+        # fails.
+        grants = [
+            {'role_id': self.role_id, 'user_id': self.user_id,
+             'project_id': self.project_id},
+            {'role_id': uuid.uuid4().hex, 'user_id': self.user_id,
+             'project_id': self.project_id}]
+        del self._notifications[:]
+        self.assertRaises(exception.RoleNotFound,
+                          PROVIDERS.assignment_api.create_grants, grants)
+        self.assertEqual(2, len(self._notifications))
+        for note in self._notifications:
+            self.assertEqual('created.role_assignment', note['action'])
+            self.assertEqual(cadftaxonomy.OUTCOME_FAILURE,
+                             note['event'].outcome)
+
 
 class TestCallbackRegistration(unit.BaseTestCase):
     def setUp(self):
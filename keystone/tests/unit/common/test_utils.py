@@ -11,15 +11,23 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+from concurrent.futures import process
 import datetime
 import fixtures
+from multiprocessing import forkserver
+import os
 import uuid
+from unittest import mock
 
+from cryptography import fernet
 import freezegun
+import passlib.hash
 from oslo_config import fixture as config_fixture
 from oslo_log import log
 
 from keystone.common import fernet_utils
+from keystone.common import password_hashing
 from keystone.common import utils as common_utils
 import keystone.conf
 from keystone.credential.providers import fernet as credential_fernet
@@ -215,6 +223,171 @@ class UtilsTestCase(unit.BaseTestCase):
         self.assertTrue(string_time.endswith(expected_string_ending))
 
 
+class PasswordVerificationTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        # NOTE: Start the fork server the worker processes are started from
+        # before the base test case sets up a temporary directory for the
+        # test, as the fork server outlives the test and its socket is in a
+        # temporary directory.
+        forkserver.ensure_running()
+        super(PasswordVerificationTestCase, self).setUp()
+        self.config_fixture = self.useFixture(config_fixture.Config(CONF))
+        self.config_fixture.config(group='identity',
+                                   password_hash_rounds=4)
+        self.useFixture(fixtures.MockPatchObject(
+            password_hashing, '_STATS', password_hashing._VerificationStats()))
+        self.addCleanup(self._discard_executor)
+        self.hashed = password_hashing.hash_password('secret')
+
+    def _discard_executor(self):
+        if password_hashing._executor is not None:
+            password_hashing._discard_executor(password_hashing._executor)
+
+    def test_check_password_in_worker_process(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1)
+        self.assertTrue(password_hashing.check_password(
+            'secret', self.hashed, offload=True))
+        self.assertFalse(password_hashing.check_password(
+            'wrong', self.hashed, offload=True))
+        self.assertIsNotNone(password_hashing._executor)
+
+        stats = password_hashing.get_verification_stats()
+        self.assertEqual(0, stats['queue_depth'])
+        self.assertEqual(1, stats['max_queue_depth'])
+        self.assertEqual(2, stats['latency']['bcrypt']['count'])
+
+    def test_worker_processes_started_from_fork_server(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1)
+        executor = password_hashing._get_executor()
+        self.assertEqual('forkserver',
+                         executor._pool._mp_context.get_start_method())
+        self.assertEqual(
+            True, executor.verify(b'secret', self.hashed)[0])
+
+    def test_worker_executable(self):
+        with mock.patch.object(password_hashing.sys, 'executable',
+                               '/usr/bin/uwsgi'):
+            self.assertTrue(os.path.basename(
+                password_hashing._get_worker_executable()).startswith(
+                    'python'))
+        self.config_fixture.config(
+            group='identity', password_hash_worker_executable='/opt/python')
+        self.assertEqual('/opt/python',
+                         password_hashing._get_worker_executable())
+
+    def test_hash_password_in_worker_process(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1)
+        hashed = password_hashing.hash_password('secret', offload=True)
+        self.assertIsNotNone(password_hashing._executor)
+        self.assertTrue(password_hashing.check_password('secret', hashed))
+        self.assertEqual(('bcrypt', {'rounds': 4}),
+                         password_hashing.describe_hash(hashed))
+
+    def test_hash_password_rejected_when_queue_full(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1,
+                                   password_hash_queue_size=0)
+        executor = password_hashing._get_executor()
+        executor._slots.acquire()
+        self.addCleanup(executor._slots.release)
+
+        self.assertRaises(exception.PasswordVerificationUnavailable,
+                          password_hashing.hash_password,
+                          'secret', offload=True)
+
+    def test_check_password_not_offloaded(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1)
+        self.assertTrue(password_hashing.check_password('secret',
+                                                        self.hashed))
+        self.assertIsNone(password_hashing._executor)
+
+        stats = password_hashing.get_verification_stats()
+        self.assertEqual(0, stats['max_queue_depth'])
+        self.assertEqual(1, stats['latency']['bcrypt']['count'])
+
+    def test_check_password_without_workers(self):
+        self.assertTrue(password_hashing.check_password(
+            'secret', self.hashed, offload=True))
+        self.assertIsNone(password_hashing._executor)
+
+    def test_check_password_rejected_when_queue_full(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1,
+                                   password_hash_queue_size=0,
+                                   password_hash_retry_after=3)
+        executor = password_hashing._get_executor()
+        # Take the only slot, as a verification in progress would.
+        executor._slots.acquire()
+        self.addCleanup(executor._slots.release)
+
+        e = self.assertRaises(exception.PasswordVerificationUnavailable,
+                              password_hashing.check_password,
+                              'secret', self.hashed, offload=True)
+        self.assertEqual(3, e.retry_after)
+        self.assertEqual(1, password_hashing.get_verification_stats()[
+            'rejected'])
+
+    def test_check_password_inline_when_worker_dies(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1)
+        executor = password_hashing._get_executor()
+        with mock.patch.object(executor, 'verify',
+                               side_effect=process.BrokenProcessPool):
+            self.assertTrue(password_hashing.check_password(
+                'secret', self.hashed, offload=True))
+        # New worker processes are started for the next verification.
+        self.assertIsNone(password_hashing._executor)
+
+
+class PasswordRehashTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(PasswordRehashTestCase, self).setUp()
+        self.config_fixture = self.useFixture(config_fixture.Config(CONF))
+        self.config_fixture.config(group='identity',
+                                   password_hash_rounds=4)
+        self.hashed = password_hashing.hash_password('secret')
+
+    def test_needs_rehash_with_current_options(self):
+        self.assertFalse(password_hashing.needs_rehash(self.hashed))
+
+    def test_needs_rehash_with_other_algorithm(self):
+        self.config_fixture.config(group='identity',
+                                   password_hash_algorithm='pbkdf2_sha512',
+                                   password_hash_rounds=1000)
+        self.assertTrue(password_hashing.needs_rehash(self.hashed))
+
+    def test_needs_rehash_with_other_rounds(self):
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        self.assertTrue(password_hashing.needs_rehash(self.hashed))
+
+    def test_needs_rehash_with_default_rounds(self):
+        # The hash was made with fewer rounds than the default.
+        self.config_fixture.config(group='identity', password_hash_rounds=None)
+        self.assertTrue(password_hashing.needs_rehash(self.hashed))
+
+    def test_needs_rehash_with_other_salt_size(self):
+        self.config_fixture.config(group='identity',
+                                   password_hash_algorithm='pbkdf2_sha512',
+                                   password_hash_rounds=1000,
+                                   salt_bytesize=16)
+        hashed = password_hashing.hash_password('secret')
+        self.assertFalse(password_hashing.needs_rehash(hashed))
+        self.config_fixture.config(group='identity', salt_bytesize=32)
+        self.assertTrue(password_hashing.needs_rehash(hashed))
+
+    def test_needs_rehash_legacy_algorithm(self):
+        hashed = passlib.hash.sha512_crypt.using(rounds=1000).hash('secret')
+        self.assertTrue(password_hashing.needs_rehash(hashed))
+
+    def test_describe_hash(self):
+        self.assertEqual(('bcrypt', {'rounds': 4}),
+                         password_hashing.describe_hash(self.hashed))
+        hashed = passlib.hash.scrypt.using(rounds=4, block_size=4).hash(
+            'secret')
+        self.assertEqual(
+            ('scrypt', {'rounds': 4, 'block_size': 4, 'parallelism': 1}),
+            password_hashing.describe_hash(hashed))
+
+
 class ServiceHelperTests(unit.BaseTestCase):
 
     @application.fail_gracefully
@@ -276,3 +449,144 @@ class FernetUtilsTestCase(unit.BaseTestCase):
                 'dir': CONF.credential.key_repository,
                 'max': credential_fernet.MAX_ACTIVE_KEYS}
         self.assertNotIn(debug_message, logging_fixture.output)
+
+
+class FernetKeyRingTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(FernetKeyRingTestCase, self).setUp()
+        self.config_fixture = self.useFixture(config_fixture.Config(CONF))
+        self.useFixture(
+            ksfixtures.KeyRepository(
+                self.config_fixture,
+                'fernet_tokens',
+                CONF.fernet_tokens.max_active_keys
+            )
+        )
+        self.key_utils = fernet_utils.FernetUtils(
+            CONF.fernet_tokens.key_repository,
+            CONF.fernet_tokens.max_active_keys,
+            'fernet_tokens'
+        )
+
+    def _get_key_ring(self):
+        return fernet_utils.get_key_ring(
+            CONF.fernet_tokens.key_repository,
+            CONF.fernet_tokens.max_active_keys,
+            'fernet_tokens'
+        )
+
+    def test_key_ring_is_shared(self):
+        self.assertIs(self._get_key_ring(), self._get_key_ring())
+
+    def test_keys_are_not_reloaded_if_repository_is_unchanged(self):
+        key_ring = self._get_key_ring()
+        _, keys = key_ring.load()
+        self.assertEqual(self.key_utils.load_keys(), keys)
+
+        with mock.patch.object(fernet_utils.FernetUtils,
+                               'load_keys') as mock_load_keys:
+            key_ring.load()
+            key_ring.load()
+        mock_load_keys.assert_not_called()
+
+    def test_keys_are_reloaded_after_rotation(self):
+        key_ring = self._get_key_ring()
+        crypto, keys = key_ring.load()
+
+        self.key_utils.rotate_keys()
+
+        new_crypto, new_keys = key_ring.load()
+        self.assertIsNot(crypto, new_crypto)
+        self.assertEqual(self.key_utils.load_keys(), new_keys)
+        self.assertNotEqual(keys[0], new_keys[0])
+
+    def test_check_interval_delays_reloading_keys(self):
+        key_ring = fernet_utils.get_key_ring(
+            CONF.fernet_tokens.key_repository,
+            CONF.fernet_tokens.max_active_keys,
+            'fernet_tokens',
+            check_interval=3600
+        )
+        _, keys = key_ring.load()
+
+        self.key_utils.rotate_keys()
+
+        self.assertEqual(keys, key_ring.load()[1])
+
+    def test_missing_key_repository_raises_keys_not_found(self):
+        key_ring = self._get_key_ring()
+        key_ring.load()
+
+        for filename in os.listdir(CONF.fernet_tokens.key_repository):
+            os.remove(
+                os.path.join(CONF.fernet_tokens.key_repository, filename))
+
+        self.assertRaises(exception.KeysNotFound, key_ring.load)
+
+
+class KeyHintedMultiFernetTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(KeyHintedMultiFernetTestCase, self).setUp()
+        self.fernets = [
+            fernet.Fernet(fernet.Fernet.generate_key()) for i in range(10)]
+        self.crypto = fernet_utils.KeyHintedMultiFernet(self.fernets)
+
+    def test_encrypt_uses_primary_key(self):
+        token = self.crypto.encrypt(b'payload')
+        self.assertEqual(b'payload', self.fernets[0].decrypt(token))
+
+    def test_decrypt_with_any_key(self):
+        for key_fernet in self.fernets:
+            token = key_fernet.encrypt(b'payload')
+            self.assertEqual(b'payload', self.crypto.decrypt(token))
+
+    def test_decrypt_tries_hinted_key_first(self):
+        token = self.fernets[-1].encrypt(b'payload')
+        self.assertEqual(b'payload', self.crypto.decrypt(token))
+
+        with mock.patch.object(fernet.Fernet, 'decrypt',
+                               autospec=True,
+                               side_effect=fernet.Fernet.decrypt) as decrypt:
+            self.assertEqual(b'payload', self.crypto.decrypt(token))
+        self.assertEqual(1, decrypt.call_count)
+
+    def test_invalid_token_is_rejected(self):
+        other_fernet = fernet.Fernet(fernet.Fernet.generate_key())
+        token = other_fernet.encrypt(b'payload')
+        self.assertRaises(fernet.InvalidToken, self.crypto.decrypt, token)
+        self.assertRaises(fernet.InvalidToken, self.crypto.decrypt, b'bogus')
+
+
+class ParseFernetTokenTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(ParseFernetTokenTestCase, self).setUp()
+        self.fernet = fernet.Fernet(fernet.Fernet.generate_key())
+
+    def test_parse_token(self):
+        with freezegun.freeze_time(
+                datetime.datetime.utcfromtimestamp(1234567890)):
+            token = self.fernet.encrypt(b'payload')
+        # keystone strips the padding from tokens
+        token = token.rstrip(b'=').decode('utf-8')
+        with mock.patch.object(fernet_utils.base64, 'urlsafe_b64decode',
+                               wraps=base64.urlsafe_b64decode) as decode:
+            parsed_token = fernet_utils.parse_token(token)
+        self.assertEqual(fernet_utils.FERNET_VERSION, parsed_token.version)
+        self.assertEqual(1234567890, parsed_token.timestamp)
+        # Only the header is decoded, the whole token is decoded when it is
+        # decrypted.
+        decode.assert_called_once_with(
+            token[:fernet_utils.HEADER_B64_LENGTH])
+        self.assertEqual(1234567890, fernet_utils.get_token_timestamp(token))
+
+    def test_parse_malformed_token(self):
+        token = self.fernet.encrypt(b'payload')
+        data = base64.urlsafe_b64decode(token)
+        wrong_version = base64.urlsafe_b64encode(b'\x81' + data[1:])
+        for malformed_token in (b'', b'bogus', token[:-8], wrong_version):
+            self.assertRaises(
+                ValueError, fernet_utils.parse_token, malformed_token)
+        self.assertIsNone(fernet_utils.get_token_timestamp(b'bogus'))
@@ -844,6 +844,10 @@ class TestCase(BaseTestCase):
         # of hashing has been used. Note that 4 is the lowest for bcrypt
         # allowed in the `[identity] password_hash_rounds` setting
         self.config_fixture.config(group='identity', password_hash_rounds=4)
+        # NOTE: Many tests revoke tokens through the revocation backend
+        # directly, as another keystone process would, and expect the
+        # revocation to take effect at once.
+        self.config_fixture.config(group='revoke', index_refresh_interval=0)
 
         self.useFixture(
             ksfixtures.KeyRepository(
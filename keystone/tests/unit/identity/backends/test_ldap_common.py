@@ -203,6 +203,83 @@ class DnCompareTest(unit.BaseTestCase):
         parent = u'ou=OpenStäck'
         self.assertTrue(common_ldap.dn_startswith(child, parent))
 
+    def test_normalize_dn(self):
+        # normalize_dn returns the same value for DNs that are equal.
+        dn1 = 'cn=Babs Jansen,ou=OpenStack'
+        dn2 = 'CN=babs   jansen ,ou=OPENSTACK'
+        self.assertTrue(common_ldap.is_dn_equal(dn1, dn2))
+        self.assertEqual(common_ldap.normalize_dn(dn1),
+                         common_ldap.normalize_dn(dn2))
+
+        # The order of the AVAs of an RDN is not significant.
+        dn1 = 'cn=Babs Jansen+sn=Jansen,ou=OpenStack'
+        dn2 = 'sn=Jansen+cn=Babs Jansen,ou=OpenStack'
+        self.assertEqual(common_ldap.normalize_dn(dn1),
+                         common_ldap.normalize_dn(dn2))
+
+    def test_normalize_dn_different(self):
+        # normalize_dn returns different values for DNs that are not equal.
+        dn1 = 'cn=Babs Jansen,ou=OpenStack'
+        dn2 = 'cn=Babs Jansen,ou=Keystone,ou=OpenStack'
+        self.assertNotEqual(common_ldap.normalize_dn(dn1),
+                            common_ldap.normalize_dn(dn2))
+
+
+class EntityCacheTest(unit.BaseTestCase):
+    """Test for the LDAP entity cache in keystone.common.ldap.core."""
+
+    def test_get_missing(self):
+        cache = common_ldap.EntityCache(size=10, cache_time=60)
+        self.assertRaises(KeyError, cache.get, 'key')
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_get(self):
+        cache = common_ldap.EntityCache(size=10, cache_time=60)
+        cache.set('key', 'value')
+        self.assertEqual('value', cache.get('key'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0, cache.misses)
+
+    def test_disabled(self):
+        cache = common_ldap.EntityCache(size=0, cache_time=60)
+        cache.set('key', 'value')
+        self.assertRaises(KeyError, cache.get, 'key')
+        self.assertEqual(0, len(cache))
+
+    def test_expired(self):
+        cache = common_ldap.EntityCache(size=10, cache_time=60)
+        with mock.patch.object(common_ldap.time, 'monotonic',
+                               return_value=1000):
+            cache.set('key', 'value')
+        with mock.patch.object(common_ldap.time, 'monotonic',
+                               return_value=1059):
+            self.assertEqual('value', cache.get('key'))
+        with mock.patch.object(common_ldap.time, 'monotonic',
+                               return_value=1060):
+            self.assertRaises(KeyError, cache.get, 'key')
+        self.assertEqual(0, len(cache))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_least_recently_used_evicted(self):
+        cache = common_ldap.EntityCache(size=2, cache_time=60)
+        cache.set('key1', 'value1')
+        cache.set('key2', 'value2')
+        # Using key1 makes key2 the least recently used entry.
+        cache.get('key1')
+        cache.set('key3', 'value3')
+        self.assertEqual(2, len(cache))
+        self.assertEqual('value1', cache.get('key1'))
+        self.assertRaises(KeyError, cache.get, 'key2')
+        self.assertEqual('value3', cache.get('key3'))
+
+    def test_clear(self):
+        cache = common_ldap.EntityCache(size=10, cache_time=60)
+        cache.set('key', 'value')
+        cache.clear()
+        self.assertRaises(KeyError, cache.get, 'key')
+
 
 class LDAPDeleteTreeTest(unit.TestCase):
 
@@ -413,6 +490,53 @@ class LDAPPagedResultsTest(unit.TestCase):
         attrlist = sorted([attr for attr in args[3] if attr])
         self.assertEqual(['mail', 'userPassword'], attrlist)
 
+    @mock.patch.object(fakeldap.FakeLdap, 'search_ext')
+    @mock.patch.object(fakeldap.FakeLdap, 'result3')
+    def test_search_pages_requests_next_page_before_yielding(
+            self, mock_result3, mock_search_ext):
+        page_ctrl_oid = ldap.controls.SimplePagedResultsControl.controlType
+
+        def page(name, cookie):
+            control = mock.Mock(controlType=page_ctrl_oid, cookie=cookie)
+            entry = ('cn=%s,dc=example,dc=test' % name,
+                     {'cn': [name.encode('utf-8')]})
+            return ldap.RES_SEARCH_RESULT, [entry], 1, [control]
+
+        mock_result3.side_effect = [page('a', 'one'), page('b', 'two'),
+                                    page('c', '')]
+        self.config_fixture.config(group='ldap', page_size=1)
+        self.load_backends()
+
+        conn = PROVIDERS.identity_api.user.get_connection()
+        pages = conn.search_pages('dc=example,dc=test',
+                                  ldap.SCOPE_SUBTREE,
+                                  'objectclass=*')
+        self.assertEqual([('cn=a,dc=example,dc=test', {'cn': ['a']})],
+                         next(pages))
+        # The second page was requested before the first one was handed over,
+        # but not read yet.
+        self.assertEqual(2, mock_search_ext.call_count)
+        self.assertEqual(1, mock_result3.call_count)
+
+        self.assertEqual([[('cn=b,dc=example,dc=test', {'cn': ['b']})],
+                          [('cn=c,dc=example,dc=test', {'cn': ['c']})]],
+                         list(pages))
+        # There was no request after the last page.
+        self.assertEqual(3, mock_search_ext.call_count)
+        self.assertEqual(3, mock_result3.call_count)
+
+    def test_list_users_streams_pages(self):
+        expected = sorted(user['id'] for user in
+                          PROVIDERS.identity_api.driver.list_users(
+                              driver_hints.Hints()))
+
+        with mock.patch.object(common_ldap.BaseLdap, '_ldap_get_all',
+                               autospec=True) as mock_get_all:
+            users = PROVIDERS.identity_api.list_users()
+        # The users were not read all at once.
+        mock_get_all.assert_not_called()
+        self.assertEqual(expected, sorted(user['id'] for user in users))
+
 
 class CommonLdapTestCase(unit.BaseTestCase):
     """These test cases call functions in keystone.common.ldap."""
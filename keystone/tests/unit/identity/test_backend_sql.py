@@ -11,6 +11,7 @@
 # under the License.
 
 import datetime
+from unittest import mock
 import uuid
 
 import freezegun
@@ -71,6 +72,125 @@ class UserPasswordHashingTestsNoCompat(test_backend_sql.SqlTests):
             password_hashing._get_hasher_from_ident(user_ref.password))
 
 
+class UserPasswordRehashTests(test_backend_sql.SqlTests):
+    def setUp(self):
+        super(UserPasswordRehashTests, self).setUp()
+        self.password = uuid.uuid4().hex
+        user_dict = {
+            'name': uuid.uuid4().hex,
+            'domain_id': CONF.identity.default_domain_id,
+            'enabled': True,
+            'password': self.password
+        }
+        self.user = PROVIDERS.identity_api.create_user(user_dict)
+
+    def _get_password_refs(self):
+        with sql.session_for_read() as session:
+            user_ref = PROVIDERS.identity_api._get_user(
+                session, self.user['id'])
+            return [(ref.password_hash, ref.created_at, ref.expires_at)
+                    for ref in user_ref.local_user.passwords]
+
+    def _authenticate(self, password=None):
+        with self.make_request():
+            PROVIDERS.identity_api.authenticate(
+                user_id=self.user['id'], password=password or self.password)
+
+    def test_password_rehashed_with_new_algorithm(self):
+        [(hashed, created_at, expires_at)] = self._get_password_refs()
+        self.config_fixture.config(group='identity',
+                                   password_hash_algorithm='pbkdf2_sha512',
+                                   password_hash_rounds=1000)
+        self._authenticate()
+
+        [(new_hashed, new_created_at,
+          new_expires_at)] = self._get_password_refs()
+        self.assertEqual(passlib.hash.pbkdf2_sha512,
+                         password_hashing._get_hasher_from_ident(new_hashed))
+        self.assertEqual(created_at, new_created_at)
+        self.assertEqual(expires_at, new_expires_at)
+        self.assertFalse(password_hashing.needs_rehash(new_hashed))
+        # The password still authenticates the user with the new hash.
+        self._authenticate()
+        self.assertEqual([(new_hashed, created_at, expires_at)],
+                         self._get_password_refs())
+
+    def test_password_rehashed_with_new_rounds(self):
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        self._authenticate()
+
+        [(hashed, _, _)] = self._get_password_refs()
+        self.assertEqual(('bcrypt', {'rounds': 5}),
+                         password_hashing.describe_hash(hashed))
+
+    def test_password_not_rehashed_with_current_options(self):
+        refs = self._get_password_refs()
+        self._authenticate()
+        self.assertEqual(refs, self._get_password_refs())
+
+    def test_password_not_rehashed_when_disabled(self):
+        refs = self._get_password_refs()
+        self.config_fixture.config(group='identity', password_hash_rounds=5,
+                                   rehash_passwords_on_authentication=False)
+        self._authenticate()
+        self.assertEqual(refs, self._get_password_refs())
+
+    def test_password_not_rehashed_on_failed_authentication(self):
+        refs = self._get_password_refs()
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        self.assertRaises(AssertionError, self._authenticate,
+                          password=uuid.uuid4().hex)
+        self.assertEqual(refs, self._get_password_refs())
+
+    def test_password_rehashed_in_worker_process(self):
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        with mock.patch.object(password_hashing, 'hash_password',
+                               wraps=password_hashing.hash_password) as m:
+            self._authenticate()
+        m.assert_called_once_with(self.password, offload=True)
+
+    def test_password_rehash_deferred_when_workers_busy(self):
+        refs = self._get_password_refs()
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        with mock.patch.object(
+                password_hashing, 'hash_password',
+                side_effect=exception.PasswordVerificationUnavailable(
+                    retry_after=1)):
+            self._authenticate()
+        self.assertEqual(refs, self._get_password_refs())
+
+        # The hash is remade on the next authentication.
+        self._authenticate()
+        [(hashed, _, _)] = self._get_password_refs()
+        self.assertEqual(('bcrypt', {'rounds': 5}),
+                         password_hashing.describe_hash(hashed))
+
+    def test_count_password_hashes(self):
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        self._authenticate()
+
+        counts = PROVIDERS.identity_api.driver.count_password_hashes()
+        rehashed = [entry for entry in counts
+                    if entry['params'] == {'rounds': 5}]
+        self.assertEqual(
+            [{'algorithm': 'bcrypt', 'params': {'rounds': 5},
+              'outdated': False, 'count': 1}], rehashed)
+        for entry in counts:
+            if entry['params'] != {'rounds': 5}:
+                self.assertTrue(entry['outdated'])
+
+    def test_count_password_hashes_with_unknown_algorithm(self):
+        with sql.session_for_write() as session:
+            user_ref = PROVIDERS.identity_api._get_user(
+                session, self.user['id'])
+            user_ref.password_ref.password_hash = (
+                '$unknown$' + uuid.uuid4().hex)
+
+        counts = PROVIDERS.identity_api.driver.count_password_hashes()
+        self.assertIn({'algorithm': 'unknown', 'params': {},
+                       'outdated': False, 'count': 1}, counts)
+
+
 class UserResourceOptionTests(test_backend_sql.SqlTests):
     def setUp(self):
         super(UserResourceOptionTests, self).setUp()
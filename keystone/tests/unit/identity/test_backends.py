@@ -424,6 +424,17 @@ class IdentityTests(object):
             self.assertNotIn('password', user_ref)
         self.assertEqual(expected_user_ids, user_ids)
 
+    def test_list_users_from_ids(self):
+        user_ids = [self.user_foo['id'], self.user_two['id']]
+        users = PROVIDERS.identity_api.list_users_from_ids(
+            user_ids + [uuid.uuid4().hex])
+        self.assertEqual(set(user_ids), set(user['id'] for user in users))
+        for user_ref in users:
+            self.assertNotIn('password', user_ref)
+            self.assertEqual(
+                PROVIDERS.identity_api.get_user(user_ref['id'])['name'],
+                user_ref['name'])
+
     def _build_hints(self, hints, filters, fed_dict):
         for key in filters:
             hints.add_filter(key,
@@ -576,6 +587,18 @@ class IdentityTests(object):
         self.assertIn(group1['id'], group_ids)
         self.assertIn(group2['id'], group_ids)
 
+    def test_list_groups_from_ids(self):
+        group1 = unit.new_group_ref(domain_id=CONF.identity.default_domain_id)
+        group2 = unit.new_group_ref(domain_id=CONF.identity.default_domain_id)
+        group1 = PROVIDERS.identity_api.create_group(group1)
+        group2 = PROVIDERS.identity_api.create_group(group2)
+        groups = PROVIDERS.identity_api.list_groups_from_ids(
+            [group1['id'], group2['id'], uuid.uuid4().hex])
+        self.assertEqual(set([group1['id'], group2['id']]),
+                         set(group['id'] for group in groups))
+        self.assertEqual(set([group1['name'], group2['name']]),
+                         set(group['name'] for group in groups))
+
     def test_create_user_doesnt_modify_passed_in_dict(self):
         new_user = unit.new_user_ref(domain_id=CONF.identity.default_domain_id)
         original_user = new_user.copy()
@@ -759,3 +759,27 @@ class LimitTests(object):
         PROVIDERS.resource_api.delete_project(self.project_bar['id'])
         ref = PROVIDERS.unified_limit_api.list_limits()
         self.assertEqual([], ref)
+
+    def test_delete_limits_for_projects(self):
+        limit_1 = unit.new_limit_ref(
+            project_id=self.project_bar['id'],
+            service_id=self.service_one['id'],
+            region_id=self.region_one['id'],
+            resource_name='volume', resource_limit=10, id=uuid.uuid4().hex)
+        limit_2 = unit.new_limit_ref(
+            project_id=self.project_baz['id'],
+            service_id=self.service_one['id'],
+            region_id=self.region_one['id'],
+            resource_name='volume', resource_limit=5, id=uuid.uuid4().hex)
+        PROVIDERS.unified_limit_api.create_limits([limit_1, limit_2])
+        # Read the limits, so that they are cached.
+        PROVIDERS.unified_limit_api.get_limit(limit_1['id'])
+        PROVIDERS.unified_limit_api.get_limit(limit_2['id'])
+
+        PROVIDERS.unified_limit_api.delete_limits_for_projects(
+            [self.project_bar['id'], self.project_baz['id']])
+        self.assertEqual([], PROVIDERS.unified_limit_api.list_limits())
+        for limit in (limit_1, limit_2):
+            self.assertRaises(exception.LimitNotFound,
+                              PROVIDERS.unified_limit_api.get_limit,
+                              limit['id'])
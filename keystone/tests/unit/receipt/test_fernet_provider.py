@@ -17,6 +17,7 @@ import os
 from unittest import mock
 import uuid
 
+import freezegun
 from oslo_utils import timeutils
 
 from keystone.common import fernet_utils
@@ -135,6 +136,35 @@ class TestReceiptFormatter(unit.TestCase):
             )
             self.assertEqual(encoded_string, encoded_str_with_padding_restored)
 
+    def test_validate_receipt_rejects_old_receipt_before_decrypting(self):
+        receipt_formatter = receipt_formatters.ReceiptFormatter()
+        receipt = receipt_formatter.create_receipt(
+            uuid.uuid4().hex, ['password'],
+            utils.isotime(timeutils.utcnow(), subsecond=True))
+
+        with mock.patch.object(receipt_formatter, 'unpack') as unpack:
+            with freezegun.freeze_time(
+                    timeutils.utcnow() + datetime.timedelta(
+                        seconds=receipt_formatters.MAX_RECEIPT_LIFETIME + 1)):
+                self.assertRaises(exception.ValidationError,
+                                  receipt_formatter.validate_receipt, receipt)
+        unpack.assert_not_called()
+
+    def test_validate_receipt_after_lowering_expiration(self):
+        receipt_formatter = receipt_formatters.ReceiptFormatter()
+        expires_at = timeutils.utcnow() + datetime.timedelta(minutes=5)
+        receipt = receipt_formatter.create_receipt(
+            uuid.uuid4().hex, ['password'],
+            utils.isotime(expires_at, subsecond=True))
+
+        # The receipt is still within the lifetime it was issued with.
+        self.config_fixture.config(group='receipt', expiration=60)
+        with freezegun.freeze_time(
+                timeutils.utcnow() + datetime.timedelta(minutes=2)):
+            validated = receipt_formatter.validate_receipt(receipt)
+        self.assertEqual(utils.isotime(expires_at, subsecond=True),
+                         validated[-1])
+
 
 class TestPayloads(unit.TestCase):
 
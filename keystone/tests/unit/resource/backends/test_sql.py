@@ -10,7 +10,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from keystone.resource.backends import sql
+from unittest import mock
+import uuid
+
+from keystone.common import sql
+from keystone.resource.backends import sql as sql_driver
 from keystone.tests import unit
 from keystone.tests.unit import default_fixtures
 from keystone.tests.unit.ksfixtures import database
@@ -22,9 +26,129 @@ class TestSqlResourceDriver(unit.BaseTestCase,
     def setUp(self):
         super(TestSqlResourceDriver, self).setUp()
         self.useFixture(database.Database())
-        self.driver = sql.Resource()
+        self.driver = sql_driver.Resource()
         root_domain = default_fixtures.ROOT_DOMAIN
         root_domain['domain_id'] = root_domain['id']
         root_domain['is_domain'] = True
         self.driver.create_project(root_domain['id'],
                                    root_domain)
+
+    def _create_project(self, parent_id=None):
+        project_id = uuid.uuid4().hex
+        project = {
+            'name': uuid.uuid4().hex,
+            'id': project_id,
+            'domain_id': default_fixtures.ROOT_DOMAIN['id'],
+            'parent_id': parent_id,
+            'is_domain': False,
+        }
+        return self.driver.create_project(project_id, project)
+
+    def _create_project_tree(self):
+        # A root project with two children, each of which has two children
+        # of its own.
+        root = self._create_project()
+        children = [self._create_project(root['id']) for x in range(2)]
+        grandchildren = [self._create_project(child['id'])
+                         for child in children for x in range(2)]
+        return root, children, grandchildren
+
+    def _read_without_index(self, method, project_id, recursive=True):
+        with mock.patch.object(sql_driver.Resource, '_is_indexed',
+                               return_value=False):
+            with mock.patch.object(sql_driver, '_supports_recursive_queries',
+                                   return_value=recursive):
+                return method(project_id)
+
+    def test_list_projects_in_subtree_with_and_without_index(self):
+        root, children, grandchildren = self._create_project_tree()
+
+        subtree = self.driver.list_projects_in_subtree(root['id'])
+        for recursive in (True, False):
+            unindexed_subtree = self._read_without_index(
+                self.driver.list_projects_in_subtree, root['id'],
+                recursive=recursive)
+            self.assertEqual(sorted(unindexed_subtree, key=lambda x: x['id']),
+                             sorted(subtree, key=lambda x: x['id']))
+        # All of them return the projects one level at a time.
+        self.assertEqual(set(x['id'] for x in children),
+                         set(x['id'] for x in subtree[:2]))
+        self.assertEqual(set(x['id'] for x in grandchildren),
+                         set(x['id'] for x in subtree[2:]))
+
+    def test_list_project_parents_with_and_without_index(self):
+        root, children, grandchildren = self._create_project_tree()
+
+        parents = self.driver.list_project_parents(grandchildren[0]['id'])
+        for recursive in (True, False):
+            self.assertEqual(parents, self._read_without_index(
+                self.driver.list_project_parents, grandchildren[0]['id'],
+                recursive=recursive))
+        self.assertEqual([children[0]['id'], root['id']],
+                         [x['id'] for x in parents])
+
+    def test_list_projects_in_subtree_includes_unindexed_projects(self):
+        root, children, grandchildren = self._create_project_tree()
+        # Remove a project from the index, as if it had been created by a
+        # server that does not maintain it.
+        with sql.session_for_write() as session:
+            self.driver._remove_from_index(session, [grandchildren[0]['id']])
+
+        subtree = self.driver.list_projects_in_subtree(root['id'])
+        self.assertIn(grandchildren[0]['id'], [x['id'] for x in subtree])
+        self.assertEqual(
+            [children[0]['id'], root['id']],
+            [x['id'] for x in self.driver.list_project_parents(
+                grandchildren[0]['id'])])
+
+    def test_update_project_moves_subtree_in_index(self):
+        root, children, grandchildren = self._create_project_tree()
+        children[0]['parent_id'] = children[1]['id']
+        self.driver.update_project(children[0]['id'], children[0])
+
+        parents = self.driver.list_project_parents(grandchildren[0]['id'])
+        self.assertEqual(
+            [children[0]['id'], children[1]['id'], root['id']],
+            [x['id'] for x in parents])
+        self.assertEqual(parents, self._read_without_index(
+            self.driver.list_project_parents, grandchildren[0]['id']))
+        subtree = self.driver.list_projects_in_subtree(children[1]['id'])
+        self.assertEqual(
+            sorted(x['id'] for x in children[:1] + grandchildren),
+            sorted(x['id'] for x in subtree))
+
+    def test_delete_projects_removes_them_from_index(self):
+        root, children, grandchildren = self._create_project_tree()
+        self.driver.delete_projects_from_ids(
+            [x['id'] for x in [children[0]] + grandchildren[:2]])
+
+        with sql.session_for_read() as session:
+            for project in [children[0]] + grandchildren[:2]:
+                self.assertFalse(
+                    self.driver._is_indexed(session, project['id']))
+        self.assertEqual(
+            [children[1]['id']] + [x['id'] for x in grandchildren[2:]],
+            [x['id'] for x in self.driver.list_projects_in_subtree(
+                root['id'])])
+
+    def test_check_project_depth_with_and_without_index(self):
+        root, children, grandchildren = self._create_project_tree()
+
+        self.assertEqual(
+            sorted(x['id'] for x in grandchildren),
+            sorted(self.driver.check_project_depth(2)))
+        self.assertEqual([], self.driver.check_project_depth(3))
+        with sql.session_for_write() as session:
+            self.driver._remove_from_index(session, [grandchildren[0]['id']])
+        self.assertEqual(
+            sorted(x['id'] for x in grandchildren),
+            sorted(self.driver.check_project_depth(2)))
+
+    def test_recursive_queries_stop_at_circular_reference(self):
+        root, children, grandchildren = self._create_project_tree()
+        root['parent_id'] = grandchildren[0]['id']
+        self.driver.update_project(root['id'], root)
+
+        self.assertIsNone(self.driver.list_projects_in_subtree(root['id']))
+        self.assertIsNone(
+            self.driver.list_project_parents(grandchildren[0]['id']))
@@ -18,8 +18,10 @@ from oslo_config import cfg
 from testtools import matchers
 
 from keystone.common import provider_api
+from keystone.common.resource_options import options as ro_opt
 import keystone.conf
 from keystone import exception
+from keystone.resource import core as resource_core
 from keystone.tests import unit
 from keystone.tests.unit import default_fixtures
 from keystone.tests.unit.ksfixtures import database
@@ -63,6 +65,254 @@ class TestResourceManagerNoFixtures(unit.SQLDriverOverrides, unit.TestCase):
                                           'id': project['id']})
 
 
+class ProjectHierarchyTestCase(unit.SQLDriverOverrides, unit.TestCase):
+    """Set up a project with children, each of which has a child."""
+
+    CHILDREN = 2
+
+    def setUp(self):
+        super(ProjectHierarchyTestCase, self).setUp()
+        self.useFixture(database.Database())
+        self.load_backends()
+        PROVIDERS.resource_api.create_domain(
+            default_fixtures.ROOT_DOMAIN['id'], default_fixtures.ROOT_DOMAIN)
+        self.domain = unit.new_domain_ref()
+        PROVIDERS.resource_api.create_domain(self.domain['id'], self.domain)
+        self.root = self._create_project(self.domain['id'])
+        self.children = [self._create_project(self.root['id'])
+                         for x in range(self.CHILDREN)]
+        self.grandchildren = [self._create_project(child['id'])
+                              for child in self.children]
+
+    def _create_project(self, parent_id):
+        project = unit.new_project_ref(domain_id=self.domain['id'],
+                                       parent_id=parent_id)
+        return PROVIDERS.resource_api.create_project(project['id'], project)
+
+
+class ProjectTreeTests(ProjectHierarchyTestCase):
+
+    def test_hierarchy_is_read_from_project_tree(self):
+        resource_api = PROVIDERS.resource_api
+        # Load the tree of the domain.
+        resource_api.list_project_ids_in_subtree(self.root['id'])
+
+        with mock.patch.object(
+                resource_api.driver,
+                'list_project_hierarchy_in_domain') as mock_list:
+            self.assertEqual(
+                [self.children[0]['id'], self.root['id'], self.domain['id']],
+                resource_api.list_project_parent_ids(
+                    self.grandchildren[0]['id']))
+            self.assertEqual(
+                [self.children[0]['id'], self.root['id'], self.domain['id']],
+                [x['id'] for x in resource_api.list_project_parents(
+                    self.grandchildren[0]['id'])])
+            self.assertEqual(
+                {self.children[0]['id']: {self.grandchildren[0]['id']: None},
+                 self.children[1]['id']: {self.grandchildren[1]['id']: None}},
+                resource_api.get_projects_in_subtree_as_ids(self.root['id']))
+            self.assertEqual(
+                {self.root['id']: {self.domain['id']: None}},
+                resource_api.get_project_parents_as_ids(self.children[1]))
+            mock_list.assert_not_called()
+
+    def test_project_tree_follows_changes(self):
+        resource_api = PROVIDERS.resource_api
+        subtree_ids = resource_api.list_project_ids_in_subtree(
+            self.root['id'])
+        self.assertEqual(sorted(x['id'] for x in self.children),
+                         sorted(subtree_ids[:2]))
+        self.assertEqual(sorted(x['id'] for x in self.grandchildren),
+                         sorted(subtree_ids[2:]))
+
+        project = self._create_project(self.children[1]['id'])
+        self.assertIn(
+            project['id'],
+            resource_api.list_project_ids_in_subtree(self.root['id']))
+
+        project['enabled'] = False
+        resource_api.update_project(project['id'], project)
+        self.assertTrue(resource_api._check_whole_subtree_is_disabled(
+            self.grandchildren[1]['id']))
+        self.assertFalse(resource_api._check_whole_subtree_is_disabled(
+            self.children[1]['id']))
+
+        resource_api.delete_project(project['id'])
+        self.assertNotIn(
+            project['id'],
+            resource_api.list_project_ids_in_subtree(self.root['id']))
+
+    def test_project_tree_kept_when_hierarchy_unchanged(self):
+        resource_api = PROVIDERS.resource_api
+        resource_api.list_project_ids_in_subtree(self.root['id'])
+
+        self.children[0]['name'] = uuid.uuid4().hex
+        resource_api.update_project(self.children[0]['id'], self.children[0])
+        with mock.patch.object(
+                resource_api.driver,
+                'list_project_hierarchy_in_domain') as mock_list:
+            resource_api.list_project_ids_in_subtree(self.root['id'])
+        mock_list.assert_not_called()
+
+    def test_list_project_hierarchy_in_domain(self):
+        disabled = self.grandchildren[1]
+        disabled['enabled'] = False
+        PROVIDERS.resource_api.update_project(disabled['id'], disabled)
+        hierarchy = PROVIDERS.resource_api.driver.\
+            list_project_hierarchy_in_domain(self.domain['id'])
+        self.assertEqual(
+            {'id': self.domain['id'], 'parent_id': None, 'enabled': True},
+            hierarchy[0])
+        expected = [{'id': project['id'], 'parent_id': project['parent_id'],
+                     'enabled': project['id'] != disabled['id']}
+                    for project in [self.root] + self.children +
+                    self.grandchildren]
+        self.assertEqual(sorted(expected, key=lambda x: x['id']),
+                         sorted(hierarchy[1:], key=lambda x: x['id']))
+
+    def test_project_tree_is_reloaded_when_generation_changes(self):
+        resource_api = PROVIDERS.resource_api
+        resource_api.list_project_ids_in_subtree(self.root['id'])
+        # Create a project behind the manager's back, as another process
+        # would.
+        project = unit.new_project_ref(domain_id=self.domain['id'],
+                                       parent_id=self.root['id'])
+        resource_api.driver.create_project(project['id'], project)
+        self.assertNotIn(
+            project['id'],
+            resource_api.list_project_ids_in_subtree(self.root['id']))
+
+        resource_api._get_project_tree_generation.invalidate(
+            resource_api, self.domain['id'])
+        self.assertIn(
+            project['id'],
+            resource_api.list_project_ids_in_subtree(self.root['id']))
+
+    def test_project_tree_rejects_circular_references(self):
+        domain = {'id': uuid.uuid4().hex}
+        projects = [{'id': uuid.uuid4().hex} for x in range(2)]
+        projects[0]['parent_id'] = projects[1]['id']
+        projects[1]['parent_id'] = projects[0]['id']
+        self.assertRaises(ValueError, resource_core._ProjectTree,
+                          domain, projects)
+
+    def test_project_tree_not_used_without_caching(self):
+        self.config_fixture.config(group='resource', caching=False)
+        resource_api = PROVIDERS.resource_api
+
+        self.assertEqual(
+            [self.children[0]['id'], self.root['id'], self.domain['id']],
+            resource_api.list_project_parent_ids(self.grandchildren[0]['id']))
+        self.assertEqual({}, resource_api._project_trees)
+
+
+class ProjectDeletionTests(ProjectHierarchyTestCase):
+
+    CHILDREN = 3
+
+    def setUp(self):
+        super(ProjectDeletionTests, self).setUp()
+        self.user = unit.new_user_ref(domain_id=self.domain['id'])
+        self.user = PROVIDERS.identity_api.create_user(self.user)
+        self.role = unit.new_role_ref()
+        PROVIDERS.role_api.create_role(self.role['id'], self.role)
+        for project in [self.root] + self.grandchildren:
+            PROVIDERS.assignment_api.create_grant(
+                self.role['id'], user_id=self.user['id'],
+                project_id=project['id'])
+
+    def _assert_deleted_level_by_level(self, mock_delete):
+        batches = [call[0][0] for call in mock_delete.call_args_list]
+        # Each level is deleted in batches of at most two projects.
+        self.assertEqual([2, 1, 2, 1, 1], [len(x) for x in batches])
+        deleted_ids = [x for batch in batches for x in batch]
+        self.assertEqual(set(x['id'] for x in self.grandchildren),
+                         set(deleted_ids[:3]))
+        self.assertEqual(set(x['id'] for x in self.children),
+                         set(deleted_ids[3:6]))
+        self.assertEqual([self.root['id']], deleted_ids[6:])
+
+    def test_delete_subtree_in_batches(self):
+        self.config_fixture.config(group='resource', delete_batch_size=2)
+        resource_api = PROVIDERS.resource_api
+        self.root['enabled'] = False
+        resource_api.update_project(self.root['id'], self.root, cascade=True)
+        progress = mock.Mock()
+
+        with mock.patch.object(
+                resource_api.driver, 'delete_projects_from_ids',
+                wraps=resource_api.driver.delete_projects_from_ids) as (
+                mock_delete):
+            resource_api.delete_project(self.root['id'], cascade=True,
+                                        progress=progress)
+
+        self._assert_deleted_level_by_level(mock_delete)
+        self.assertEqual([mock.call(2, 7), mock.call(3, 7),
+                          mock.call(5, 7), mock.call(6, 7),
+                          mock.call(7, 7)], progress.call_args_list)
+        for project in [self.root] + self.children + self.grandchildren:
+            self.assertRaises(exception.ProjectNotFound,
+                              resource_api.get_project, project['id'])
+        self.assertEqual(
+            [], PROVIDERS.assignment_api.list_role_assignments(
+                user_id=self.user['id']))
+
+    def test_delete_domain_in_batches(self):
+        self.config_fixture.config(group='resource', delete_batch_size=2)
+        resource_api = PROVIDERS.resource_api
+        resource_api.update_domain(self.domain['id'], {'enabled': False})
+
+        with mock.patch.object(
+                resource_api.driver, 'delete_projects_from_ids',
+                wraps=resource_api.driver.delete_projects_from_ids) as (
+                mock_delete), mock.patch.object(
+                PROVIDERS.assignment_api.driver,
+                'delete_assignments_for_projects',
+                wraps=PROVIDERS.assignment_api.driver.
+                delete_assignments_for_projects) as mock_assignments:
+            resource_api.delete_domain(self.domain['id'])
+
+        self._assert_deleted_level_by_level(mock_delete)
+        # The assignments of each batch of projects, and then those of the
+        # domain, are deleted with a single call.
+        self.assertEqual(6, mock_assignments.call_count)
+        self.assertRaises(exception.DomainNotFound,
+                          resource_api.get_domain, self.domain['id'])
+        self.assertEqual(
+            [], PROVIDERS.assignment_api.list_role_assignments(
+                user_id=self.user['id']))
+
+    def test_immutable_project_prevents_deleting_subtree(self):
+        resource_api = PROVIDERS.resource_api
+        self.root['enabled'] = False
+        resource_api.update_project(self.root['id'], self.root, cascade=True)
+        resource_api.update_project(
+            self.grandchildren[2]['id'],
+            {'enabled': False,
+             'options': {ro_opt.IMMUTABLE_OPT.option_name: True}})
+
+        self.assertRaises(exception.ResourceDeleteForbidden,
+                          resource_api.delete_project,
+                          self.root['id'], cascade=True)
+        # Nothing was deleted.
+        self.assertEqual(
+            6, len(resource_api.list_projects_in_subtree(self.root['id'])))
+
+    def test_group_projects_by_level_skips_circular_references(self):
+        projects = [{'id': uuid.uuid4().hex} for x in range(4)]
+        projects[0]['parent_id'] = self.domain['id']
+        projects[1]['parent_id'] = projects[0]['id']
+        # projects[2] and projects[3] are each other's parent.
+        projects[2]['parent_id'] = projects[3]['id']
+        projects[3]['parent_id'] = projects[2]['id']
+
+        self.assertEqual(
+            [[projects[0]], [projects[1]]],
+            PROVIDERS.resource_api._group_projects_by_level(
+                list(reversed(projects))))
+
+
 class DomainConfigDriverTests(object):
 
     def _domain_config_crud(self, sensitive):
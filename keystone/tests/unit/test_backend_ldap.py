@@ -38,6 +38,7 @@ from keystone.identity.mapping_backends import mapping as map
 from keystone.tests import unit
 from keystone.tests.unit.assignment import test_backends as assignment_tests
 from keystone.tests.unit import default_fixtures
+from keystone.tests.unit import fakeldap
 from keystone.tests.unit.identity import test_backends as identity_tests
 from keystone.tests.unit import identity_mapping as mapping_sql
 from keystone.tests.unit.ksfixtures import database
@@ -1143,6 +1144,98 @@ class LDAPIdentity(BaseLDAPIdentity):
                           password='demo',
                           end_user_auth=True)
 
+    def test_list_users_in_group_searches_in_batches(self):
+        self.config_fixture.config(group='ldap', lookup_batch_size=2)
+        self.load_backends()
+        domain_id = CONF.identity.default_domain_id
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=domain_id))
+        user_ids = []
+        for _ in range(5):
+            user = PROVIDERS.identity_api.create_user(
+                self.new_user_ref(domain_id=domain_id))
+            PROVIDERS.identity_api.add_user_to_group(user['id'], group['id'])
+            user_ids.append(user['id'])
+
+        with mock.patch.object(fakeldap.FakeLdap, 'search_s', autospec=True,
+                               side_effect=fakeldap.FakeLdap.search_s
+                               ) as search_s:
+            users = PROVIDERS.identity_api.list_users_in_group(group['id'])
+        self.assertEqual(sorted(user_ids), sorted(x['id'] for x in users))
+
+        # The five members are looked up with one search for each batch of
+        # two, rather than one search each.
+        user_tree_dn = PROVIDERS.identity_api.driver.user.tree_dn
+        user_searches = [call for call in search_s.call_args_list
+                         if call[0][1] == user_tree_dn]
+        self.assertEqual(3, len(user_searches))
+
+    def test_list_users_in_group_ignores_missing_members(self):
+        domain_id = CONF.identity.default_domain_id
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=domain_id))
+        user = PROVIDERS.identity_api.create_user(
+            self.new_user_ref(domain_id=domain_id))
+        PROVIDERS.identity_api.add_user_to_group(user['id'], group['id'])
+
+        # Add a member that is not in the directory.
+        group_api = PROVIDERS.identity_api.driver.group
+        missing_user_dn = PROVIDERS.identity_api.driver.user._id_to_dn_string(
+            uuid.uuid4().hex)
+        group_api.add_user(missing_user_dn, group['id'], uuid.uuid4().hex)
+
+        users = PROVIDERS.identity_api.list_users_in_group(group['id'])
+        self.assertEqual([user['id']], [x['id'] for x in users])
+
+    def test_entity_cache_serves_repeat_lookups(self):
+        self.config_fixture.config(group='ldap', entity_cache_size=100)
+        self.load_backends()
+        domain_id = CONF.identity.default_domain_id
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=domain_id))
+        user = PROVIDERS.identity_api.create_user(
+            self.new_user_ref(domain_id=domain_id))
+        PROVIDERS.identity_api.add_user_to_group(user['id'], group['id'])
+
+        driver = PROVIDERS.identity_api.driver
+        driver.check_user_in_group(user['id'], group['id'])
+        user_misses = driver.user.entity_cache.misses
+        group_misses = driver.group.entity_cache.misses
+        with mock.patch.object(fakeldap.FakeLdap, 'search_s', autospec=True,
+                               side_effect=fakeldap.FakeLdap.search_s
+                               ) as search_s:
+            driver.get_user(user['id'])
+            driver.check_user_in_group(user['id'], group['id'])
+        # The user and the members of the group were read from the cache,
+        # only whether the user is enabled is looked up every time.
+        user_tree_dn = driver.user.tree_dn
+        group_tree_dn = driver.group.tree_dn
+        self.assertEqual([], [call for call in search_s.call_args_list
+                              if call[0][1] in (user_tree_dn, group_tree_dn)])
+        self.assertEqual(user_misses, driver.user.entity_cache.misses)
+        self.assertEqual(group_misses, driver.group.entity_cache.misses)
+        self.assertGreater(driver.user.entity_cache.hits, 0)
+        self.assertGreater(driver.group.entity_cache.hits, 0)
+
+    def test_entity_cache_cleared_on_write(self):
+        self.config_fixture.config(group='ldap', entity_cache_size=100)
+        self.load_backends()
+        domain_id = CONF.identity.default_domain_id
+        group = PROVIDERS.identity_api.create_group(
+            unit.new_group_ref(domain_id=domain_id))
+        user = PROVIDERS.identity_api.create_user(
+            self.new_user_ref(domain_id=domain_id))
+
+        driver = PROVIDERS.identity_api.driver
+        self.assertEqual([], driver.group.list_group_users(group['id']))
+        driver.add_user_to_group(user['id'], group['id'])
+        self.assertEqual(1, len(driver.group.list_group_users(group['id'])))
+
+        user['description'] = uuid.uuid4().hex
+        driver.update_user(user['id'], user)
+        self.assertEqual(user['description'],
+                         driver.get_user(user['id'])['description'])
+
     def test_configurable_allowed_project_actions(self):
         domain = self._get_domain_fixture()
         project = unit.new_project_ref(domain_id=domain['id'])
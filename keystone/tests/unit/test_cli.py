@@ -43,11 +43,14 @@ from keystone.cmd.doctor import tokens
 from keystone.cmd.doctor import tokens_fernet
 from keystone.cmd import status
 from keystone.common import provider_api
+from keystone.common import sql
 from keystone.common.sql import upgrades
 import keystone.conf
 from keystone import exception
 from keystone.i18n import _
+from keystone.identity.backends import sql_model as identity_sql_model
 from keystone.identity.mapping_backends import mapping as identity_mapping
+from keystone.models import revoke_model
 from keystone.tests import unit
 from keystone.tests.unit import default_fixtures
 from keystone.tests.unit.ksfixtures import database
@@ -1790,6 +1793,224 @@ class TestTrustFlush(unit.SQLDriverOverrides, unit.BaseTestCase):
         self.assertRaises(ValueError, trust.main)
 
 
+class TestRevocationPrune(unit.SQLDriverOverrides, unit.BaseTestCase):
+
+    class FakeConfCommand(object):
+        def __init__(self, parent):
+            self.extension = False
+            self.batch_size = parent.command_batch_size
+            self.time_budget = parent.command_time_budget
+
+    def setUp(self):
+        super(TestRevocationPrune, self).setUp()
+        self.useFixture(database.Database())
+        self.config_fixture = self.useFixture(oslo_config.fixture.Config(CONF))
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        parser_test = argparse.ArgumentParser()
+        subparsers = parser_test.add_subparsers()
+        self.parser = cli.RevocationPrune.add_argument_parser(subparsers)
+        self.command_batch_size = 2
+        self.command_time_budget = None
+
+        # Clear backend dependencies, since cli loads these manually
+        provider_api.ProviderAPIs._clear_registry_instances()
+        self.revoke_manager = keystone.revoke.core.Manager()
+
+        def fake_load_backends():
+            return dict(revoke_api=self.revoke_manager)
+
+        self.useFixture(fixtures.MockPatch(
+            'keystone.server.backends.load_backends',
+            side_effect=fake_load_backends))
+
+    def config_files(self):
+        config_files = super(TestRevocationPrune, self).config_files()
+        config_files.append(unit.dirs.tests_conf('backend_sql.conf'))
+        return config_files
+
+    def _revoke(self, revoked_at=None):
+        self.revoke_manager.driver.revoke(revoke_model.RevokeEvent(
+            user_id=uuid.uuid4().hex, revoked_at=revoked_at))
+
+    def test_revocation_prune(self):
+        # Only the first revocation prunes expired events inline.
+        self.config_fixture.config(group='revoke', prune_interval=3600)
+        self._revoke()
+        expired = datetime.datetime.utcnow() - datetime.timedelta(days=2)
+        for i in range(5):
+            self._revoke(revoked_at=expired)
+        self.assertEqual(6, len(self.revoke_manager.driver.list_events()))
+
+        self.useFixture(fixtures.MockPatchObject(
+            CONF, 'command', self.FakeConfCommand(self)))
+        with mock.patch('sys.stdout') as mock_stdout:
+            cli.RevocationPrune.main()
+
+        self.assertEqual(1, len(self.revoke_manager.driver.list_events()))
+        output = ''.join(call[0][0]
+                         for call in mock_stdout.write.call_args_list)
+        self.assertIn('Pruned 5 revocation events', output)
+
+    def test_revocation_prune_with_invalid_batch_size(self):
+        self.command_batch_size = 0
+        self.useFixture(fixtures.MockPatchObject(
+            CONF, 'command', self.FakeConfCommand(self)))
+        self.assertRaises(ValueError, cli.RevocationPrune.main)
+
+
+class TestPasswordHashReport(unit.SQLDriverOverrides, unit.TestCase):
+
+    def setUp(self):
+        super(TestPasswordHashReport, self).setUp()
+        self.useFixture(database.Database())
+        self.load_backends()
+        PROVIDERS.resource_api.create_domain(
+            default_fixtures.ROOT_DOMAIN['id'], default_fixtures.ROOT_DOMAIN)
+        self.domain = unit.new_domain_ref()
+        PROVIDERS.resource_api.create_domain(self.domain['id'], self.domain)
+
+    def config_files(self):
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        return super(TestPasswordHashReport, self).config_files()
+
+    def config(self, config_files):
+        CONF(args=['password_hash_report'], project='keystone',
+             default_config_files=config_files)
+
+    def _report(self):
+        with mock.patch('sys.stdout') as mock_stdout:
+            cli.PasswordHashReport.main()
+        return ''.join(call[0][0]
+                       for call in mock_stdout.write.call_args_list)
+
+    def _create_user(self):
+        user = unit.new_user_ref(domain_id=self.domain['id'])
+        PROVIDERS.identity_api.create_user(user)
+
+    def test_password_hash_report(self):
+        self._create_user()
+        self.config_fixture.config(group='identity', password_hash_rounds=5)
+        self._create_user()
+        self._create_user()
+        output = self._report()
+
+        self.assertRegex(output, r'bcrypt +rounds=4 +1 yes')
+        self.assertRegex(output, r'bcrypt +rounds=5 +2 no')
+        self.assertIn('1 of 3 passwords are hashed with other options', output)
+
+    def test_password_hash_report_with_unknown_algorithm(self):
+        self._create_user()
+        self._create_user()
+        with sql.session_for_write() as session:
+            password_ref = session.query(identity_sql_model.Password).first()
+            password_ref.password_hash = '$unknown$' + uuid.uuid4().hex
+        output = self._report()
+
+        self.assertRegex(output, r'bcrypt +rounds=4 +1 no')
+        self.assertRegex(output, r'unknown +1 no')
+        self.assertIn('1 passwords are hashed with an algorithm keystone '
+                      'does not support', output)
+
+    def test_password_hash_report_without_passwords(self):
+        self.assertIn('No passwords are stored.', self._report())
+
+
+class TestProjectPurge(unit.SQLDriverOverrides, unit.TestCase):
+
+    class FakeConfCommand(object):
+        def __init__(self, parent):
+            self.extension = False
+            self.project_id = parent.command_project_id
+            self.domain_id = parent.command_domain_id
+            self.batch_size = parent.command_batch_size
+
+    def setUp(self):
+        super(TestProjectPurge, self).setUp()
+        self.useFixture(database.Database())
+        self.load_backends()
+        parser_test = argparse.ArgumentParser()
+        subparsers = parser_test.add_subparsers()
+        self.parser = cli.ProjectPurge.add_argument_parser(subparsers)
+        self.command_project_id = None
+        self.command_domain_id = None
+        self.command_batch_size = 2
+
+        PROVIDERS.resource_api.create_domain(
+            default_fixtures.ROOT_DOMAIN['id'], default_fixtures.ROOT_DOMAIN)
+        self.domain = unit.new_domain_ref()
+        PROVIDERS.resource_api.create_domain(self.domain['id'], self.domain)
+        self.root = unit.new_project_ref(domain_id=self.domain['id'])
+        PROVIDERS.resource_api.create_project(self.root['id'], self.root)
+        for i in range(3):
+            project = unit.new_project_ref(domain_id=self.domain['id'],
+                                           parent_id=self.root['id'])
+            PROVIDERS.resource_api.create_project(project['id'], project)
+        self.root['enabled'] = False
+        PROVIDERS.resource_api.update_project(self.root['id'], self.root,
+                                              cascade=True)
+        PROVIDERS.resource_api.update_domain(self.domain['id'],
+                                             {'enabled': False})
+
+        def fake_load_backends():
+            return dict(resource_api=PROVIDERS.resource_api)
+
+        self.useFixture(fixtures.MockPatch(
+            'keystone.server.backends.load_backends',
+            side_effect=fake_load_backends))
+
+    def config_files(self):
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        return super(TestProjectPurge, self).config_files()
+
+    def config(self, config_files):
+        CONF(args=['project_purge'], project='keystone',
+             default_config_files=config_files)
+
+    def _purge(self):
+        self.useFixture(fixtures.MockPatchObject(
+            CONF, 'command', self.FakeConfCommand(self)))
+        with mock.patch('sys.stdout') as mock_stdout:
+            cli.ProjectPurge.main()
+        return ''.join(call[0][0]
+                       for call in mock_stdout.write.call_args_list)
+
+    def test_project_purge(self):
+        self.command_project_id = self.root['id']
+        output = self._purge()
+
+        self.assertRaises(exception.ProjectNotFound,
+                          PROVIDERS.resource_api.get_project,
+                          self.root['id'])
+        self.assertEqual(
+            [], PROVIDERS.resource_api.list_projects_in_domain(
+                self.domain['id']))
+        self.assertIn('Deleted 2 of 4 projects.', output)
+        self.assertIn('Deleted 3 of 4 projects.', output)
+        self.assertIn('Deleted 4 of 4 projects.', output)
+
+    def test_project_purge_domain(self):
+        self.command_domain_id = self.domain['id']
+        output = self._purge()
+
+        self.assertRaises(exception.DomainNotFound,
+                          PROVIDERS.resource_api.get_domain,
+                          self.domain['id'])
+        self.assertIn('Deleted 4 of 4 projects.', output)
+        self.assertIn('Deleted %s in' % self.domain['id'], output)
+
+    def test_project_purge_without_target(self):
+        self.useFixture(fixtures.MockPatchObject(
+            CONF, 'command', self.FakeConfCommand(self)))
+        self.assertRaises(ValueError, cli.ProjectPurge.main)
+
+    def test_project_purge_with_invalid_batch_size(self):
+        self.command_project_id = self.root['id']
+        self.command_batch_size = 0
+        self.useFixture(fixtures.MockPatchObject(
+            CONF, 'command', self.FakeConfCommand(self)))
+        self.assertRaises(ValueError, cli.ProjectPurge.main)
+
+
 class TestMappingEngineTester(unit.BaseTestCase):
 
     class FakeConfCommand(object):
@@ -451,6 +451,200 @@ class RevokeTests(object):
         PROVIDERS.identity_api.delete_group(group2['id'])
         self.assertEqual(2, len(revocation_backend.list_events()))
 
+    def test_revocations_from_other_processes_are_picked_up(self):
+        revocation_backend = sql.Revoke()
+        token_data = _sample_blank_token()
+        token_data['user_id'] = uuid.uuid4().hex
+
+        # Build the revocation index before the token is revoked.
+        self._assertTokenNotRevoked(token_data)
+
+        # Revoking through the backend directly mimics a revocation made by
+        # another keystone process, which doesn't update our index.
+        revocation_backend.revoke(
+            revoke_model.RevokeEvent(user_id=token_data['user_id']))
+        self._assertTokenRevoked(token_data)
+
+    def test_revocation_index_is_refreshed_incrementally(self):
+        token_data = _sample_blank_token()
+        token_data['user_id'] = uuid.uuid4().hex
+        PROVIDERS.revoke_api.revoke_by_user(user_id=uuid.uuid4().hex)
+        self._assertTokenNotRevoked(token_data)
+
+        with mock.patch.object(PROVIDERS.revoke_api.driver,
+                               'list_events_after',
+                               return_value=(None, [])) as mock_list_events:
+            self._assertTokenNotRevoked(token_data)
+        self.assertIsNotNone(mock_list_events.call_args[1]['event_id'])
+
+    def test_revocation_index_refresh_interval(self):
+        self.config_fixture.config(group='revoke', index_refresh_interval=600)
+        revocation_backend = sql.Revoke()
+        token_data = _sample_blank_token()
+        token_data['user_id'] = uuid.uuid4().hex
+        self._assertTokenNotRevoked(token_data)
+
+        # Revocations made by other processes aren't seen until the next
+        # refresh, but revocations made through this process are.
+        revocation_backend.revoke(
+            revoke_model.RevokeEvent(user_id=token_data['user_id']))
+        self._assertTokenNotRevoked(token_data)
+
+        token_data['user_id'] = uuid.uuid4().hex
+        PROVIDERS.revoke_api.revoke_by_user(user_id=token_data['user_id'])
+        self._assertTokenRevoked(token_data)
+
+    def test_local_revocation_does_not_skip_events_of_other_processes(self):
+        revocation_backend = sql.Revoke()
+        token_data = _sample_blank_token()
+        token_data['user_id'] = uuid.uuid4().hex
+        self._assertTokenNotRevoked(token_data)
+
+        # Another process revokes the token with an event dated well before
+        # the local revocation, beyond the overlap of incremental refreshes,
+        # and the index isn't refreshed in between.
+        revoked_at = timeutils.utcnow() - datetime.timedelta(minutes=1)
+        revocation_backend.revoke(revoke_model.RevokeEvent(
+            user_id=token_data['user_id'], revoked_at=revoked_at))
+        PROVIDERS.revoke_api.revoke_by_user(user_id=uuid.uuid4().hex)
+        self._assertTokenRevoked(token_data)
+
+    def test_refresh_does_not_skip_events_from_skewed_clocks(self):
+        revocation_backend = sql.Revoke()
+        token_data = _sample_blank_token()
+        token_data['user_id'] = uuid.uuid4().hex
+        revocation_backend.revoke(
+            revoke_model.RevokeEvent(user_id=uuid.uuid4().hex))
+        self._assertTokenNotRevoked(token_data)
+
+        # A node whose clock is behind records an event with a revocation
+        # time well before the events the index has already fetched.
+        revoked_at = timeutils.utcnow() - datetime.timedelta(minutes=10)
+        revocation_backend.revoke(revoke_model.RevokeEvent(
+            user_id=token_data['user_id'], revoked_at=revoked_at,
+            issued_before=timeutils.utcnow()))
+        self._assertTokenRevoked(token_data)
+
+    def test_failed_rebuild_stops_collecting_local_revocations(self):
+        # Make the next token check rebuild the index.
+        PROVIDERS.revoke_api._index = None
+        with mock.patch.object(PROVIDERS.revoke_api.driver,
+                               'list_events_after',
+                               side_effect=exception.UnexpectedError):
+            self.assertRaises(exception.UnexpectedError,
+                              PROVIDERS.revoke_api.check_token,
+                              _sample_blank_token())
+        self.assertIsNone(PROVIDERS.revoke_api._revoked_while_fetching)
+
+    def test_revocation_index_fetches_outside_index_lock(self):
+        token_data = _sample_blank_token()
+        self._assertTokenNotRevoked(token_data)
+
+        def list_events_after(event_id=None):
+            # Revoking through this process doesn't wait for the fetch.
+            self.assertFalse(PROVIDERS.revoke_api._index_lock.locked())
+            return event_id, []
+
+        with mock.patch.object(PROVIDERS.revoke_api.driver,
+                               'list_events_after',
+                               side_effect=list_events_after
+                               ) as mock_list_events:
+            self._assertTokenNotRevoked(token_data)
+        self.assertEqual(1, mock_list_events.call_count)
+
+    def test_pruning_is_throttled_by_prune_interval(self):
+        self.config_fixture.config(group='revoke', prune_interval=3600)
+        revocation_backend = sql.Revoke()
+        with mock.patch.object(revocation_backend,
+                               '_prune_expired_events') as mock_prune:
+            revocation_backend.revoke(
+                revoke_model.RevokeEvent(user_id=uuid.uuid4().hex))
+            revocation_backend.revoke(
+                revoke_model.RevokeEvent(user_id=uuid.uuid4().hex))
+        self.assertEqual(1, mock_prune.call_count)
+
+    def test_prune_expired_events_in_batches(self):
+        # Only the first revocation prunes expired events inline.
+        self.config_fixture.config(group='revoke', prune_interval=3600)
+        revocation_backend = sql.Revoke()
+        revocation_backend.revoke(
+            revoke_model.RevokeEvent(user_id=uuid.uuid4().hex))
+        expired = timeutils.utcnow() - datetime.timedelta(days=2)
+        for i in range(5):
+            revocation_backend.revoke(revoke_model.RevokeEvent(
+                user_id=uuid.uuid4().hex, revoked_at=expired))
+
+        self.assertEqual(
+            5, PROVIDERS.revoke_api.prune_expired_events(batch_size=2))
+        self.assertEqual(1, len(revocation_backend.list_events()))
+        self.assertEqual(
+            0, PROVIDERS.revoke_api.prune_expired_events(batch_size=2))
+
+
+class RevokeIndexTests(unit.BaseTestCase):
+
+    def _sample_token(self):
+        token_data = _sample_blank_token()
+        token_data.update(user_id=uuid.uuid4().hex,
+                          project_id=uuid.uuid4().hex,
+                          audit_id=uuid.uuid4().hex,
+                          identity_domain_id=uuid.uuid4().hex,
+                          assignment_domain_id=uuid.uuid4().hex,
+                          roles=[uuid.uuid4().hex])
+        token_data['audit_chain_id'] = token_data['audit_id']
+        return token_data
+
+    def test_events_match_the_same_tokens_as_matches(self):
+        token_data = self._sample_token()
+        other_token_data = self._sample_token()
+        for attribute in ('user_id', 'project_id', 'audit_id',
+                          'audit_chain_id'):
+            index = revoke_model.RevokeIndex(
+                [revoke_model.RevokeEvent(
+                    **{attribute: token_data[attribute]})])
+            self.assertTrue(index.is_revoked(token_data))
+            self.assertFalse(index.is_revoked(other_token_data))
+
+        index = revoke_model.RevokeIndex(
+            [revoke_model.RevokeEvent(domain_id=token_data[domain_key])
+             for domain_key in ('identity_domain_id',
+                                'assignment_domain_id')])
+        self.assertTrue(index.is_revoked(token_data))
+        self.assertFalse(index.is_revoked(other_token_data))
+
+        index = revoke_model.RevokeIndex(
+            [revoke_model.RevokeEvent(user_id=token_data['user_id'],
+                                      role_id=token_data['roles'][0])])
+        self.assertTrue(index.is_revoked(token_data))
+        token_data['roles'] = [uuid.uuid4().hex]
+        self.assertFalse(index.is_revoked(token_data))
+
+    def test_tokens_issued_after_the_event_are_not_revoked(self):
+        token_data = self._sample_token()
+        index = revoke_model.RevokeIndex(
+            [revoke_model.RevokeEvent(user_id=token_data['user_id'])])
+        token_data['issued_at'] = _future_time()
+        self.assertFalse(index.is_revoked(token_data))
+
+    def test_are_revoked_matches_is_revoked(self):
+        tokens_data = [self._sample_token() for _ in range(4)]
+        index = revoke_model.RevokeIndex([
+            revoke_model.RevokeEvent(user_id=tokens_data[0]['user_id']),
+            revoke_model.RevokeEvent(audit_id=tokens_data[2]['audit_id']),
+            revoke_model.RevokeEvent(
+                domain_id=tokens_data[3]['identity_domain_id'])])
+        self.assertEqual(
+            [index.is_revoked(token_data) for token_data in tokens_data],
+            index.are_revoked(tokens_data))
+        self.assertEqual([True, False, True, True],
+                         index.are_revoked(tokens_data))
+
+    def test_duplicate_events_are_ignored(self):
+        event = revoke_model.RevokeEvent(user_id=uuid.uuid4().hex)
+        index = revoke_model.RevokeIndex([event])
+        index.add_event(event)
+        self.assertEqual(1, len(index))
+
 
 class FernetSqlRevokeTests(test_backend_sql.SqlTests, RevokeTests):
     def config_overrides(self):
@@ -3499,6 +3499,54 @@ class FullMigration(SqlMigrateBase, unit.TestCase):
             ['id', 'domain_id', 'enabled', 'description',
              'authorization_ttl'])
 
+    def test_migration_079_add_project_ancestor_table(self):
+        self.expand(78)
+        self.migrate(78)
+        self.contract(78)
+
+        project_ancestor = 'project_ancestor'
+        self.assertTableDoesNotExist(project_ancestor)
+
+        project_table = sqlalchemy.Table('project', self.metadata,
+                                         autoload=True)
+        domain_id = uuid.uuid4().hex
+        project_id = uuid.uuid4().hex
+        for id_, parent_id in ((domain_id, None), (project_id, domain_id)):
+            project_table.insert().values(
+                id=id_, name=id_, domain_id=domain_id, enabled=True,
+                is_domain=parent_id is None, parent_id=parent_id,
+                extra='{}').execute()
+
+        self.expand(79)
+        self.migrate(79)
+        # A server still running the previous release creates a project
+        # without indexing it.
+        old_project_id = uuid.uuid4().hex
+        project_table.insert().values(
+            id=old_project_id, name=old_project_id, domain_id=domain_id,
+            enabled=True, is_domain=False, parent_id=project_id,
+            extra='{}').execute()
+        self.contract(79)
+
+        self.assertTableColumns(
+            project_ancestor, ['project_id', 'ancestor_id', 'depth'])
+        self.assertIn('ix_project_parent_id',
+                      [idx['name'] for idx in
+                       inspect(self.engine).get_indexes('project')])
+        self.assertTrue(self.does_index_exist(
+            project_ancestor, 'ix_project_ancestor_ancestor_id_depth'))
+        project_ancestor_table = sqlalchemy.Table(
+            project_ancestor, self.metadata, autoload=True)
+        rows = project_ancestor_table.select().execute().fetchall()
+        self.assertEqual(
+            sorted([(domain_id, domain_id, 0), (project_id, project_id, 0),
+                    (project_id, domain_id, 1),
+                    (old_project_id, old_project_id, 0),
+                    (old_project_id, project_id, 1),
+                    (old_project_id, domain_id, 2)]),
+            sorted((row.project_id, row.ancestor_id, row.depth)
+                   for row in rows))
+
 
 class MySQLOpportunisticFullMigration(FullMigration):
     FIXTURE = db_fixtures.MySQLOpportunisticFixture
@@ -13,16 +13,20 @@
 # under the License.
 
 import datetime
+from unittest import mock
 
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import urllib
 
 from keystone.common import provider_api
+from keystone.common import render_token
 from keystone.common import utils
 import keystone.conf
 from keystone import exception
 from keystone.models import token_model
 from keystone.tests import unit
+from keystone.tests.unit import default_fixtures
 from keystone.tests.unit import ksfixtures
 from keystone.tests.unit.ksfixtures import database
 from keystone import token
@@ -78,3 +82,80 @@ class TestTokenProvider(unit.TestCase):
             exception.TokenNotFound,
             PROVIDERS.token_provider_api.validate_token,
             None)
+
+
+class TestTokenResponseCache(unit.TestCase):
+    def setUp(self):
+        super(TestTokenResponseCache, self).setUp()
+        self.useFixture(database.Database())
+        self.useFixture(
+            ksfixtures.KeyRepository(
+                self.config_fixture,
+                'fernet_tokens',
+                CONF.fernet_tokens.max_active_keys
+            )
+        )
+        self.load_backends()
+        PROVIDERS.resource_api.create_domain(
+            default_fixtures.ROOT_DOMAIN['id'], default_fixtures.ROOT_DOMAIN)
+
+        domain = unit.new_domain_ref()
+        PROVIDERS.resource_api.create_domain(domain['id'], domain)
+        self.user = unit.create_user(PROVIDERS.identity_api, domain['id'])
+        self.project = unit.new_project_ref(domain_id=domain['id'])
+        PROVIDERS.resource_api.create_project(
+            self.project['id'], self.project)
+        role = unit.new_role_ref()
+        PROVIDERS.role_api.create_role(role['id'], role)
+        PROVIDERS.assignment_api.create_grant(
+            role['id'], user_id=self.user['id'],
+            project_id=self.project['id'])
+
+        token = PROVIDERS.token_provider_api.issue_token(
+            self.user['id'], ['password'], project_id=self.project['id'])
+        self.token = PROVIDERS.token_provider_api.validate_token(token.id)
+
+    def _render(self, include_catalog=True):
+        with mock.patch.object(
+                render_token, 'render_token_response_from_model',
+                wraps=render_token.render_token_response_from_model) as m:
+            body = PROVIDERS.token_provider_api.render_token_response(
+                self.token, include_catalog=include_catalog)
+        return body, m.call_count
+
+    def test_rendered_response_is_cached(self):
+        body, renders = self._render()
+        self.assertEqual(1, renders)
+        self.assertEqual(
+            self.token.audit_ids, jsonutils.loads(body)['token']['audit_ids'])
+        self.assertEqual((body, 0), self._render())
+
+    def test_catalog_and_nocatalog_are_cached_separately(self):
+        body, _ = self._render()
+        nocatalog_body, renders = self._render(include_catalog=False)
+        self.assertEqual(1, renders)
+        self.assertIn('catalog', jsonutils.loads(body)['token'])
+        self.assertNotIn('catalog', jsonutils.loads(nocatalog_body)['token'])
+
+    def test_catalog_change_rerenders_response(self):
+        self._render()
+        service = unit.new_service_ref()
+        PROVIDERS.catalog_api.create_service(service['id'], service)
+        self.assertEqual(1, self._render()[1])
+
+    def test_assignment_change_rerenders_response(self):
+        body, _ = self._render()
+        role = unit.new_role_ref()
+        PROVIDERS.role_api.create_role(role['id'], role)
+        PROVIDERS.assignment_api.create_grant(
+            role['id'], user_id=self.user['id'],
+            project_id=self.project['id'])
+        body, renders = self._render()
+        self.assertEqual(1, renders)
+        role_ids = [r['id'] for r in jsonutils.loads(body)['token']['roles']]
+        self.assertIn(role['id'], role_ids)
+
+    def test_response_not_cached_without_token_caching(self):
+        self.config_fixture.config(group='token', caching=False)
+        self._render()
+        self.assertEqual(1, self._render()[1])
@@ -325,6 +325,77 @@ class AssignmentTestCase(test_v3.RestfulTestCase,
         self.head(member_url, expected_status=http.client.NOT_FOUND)
         self.get(member_url, expected_status=http.client.NOT_FOUND)
 
+    def test_bulk_create_and_delete_role_assignments(self):
+        """Call ``PUT & DELETE /role_assignments``."""
+        PROVIDERS.assignment_api.create_system_grant_for_user(
+            self.user_id, self.role_id)
+        token = self.get_system_scoped_token()
+        user = unit.create_user(PROVIDERS.identity_api,
+                                domain_id=self.domain_id)
+        body = {
+            'role_assignments': [
+                {'role': {'id': self.role_id},
+                 'user': {'id': user['id']},
+                 'scope': {'project': {'id': self.project_id}}},
+                {'role': {'id': self.role_id},
+                 'group': {'id': self.group_id},
+                 'scope': {'domain': {'id': self.domain_id},
+                           'OS-INHERIT:inherited_to': 'projects'}}]}
+        collection_url = (
+            '/role_assignments?role.id=%(role_id)s&scope.domain.id='
+            '%(domain_id)s&group.id=%(group_id)s' % {
+                'role_id': self.role_id, 'domain_id': self.domain_id,
+                'group_id': self.group_id})
+        member_url = ('/projects/%(project_id)s/users/%(user_id)s/roles/'
+                      '%(role_id)s' % {
+                          'project_id': self.project_id,
+                          'user_id': user['id'],
+                          'role_id': self.role_id})
+
+        self.put('/role_assignments', body=body, token=token)
+        self.head(member_url)
+        r = self.get(collection_url)
+        self.assertEqual(1, len(r.result['role_assignments']))
+
+        self.delete('/role_assignments', body=body, token=token)
+        self.head(member_url, expected_status=http.client.NOT_FOUND)
+        r = self.get(collection_url)
+        self.assertEqual(0, len(r.result['role_assignments']))
+
+        # Deleting assignments that no longer exist fails.
+        self.delete('/role_assignments', body=body, token=token,
+                    expected_status=http.client.NOT_FOUND)
+
+    def test_bulk_create_role_assignments_invalid(self):
+        PROVIDERS.assignment_api.create_system_grant_for_user(
+            self.user_id, self.role_id)
+        token = self.get_system_scoped_token()
+        for assignment in [
+                {'role': {'id': self.role_id},
+                 'user': {'id': self.user_id},
+                 'group': {'id': self.group_id},
+                 'scope': {'project': {'id': self.project_id}}},
+                {'role': {'id': self.role_id},
+                 'user': {'id': self.user_id},
+                 'scope': {'project': {'id': self.project_id},
+                           'domain': {'id': self.domain_id}}},
+                {'role': {'id': self.role_id},
+                 'user': {'id': self.user_id}}]:
+            self.put('/role_assignments',
+                     body={'role_assignments': [assignment]}, token=token,
+                     expected_status=http.client.BAD_REQUEST)
+        self.put('/role_assignments', body={'role_assignments': []},
+                 token=token, expected_status=http.client.BAD_REQUEST)
+
+    def test_bulk_create_role_assignments_requires_system_scope(self):
+        body = {
+            'role_assignments': [
+                {'role': {'id': self.role_id},
+                 'user': {'id': self.user_id},
+                 'scope': {'project': {'id': self.project_id}}}]}
+        self.put('/role_assignments', body=body,
+                 expected_status=http.client.FORBIDDEN)
+
     def _create_new_user_and_assign_role_on_project(self):
         """Create a new user and assign user a role on a project."""
         # Create a new user
@@ -32,6 +32,7 @@ from testtools import testcase
 from keystone import auth
 from keystone.auth.plugins import totp
 from keystone.common import authorization
+from keystone.common import password_hashing
 from keystone.common import provider_api
 from keystone.common.rbac_enforcer import policy
 from keystone.common import utils
@@ -43,6 +44,7 @@ from keystone.tests.common import auth as common_auth
 from keystone.tests import unit
 from keystone.tests.unit import ksfixtures
 from keystone.tests.unit import test_v3
+from keystone.token import provider as token_provider
 
 
 CONF = keystone.conf.CONF
@@ -2306,6 +2308,20 @@ class TokenAPITests(object):
         self.v3_create_token(auth_data,
                              expected_status=http.client.UNAUTHORIZED)
 
+    def test_create_token_when_password_verification_unavailable(self):
+        self.config_fixture.config(group='identity', password_hash_workers=1,
+                                   password_hash_retry_after=5)
+        auth_data = self.build_authentication_request(
+            user_id=self.user['id'],
+            password=self.user['password'])
+        with mock.patch.object(
+                password_hashing._VerificationExecutor, 'verify',
+                side_effect=exception.PasswordVerificationUnavailable(
+                    retry_after=5)):
+            r = self.v3_create_token(
+                auth_data, expected_status=http.client.SERVICE_UNAVAILABLE)
+        self.assertEqual('5', r.headers['Retry-After'])
+
     def test_user_and_group_roles_scoped_token(self):
         """Test correct roles are returned in scoped token.
 
@@ -3416,6 +3432,31 @@ class TestTokenRevokeById(test_v3.RestfulTestCase):
                   headers={'X-Subject-Token': token2},
                   expected_status=http.client.OK)
 
+    @unit.skip_if_cache_disabled('token')
+    def test_removing_role_assignment_keeps_token_cache(self):
+        """Removing a role checks cached tokens again instead of dropping."""
+        project = unit.new_project_ref(domain_id=self.domainA['id'])
+        PROVIDERS.resource_api.create_project(project['id'], project)
+        PROVIDERS.assignment_api.create_grant(
+            self.role1['id'], user_id=self.user1['id'],
+            project_id=project['id'])
+        token = self.get_requested_token(
+            self.build_authentication_request(
+                user_id=self.user1['id'],
+                password=self.user1['password'],
+                project_id=project['id']))
+        self.head('/auth/tokens', headers={'X-Subject-Token': token},
+                  expected_status=http.client.OK)
+
+        with mock.patch.object(token_provider.TOKENS_REGION,
+                               'invalidate') as invalidate:
+            PROVIDERS.assignment_api.delete_grant(
+                self.role1['id'], user_id=self.user1['id'],
+                project_id=project['id'])
+            self.head('/auth/tokens', headers={'X-Subject-Token': token},
+                      expected_status=http.client.NOT_FOUND)
+        invalidate.assert_not_called()
+
     def test_removing_role_assignment_does_not_affect_other_users(self):
         """Revoking a role from one user should not affect other users."""
         time = datetime.datetime.utcnow()
@@ -3723,6 +3764,77 @@ class TestTokenRevokeApi(TestTokenRevokeById):
         self.assertEqual(0, len(events))
 
 
+class TestBatchTokenValidation(test_v3.RestfulTestCase):
+
+    def setUp(self):
+        super(TestBatchTokenValidation, self).setUp()
+        reader = unit.new_role_ref(name='reader')
+        PROVIDERS.role_api.create_role(reader['id'], reader)
+        PROVIDERS.assignment_api.create_system_grant_for_user(
+            self.user['id'], reader['id'])
+        self.system_token = self.get_system_scoped_token()
+
+    def _validate_tokens(self, token_ids, path='/auth/tokens/validate',
+                         expected_status=http.client.OK):
+        return self.post(path, body={'tokens': token_ids},
+                         token=self.system_token,
+                         expected_status=expected_status)
+
+    def test_validate_tokens(self):
+        scoped_token = self.get_scoped_token()
+        revoked_token = self.get_scoped_token()
+        self.delete('/auth/tokens',
+                    headers={'X-Subject-Token': revoked_token})
+        invalid_token = uuid.uuid4().hex
+
+        r = self._validate_tokens(
+            [scoped_token, revoked_token, invalid_token, scoped_token])
+        results = r.result['tokens']
+        self.assertEqual(
+            [scoped_token, revoked_token, invalid_token, scoped_token],
+            [result['id'] for result in results])
+        self.assertEqual(self.user['id'], results[0]['token']['user']['id'])
+        self.assertIn('catalog', results[0]['token'])
+        self.assertEqual(results[0], results[3])
+        for result in results[1:3]:
+            self.assertNotIn('token', result)
+            self.assertEqual(http.client.NOT_FOUND, result['error']['code'])
+
+    def test_validate_tokens_renders_through_token_provider(self):
+        scoped_token = self.get_scoped_token()
+        token_provider_api = PROVIDERS.token_provider_api
+        with mock.patch.object(
+                token_provider_api, 'render_token_response',
+                wraps=token_provider_api.render_token_response) as render:
+            r = self._validate_tokens([scoped_token, scoped_token])
+        self.assertEqual(1, render.call_count)
+        results = r.result['tokens']
+        self.assertEqual(scoped_token, results[0]['id'])
+        self.assertEqual(self.user['id'], results[0]['token']['user']['id'])
+        self.assertEqual(results[0], results[1])
+
+    def test_validate_tokens_nocatalog(self):
+        r = self._validate_tokens(
+            [self.get_scoped_token()],
+            path='/auth/tokens/validate?nocatalog')
+        self.assertNotIn('catalog', r.result['tokens'][0]['token'])
+
+    def test_validate_tokens_requires_tokens(self):
+        self._validate_tokens([], expected_status=http.client.BAD_REQUEST)
+
+    def test_validate_tokens_over_limit(self):
+        self.config_fixture.config(group='token',
+                                   max_batch_validation_size=1)
+        token_id = self.get_scoped_token()
+        self._validate_tokens([token_id, token_id],
+                              expected_status=http.client.BAD_REQUEST)
+
+    def test_validate_tokens_forbidden_for_project_member(self):
+        self.post('/auth/tokens/validate',
+                  body={'tokens': [self.get_scoped_token()]},
+                  expected_status=http.client.FORBIDDEN)
+
+
 class TestAuthExternalDisabled(test_v3.RestfulTestCase):
     def config_overrides(self):
         super(TestAuthExternalDisabled, self).config_overrides()
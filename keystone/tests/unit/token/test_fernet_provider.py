@@ -17,6 +17,8 @@ import os
 from unittest import mock
 import uuid
 
+import freezegun
+import msgpack
 from oslo_utils import timeutils
 
 from keystone import auth
@@ -26,6 +28,7 @@ from keystone.common import utils
 import keystone.conf
 from keystone import exception
 from keystone.federation import constants as federation_constants
+from keystone.models import revoke_model
 from keystone.tests import unit
 from keystone.tests.unit import default_fixtures
 from keystone.tests.unit import ksfixtures
@@ -210,6 +213,132 @@ class TestValidate(unit.TestCase):
             token_id
         )
 
+    def test_validate_tokens(self):
+        domain_ref = unit.new_domain_ref()
+        domain_ref = PROVIDERS.resource_api.create_domain(
+            domain_ref['id'], domain_ref
+        )
+        user_ref = unit.new_user_ref(domain_ref['id'])
+        user_ref = PROVIDERS.identity_api.create_user(user_ref)
+
+        valid = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        revoked = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        PROVIDERS.token_provider_api.revoke_token(revoked.id)
+        malformed = uuid.uuid4().hex
+
+        results = PROVIDERS.token_provider_api.validate_tokens(
+            [valid.id, revoked.id, malformed, valid.id])
+
+        # Duplicates are collapsed and request order is preserved.
+        self.assertEqual([valid.id, revoked.id, malformed], list(results))
+        self.assertEqual(user_ref['id'], results[valid.id].user_id)
+        self.assertIsInstance(results[revoked.id], exception.TokenNotFound)
+        self.assertIsInstance(results[malformed], exception.TokenNotFound)
+
+    def test_validate_tokens_checks_revocation_once(self):
+        domain_ref = unit.new_domain_ref()
+        domain_ref = PROVIDERS.resource_api.create_domain(
+            domain_ref['id'], domain_ref
+        )
+        user_ref = unit.new_user_ref(domain_ref['id'])
+        user_ref = PROVIDERS.identity_api.create_user(user_ref)
+        token_ids = [
+            PROVIDERS.token_provider_api.issue_token(
+                user_ref['id'], ['password']).id
+            for _ in range(3)
+        ]
+
+        with mock.patch.object(PROVIDERS.revoke_api, 'are_tokens_revoked',
+                               return_value=[False] * 3) as mock_check:
+            results = PROVIDERS.token_provider_api.validate_tokens(token_ids)
+        self.assertEqual(1, mock_check.call_count)
+        for token_id in token_ids:
+            self.assertEqual(token_id, results[token_id].id)
+
+    def test_validate_tokens_isolates_failing_tokens(self):
+        domain_ref = unit.new_domain_ref()
+        domain_ref = PROVIDERS.resource_api.create_domain(
+            domain_ref['id'], domain_ref
+        )
+        user_ref = unit.new_user_ref(domain_ref['id'])
+        user_ref = PROVIDERS.identity_api.create_user(user_ref)
+        valid = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        failing = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        build_token_values = revoke_model.build_token_values
+
+        def fail_for_one_token(token):
+            if token.id == failing.id:
+                raise exception.UserNotFound(user_id=token.user_id)
+            return build_token_values(token)
+
+        with mock.patch.object(revoke_model, 'build_token_values',
+                               side_effect=fail_for_one_token):
+            results = PROVIDERS.token_provider_api.validate_tokens(
+                [valid.id, failing.id])
+        self.assertEqual(valid.id, results[valid.id].id)
+        self.assertIsInstance(results[failing.id], exception.UserNotFound)
+
+    def test_validate_tokens_checks_one_at_a_time_on_batch_failure(self):
+        domain_ref = unit.new_domain_ref()
+        domain_ref = PROVIDERS.resource_api.create_domain(
+            domain_ref['id'], domain_ref
+        )
+        user_ref = unit.new_user_ref(domain_ref['id'])
+        user_ref = PROVIDERS.identity_api.create_user(user_ref)
+        valid = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        revoked = PROVIDERS.token_provider_api.issue_token(
+            user_ref['id'], ['password'])
+        PROVIDERS.token_provider_api.revoke_token(revoked.id)
+
+        with mock.patch.object(PROVIDERS.revoke_api, 'are_tokens_revoked',
+                               side_effect=TypeError):
+            results = PROVIDERS.token_provider_api.validate_tokens(
+                [valid.id, revoked.id])
+        self.assertEqual(valid.id, results[valid.id].id)
+        self.assertIsInstance(results[revoked.id], exception.TokenNotFound)
+
+    def test_validate_tokens_resolves_entities_in_bulk(self):
+        domain_ref = unit.new_domain_ref()
+        domain_ref = PROVIDERS.resource_api.create_domain(
+            domain_ref['id'], domain_ref
+        )
+        token_ids = []
+        for _ in range(3):
+            user_ref = unit.new_user_ref(domain_ref['id'])
+            user_ref = PROVIDERS.identity_api.create_user(user_ref)
+            token = PROVIDERS.token_provider_api.issue_token(
+                user_ref['id'], ['password'])
+            PROVIDERS.token_provider_api.invalidate_individual_token_cache(
+                token.id)
+            token_ids.append(token.id)
+
+        identity_api = PROVIDERS.identity_api
+        resource_api = PROVIDERS.resource_api
+        with mock.patch.object(
+                identity_api, 'list_users_from_ids',
+                wraps=identity_api.list_users_from_ids) as list_users, \
+                mock.patch.object(
+                    resource_api, 'list_domains_from_ids',
+                    wraps=resource_api.list_domains_from_ids) as list_doms, \
+                mock.patch.object(identity_api, 'get_user',
+                                  wraps=identity_api.get_user) as get_user, \
+                mock.patch.object(resource_api, 'get_domain',
+                                  wraps=resource_api.get_domain) as get_domain:
+            results = PROVIDERS.token_provider_api.validate_tokens(token_ids)
+        for token_id in token_ids:
+            self.assertEqual(token_id, results[token_id].id)
+            self.assertEqual(domain_ref['id'],
+                             results[token_id].user_domain['id'])
+        self.assertEqual(1, list_users.call_count)
+        self.assertEqual(1, list_doms.call_count)
+        get_user.assert_not_called()
+        get_domain.assert_not_called()
+
 
 class TestValidateWithoutCache(TestValidate):
 
@@ -308,6 +437,88 @@ class TestTokenFormatter(unit.TestCase):
         self.assertEqual(exp_idp_id, identity_provider_id)
         self.assertEqual(exp_protocol_id, protocol_id)
 
+    def test_payload_versions_are_unique(self):
+        self.assertEqual(
+            len(token_formatters._PAYLOAD_CLASSES),
+            len(token_formatters._PAYLOAD_CLASSES_BY_VERSION))
+        for version, payload_class in (
+                token_formatters._PAYLOAD_CLASSES_BY_VERSION.items()):
+            self.assertEqual(version, payload_class.version)
+
+    def test_validate_token_with_unknown_payload_version(self):
+        token_formatter = token_formatters.TokenFormatter()
+        token = token_formatter.pack(msgpack.packb((99, uuid.uuid4().hex)))
+        self.assertRaises(exception.ValidationError,
+                          token_formatter.validate_token, token)
+
+    def test_validate_token_does_not_parse_time_strings(self):
+        exp_expires_at = utils.isotime(timeutils.utcnow(), subsecond=True)
+
+        token_formatter = token_formatters.TokenFormatter()
+        token = token_formatter.create_token(
+            user_id=uuid.uuid4().hex,
+            expires_at=exp_expires_at,
+            audit_ids=[provider.random_urlsafe_str()],
+            payload_class=token_formatters.ProjectScopedPayload,
+            methods=['password'],
+            project_id=uuid.uuid4().hex)
+
+        with mock.patch.object(timeutils, 'parse_isotime') as parse_isotime:
+            validated = token_formatter.validate_token(token)
+        parse_isotime.assert_not_called()
+
+        issued_at, expires_at = validated[-2:]
+        self.assertEqual(exp_expires_at, expires_at)
+        self.assertEqual(
+            utils.isotime(token_formatter.creation_time(token),
+                          subsecond=True),
+            issued_at)
+
+    def test_validate_token_rejects_old_token_before_decrypting(self):
+        token_formatter = token_formatters.TokenFormatter()
+        token = token_formatter.create_token(
+            user_id=uuid.uuid4().hex,
+            expires_at=utils.isotime(timeutils.utcnow(), subsecond=True),
+            audit_ids=[provider.random_urlsafe_str()],
+            payload_class=token_formatters.UnscopedPayload,
+            methods=['password'])
+
+        max_age = (token_formatters.MAX_TOKEN_LIFETIME +
+                   CONF.token.allow_expired_window)
+        with mock.patch.object(token_formatter, 'unpack') as unpack:
+            with freezegun.freeze_time(
+                    timeutils.utcnow() +
+                    datetime.timedelta(seconds=max_age + 1)):
+                self.assertRaises(exception.ValidationError,
+                                  token_formatter.validate_token, token)
+        unpack.assert_not_called()
+
+    def test_validate_token_after_lowering_expiration(self):
+        token_formatter = token_formatters.TokenFormatter()
+        expires_at = timeutils.utcnow() + datetime.timedelta(hours=1)
+        token = token_formatter.create_token(
+            user_id=uuid.uuid4().hex,
+            expires_at=utils.isotime(expires_at, subsecond=True),
+            audit_ids=[provider.random_urlsafe_str()],
+            payload_class=token_formatters.UnscopedPayload,
+            methods=['password'])
+
+        # The token is still within the lifetime it was issued with.
+        self.config_fixture.config(group='token', expiration=60,
+                                   allow_expired_window=0)
+        with freezegun.freeze_time(
+                timeutils.utcnow() + datetime.timedelta(minutes=30)):
+            validated = token_formatter.validate_token(token)
+        self.assertEqual(utils.isotime(expires_at, subsecond=True),
+                         validated[-1])
+
+    def test_validate_malformed_token(self):
+        token_formatter = token_formatters.TokenFormatter()
+        with mock.patch.object(token_formatter, 'unpack') as unpack:
+            self.assertRaises(exception.ValidationError,
+                              token_formatter.validate_token, 'bogus')
+        unpack.assert_not_called()
+
 
 class TestPayloads(unit.TestCase):
     def assertTimestampsEqual(self, expected, actual):
@@ -797,6 +1008,26 @@ class TestFernetKeyRotation(unit.TestCase):
             keys += 1
         self.assertEqual(3, keys)
 
+    def test_validate_token_with_key_hints_after_rotation(self):
+        self.config_fixture.config(group='fernet_tokens',
+                                   max_active_keys=10,
+                                   decrypt_with_key_hints=True)
+        token_formatter = token_formatters.TokenFormatter()
+        key_utils = fernet_utils.FernetUtils(
+            CONF.fernet_tokens.key_repository,
+            CONF.fernet_tokens.max_active_keys,
+            'fernet_tokens'
+        )
+        payload = b'payload'
+        token = token_formatter.pack(payload)
+        for rotation in range(5):
+            key_utils.rotate_keys()
+
+        self.assertEqual(payload, token_formatter.unpack(token))
+        self.assertEqual(payload, token_formatter.unpack(token))
+        new_token = token_formatter.pack(payload)
+        self.assertEqual(payload, token_formatter.unpack(new_token))
+
 
 class TestLoadKeys(unit.TestCase):
 
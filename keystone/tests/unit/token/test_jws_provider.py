@@ -11,8 +11,15 @@
 # under the License.
 
 import os
+import time
+from unittest import mock
 import uuid
 
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+import jwt
+from oslo_serialization import jsonutils
+
 from keystone.common import jwt_utils
 from keystone.common import provider_api
 from keystone.common import utils
@@ -124,3 +131,118 @@ class TestJWSProvider(unit.TestCase):
         # make sure we iterate through all public keys on disk and we can still
         # validate the token
         self.provider.validate_token(token_id)
+
+    def _create_token_id(self):
+        token = token_model.TokenModel()
+        token.methods = ['password']
+        token.user_id = uuid.uuid4().hex
+        token.audit_id = provider.random_urlsafe_str()
+        token.expires_at = utils.isotime(
+            provider.default_expire_time(), subsecond=True
+        )
+        token_id, issued_at = self.provider.generate_id_and_issued_at(token)
+        return token_id
+
+    def _get_public_key_id(self, filename='public.pem'):
+        path = os.path.join(
+            CONF.jwt_tokens.jws_public_key_repository, filename
+        )
+        with open(path, 'rb') as f:
+            public_key = serialization.load_pem_public_key(
+                f.read(), backend=default_backend()
+            )
+        return jwt_utils.get_key_id(public_key)
+
+    def test_token_header_contains_key_id(self):
+        token_id = self._create_token_id()
+        self.assertEqual(
+            self._get_public_key_id(),
+            jwt.get_unverified_header(token_id)['kid']
+        )
+
+    def test_keys_are_only_parsed_once(self):
+        token_id = self._create_token_id()
+        with mock.patch.object(
+                serialization, 'load_pem_public_key',
+                wraps=serialization.load_pem_public_key) as load_public_key:
+            with mock.patch.object(
+                    serialization, 'load_pem_private_key',
+                    wraps=serialization.load_pem_private_key) as load_private:
+                for _ in range(3):
+                    self.provider.validate_token(token_id)
+                    self._create_token_id()
+        load_public_key.assert_not_called()
+        load_private.assert_not_called()
+
+    def test_validate_token_only_tries_key_matching_key_id(self):
+        token_id = self._create_token_id()
+        for _ in range(2):
+            jwt_utils.create_jws_keypair(
+                os.path.join(CONF.jwt_tokens.jws_private_key_repository,
+                             uuid.uuid4().hex),
+                os.path.join(CONF.jwt_tokens.jws_public_key_repository,
+                             uuid.uuid4().hex)
+            )
+        with mock.patch.object(jwt, 'decode', wraps=jwt.decode) as decode:
+            self.provider.validate_token(token_id)
+        self.assertEqual(1, decode.call_count)
+
+    def test_validate_token_without_key_id(self):
+        private_key_path = os.path.join(
+            CONF.jwt_tokens.jws_private_key_repository, 'private.pem'
+        )
+        with open(private_key_path, 'r') as f:
+            private_key = f.read()
+        payload = {
+            'sub': uuid.uuid4().hex,
+            'iat': int(time.time()),
+            'exp': int(time.time()) + 3600,
+            'openstack_methods': ['password'],
+            'openstack_audit_ids': [provider.random_urlsafe_str()]
+        }
+        token_id = jwt.encode(
+            payload, private_key, algorithm=jws.JWSFormatter.algorithm
+        )
+        self.assertNotIn('kid', jwt.get_unverified_header(token_id))
+        self.assertEqual(
+            payload['sub'], self.provider.validate_token(token_id)[0]
+        )
+
+    def test_validate_token_with_malformed_key_id(self):
+        payload = jwt.utils.base64url_encode(jsonutils.dump_as_bytes(
+            {'sub': uuid.uuid4().hex}))
+        for key_id in ([uuid.uuid4().hex], {'id': uuid.uuid4().hex}, 1):
+            header = jwt.utils.base64url_encode(jsonutils.dump_as_bytes(
+                {'alg': jws.JWSFormatter.algorithm, 'typ': 'JWT',
+                 'kid': key_id}))
+            token_id = b'.'.join(
+                [header, payload, jwt.utils.base64url_encode(b'signature')]
+            ).decode('utf-8')
+            self.assertRaises(exception.TokenNotFound,
+                              self.provider.validate_token, token_id)
+
+    def test_replaced_key_pair_is_picked_up(self):
+        token_id = self._create_token_id()
+
+        # rotate to a new key pair, keeping the old public key around
+        private_key_path = os.path.join(
+            CONF.jwt_tokens.jws_private_key_repository, 'private.pem'
+        )
+        new_private_key_path = os.path.join(
+            CONF.jwt_tokens.jws_private_key_repository, uuid.uuid4().hex
+        )
+        new_public_key_name = uuid.uuid4().hex
+        jwt_utils.create_jws_keypair(
+            new_private_key_path,
+            os.path.join(CONF.jwt_tokens.jws_public_key_repository,
+                         new_public_key_name)
+        )
+        os.rename(new_private_key_path, private_key_path)
+
+        new_token_id = self._create_token_id()
+        self.assertEqual(
+            self._get_public_key_id(new_public_key_name),
+            jwt.get_unverified_header(new_token_id)['kid']
+        )
+        self.provider.validate_token(token_id)
+        self.provider.validate_token(new_token_id)
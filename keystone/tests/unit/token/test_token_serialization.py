@@ -15,12 +15,17 @@ from unittest import mock
 import uuid
 
 from keystone.common.cache import _context_cache
+from keystone.common import provider_api
 from keystone.common import utils as ks_utils
 from keystone import exception
 from keystone.models import token_model
+from keystone.tests import unit
 from keystone.tests.unit import base_classes
 
 
+PROVIDERS = provider_api.ProviderAPIs
+
+
 class TestTokenSerialization(base_classes.TestCaseWithBootstrap):
 
     def setUp(self):
@@ -58,6 +63,69 @@ class TestTokenSerialization(base_classes.TestCaseWithBootstrap):
         self.assertEqual(self.exp_token.id, token.id)
         self.assertEqual(self.exp_token.issued_at, token.issued_at)
 
+    def test_deserialized_token_carries_resolved_data(self):
+        exp_roles = self.exp_token.roles
+        serialized = self.token_handler.serialize(self.exp_token)
+        token = self.token_handler.deserialize(serialized)
+
+        # Everything needed to render the token was resolved when it was
+        # minted, so nothing has to be looked up again.
+        with mock.patch.object(PROVIDERS.identity_api, 'get_user') as gu, \
+                mock.patch.object(PROVIDERS.resource_api,
+                                  'get_project') as gp, \
+                mock.patch.object(PROVIDERS.resource_api,
+                                  'get_domain') as gd, \
+                mock.patch.object(PROVIDERS.assignment_api,
+                                  'get_roles_for_user_and_project') as gr:
+            self.assertEqual(self.admin_username, token.user['name'])
+            self.assertEqual(self.project_name, token.project['name'])
+            self.assertIsNotNone(token.user_domain)
+            self.assertIsNotNone(token.project_domain)
+            self.assertEqual(exp_roles, token.roles)
+        for lookup in (gu, gp, gd, gr):
+            lookup.assert_not_called()
+
+    def test_resolve_reads_entities_with_one_lookup_per_backend(self):
+        token = token_model.TokenModel()
+        token.user_id = self.admin_user_id
+        token.project_id = self.project_id
+
+        identity_api = PROVIDERS.identity_api
+        resource_api = PROVIDERS.resource_api
+        with mock.patch.object(
+                identity_api, 'list_users_from_ids',
+                wraps=identity_api.list_users_from_ids) as list_users, \
+                mock.patch.object(resource_api, 'get_project',
+                                  wraps=resource_api.get_project) as get_prj, \
+                mock.patch.object(
+                    resource_api, 'list_domains_from_ids',
+                    wraps=resource_api.list_domains_from_ids) as list_doms, \
+                mock.patch.object(resource_api, 'get_domain',
+                                  wraps=resource_api.get_domain) as get_domain:
+            token._resolve()
+
+        list_users.assert_called_once_with([self.admin_user_id])
+        # The user and the project share a domain, which is read once.
+        list_doms.assert_called_once_with([token.project['domain_id']])
+        get_prj.assert_not_called()
+        get_domain.assert_not_called()
+        self.assertEqual(self.project_id, token.project['id'])
+        self.assertEqual(token.user_domain, token.project_domain)
+
+    def test_roles_recomputed_after_assignment_change(self):
+        role_ids = [role['id'] for role in self.exp_token.roles]
+        self.assertIn(self.admin_role_id, role_ids)
+
+        role = unit.new_role_ref()
+        PROVIDERS.role_api.create_role(role['id'], role)
+        PROVIDERS.assignment_api.create_grant(
+            role['id'], user_id=self.admin_user_id,
+            project_id=self.project_id)
+
+        serialized = self.token_handler.serialize(self.exp_token)
+        token = self.token_handler.deserialize(serialized)
+        self.assertIn(role['id'], [r['id'] for r in token.roles])
+
     @mock.patch.object(
         token_model.TokenModel, '__init__', side_effect=Exception)
     def test_error_handling_in_deserialize(self, handler_mock):
@@ -18,12 +18,15 @@ import base64
 import datetime
 import uuid
 
+from dogpile.cache import api as cache_api
 from oslo_log import log
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 
 from keystone.common import cache
 from keystone.common import manager
 from keystone.common import provider_api
+from keystone.common import render_token
 from keystone.common import utils
 import keystone.conf
 from keystone import exception
@@ -143,6 +146,7 @@ class Manager(manager.Manager):
 
         try:
             token = self._validate_token(token_id)
+            self._validate_token_roles(token)
             self._is_valid_token(token, window_seconds=window_seconds)
             self._validate_token_access_rules(token, access_rules_support)
             return token
@@ -150,8 +154,149 @@ class Manager(manager.Manager):
             LOG.debug('Unable to validate token: %s', e)
             raise exception.TokenNotFound(token_id=token_id)
 
+    def validate_tokens(self, token_ids, window_seconds=0,
+                        access_rules_support=None):
+        """Validate a batch of tokens.
+
+        Each token goes through the same checks as :meth:`validate_token`,
+        but the users, projects and domains of the tokens that aren't cached
+        yet are looked up together, and the revocation index is consulted
+        once for the whole batch instead of once per token. Duplicate token
+        IDs are only validated once, and a token that can't be validated
+        doesn't affect the others.
+
+        :param token_ids: an iterable of token IDs
+        :returns: a dictionary mapping each distinct token ID, in the order
+                  given, to either the validated token model or the
+                  ``keystone.exception.Error`` that rejected it
+
+        """
+        results = {}
+
+        def _reject(token_id, e):
+            LOG.debug('Unable to validate token: %s', e)
+            if isinstance(e, exception.Unauthorized):
+                e = exception.TokenNotFound(token_id=token_id)
+            results[token_id] = e
+
+        unminted = []
+        for token_id in token_ids:
+            if token_id in results:
+                continue
+            try:
+                if not token_id:
+                    raise exception.TokenNotFound(
+                        _('No token in the request'))
+                token = self._validate_token.get(self, token_id)
+                if token is cache_api.NO_VALUE:
+                    token, issued_at = self._load_token(token_id)
+                    unminted.append((token_id, token, issued_at))
+                results[token_id] = token
+            except exception.Error as e:
+                _reject(token_id, e)
+
+        try:
+            token_model.TokenModel.resolve_all(
+                [token for token_id, token, issued_at in unminted])
+        except Exception:
+            # NOTE: Minting looks up whatever is still missing one token at a
+            # time, so that only the tokens that can't be resolved fail.
+            LOG.debug('Unable to resolve a batch of tokens, resolving them '
+                      'one at a time.', exc_info=True)
+        for token_id, token, issued_at in unminted:
+            try:
+                token.mint(token_id, issued_at)
+            except exception.Error as e:
+                _reject(token_id, e)
+            else:
+                if self._should_cache_tokens():
+                    self._validate_token.set(token, self, token_id)
+
+        pending = []
+        for token_id, token in results.items():
+            if isinstance(token, exception.Error):
+                continue
+            try:
+                self._validate_token_roles(token)
+                self._assert_token_not_expired(
+                    token, window_seconds=window_seconds)
+                self._validate_token_access_rules(token, access_rules_support)
+                token_values = self.revoke_api.model.build_token_values(token)
+            except exception.Error as e:
+                _reject(token_id, e)
+            else:
+                pending.append((token, token_values))
+
+        try:
+            revoked = PROVIDERS.revoke_api.are_tokens_revoked(
+                [token_values for token, token_values in pending])
+        except Exception:
+            # NOTE: Check the tokens one at a time instead, so that only the
+            # tokens that can't be checked are rejected.
+            LOG.debug('Unable to check a batch of tokens for revocation, '
+                      'checking them one at a time.', exc_info=True)
+            revoked = [None] * len(pending)
+        for (token, token_values), is_revoked in zip(pending, revoked):
+            try:
+                if is_revoked is None:
+                    PROVIDERS.revoke_api.check_token(token_values)
+                elif is_revoked:
+                    raise exception.TokenNotFound(
+                        _('Failed to validate token'))
+            except exception.Error as e:
+                _reject(token.id, e)
+        return results
+
+    def render_token_response(self, token, include_catalog=True):
+        """Return the serialized body of a token validation response.
+
+        Rendering a token, and especially its catalog, is repeated on every
+        validation of the same token. When token caching is enabled the JSON
+        body is cached next to the token, keyed by the token ID, whether the
+        catalog is included, the current catalog generation and the
+        assignment generation of the token's user and scope, so that it is
+        rendered again only after something it contains has changed. The rest
+        of the token cache invalidation (user, project, domain or trust
+        changes) applies to it as well.
+
+        The token must already have been validated.
+
+        :returns: the JSON document as a string
+
+        """
+        if not (CONF.cache.enabled and CONF.token.caching):
+            return self._render_token_response_from_model(
+                token, include_catalog)
+        return self._render_token_response(
+            token.id, include_catalog,
+            PROVIDERS.catalog_api.get_catalog_generation(),
+            token.get_assignment_generation())
+
+    @MEMOIZE_TOKENS
+    def _render_token_response(self, token_id, include_catalog,
+                               catalog_generation, assignment_generation):
+        # NOTE: This is only reached after the token has been validated, so
+        # the token model itself comes straight out of the token cache.
+        token = self._validate_token(token_id)
+        return self._render_token_response_from_model(token, include_catalog)
+
+    def _render_token_response_from_model(self, token, include_catalog):
+        token_resp = render_token.render_token_response_from_model(
+            token, include_catalog=include_catalog)
+        return jsonutils.dumps(token_resp)
+
     @MEMOIZE_TOKENS
     def _validate_token(self, token_id):
+        token, issued_at = self._load_token(token_id)
+        token.mint(token_id, issued_at)
+        return token
+
+    def _load_token(self, token_id):
+        """Build the token model of a token ID, without minting it.
+
+        :returns: the token model and the time the token was issued at
+
+        """
         (user_id, methods, audit_ids, system, domain_id,
             project_id, trust_id, federated_group_ids, identity_provider_id,
             protocol_id, access_token_id, app_cred_id, issued_at,
@@ -175,12 +320,28 @@ class Manager(manager.Manager):
             token.identity_provider_id = identity_provider_id
             token.protocol_id = protocol_id
             token.federated_groups = federated_group_ids
+        return token, issued_at
 
-        token.mint(token_id, issued_at)
-        return token
+    def _validate_token_roles(self, token):
+        # Role assignment changes don't invalidate the token cache, so a
+        # cached token checks the roles of its user again if they have
+        # changed since, and is cached again once checked.
+        if token.validate_roles() and self._should_cache_tokens():
+            self._validate_token.set(token, self, token.id)
+
+    def _should_cache_tokens(self):
+        return CONF.cache.enabled and (
+            CONF.token.cache_on_issue or CONF.token.caching)
 
     def _is_valid_token(self, token, window_seconds=0):
         """Verify the token is valid format and has not expired."""
+        self._assert_token_not_expired(token, window_seconds=window_seconds)
+        self.check_revocation(token)
+        # Token has not expired and has not been revoked.
+        return None
+
+    def _assert_token_not_expired(self, token, window_seconds=0):
+        """Raise TokenNotFound if the token is malformed or has expired."""
         current_time = timeutils.normalize_time(timeutils.utcnow())
 
         try:
@@ -195,11 +356,7 @@ class Manager(manager.Manager):
                           'determining token expiry: %s', token)
             raise exception.TokenNotFound(_('Failed to validate token'))
 
-        if current_time < expiry:
-            self.check_revocation(token)
-            # Token has not expired and has not been revoked.
-            return None
-        else:
+        if current_time >= expiry:
             raise exception.TokenNotFound(_('Failed to validate token'))
 
     def _validate_token_access_rules(self, token, access_rules_support=None):
@@ -271,7 +428,7 @@ class Manager(manager.Manager):
         token.mint(token_id, issued_at)
 
         # cache the token object and with ID
-        if CONF.token.cache_on_issue or CONF.token.caching:
+        if self._should_cache_tokens():
             # NOTE(amakarov): here and above TOKENS_REGION is to be passed
             # to serve as required positional "self" argument. It's ignored,
             # so I've put it here for convenience - any placeholder is fine.
@@ -16,6 +16,7 @@ import os
 import jwt
 from oslo_utils import timeutils
 
+from keystone.common import jwt_utils
 from keystone.common import utils
 import keystone.conf
 from keystone import exception
@@ -85,22 +86,12 @@ class JWSFormatter(object):
     algorithm = 'ES256'
 
     @property
-    def private_key(self):
-        private_key_path = os.path.join(
-            CONF.jwt_tokens.jws_private_key_repository, 'private.pem'
+    def key_ring(self):
+        return jwt_utils.get_key_ring(
+            CONF.jwt_tokens.jws_private_key_repository,
+            CONF.jwt_tokens.jws_public_key_repository,
+            check_interval=CONF.jwt_tokens.key_repository_check_interval
         )
-        with open(private_key_path, 'r') as f:
-            key = f.read()
-        return key
-
-    @property
-    def public_keys(self):
-        keys = []
-        key_repo = CONF.jwt_tokens.jws_public_key_repository
-        for keyfile in os.listdir(key_repo):
-            with open(os.path.join(key_repo, keyfile), 'r') as f:
-                keys.append(f.read())
-        return keys
 
     def create_token(self, user_id, expires_at, audit_ids, methods,
                      system=None, domain_id=None, project_id=None,
@@ -139,10 +130,16 @@ class JWSFormatter(object):
             if v is None:
                 payload.pop(k)
 
+        private_key, key_id = self.key_ring.get_private_key()
+        if private_key is None:
+            raise exception.UnexpectedError(
+                _('Unable to load the private key used to sign JWS tokens.'))
+
         token_id = jwt.encode(
             payload,
-            self.private_key,
-            algorithm=JWSFormatter.algorithm
+            private_key,
+            algorithm=JWSFormatter.algorithm,
+            headers={'kid': key_id}
         )
         return token_id, issued_at
 
@@ -175,7 +172,24 @@ class JWSFormatter(object):
         )
 
     def _decode_token_from_id(self, token_id):
-        for public_key in self.public_keys:
+        public_keys = self.key_ring.get_public_keys()
+        try:
+            key_id = jwt.get_unverified_header(token_id).get('kid')
+            if key_id is not None:
+                # NOTE: Key IDs are derived from the public keys themselves,
+                # so a token whose key ID isn't in the repository can't be
+                # validated by any of the keys in it. Tokens issued without a
+                # key ID fall back to trying every public key.
+                public_key = public_keys.get(key_id)
+                public_keys = [public_key] if public_key is not None else []
+            else:
+                public_keys = list(public_keys.values())
+        except (jwt.InvalidTokenError, TypeError, KeyError):
+            # NOTE: The header isn't verified yet, so it may hold anything,
+            # such as a key ID that isn't a string.
+            raise exception.TokenNotFound(token_id=token_id)
+
+        for public_key in public_keys:
             try:
                 return jwt.decode(
                     token_id, public_key, algorithms=JWSFormatter.algorithm
@@ -12,7 +12,6 @@
 
 import base64
 import datetime
-import struct
 import uuid
 
 from cryptography import fernet
@@ -33,8 +32,15 @@ LOG = log.getLogger(__name__)
 
 # Fernet byte indexes as computed by pypi/keyless_fernet and defined in
 # https://github.com/fernet/spec
-TIMESTAMP_START = 1
-TIMESTAMP_END = 9
+TIMESTAMP_START = utils.TIMESTAMP_START
+TIMESTAMP_END = utils.TIMESTAMP_END
+
+# Tokens created longer ago than this, plus [token] allow_expired_window, are
+# rejected before being decrypted. It is a fixed bound rather than the current
+# [token] expiration, which may have been lowered since a token was issued;
+# the expiry embedded in the token is what actually decides whether it is
+# still valid.
+MAX_TOKEN_LIFETIME = 30 * 24 * 60 * 60
 
 
 class TokenFormatter(object):
@@ -53,18 +59,15 @@ class TokenFormatter(object):
         ``encrypt(plaintext)`` and ``decrypt(ciphertext)``.
 
         """
-        fernet_utils = utils.FernetUtils(
+        key_ring = utils.get_key_ring(
             CONF.fernet_tokens.key_repository,
             CONF.fernet_tokens.max_active_keys,
-            'fernet_tokens'
+            'fernet_tokens',
+            check_interval=CONF.fernet_tokens.key_repository_check_interval
         )
-        keys = fernet_utils.load_keys()
-
-        if not keys:
-            raise exception.KeysNotFound()
-
-        fernet_instances = [fernet.Fernet(key) for key in keys]
-        return fernet.MultiFernet(fernet_instances)
+        if CONF.fernet_tokens.decrypt_with_key_hints:
+            return key_ring.hinted_crypto
+        return key_ring.crypto
 
     def pack(self, payload):
         """Pack a payload for transport as a token.
@@ -91,6 +94,21 @@ class TokenFormatter(object):
             raise exception.ValidationError(
                 _('Could not recognize Fernet token'))
 
+    @classmethod
+    def parse(cls, token):
+        """Read the header of a Fernet token, without decrypting it.
+
+        :type token: str
+        :rtype: keystone.common.fernet_utils.ParsedToken
+        :raises keystone.exception.ValidationError: if the token is malformed
+
+        """
+        try:
+            return utils.parse_token(token)
+        except ValueError:
+            raise exception.ValidationError(
+                _('Could not recognize Fernet token'))
+
     @classmethod
     def restore_padding(cls, token):
         """Restore padding based on token size.
@@ -114,19 +132,12 @@ class TokenFormatter(object):
         :type fernet_token: str
 
         """
-        fernet_token = TokenFormatter.restore_padding(fernet_token)
-        # fernet_token is str
-
-        # Fernet tokens are base64 encoded, so we need to unpack them first
-        # urlsafe_b64decode() requires bytes
-        token_bytes = base64.urlsafe_b64decode(fernet_token.encode('utf-8'))
-
-        # slice into the byte array to get just the timestamp
-        timestamp_bytes = token_bytes[TIMESTAMP_START:TIMESTAMP_END]
-
-        # convert those bytes to an integer
-        # (it's a 64-bit "unsigned long long int" in C)
-        timestamp_int = struct.unpack(">Q", timestamp_bytes)[0]
+        # Fernet tokens are base64 encoded, but only the header holding the
+        # timestamp needs to be decoded
+        timestamp_int = utils.get_token_timestamp(fernet_token)
+        if timestamp_int is None:
+            raise exception.ValidationError(
+                _('Could not recognize Fernet token'))
 
         # and with an integer, it's trivial to produce a datetime object
         issued_at = datetime.datetime.utcfromtimestamp(timestamp_int)
@@ -169,22 +180,31 @@ class TokenFormatter(object):
         :type token: str
 
         """
+        # NOTE: The token header is read up front so that malformed tokens,
+        # and tokens too old to possibly still be valid, are rejected before
+        # any keys are tried. The creation time isn't authenticated until the
+        # token is decrypted, which can only ever cause a token to be rejected
+        # early.
+        parsed_token = TokenFormatter.parse(token)
+        max_age = (max(CONF.token.expiration, MAX_TOKEN_LIFETIME) +
+                   CONF.token.allow_expired_window)
+        if parsed_token.timestamp + max_age < timeutils.utcnow_ts():
+            raise exception.ValidationError(_('Fernet token has expired'))
+
         serialized_payload = self.unpack(token)
         versioned_payload = msgpack.unpackb(serialized_payload)
         version, payload = versioned_payload[0], versioned_payload[1:]
 
-        for payload_class in _PAYLOAD_CLASSES:
-            if version == payload_class.version:
-                (user_id, methods, system, project_id, domain_id,
-                 expires_at, audit_ids, trust_id, federated_group_ids,
-                 identity_provider_id, protocol_id, access_token_id,
-                 app_cred_id) = payload_class.disassemble(payload)
-                break
-        else:
+        payload_class = _PAYLOAD_CLASSES_BY_VERSION.get(version)
+        if payload_class is None:
             # If the token_format is not recognized, raise ValidationError.
             raise exception.ValidationError(_(
                 'This is not a recognized Fernet payload version: %s') %
                 version)
+        (user_id, methods, system, project_id, domain_id,
+         expires_at, audit_ids, trust_id, federated_group_ids,
+         identity_provider_id, protocol_id, access_token_id,
+         app_cred_id) = payload_class._disassemble(payload)
 
         # FIXME(lbragstad): Without this, certain token validation tests fail
         # when running with python 3. Once we get further along in this
@@ -195,10 +215,9 @@ class TokenFormatter(object):
 
         # rather than appearing in the payload, the creation time is encoded
         # into the token format itself
-        issued_at = TokenFormatter.creation_time(token)
+        issued_at = datetime.datetime.utcfromtimestamp(parsed_token.timestamp)
         issued_at = ks_utils.isotime(at=issued_at, subsecond=True)
-        expires_at = timeutils.parse_isotime(expires_at)
-        expires_at = ks_utils.isotime(at=expires_at, subsecond=True)
+        expires_at = BasePayload._convert_float_to_time_string(expires_at)
 
         return (user_id, methods, audit_ids, system, domain_id, project_id,
                 trust_id, federated_group_ids, identity_provider_id,
@@ -252,6 +271,22 @@ class BasePayload(object):
         :param payload: this variant of payload
         :returns: a tuple of the payloads component data
 
+        """
+        disassembled = cls._disassemble(payload)
+        expires_at_str = cls._convert_float_to_time_string(disassembled[5])
+        return disassembled[:5] + (expires_at_str,) + disassembled[6:]
+
+    @classmethod
+    def _disassemble(cls, payload):
+        """Disassemble a payload, leaving the expiration as a timestamp.
+
+        This returns the same tuple as :meth:`disassemble`, except that the
+        expiration is the floating point timestamp stored in the payload, so
+        that it only has to be formatted once it is actually needed.
+
+        :param payload: this variant of payload
+        :returns: a tuple of the payloads component data
+
         """
         raise NotImplementedError()
 
@@ -274,6 +309,11 @@ class BasePayload(object):
         :returns: uuid hex formatted string
 
         """
+        # NOTE: For the 16 byte strings that make up nearly every ID in a
+        # token, the hex representation of the bytes is the UUID's hex
+        # format, without the cost of building a uuid.UUID.
+        if isinstance(uuid_byte_string, bytes) and len(uuid_byte_string) == 16:
+            return uuid_byte_string.hex()
         uuid_obj = uuid.UUID(bytes=uuid_byte_string)
         return uuid_obj.hex
 
@@ -377,11 +417,11 @@ class UnscopedPayload(BasePayload):
         return (b_user_id, methods, expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
-        expires_at_str = cls._convert_float_to_time_string(payload[2])
+        expires_at = payload[2]
         audit_ids = list(map(cls.base64_encode, payload[3]))
         system = None
         project_id = None
@@ -393,7 +433,7 @@ class UnscopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -422,7 +462,7 @@ class DomainScopedPayload(BasePayload):
         return (b_user_id, methods, b_domain_id, expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
@@ -436,7 +476,7 @@ class DomainScopedPayload(BasePayload):
                 domain_id = payload[2]
             else:
                 raise
-        expires_at_str = cls._convert_float_to_time_string(payload[3])
+        expires_at = payload[3]
         audit_ids = list(map(cls.base64_encode, payload[4]))
         system = None
         project_id = None
@@ -447,7 +487,7 @@ class DomainScopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -469,13 +509,13 @@ class ProjectScopedPayload(BasePayload):
         return (b_user_id, methods, b_project_id, expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
         (is_stored_as_bytes, project_id) = payload[2]
         project_id = cls._convert_or_decode(is_stored_as_bytes, project_id)
-        expires_at_str = cls._convert_float_to_time_string(payload[3])
+        expires_at = payload[3]
         audit_ids = list(map(cls.base64_encode, payload[4]))
         system = None
         domain_id = None
@@ -486,7 +526,7 @@ class ProjectScopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -511,13 +551,13 @@ class TrustScopedPayload(BasePayload):
                 b_trust_id)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
         (is_stored_as_bytes, project_id) = payload[2]
         project_id = cls._convert_or_decode(is_stored_as_bytes, project_id)
-        expires_at_str = cls._convert_float_to_time_string(payload[3])
+        expires_at = payload[3]
         audit_ids = list(map(cls.base64_encode, payload[4]))
         trust_id = cls.convert_uuid_bytes_to_hex(payload[5])
         system = None
@@ -528,7 +568,7 @@ class TrustScopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -563,7 +603,7 @@ class FederatedUnscopedPayload(BasePayload):
                 expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
@@ -573,7 +613,7 @@ class FederatedUnscopedPayload(BasePayload):
         protocol_id = payload[4]
         if isinstance(protocol_id, bytes):
             protocol_id = protocol_id.decode('utf-8')
-        expires_at_str = cls._convert_float_to_time_string(payload[5])
+        expires_at = payload[5]
         audit_ids = list(map(cls.base64_encode, payload[6]))
         system = None
         project_id = None
@@ -582,7 +622,7 @@ class FederatedUnscopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, group_ids, idp_id,
+                expires_at, audit_ids, trust_id, group_ids, idp_id,
                 protocol_id, access_token_id, app_cred_id)
 
 
@@ -608,7 +648,7 @@ class FederatedScopedPayload(FederatedUnscopedPayload):
                 protocol_id, expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
@@ -626,14 +666,14 @@ class FederatedScopedPayload(FederatedUnscopedPayload):
         protocol_id = payload[5]
         if isinstance(protocol_id, bytes):
             protocol_id = protocol_id.decode('utf-8')
-        expires_at_str = cls._convert_float_to_time_string(payload[6])
+        expires_at = payload[6]
         audit_ids = list(map(cls.base64_encode, payload[7]))
         system = None
         trust_id = None
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, group_ids, idp_id,
+                expires_at, audit_ids, trust_id, group_ids, idp_id,
                 protocol_id, access_token_id, app_cred_id)
 
 
@@ -665,7 +705,7 @@ class OauthScopedPayload(BasePayload):
                 expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
@@ -674,7 +714,7 @@ class OauthScopedPayload(BasePayload):
         (is_stored_as_bytes, access_token_id) = payload[3]
         access_token_id = cls._convert_or_decode(is_stored_as_bytes,
                                                  access_token_id)
-        expires_at_str = cls._convert_float_to_time_string(payload[4])
+        expires_at = payload[4]
         audit_ids = list(map(cls.base64_encode, payload[5]))
         system = None
         domain_id = None
@@ -685,7 +725,7 @@ class OauthScopedPayload(BasePayload):
         app_cred_id = None
 
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -706,12 +746,12 @@ class SystemScopedPayload(BasePayload):
         return (b_user_id, methods, system, expires_at_int, b_audit_ids)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
         system = payload[2]
-        expires_at_str = cls._convert_float_to_time_string(payload[3])
+        expires_at = payload[3]
         audit_ids = list(map(cls.base64_encode, payload[4]))
         project_id = None
         domain_id = None
@@ -722,7 +762,7 @@ class SystemScopedPayload(BasePayload):
         access_token_id = None
         app_cred_id = None
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -746,13 +786,13 @@ class ApplicationCredentialScopedPayload(BasePayload):
                 b_app_cred_id)
 
     @classmethod
-    def disassemble(cls, payload):
+    def _disassemble(cls, payload):
         (is_stored_as_bytes, user_id) = payload[0]
         user_id = cls._convert_or_decode(is_stored_as_bytes, user_id)
         methods = auth_plugins.convert_integer_to_method_list(payload[1])
         (is_stored_as_bytes, project_id) = payload[2]
         project_id = cls._convert_or_decode(is_stored_as_bytes, project_id)
-        expires_at_str = cls._convert_float_to_time_string(payload[3])
+        expires_at = payload[3]
         audit_ids = list(map(cls.base64_encode, payload[4]))
         system = None
         domain_id = None
@@ -764,7 +804,7 @@ class ApplicationCredentialScopedPayload(BasePayload):
         (is_stored_as_bytes, app_cred_id) = payload[5]
         app_cred_id = cls._convert_or_decode(is_stored_as_bytes, app_cred_id)
         return (user_id, methods, system, project_id, domain_id,
-                expires_at_str, audit_ids, trust_id, federated_group_ids,
+                expires_at, audit_ids, trust_id, federated_group_ids,
                 identity_provider_id, protocol_id, access_token_id,
                 app_cred_id)
 
@@ -781,3 +821,8 @@ _PAYLOAD_CLASSES = [
     SystemScopedPayload,
     ApplicationCredentialScopedPayload,
 ]
+
+_PAYLOAD_CLASSES_BY_VERSION = {
+    payload_class.version: payload_class
+    for payload_class in _PAYLOAD_CLASSES
+}
@@ -77,6 +77,15 @@ class TrustDriverBase(object, metaclass=abc.ABCMeta):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def delete_trusts_for_projects(self, project_ids):
+        """Delete all trusts for a list of projects.
+
+        :param project_ids: IDs of the projects to filter trusts by.
+
+        """
+        for project_id in project_ids:
+            self.delete_trusts_for_project(project_id)
+
     @abc.abstractmethod
     def flush_expired_and_soft_deleted_trusts(self, project_id=None,
                                               trustor_user_id=None,
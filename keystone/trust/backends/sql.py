@@ -193,6 +193,15 @@ class Trust(base.TrustDriverBase):
             for trust_ref in trusts:
                 trust_ref.deleted_at = timeutils.utcnow()
 
+    def delete_trusts_for_projects(self, project_ids):
+        if not project_ids:
+            return
+        with sql.session_for_write() as session:
+            query = session.query(TrustModel)
+            query = query.filter(TrustModel.project_id.in_(project_ids))
+            query.update({'deleted_at': timeutils.utcnow()},
+                         synchronize_session=False)
+
     def flush_expired_and_soft_deleted_trusts(self, project_id=None,
                                               trustor_user_id=None,
                                               trustee_user_id=None,